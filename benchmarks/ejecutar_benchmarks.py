@@ -0,0 +1,317 @@
+"""
+Benchmarks del pipeline hospitalario sobre datos sintéticos.
+
+Escenarios medidos (con varias repeticiones por escala):
+
+- ``procesar_todo``: carga, limpieza, agregaciones y modelos de ``ProcesadorDatosHospital`` (caché frío)
+- ``anonimizacion``: ``AnonimizadorDatosV2`` sobre resumen y detalle completos
+- ``modelos_entrenamiento``: ``entrenar_modelos_completos``
+- ``modelos_prediccion``: predicción de demanda a 30 días y de costo por paciente
+- ``reportes_excel``: ``GeneradorReportesExcel`` a partir de ``metricas_completas.json``
+
+Cada ejecución agrega un registro por escenario y escala a ``benchmarks/resultados/historial.jsonl``
+con las duraciones, el pico de RSS, la duración por etapa (trazas) y el entorno, para comparar
+corridas a lo largo del tiempo.
+
+Uso:
+    python benchmarks/ejecutar_benchmarks.py --escalas 10k 1m --repeticiones 3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+DIRECTORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(DIRECTORIO_BENCHMARKS, '..', 'datos'))
+sys.path.append(os.path.join(DIRECTORIO_BENCHMARKS, '..', 'modelos'))
+sys.path.append(os.path.join(DIRECTORIO_BENCHMARKS, '..', 'scripts'))
+
+import numpy as np
+import pandas as pd
+
+from generador_datos_sinteticos import ESCALAS, preparar_datos
+from monitor_memoria import MonitorMemoria
+from trazas import Trazador
+from procesar_datos_avanzado import ProcesadorDatosHospital
+from anonimizar_datos_v2 import AnonimizadorDatosV2
+from generar_reportes_excel import GeneradorReportesExcel
+from modelos_predictivos import entrenar_modelos_completos
+
+RUTA_DATOS_SINTETICOS = os.path.join(DIRECTORIO_BENCHMARKS, 'datos_sinteticos')
+RUTA_HISTORIAL = os.path.join(DIRECTORIO_BENCHMARKS, 'resultados', 'historial.jsonl')
+
+# Pacientes individuales por repetición en el escenario de predicción
+PREDICCIONES_POR_REPETICION = 200
+
+# Si la repetición más lenta tarda más que esto veces la más rápida, las repeticiones no miden
+# lo mismo (p. ej. una reutiliza un caché o puntos de control de la anterior)
+DISPERSION_MAXIMA_REPETICIONES = 10
+
+ESCENARIOS = ['procesar_todo', 'anonimizacion', 'modelos_entrenamiento', 'modelos_prediccion', 'reportes_excel']
+
+
+@contextlib.contextmanager
+def _silencio(activo):
+    """Oculta los print del pipeline durante las mediciones"""
+    if not activo:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _entorno():
+    """Versiones y equipo en que se corrió el benchmark"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRECTORIO_BENCHMARKS,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def rango_intercuartil(valores):
+    """IQR (p75 - p25) de una lista de mediciones; 0 con menos de dos valores"""
+    if len(valores) < 2:
+        return 0.0
+    p25, p75 = np.percentile(valores, [25, 75])
+    return float(p75 - p25)
+
+
+def repeticiones_consistentes(duraciones, dispersion_maxima=DISPERSION_MAXIMA_REPETICIONES):
+    """True si todas las repeticiones están dentro del mismo orden de magnitud"""
+    if len(duraciones) < 2 or min(duraciones) <= 0:
+        return True
+    return max(duraciones) / min(duraciones) <= dispersion_maxima
+
+
+class Escenario:
+    """
+    Un caso medible: ``preparar`` corre una vez sin medir y ``ejecutar`` se mide en cada repetición.
+    """
+
+    def __init__(self, nombre, preparar, ejecutar, registros=None):
+        self.nombre = nombre
+        self.preparar = preparar
+        self.ejecutar = ejecutar
+        self.registros = registros
+
+
+class EjecutorBenchmarks:
+    """
+    Genera (o reutiliza) los datos sintéticos de cada escala, mide los escenarios
+    y guarda los resultados en el historial.
+    """
+
+    def __init__(self, repeticiones=3, silencioso=True, ruta_datos=RUTA_DATOS_SINTETICOS, ruta_historial=RUTA_HISTORIAL,
+                 guardar_historial=True):
+        self.repeticiones = repeticiones
+        self.silencioso = silencioso
+        self.ruta_datos = ruta_datos
+        self.ruta_historial = ruta_historial
+        self.guardar_historial = guardar_historial
+        self.entorno = _entorno()
+
+    # ----- Preparación compartida por escala -----
+
+    def _procesador(self, ruta_base, trazador=None, cache_fria=True):
+        if cache_fria:
+            shutil.rmtree(os.path.join(ruta_base, 'datos', 'cache_columnar'), ignore_errors=True)
+        # Sin puntos de control: cada repetición debe medir el procesamiento completo
+        return ProcesadorDatosHospital(ruta_base=ruta_base, trazador=trazador or Trazador(), reanudar=False)
+
+    def _datos_limpios(self, ruta_base):
+        procesador = self._procesador(ruta_base)
+        procesador.cargar_datos()
+        procesador.limpiar_datos()
+        return procesador
+
+    def escenarios(self, ruta_base, manifiesto):
+        """Construye los escenarios de una escala sobre ``ruta_base``"""
+        estado = {}
+
+        def preparar_anonimizacion():
+            estado['resumen'] = pd.read_csv(manifiesto['ruta_resumen'])
+            estado['detalle'] = pd.read_csv(manifiesto['ruta_detalle'])
+
+        def ejecutar_anonimizacion(trazador):
+            anonimizador = AnonimizadorDatosV2(trazador=trazador)
+            anonimizador.anonimizar_resumen(estado['resumen'])
+            anonimizador.anonimizar_detalle(estado['detalle'])
+
+        def preparar_modelos():
+            procesador = self._datos_limpios(ruta_base)
+            estado['procesador'] = procesador
+            estado['servicios'] = procesador.analizar_por_servicio()
+
+        def ejecutar_entrenamiento(trazador):
+            procesador = estado['procesador']
+            resultados = entrenar_modelos_completos(
+                procesador.df_resumen, procesador.df_detalle, estado['servicios'], trazador=trazador
+            )
+            if resultados:
+                estado['modelos'] = resultados['modelos']
+
+        def preparar_prediccion():
+            if 'modelos' not in estado:
+                preparar_modelos()
+                ejecutar_entrenamiento(Trazador())
+
+        def ejecutar_prediccion(trazador):
+            modelos = estado.get('modelos')
+            if modelos is None:
+                return
+            with trazador.span('predecir_demanda'):
+                if modelos.modelo_demanda is not None:
+                    modelos.predecir_demanda(30)
+            n = PREDICCIONES_POR_REPETICION
+            with trazador.span('predecir_costo_paciente', filas_entrada=n):
+                if modelos.modelo_costos is not None:
+                    rng = np.random.default_rng(0)
+                    for edad, sexo, dias in zip(rng.integers(0, 100, n), rng.integers(0, 2, n), rng.integers(1, 30, n)):
+                        modelos.predecir_costo_paciente(int(edad), 'MASCULINO' if sexo else 'FEMENINO', int(dias))
+
+        def preparar_reportes():
+            procesador = self._procesador(ruta_base)
+            if procesador.procesar_todo():
+                procesador.guardar_resultados()
+
+        def ejecutar_reportes(trazador):
+            GeneradorReportesExcel(ruta_base=ruta_base, trazador=trazador).guardar_reportes_excel()
+
+        def ejecutar_procesamiento(trazador):
+            self._procesador(ruta_base, trazador).procesar_todo()
+
+        registros = manifiesto['registros_resumen'] + manifiesto['registros_detalle']
+        return [
+            Escenario('procesar_todo', lambda: None, ejecutar_procesamiento, registros),
+            Escenario('anonimizacion', preparar_anonimizacion, ejecutar_anonimizacion, registros),
+            Escenario('modelos_entrenamiento', preparar_modelos, ejecutar_entrenamiento, registros),
+            Escenario('modelos_prediccion', preparar_prediccion, ejecutar_prediccion, PREDICCIONES_POR_REPETICION),
+            Escenario('reportes_excel', preparar_reportes, ejecutar_reportes)
+        ]
+
+    # ----- Medición -----
+
+    def medir(self, escenario, escala, manifiesto):
+        """Ejecuta un escenario ``repeticiones`` veces y retorna su registro de resultados"""
+        print(f"▶ {escenario.nombre} [{escala}]")
+        with _silencio(self.silencioso):
+            escenario.preparar()
+
+        duraciones = []
+        etapas = {}
+        monitor = MonitorMemoria()
+        for repeticion in range(self.repeticiones):
+            trazador = Trazador()
+            with _silencio(self.silencioso), monitor.etapa(f'{escenario.nombre}_{repeticion}'):
+                inicio = time.perf_counter()
+                escenario.ejecutar(trazador)
+                duraciones.append(time.perf_counter() - inicio)
+            for ruta, duracion in trazador.duraciones_por_ruta().items():
+                etapas.setdefault(ruta, []).append(duracion)
+
+        mediana = statistics.median(duraciones)
+        print(f"  mediana {mediana:.3f}s · mínimo {min(duraciones):.3f}s · "
+              f"RSS pico {max(e['rss_pico_mb'] for e in monitor.etapas):.0f}MB")
+        consistentes = repeticiones_consistentes(duraciones)
+        if not consistentes:
+            print(f"  ⚠ Repeticiones con distinto orden de magnitud: {', '.join(f'{d:.3f}s' for d in duraciones)}")
+        return {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'escenario': escenario.nombre,
+            'escala': escala,
+            'registros_resumen': manifiesto['registros_resumen'],
+            'registros_detalle': manifiesto['registros_detalle'],
+            'registros_por_segundo': round(escenario.registros / mediana, 1) if escenario.registros and mediana > 0 else None,
+            'repeticiones': self.repeticiones,
+            'duraciones_s': [round(d, 4) for d in duraciones],
+            'mediana_s': round(mediana, 4),
+            'iqr_s': round(rango_intercuartil(duraciones), 4),
+            'minimo_s': round(min(duraciones), 4),
+            'repeticiones_consistentes': consistentes,
+            'rss_pico_mb': max(e['rss_pico_mb'] for e in monitor.etapas),
+            'incremento_pico_mb': max(e['incremento_pico_mb'] for e in monitor.etapas),
+            'etapas_mediana_s': {ruta: round(statistics.median(valores), 4) for ruta, valores in sorted(etapas.items())},
+            'etapas_iqr_s': {ruta: round(rango_intercuartil(valores), 4) for ruta, valores in sorted(etapas.items())},
+            'entorno': self.entorno
+        }
+
+    def guardar(self, resultado):
+        os.makedirs(os.path.dirname(self.ruta_historial), exist_ok=True)
+        with open(self.ruta_historial, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+    def ejecutar(self, escalas, escenarios=None):
+        """Corre los escenarios seleccionados en cada escala y retorna los resultados"""
+        resultados = []
+        for escala in escalas:
+            registros = ESCALAS.get(escala.lower()) or int(escala)
+            ruta_base = os.path.join(self.ruta_datos, escala.lower())
+            manifiesto = preparar_datos(ruta_base, registros)
+            for escenario in self.escenarios(ruta_base, manifiesto):
+                if escenarios and escenario.nombre not in escenarios:
+                    continue
+                resultado = self.medir(escenario, escala.lower(), manifiesto)
+                if self.guardar_historial:
+                    self.guardar(resultado)
+                resultados.append(resultado)
+        return resultados
+
+
+def comparar_con_anterior(resultados, ruta_historial=RUTA_HISTORIAL):
+    """Imprime la variación de cada resultado contra la corrida previa del mismo escenario y escala"""
+    if not os.path.exists(ruta_historial):
+        return
+    with open(ruta_historial, 'r', encoding='utf-8') as f:
+        historial = [json.loads(linea) for linea in f if linea.strip()]
+
+    print("\n=== COMPARACIÓN CONTRA LA CORRIDA ANTERIOR ===")
+    for resultado in resultados:
+        previos = [r for r in historial
+                   if r['escenario'] == resultado['escenario'] and r['escala'] == resultado['escala']
+                   and r['timestamp'] < resultado['timestamp']]
+        if not previos:
+            print(f"  {resultado['escenario']:<22} {resultado['escala']:>4}: sin corrida anterior")
+            continue
+        anterior = previos[-1]
+        cambio = (resultado['mediana_s'] / anterior['mediana_s'] - 1) * 100 if anterior['mediana_s'] else 0
+        print(f"  {resultado['escenario']:<22} {resultado['escala']:>4}: {anterior['mediana_s']:.3f}s → "
+              f"{resultado['mediana_s']:.3f}s ({cambio:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del pipeline hospitalario con datos sintéticos')
+    parser.add_argument('--escalas', nargs='+', default=['10k'], help=f"Escalas a medir ({', '.join(ESCALAS)} o número de registros)")
+    parser.add_argument('--escenarios', nargs='+', choices=ESCENARIOS, help='Subconjunto de escenarios (por defecto todos)')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--verboso', action='store_true', help='Muestra la salida del pipeline durante las mediciones')
+    args = parser.parse_args()
+
+    print("=== BENCHMARKS DEL PIPELINE HOSPITALARIO ===")
+    ejecutor = EjecutorBenchmarks(repeticiones=args.repeticiones, silencioso=not args.verboso)
+    resultados = ejecutor.ejecutar(args.escalas, args.escenarios)
+    comparar_con_anterior(resultados, ejecutor.ruta_historial)
+    print(f"\n✓ Resultados agregados a {ejecutor.ruta_historial}")
+
+
+if __name__ == '__main__':
+    main()
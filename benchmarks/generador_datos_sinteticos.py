@@ -0,0 +1,367 @@
+"""
+Generador de datos sintéticos de egresos hospitalarios para benchmarks.
+
+Produce archivos con las mismas columnas que la salida del query
+(``datos/Egresos_Detalle_Completo.sql``) y los mismos nombres que espera
+``ProcesadorDatosHospital``:
+
+- ``<ruta_base>/datos/ejemplos/Resumen Egreso 2025.csv`` (un registro por egreso)
+- ``<ruta_base>/datos/ejemplos/Egreso Detalle Ene 2025 a Abr 2025.csv`` (estudios y servicios por paciente)
+
+Los datos no contienen información real: cardinalidades de diagnósticos, servicios,
+claves y alcaldías similares a las del hospital, frecuencias sesgadas (Zipf) y costos
+con distribución log-normal. La generación es determinista (semilla) y se escribe por
+bloques para poder producir decenas de millones de registros con memoria acotada.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Escalas predefinidas: número de registros del archivo detalle.
+# El resumen tiene un egreso por cada ~8 registros de detalle.
+ESCALAS = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000
+}
+REGISTROS_DETALLE_POR_EGRESO = 8
+
+NOMBRE_RESUMEN = 'Resumen Egreso 2025.csv'
+NOMBRE_DETALLE = 'Egreso Detalle Ene 2025 a Abr 2025.csv'
+NOMBRE_MANIFIESTO = 'datos_sinteticos.json'
+VERSION_GENERADOR = 1
+
+COLUMNAS_RESUMEN = [
+    'id_registro_urg', 'fecha_recepcion_urg', 'fecha_egreso_urg', 'motivo_alta_urg', 'expediente_urg',
+    'nse_urg', 'no_de_cam_urg', 'hospitalizado_urg',
+    'id_registro_admision', 'fecha_recepcion_hosp', 'fecha_egreso_hosp', 'motivo_alta_hosp',
+    'n_expediente_hosp', 'ian_expediente_hosp', 'nse_hosp', 'no_de_cama_hosp', 'estancia_hosp',
+    'FYF7Y9IB2I2II_L5JF77Y5J5F1B',
+    'nombre_paciente', 'nombre_paciente_hosp', 'edad', 'sexo', 'estado', 'ciudad', 'alcaldia_municipio',
+    'cp', 'direcccion', 'calle', 'derechohabiencia', 'diagnostico_urg', 'diagnostico_hosp',
+    'fecha_egreso_general', 'dias_hopit', 'gasto_nivel_6', 'gasto_nivel_1', 'id_paciente'
+]
+
+COLUMNAS_DETALLE = [
+    'paciente', 'fecha', 'cantidad', 'clave', 'descripcion', 'area_servicio', 'nivel',
+    'costo_nivel_6', 'monto_nivel_1', 'monto_nivel_6', 'gasto_nivel_6', 'edad', 'sexo'
+]
+
+ALCALDIAS_CDMX = [
+    'ÁLVARO OBREGÓN', 'AZCAPOTZALCO', 'BENITO JUÁREZ', 'COYOACÁN', 'CUAJIMALPA DE MORELOS',
+    'CUAUHTÉMOC', 'GUSTAVO A. MADERO', 'IZTACALCO', 'IZTAPALAPA', 'LA MAGDALENA CONTRERAS',
+    'MIGUEL HIDALGO', 'MILPA ALTA', 'TLÁHUAC', 'TLALPAN', 'VENUSTIANO CARRANZA', 'XOCHIMILCO'
+]
+
+MUNICIPIOS_EDOMEX = [
+    'ECATEPEC DE MORELOS', 'NEZAHUALCÓYOTL', 'NAUCALPAN DE JUÁREZ', 'TLALNEPANTLA DE BAZ',
+    'CHIMALHUACÁN', 'TOLUCA', 'IXTAPALUCA', 'CHALCO', 'LA PAZ', 'VALLE DE CHALCO SOLIDARIDAD',
+    'TEXCOCO', 'HUIXQUILUCAN', 'CUAUTITLÁN IZCALLI', 'TECÁMAC', 'NICOLÁS ROMERO', 'ATIZAPÁN DE ZARAGOZA'
+]
+
+OTROS_ESTADOS = [
+    'HIDALGO', 'MORELOS', 'PUEBLA', 'TLAXCALA', 'QUERÉTARO', 'GUERRERO', 'MICHOACÁN', 'OAXACA',
+    'VERACRUZ', 'GUANAJUATO', 'JALISCO', 'CHIAPAS', 'SAN LUIS POTOSÍ', 'NUEVO LEÓN', 'YUCATÁN'
+]
+
+SERVICIOS = [
+    'URGENCIAS', 'MEDICINA INTERNA', 'CIRUGÍA GENERAL', 'PEDIATRÍA', 'GINECOLOGÍA Y OBSTETRICIA',
+    'TRAUMATOLOGÍA Y ORTOPEDIA', 'CARDIOLOGÍA', 'NEUMOLOGÍA', 'NEUROLOGÍA', 'NEUROCIRUGÍA',
+    'UROLOGÍA', 'ORL', 'OFTALMOLOGÍA', 'NEFROLOGÍA', 'GASTROENTEROLOGÍA', 'ONCOLOGÍA',
+    'HEMATOLOGÍA', 'INFECTOLOGÍA', 'TERAPIA INTENSIVA', 'TERAPIA INTERMEDIA', 'CIRUGÍA PLÁSTICA',
+    'ANGIOLOGÍA', 'ENDOCRINOLOGÍA', 'GERIATRÍA', 'PSIQUIATRÍA', 'DERMATOLOGÍA', 'REUMATOLOGÍA',
+    'CIRUGÍA PEDIÁTRICA', 'NEONATOLOGÍA', 'UCIN', 'CIRUGÍA CARDIOTORÁCICA', 'MAXILOFACIAL',
+    'COLOPROCTOLOGÍA', 'SERVICIO CLÍNICO 9', 'CORTA ESTANCIA'
+]
+
+AREAS_SERVICIO = [
+    'LAB', 'IMAGEN', 'FARMACIA', 'QUIRÓFANO', 'BANCO DE SANGRE', 'PATOLOGÍA', 'ENDOSCOPÍA',
+    'HEMODIÁLISIS', 'REHABILITACIÓN', 'INHALOTERAPIA', 'CARDIOLOGÍA', 'MEDICINA NUCLEAR',
+    'TOMOGRAFÍA', 'RESONANCIA', 'ULTRASONIDO', 'HOSPITALIZACIÓN', 'URGENCIAS', 'TERAPIA INTENSIVA',
+    'NUTRICIÓN', 'CENTRAL DE EQUIPOS'
+]
+
+TERMINOS_DIAGNOSTICO = [
+    'NEUMONIA', 'COVID', 'DIABETES MELLITUS', 'HIPERTENSION ARTERIAL', 'INSUFICIENCIA RENAL',
+    'APENDICITIS', 'COLECISTITIS', 'FRACTURA', 'INFARTO AGUDO', 'EVC', 'SEPSIS', 'TRAUMATISMO',
+    'PARTO', 'CESAREA', 'HERNIA', 'PANCREATITIS', 'CIRROSIS', 'EPOC', 'ASMA', 'ANEMIA',
+    'LEUCEMIA', 'LINFOMA', 'CANCER DE MAMA', 'INFECCION URINARIA', 'GASTROENTERITIS', 'QUEMADURA',
+    'INTOXICACION', 'CONVULSIONES', 'DENGUE', 'CELULITIS'
+]
+
+MOTIVOS_ALTA = ['MEJORÍA', 'CURACIÓN', 'DEFUNCIÓN', 'VOLUNTARIA', 'TRASLADO', 'MÁXIMO BENEFICIO']
+PROBABILIDAD_MOTIVOS = [0.72, 0.12, 0.05, 0.05, 0.04, 0.02]
+
+DERECHOHABIENCIAS = ['NINGUNA', 'IMSS', 'ISSSTE', 'IMSS-BIENESTAR', 'PEMEX', 'SEDENA', 'PRIVADO']
+PROBABILIDAD_DERECHOHABIENCIA = [0.55, 0.2, 0.1, 0.08, 0.03, 0.02, 0.02]
+
+NOMBRES = ['JUAN', 'MARIA', 'JOSE', 'GUADALUPE', 'LUIS', 'ANA', 'CARLOS', 'SOFIA', 'MIGUEL', 'ROSA']
+APELLIDOS = ['HERNANDEZ', 'GARCIA', 'MARTINEZ', 'LOPEZ', 'GONZALEZ', 'PEREZ', 'RODRIGUEZ', 'SANCHEZ',
+             'RAMIREZ', 'CRUZ', 'FLORES', 'GOMEZ']
+
+INICIO_PERIODO = np.datetime64('2025-01-01T00:00')
+DIAS_PERIODO = 120
+
+
+def _pesos_zipf(n, exponente=1.1):
+    """Probabilidades sesgadas: pocos valores concentran la mayoría de los registros"""
+    pesos = 1.0 / np.arange(1, n + 1) ** exponente
+    return pesos / pesos.sum()
+
+
+def _catalogo_diagnosticos(n=1500):
+    """Diagnósticos con código estilo CIE-10 (alta cardinalidad)"""
+    rng = np.random.default_rng(7)
+    letras = np.array(list('ABCDEFGIJKLMNORSTUZ'))
+    diagnosticos = list(TERMINOS_DIAGNOSTICO)
+    vistos = set(diagnosticos)
+    while len(diagnosticos) < n:
+        codigo = f"{rng.choice(letras)}{rng.integers(0, 100):02d}.{rng.integers(0, 10)}"
+        nombre = f"{codigo} {TERMINOS_DIAGNOSTICO[rng.integers(0, len(TERMINOS_DIAGNOSTICO))]}"
+        if nombre not in vistos:
+            vistos.add(nombre)
+            diagnosticos.append(nombre)
+    return np.array(diagnosticos, dtype=object)
+
+
+def _catalogo_estudios(n=4000):
+    """Catálogo de claves de estudios/servicios con su descripción, área y costo base"""
+    rng = np.random.default_rng(11)
+    claves = np.array([f"{AREAS_SERVICIO[i % len(AREAS_SERVICIO)][:3]}{i:05d}" for i in range(n)], dtype=object)
+    areas = np.array([AREAS_SERVICIO[i % len(AREAS_SERVICIO)] for i in range(n)], dtype=object)
+    descripciones = np.array([f"ESTUDIO {areas[i]} {i}" for i in range(n)], dtype=object)
+    # Costo base por clave: log-normal con cola larga (pocos estudios muy caros)
+    costo_base = np.round(rng.lognormal(mean=6.5, sigma=1.2, size=n), 2)
+    return claves, descripciones, areas, costo_base
+
+
+class GeneradorDatosSinteticos:
+    """
+    Genera los archivos resumen y detalle con el esquema de la salida SQL.
+
+    Args:
+        registros_detalle (int): registros del archivo detalle
+        semilla (int): semilla del generador aleatorio
+        tamano_bloque (int): registros por bloque escrito
+    """
+
+    def __init__(self, registros_detalle, semilla=2025, tamano_bloque=250_000):
+        self.registros_detalle = int(registros_detalle)
+        self.registros_resumen = max(1000, self.registros_detalle // REGISTROS_DETALLE_POR_EGRESO)
+        self.semilla = semilla
+        self.tamano_bloque = tamano_bloque
+
+        self.diagnosticos = _catalogo_diagnosticos()
+        self.pesos_diagnosticos = _pesos_zipf(len(self.diagnosticos))
+        self.servicios = np.array(SERVICIOS, dtype=object)
+        self.pesos_servicios = _pesos_zipf(len(self.servicios), 0.9)
+        self.claves, self.descripciones, self.areas, self.costo_base = _catalogo_estudios()
+        self.pesos_claves = _pesos_zipf(len(self.claves), 1.05)
+
+        # Alcaldía y estado vienen juntos: 70% CDMX, 25% Estado de México, 5% resto del país
+        self.ubicaciones = np.array(
+            [('CIUDAD DE MÉXICO', a) for a in ALCALDIAS_CDMX]
+            + [('ESTADO DE MÉXICO', m) for m in MUNICIPIOS_EDOMEX]
+            + [(e, 'FORÁNEO') for e in OTROS_ESTADOS],
+            dtype=object
+        )
+        self.pesos_ubicaciones = np.concatenate([
+            0.70 * _pesos_zipf(len(ALCALDIAS_CDMX), 0.6),
+            0.25 * _pesos_zipf(len(MUNICIPIOS_EDOMEX), 0.8),
+            0.05 * _pesos_zipf(len(OTROS_ESTADOS), 0.8)
+        ])
+
+    def _bloques(self, total):
+        for inicio in range(0, total, self.tamano_bloque):
+            yield inicio, min(self.tamano_bloque, total - inicio)
+
+    def _bloque_resumen(self, rng, inicio, n):
+        ids = np.arange(inicio, inicio + n)
+        expediente = rng.integers(1, max(2, self.registros_resumen // 2), size=n)
+
+        # ~35% de los egresos solo pasan por urgencias, ~15% ingresan directo a hospitalización
+        tipo = rng.choice(3, size=n, p=[0.35, 0.15, 0.50])
+        tiene_urg = tipo != 1
+        tiene_hosp = tipo != 0
+
+        recepcion_urg = INICIO_PERIODO + rng.integers(0, DIAS_PERIODO * 24 * 60, size=n).astype('timedelta64[m]')
+        horas_urg = rng.gamma(2.0, 6.0, size=n).astype(int) + 1
+        egreso_urg = recepcion_urg + (horas_urg * 60).astype('timedelta64[m]')
+        # Ingreso a hospitalización el mismo día o ±1 día del egreso de urgencias
+        recepcion_hosp = np.where(
+            tiene_urg, egreso_urg + rng.integers(-60, 24 * 60, size=n).astype('timedelta64[m]'), recepcion_urg
+        )
+        dias = np.minimum(rng.geometric(0.15, size=n), 120)
+        egreso_hosp = recepcion_hosp + (dias * 24 * 60).astype('timedelta64[m]')
+        egreso_general = np.where(tiene_hosp, egreso_hosp, egreso_urg)
+
+        def fechas(valores, mascara):
+            serie = pd.Series(pd.to_datetime(valores))
+            return serie.where(mascara)
+
+        servicio = rng.choice(self.servicios, size=n, p=self.pesos_servicios)
+        diagnostico_hosp = rng.choice(self.diagnosticos, size=n, p=self.pesos_diagnosticos)
+        diagnostico_urg = np.where(
+            rng.random(n) < 0.8, diagnostico_hosp, rng.choice(self.diagnosticos, size=n, p=self.pesos_diagnosticos)
+        )
+        ubicacion = self.ubicaciones[rng.choice(len(self.ubicaciones), size=n, p=self.pesos_ubicaciones)]
+        alcaldia = pd.Series(ubicacion[:, 1]).where(rng.random(n) > 0.08)  # ~8% sin alcaldía capturada
+        edad = np.clip(rng.normal(48, 22, size=n), 0, 105).astype(int)
+
+        # Costos sesgados: log-normal que crece con los días de estancia
+        gasto_nivel_6 = np.round(rng.lognormal(9.3, 1.1, size=n) * (1 + dias / 10), 2)
+        gasto_nivel_1 = np.round(gasto_nivel_6 * rng.uniform(0.05, 0.6, size=n), 2)
+
+        nombres = pd.Series(rng.choice(NOMBRES, size=n)).str.cat(
+            pd.Series(rng.choice(APELLIDOS, size=n)), sep=' '
+        )
+        estancia = np.where(tiene_hosp, np.where(rng.random(n) < 0.93, 'Hospitalizado', 'Ambulatorio'), None)
+
+        return pd.DataFrame({
+            'id_registro_urg': pd.Series(ids + 100_000).where(tiene_urg).astype('Int64'),
+            'fecha_recepcion_urg': fechas(recepcion_urg, tiene_urg),
+            'fecha_egreso_urg': fechas(egreso_urg, tiene_urg),
+            'motivo_alta_urg': pd.Series(
+                np.where(tiene_hosp, 'HOSPITALIZACIÓN', rng.choice(MOTIVOS_ALTA, size=n, p=PROBABILIDAD_MOTIVOS))
+            ).where(tiene_urg),
+            'expediente_urg': pd.Series(expediente).where(tiene_urg).astype('Int64'),
+            'nse_urg': pd.Series(rng.integers(1, 7, size=n)).where(tiene_urg).astype('Int64'),
+            'no_de_cam_urg': pd.Series(rng.integers(1, 60, size=n)).where(tiene_urg).astype('Int64'),
+            'hospitalizado_urg': pd.Series(np.where(tiene_hosp, 'SI', 'NO')).where(tiene_urg),
+            'id_registro_admision': pd.Series(ids + 500_000).where(tiene_hosp).astype('Int64'),
+            'fecha_recepcion_hosp': fechas(recepcion_hosp, tiene_hosp),
+            'fecha_egreso_hosp': fechas(egreso_hosp, tiene_hosp),
+            'motivo_alta_hosp': pd.Series(rng.choice(MOTIVOS_ALTA, size=n, p=PROBABILIDAD_MOTIVOS)).where(tiene_hosp),
+            'n_expediente_hosp': pd.Series(expediente).where(tiene_hosp).astype('Int64'),
+            'ian_expediente_hosp': pd.Series(expediente + 9_000_000).where(tiene_hosp).astype('Int64'),
+            'nse_hosp': pd.Series(rng.integers(1, 7, size=n)).where(tiene_hosp).astype('Int64'),
+            'no_de_cama_hosp': pd.Series(rng.integers(100, 400, size=n)).where(tiene_hosp).astype('Int64'),
+            'estancia_hosp': estancia,
+            'FYF7Y9IB2I2II_L5JF77Y5J5F1B': pd.Series(servicio).where(tiene_hosp, 'URGENCIAS'),
+            'nombre_paciente': nombres,
+            'nombre_paciente_hosp': nombres.where(tiene_hosp),
+            'edad': edad,
+            'sexo': rng.choice(['FEMENINO', 'MASCULINO'], size=n, p=[0.53, 0.47]),
+            'estado': ubicacion[:, 0],
+            'ciudad': ubicacion[:, 0],
+            'alcaldia_municipio': alcaldia,
+            'cp': rng.integers(1000, 99999, size=n),
+            'direcccion': pd.Series(rng.integers(1, 999, size=n)).astype(str).radd('NUM '),
+            'calle': rng.choice(APELLIDOS, size=n),
+            'derechohabiencia': rng.choice(DERECHOHABIENCIAS, size=n, p=PROBABILIDAD_DERECHOHABIENCIA),
+            'diagnostico_urg': pd.Series(diagnostico_urg).where(tiene_urg),
+            'diagnostico_hosp': pd.Series(diagnostico_hosp).where(tiene_hosp),
+            'fecha_egreso_general': pd.to_datetime(egreso_general),
+            'dias_hopit': np.where(tiene_hosp, dias, 0),
+            'gasto_nivel_6': gasto_nivel_6,
+            'gasto_nivel_1': gasto_nivel_1,
+            'id_paciente': ids
+        }, columns=COLUMNAS_RESUMEN)
+
+    def _bloque_detalle(self, rng, n):
+        paciente = rng.integers(0, self.registros_resumen, size=n)
+        indice = rng.choice(len(self.claves), size=n, p=self.pesos_claves)
+        cantidad = np.minimum(rng.geometric(0.7, size=n), 20)
+        costo_nivel_6 = self.costo_base[indice]
+        monto_nivel_1 = np.round(costo_nivel_6 * rng.uniform(0.02, 0.15, size=n), 2)
+        monto_nivel_6 = np.round(costo_nivel_6 * cantidad, 2)
+        fecha = INICIO_PERIODO.astype('datetime64[D]') + rng.integers(0, DIAS_PERIODO, size=n).astype('timedelta64[D]')
+
+        return pd.DataFrame({
+            'paciente': paciente,
+            'fecha': pd.to_datetime(fecha),
+            'cantidad': cantidad,
+            'clave': self.claves[indice],
+            'descripcion': self.descripciones[indice],
+            'area_servicio': self.areas[indice],
+            'nivel': rng.choice([1, 2, 3, 4, 5, 6], size=n, p=[0.05, 0.05, 0.1, 0.1, 0.2, 0.5]),
+            'costo_nivel_6': costo_nivel_6,
+            'monto_nivel_1': monto_nivel_1,
+            'monto_nivel_6': monto_nivel_6,
+            'gasto_nivel_6': np.round(monto_nivel_6 * rng.lognormal(0, 0.3, size=n), 2),
+            # Edad y sexo del paciente: deterministas a partir del id para ser consistentes entre registros
+            'edad': (paciente * 7919) % 100,
+            'sexo': np.where(paciente % 2 == 0, 'FEMENINO', 'MASCULINO')
+        }, columns=COLUMNAS_DETALLE)
+
+    def _escribir(self, ruta, total, constructor, formato_fecha='%Y-%m-%d %H:%M:%S'):
+        ruta_temporal = ruta + '.tmp'
+        for i, (inicio, n) in enumerate(self._bloques(total)):
+            bloque = constructor(inicio, n)
+            bloque.to_csv(ruta_temporal, mode='w' if i == 0 else 'a', header=(i == 0), index=False,
+                          encoding='utf-8', date_format=formato_fecha)
+        os.replace(ruta_temporal, ruta)
+
+    def generar(self, ruta_base):
+        """
+        Escribe los archivos resumen y detalle bajo ``<ruta_base>/datos/ejemplos``.
+
+        Returns:
+            dict: manifiesto con rutas, registros, semilla y duración
+        """
+        directorio = os.path.join(ruta_base, 'datos', 'ejemplos')
+        os.makedirs(directorio, exist_ok=True)
+        ruta_resumen = os.path.join(directorio, NOMBRE_RESUMEN)
+        ruta_detalle = os.path.join(directorio, NOMBRE_DETALLE)
+
+        inicio = time.perf_counter()
+        rng = np.random.default_rng(self.semilla)
+        print(f"Generando resumen sintético: {self.registros_resumen:,} registros")
+        self._escribir(ruta_resumen, self.registros_resumen, lambda i, n: self._bloque_resumen(rng, i, n))
+        print(f"Generando detalle sintético: {self.registros_detalle:,} registros")
+        self._escribir(ruta_detalle, self.registros_detalle, lambda i, n: self._bloque_detalle(rng, n), '%Y-%m-%d')
+
+        manifiesto = {
+            'version': VERSION_GENERADOR,
+            'semilla': self.semilla,
+            'registros_resumen': self.registros_resumen,
+            'registros_detalle': self.registros_detalle,
+            'ruta_resumen': ruta_resumen,
+            'ruta_detalle': ruta_detalle,
+            'bytes_resumen': os.path.getsize(ruta_resumen),
+            'bytes_detalle': os.path.getsize(ruta_detalle),
+            'duracion_s': round(time.perf_counter() - inicio, 2)
+        }
+        with open(os.path.join(directorio, NOMBRE_MANIFIESTO), 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+        print(f"✓ Datos sintéticos generados en {directorio} ({manifiesto['duracion_s']}s)")
+        return manifiesto
+
+
+def preparar_datos(ruta_base, registros_detalle, semilla=2025):
+    """
+    Genera los datos sintéticos solo si no existen con los mismos parámetros.
+
+    Returns:
+        dict: manifiesto de los datos (generados o reutilizados)
+    """
+    ruta_manifiesto = os.path.join(ruta_base, 'datos', 'ejemplos', NOMBRE_MANIFIESTO)
+    if os.path.exists(ruta_manifiesto):
+        with open(ruta_manifiesto, 'r', encoding='utf-8') as f:
+            manifiesto = json.load(f)
+        if (manifiesto.get('version') == VERSION_GENERADOR and manifiesto.get('semilla') == semilla
+                and manifiesto.get('registros_detalle') == int(registros_detalle)
+                and os.path.exists(manifiesto['ruta_resumen']) and os.path.exists(manifiesto['ruta_detalle'])):
+            print(f"✓ Reutilizando datos sintéticos existentes en {ruta_base}")
+            return manifiesto
+    return GeneradorDatosSinteticos(registros_detalle, semilla=semilla).generar(ruta_base)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos de egresos hospitalarios')
+    parser.add_argument('--escala', default='10k', help=f"Escala predefinida ({', '.join(ESCALAS)}) o número de registros")
+    parser.add_argument('--destino', default='benchmarks/datos_sinteticos', help='Directorio base de salida')
+    parser.add_argument('--semilla', type=int, default=2025)
+    args = parser.parse_args()
+
+    registros = ESCALAS.get(args.escala.lower()) or int(args.escala)
+    GeneradorDatosSinteticos(registros, semilla=args.semilla).generar(os.path.join(args.destino, args.escala.lower()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Verificación de regresiones de rendimiento contra la línea base versionada.
+
+Corre los escenarios de ``ejecutar_benchmarks.py`` (procesamiento, anonimización,
+modelos y reportes) con varias repeticiones y compara contra ``benchmarks/linea_base.json``:
+
+- Tiempo: hay regresión si la mediana actual supera la de la línea base por más de
+  ``--tolerancia`` (relativa) **y** por más de ``--factor-iqr`` veces el ruido medido
+  (IQR de la línea base y de la corrida actual). Así una variación dentro del ruido
+  normal del equipo no se reporta como regresión.
+- Memoria: hay regresión si el incremento de RSS pico supera la línea base por más de
+  ``--tolerancia-memoria`` (relativa) y de ``MARGEN_MEMORIA_MB``.
+
+Se evalúa el escenario completo y cada etapa de la traza (p. ej. ``procesar_todo;limpiar_datos``
+o ``anonimizar_resumen;hashear_identificador``). Si algo regresó, imprime el reporte por etapa
+y termina con código 1.
+
+Uso:
+    python benchmarks/verificar_regresion.py                      # verificar
+    python benchmarks/verificar_regresion.py --actualizar-linea-base
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from ejecutar_benchmarks import DIRECTORIO_BENCHMARKS, ESCENARIOS, EjecutorBenchmarks
+
+RUTA_LINEA_BASE = os.path.join(DIRECTORIO_BENCHMARKS, 'linea_base.json')
+
+# Etapas más cortas que esto son demasiado ruidosas para juzgarlas por separado
+DURACION_MINIMA_ETAPA_S = 0.02
+MARGEN_MEMORIA_MB = 16
+
+
+def _registro_linea_base(resultado):
+    """Parte de un resultado de benchmark que se guarda en la línea base"""
+    return {
+        'mediana_s': resultado['mediana_s'],
+        'iqr_s': resultado['iqr_s'],
+        'registros_por_segundo': resultado['registros_por_segundo'],
+        'incremento_pico_mb': resultado['incremento_pico_mb'],
+        'repeticiones': resultado['repeticiones'],
+        'etapas': {
+            ruta: {'mediana_s': mediana, 'iqr_s': resultado['etapas_iqr_s'].get(ruta, 0.0)}
+            for ruta, mediana in resultado['etapas_mediana_s'].items()
+        }
+    }
+
+
+def guardar_linea_base(resultados, entorno, ruta=RUTA_LINEA_BASE):
+    """Escribe la línea base (escala -> escenario -> métricas)"""
+    linea_base = {'generada': datetime.now().isoformat(timespec='seconds'), 'entorno': entorno, 'escalas': {}}
+    for resultado in resultados:
+        linea_base['escalas'].setdefault(resultado['escala'], {})[resultado['escenario']] = _registro_linea_base(resultado)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(linea_base, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    return linea_base
+
+
+def cargar_linea_base(ruta=RUTA_LINEA_BASE):
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class VerificadorRegresion:
+    """Compara resultados de benchmark contra la línea base con tolerancia estadística"""
+
+    def __init__(self, linea_base, tolerancia=0.15, factor_iqr=3.0, tolerancia_memoria=0.25):
+        self.linea_base = linea_base
+        self.tolerancia = tolerancia
+        self.factor_iqr = factor_iqr
+        self.tolerancia_memoria = tolerancia_memoria
+
+    def es_regresion_tiempo(self, base, base_iqr, actual, actual_iqr):
+        """La mediana creció más que la tolerancia relativa y más que el ruido observado"""
+        diferencia = actual - base
+        ruido = self.factor_iqr * max(base_iqr, actual_iqr)
+        return diferencia > base * self.tolerancia and diferencia > ruido
+
+    def es_regresion_memoria(self, base, actual):
+        diferencia = actual - base
+        return diferencia > MARGEN_MEMORIA_MB and diferencia > abs(base) * self.tolerancia_memoria
+
+    def comparar(self, resultado):
+        """
+        Compara un resultado contra su línea base.
+
+        Returns:
+            dict: filas del reporte (escenario y etapas) y bandera de regresión, o None si no hay línea base
+        """
+        base = self.linea_base.get('escalas', {}).get(resultado['escala'], {}).get(resultado['escenario'])
+        if base is None:
+            return None
+
+        filas = [{
+            'ruta': f"{resultado['escenario']} (total)",
+            'base_s': base['mediana_s'],
+            'actual_s': resultado['mediana_s'],
+            'regresion': self.es_regresion_tiempo(
+                base['mediana_s'], base['iqr_s'], resultado['mediana_s'], resultado['iqr_s']
+            )
+        }]
+        for ruta, etapa_base in sorted(base['etapas'].items()):
+            if ruta not in resultado['etapas_mediana_s']:
+                continue
+            actual = resultado['etapas_mediana_s'][ruta]
+            filas.append({
+                'ruta': ruta,
+                'base_s': etapa_base['mediana_s'],
+                'actual_s': actual,
+                'regresion': (
+                    max(etapa_base['mediana_s'], actual) >= DURACION_MINIMA_ETAPA_S
+                    and self.es_regresion_tiempo(
+                        etapa_base['mediana_s'], etapa_base['iqr_s'], actual, resultado['etapas_iqr_s'].get(ruta, 0.0)
+                    )
+                )
+            })
+
+        memoria = {
+            'base_mb': base['incremento_pico_mb'],
+            'actual_mb': resultado['incremento_pico_mb'],
+            'regresion': self.es_regresion_memoria(base['incremento_pico_mb'], resultado['incremento_pico_mb'])
+        }
+        # Repeticiones de distinto orden de magnitud no miden lo mismo: la mediana no es comparable
+        consistentes = resultado.get('repeticiones_consistentes', True)
+        return {
+            'escenario': resultado['escenario'],
+            'escala': resultado['escala'],
+            'filas': filas,
+            'memoria': memoria,
+            'throughput_base': base.get('registros_por_segundo'),
+            'throughput_actual': resultado.get('registros_por_segundo'),
+            'repeticiones_consistentes': consistentes,
+            'duraciones_s': resultado.get('duraciones_s', []),
+            'regresion': any(f['regresion'] for f in filas) or memoria['regresion'] or not consistentes
+        }
+
+
+def imprimir_reporte(comparacion):
+    """Reporte por etapa de un escenario comparado"""
+    estado = '❌ REGRESIÓN' if comparacion['regresion'] else '✓ OK'
+    print(f"\n{estado} · {comparacion['escenario']} [{comparacion['escala']}]")
+    if comparacion['throughput_base'] and comparacion['throughput_actual']:
+        print(f"  Throughput: {comparacion['throughput_base']:,.0f} → {comparacion['throughput_actual']:,.0f} registros/s")
+    memoria = comparacion['memoria']
+    marca = '  ⚠' if memoria['regresion'] else ''
+    print(f"  Incremento RSS pico: {memoria['base_mb']:.1f}MB → {memoria['actual_mb']:.1f}MB{marca}")
+    if not comparacion['repeticiones_consistentes']:
+        print(f"  ⚠ Repeticiones inconsistentes: {', '.join(f'{d:.3f}s' for d in comparacion['duraciones_s'])}")
+    print(f"  {'Etapa':<60} {'Base':>9} {'Actual':>9} {'Cambio':>8}")
+    for fila in comparacion['filas']:
+        cambio = (fila['actual_s'] / fila['base_s'] - 1) * 100 if fila['base_s'] else 0.0
+        marca = '  ⚠' if fila['regresion'] else ''
+        print(f"  {fila['ruta'][:60]:<60} {fila['base_s']:>8.3f}s {fila['actual_s']:>8.3f}s {cambio:>+7.1f}%{marca}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verifica regresiones de rendimiento contra la línea base')
+    parser.add_argument('--escalas', nargs='+', default=['10k'])
+    parser.add_argument('--escenarios', nargs='+', choices=ESCENARIOS)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--tolerancia', type=float, default=0.15, help='Aumento relativo de la mediana permitido')
+    parser.add_argument('--factor-iqr', type=float, default=3.0, help='Veces el IQR que se considera ruido')
+    parser.add_argument('--tolerancia-memoria', type=float, default=0.25)
+    parser.add_argument('--linea-base', default=RUTA_LINEA_BASE)
+    parser.add_argument('--actualizar-linea-base', action='store_true',
+                        help='Reemplaza la línea base con los resultados de esta corrida')
+    args = parser.parse_args()
+
+    print("=== VERIFICACIÓN DE REGRESIONES DE RENDIMIENTO ===")
+    ejecutor = EjecutorBenchmarks(repeticiones=args.repeticiones, guardar_historial=False)
+    resultados = ejecutor.ejecutar(args.escalas, args.escenarios)
+
+    if args.actualizar_linea_base:
+        inconsistentes = [f"{r['escenario']} [{r['escala']}]" for r in resultados if not r['repeticiones_consistentes']]
+        if inconsistentes:
+            print(f"\n❌ Repeticiones inconsistentes en {', '.join(inconsistentes)}; no se actualiza la línea base")
+            return 1
+        guardar_linea_base(resultados, ejecutor.entorno, args.linea_base)
+        print(f"\n✓ Línea base actualizada: {args.linea_base}")
+        return 0
+
+    linea_base = cargar_linea_base(args.linea_base)
+    if linea_base is None:
+        print(f"❌ No existe línea base en {args.linea_base}; generarla con --actualizar-linea-base")
+        return 1
+    if linea_base.get('entorno', {}).get('cpus') != ejecutor.entorno['cpus']:
+        print("⚠ La línea base se generó en un equipo con distinto número de CPUs; los tiempos pueden no ser comparables")
+
+    verificador = VerificadorRegresion(linea_base, args.tolerancia, args.factor_iqr, args.tolerancia_memoria)
+    regresiones = []
+    for resultado in resultados:
+        comparacion = verificador.comparar(resultado)
+        if comparacion is None:
+            print(f"\n⚠ Sin línea base para {resultado['escenario']} [{resultado['escala']}]")
+            continue
+        imprimir_reporte(comparacion)
+        if comparacion['regresion']:
+            regresiones.append(comparacion)
+
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} escenario(s) con regresión de rendimiento")
+        return 1
+    print("\n✓ Sin regresiones de rendimiento")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
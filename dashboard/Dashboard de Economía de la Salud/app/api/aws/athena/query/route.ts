@@ -9,6 +9,48 @@ const athenaClient = new AthenaClient({
   },
 });
 
+// Motor SQL local (datos/motor_consultas.py) servido por datos/servicio_analitico.py
+const SERVICIO_ANALITICO_URL = process.env.SERVICIO_ANALITICO_URL;
+
+async function consultarLocal(query: string, database: string) {
+  if (!SERVICIO_ANALITICO_URL) return null;
+  try {
+    const response = await fetch(`${SERVICIO_ANALITICO_URL}/consulta`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ query, database }),
+      signal: AbortSignal.timeout(5000),
+    });
+    const resultado = await response.json();
+    if (response.status === 400) {
+      // Error de SQL: se reporta en lugar de pasar a Athena con la misma consulta
+      return NextResponse.json({ success: false, status: 'FAILED', error: resultado.error, model: 'local-duckdb' }, { status: 400 });
+    }
+    if (!response.ok) {
+      // Sin exportación local de alguna tabla o error del servicio: se resuelve en Athena
+      console.warn(`Servicio analítico local respondió ${response.status}, usando Athena:`, resultado.error);
+      return null;
+    }
+    return NextResponse.json({
+      success: true,
+      queryExecutionId: 'local-' + Date.now(),
+      status: 'SUCCEEDED',
+      database,
+      query: query.substring(0, 100) + '...',
+      resultLocation: 'local-parquet',
+      model: 'local-duckdb',
+      executionTime: resultado.tiempo_ms,
+      cached: resultado.desde_cache,
+      columns: resultado.columnas,
+      truncated: resultado.truncado,
+      data: resultado.filas,
+    });
+  } catch (error) {
+    console.warn('Servicio analítico local no disponible, usando Athena:', error);
+    return null;
+  }
+}
+
 export async function POST(request: NextRequest) {
   try {
     const { query, database = 'econ' } = await request.json();
@@ -17,6 +59,11 @@ export async function POST(request: NextRequest) {
       return NextResponse.json({ error: 'Query is required' }, { status: 400 });
     }
     
+    const local = await consultarLocal(query, database);
+    if (local) {
+      return local;
+    }
+    
     // Ejecutar consulta en Athena
     const startCommand = new StartQueryExecutionCommand({
       QueryString: query,
@@ -0,0 +1,46 @@
+import { NextRequest, NextResponse } from 'next/server';
+import fs from 'fs';
+import path from 'path';
+
+// Vistas por página generadas por datos/vistas_dashboard.py
+const PAGINAS = ['trends', 'geographic', 'motivos'];
+const directorioVistas = () => path.join(process.cwd(), 'datos', 'procesados', 'vistas');
+
+function leerIndice(): Record<string, { etag: string }> {
+  try {
+    const indice = JSON.parse(fs.readFileSync(path.join(directorioVistas(), 'indice.json'), 'utf-8'));
+    return indice.vistas || {};
+  } catch {
+    return {};
+  }
+}
+
+export async function GET(request: NextRequest, { params }: { params: Promise<{ pagina: string }> }) {
+  const { pagina } = await params;
+
+  if (!PAGINAS.includes(pagina)) {
+    return NextResponse.json({ error: 'Página no válida' }, { status: 404 });
+  }
+
+  const entrada = leerIndice()[pagina];
+  if (!entrada) {
+    return NextResponse.json({ error: 'Vista no generada; ejecutar procesar_datos_avanzado.py' }, { status: 404 });
+  }
+
+  // El navegador revalida con If-None-Match; si la vista no cambió no se lee ni se envía
+  const etag = `"${entrada.etag}"`;
+  const encabezados = { ETag: etag, 'Cache-Control': 'no-cache' };
+  if (request.headers.get('if-none-match') === etag) {
+    return new NextResponse(null, { status: 304, headers: encabezados });
+  }
+
+  try {
+    const contenido = fs.readFileSync(path.join(directorioVistas(), `${pagina}.json`), 'utf-8');
+    return new NextResponse(contenido, {
+      headers: { ...encabezados, 'Content-Type': 'application/json; charset=utf-8' },
+    });
+  } catch (error) {
+    console.error('Error reading view:', error);
+    return NextResponse.json({ error: 'Error reading data' }, { status: 500 });
+  }
+}
@@ -10,6 +10,13 @@ export default function GeographicPage() {
   useEffect(() => {
     const fetchData = async () => {
       try {
+        // Vista precalculada por el pipeline; la ruta anterior queda como respaldo
+        const vista = await fetch('/api/vistas/geographic');
+        if (vista.ok) {
+          const { datos } = await vista.json();
+          setData(datos.alcaldias);
+          return;
+        }
         const response = await fetch('/api/costos-por-alcaldia');
         const jsonData = await response.json();
         setData(jsonData);
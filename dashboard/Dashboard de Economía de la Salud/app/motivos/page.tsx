@@ -10,6 +10,13 @@ export default function MotivosPage() {
   useEffect(() => {
     const fetchData = async () => {
       try {
+        // Vista precalculada por el pipeline; la ruta anterior queda como respaldo
+        const vista = await fetch('/api/vistas/motivos');
+        if (vista.ok) {
+          const { datos } = await vista.json();
+          setData(datos.motivos);
+          return;
+        }
         const response = await fetch('/api/costos-por-motivo');
         const jsonData = await response.json();
         setData(jsonData);
@@ -60,6 +60,40 @@ interface TrendsData {
   };
 }
 
+// Vista precalculada por el pipeline (datos/vistas_dashboard.py) en la forma que usa la página
+function desdeVista(datos: any): TrendsData {
+  const rawData = datos.serie_mensual.map((mes: any) => ({
+    name: mes.name,
+    periodo: mes.periodo,
+    total_facturado: mes.total_facturado,
+    costo_promedio: mes.costo_promedio,
+    total_pacientes: mes.total_pacientes,
+    estancia_promedio: mes.estancia_promedio,
+  }))
+  return {
+    // Mismas estimaciones por servicio que /api/tendencias
+    timeSeriesData: rawData.map((mes: any) => ({
+      name: mes.name,
+      urgencias: mes.total_facturado * 0.86,
+      hospitalizacion: mes.total_facturado * 0.14,
+      laboratorios: mes.total_facturado * 0.05,
+    })),
+    changeRateData: datos.serie_mensual.map((mes: any) => ({
+      name: mes.name,
+      cambio_facturado: mes.cambio_total_facturado,
+      cambio_pacientes: mes.cambio_total_pacientes,
+      cambio_costo_promedio: mes.cambio_costo_promedio,
+    })),
+    rawData,
+    metadatos: {
+      periodo_inicio: datos.periodo?.inicio,
+      periodo_fin: datos.periodo?.fin,
+      total_registros: datos.total_registros,
+      nota: "DEMO - Datos reales del hospital con algunas estimaciones para visualización",
+    },
+  }
+}
+
 export function TrendsPage() {
   const [seasonalView, setSeasonalView] = useState("weekday")
   const [trendsData, setTrendsData] = useState<TrendsData | null>(null)
@@ -71,6 +105,13 @@ export function TrendsPage() {
   useEffect(() => {
     const fetchTrendsData = async () => {
       try {
+        // Vista precalculada por el pipeline; la ruta anterior queda como respaldo
+        const vista = await fetch('/api/vistas/trends')
+        if (vista.ok) {
+          const { datos } = await vista.json()
+          setTrendsData(desdeVista(datos))
+          return
+        }
         const response = await fetch('/api/tendencias')
         if (!response.ok) {
           throw new Error('Error al cargar datos de tendencias')
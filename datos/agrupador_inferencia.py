@@ -0,0 +1,169 @@
+"""
+Agrupación de solicitudes de inferencia en lotes (micro-batching).
+
+Las solicitudes concurrentes al servicio analítico se encolan brevemente y se evalúan con una sola
+llamada al modelo; cada solicitud recibe después su parte del resultado. El lote se cierra al
+alcanzar ``tamano_maximo`` elementos o al cumplirse ``espera_maxima_ms`` desde la primera solicitud.
+
+    agrupador = AgrupadorInferencia('costos', evaluar_lote, tamano=len, tamano_maximo=64)
+    costos = agrupador.evaluar([(45, 'FEMENINO', 3)])
+"""
+
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+MUESTRAS_LATENCIA = 2000
+
+
+class _Solicitud:
+    __slots__ = ('datos', 'tamano', 'futuro', 'inicio')
+
+    def __init__(self, datos, tamano):
+        self.datos = datos
+        self.tamano = tamano
+        self.futuro = Future()
+        self.inicio = time.perf_counter()
+
+
+def _cubeta(tamano):
+    """Intervalo en potencias de 2 para el histograma de tamaños de lote"""
+    inferior = 1 << (max(tamano, 1).bit_length() - 1)
+    superior = inferior * 2 - 1
+    return str(inferior) if inferior == superior else f'{inferior}-{superior}'
+
+
+class AgrupadorInferencia:
+    """
+    Evalúa solicitudes concurrentes en lotes con un hilo de trabajo.
+
+    Args:
+        nombre (str): nombre para métricas y el hilo
+        funcion_lote (callable): recibe la lista de solicitudes y devuelve un resultado por solicitud
+        tamano (callable): elementos de una solicitud (por defecto 1)
+        tamano_maximo (int): elementos por lote; una solicitud mayor se evalúa sola
+        espera_maxima_ms (float): tiempo máximo que la primera solicitud espera a otras
+    """
+
+    def __init__(self, nombre, funcion_lote, tamano=None, tamano_maximo=64, espera_maxima_ms=2.0):
+        self.nombre = nombre
+        self.funcion_lote = funcion_lote
+        self.tamano = tamano or (lambda datos: 1)
+        self.tamano_maximo = max(int(tamano_maximo), 1)
+        self.espera_maxima = max(float(espera_maxima_ms), 0.0) / 1000
+        self._cola = queue.Queue()
+        self._pendiente = None
+        self._candado = threading.Lock()
+        self._latencias = deque(maxlen=MUESTRAS_LATENCIA)
+        self._histograma = defaultdict(int)
+        self.lotes = 0
+        self.solicitudes = 0
+        self.elementos = 0
+        self.errores = 0
+        self._activo = True
+        self._hilo = threading.Thread(target=self._ciclo, name=f'agrupador-{nombre}', daemon=True)
+        self._hilo.start()
+
+    def enviar(self, datos):
+        """Encola una solicitud y devuelve un ``Future`` con su resultado"""
+        if not self._activo:
+            raise RuntimeError(f"agrupador {self.nombre} detenido")
+        solicitud = _Solicitud(datos, self.tamano(datos))
+        self._cola.put(solicitud)
+        return solicitud.futuro
+
+    def evaluar(self, datos, tiempo_limite=None):
+        """Encola una solicitud y espera su resultado"""
+        return self.enviar(datos).result(tiempo_limite)
+
+    def detener(self):
+        self._activo = False
+        self._cola.put(None)
+        self._hilo.join()
+
+    def _siguiente(self, tiempo_limite=None):
+        if self._pendiente is not None:
+            solicitud, self._pendiente = self._pendiente, None
+            return solicitud
+        return self._cola.get(timeout=tiempo_limite)
+
+    def _juntar_lote(self):
+        """Espera la primera solicitud y agrega otras hasta llenar el lote o agotar la espera"""
+        primera = self._siguiente()
+        if primera is None:
+            return None
+        lote = [primera]
+        elementos = primera.tamano
+        limite = time.perf_counter() + self.espera_maxima
+        while elementos < self.tamano_maximo:
+            restante = limite - time.perf_counter()
+            try:
+                solicitud = self._siguiente(restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if solicitud is None:
+                self._cola.put(None)
+                break
+            if elementos + solicitud.tamano > self.tamano_maximo:
+                # No cabe completa: abre el siguiente lote
+                self._pendiente = solicitud
+                break
+            lote.append(solicitud)
+            elementos += solicitud.tamano
+        return lote
+
+    def _ciclo(self):
+        while True:
+            lote = self._juntar_lote()
+            if lote is None:
+                return
+            try:
+                resultados = list(self.funcion_lote([s.datos for s in lote]))
+                if len(resultados) != len(lote):
+                    raise RuntimeError(f"agrupador {self.nombre}: {len(resultados)} resultado(s) "
+                                       f"para {len(lote)} solicitud(es)")
+                error = None
+            except Exception as e:
+                resultados, error = None, e
+
+            fin = time.perf_counter()
+            with self._candado:
+                self.lotes += 1
+                self.solicitudes += len(lote)
+                self.elementos += sum(s.tamano for s in lote)
+                self._histograma[_cubeta(sum(s.tamano for s in lote))] += 1
+                for solicitud in lote:
+                    self._latencias.append((fin - solicitud.inicio) * 1000)
+                if error is not None:
+                    self.errores += len(lote)
+
+            for i, solicitud in enumerate(lote):
+                if error is not None:
+                    solicitud.futuro.set_exception(error)
+                else:
+                    solicitud.futuro.set_result(resultados[i])
+
+    def resumen(self):
+        """Lotes evaluados, histograma de tamaños y latencia de las solicitudes (ms)"""
+        with self._candado:
+            latencias = np.array(self._latencias) if self._latencias else np.array([0.0])
+            histograma = dict(sorted(self._histograma.items(), key=lambda item: int(item[0].split('-')[0])))
+            return {
+                'tamano_maximo': self.tamano_maximo,
+                'espera_maxima_ms': self.espera_maxima * 1000,
+                'lotes': self.lotes,
+                'solicitudes': self.solicitudes,
+                'elementos': self.elementos,
+                'errores': self.errores,
+                'elementos_por_lote': round(self.elementos / self.lotes, 2) if self.lotes else None,
+                'histograma_lotes': histograma,
+                'latencia_ms': {
+                    'p50': round(float(np.percentile(latencias, 50)), 3),
+                    'p99': round(float(np.percentile(latencias, 99)), 3),
+                    'max': round(float(latencias.max()), 3)
+                }
+            }
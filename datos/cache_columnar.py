@@ -0,0 +1,122 @@
+"""
+Caché columnar (Parquet) de los DataFrames limpios del pipeline.
+
+Cada tabla se guarda como ``<nombre>.parquet`` junto con un archivo ``<nombre>.origen.json``
+que registra el archivo fuente (tamaño y fecha de modificación) y la huella del código de
+limpieza que la generó. Si ni la fuente ni ese código cambiaron, el caché se reutiliza y se
+evita volver a parsear el CSV. El diccionario de categorías se guarda en el mismo directorio.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from codificacion_categorica import DiccionarioCategorias
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+NOMBRE_DICCIONARIO = 'diccionario_categorias.json'
+
+
+def huella_archivo(ruta):
+    """Identifica la versión de un archivo fuente por tamaño y fecha de modificación"""
+    if not ruta or not os.path.exists(ruta):
+        return None
+    estado = os.stat(ruta)
+    return {'ruta': os.path.abspath(ruta), 'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+
+def huella_codigo(rutas):
+    """Hash del contenido de los archivos de código (las rutas inexistentes se omiten)"""
+    digest = hashlib.sha256()
+    for ruta in rutas:
+        if os.path.exists(ruta):
+            with open(ruta, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()[:16]
+
+
+def ruta_diccionario(ruta_cache):
+    return os.path.join(ruta_cache, NOMBRE_DICCIONARIO)
+
+
+def cargar_diccionario(ruta_cache):
+    """Carga el diccionario de categorías persistido en el caché"""
+    return DiccionarioCategorias.cargar(ruta_diccionario(ruta_cache))
+
+
+def guardar_tabla(df, ruta_cache, nombre, diccionario=None, origen=None, extra=None, codigo=None):
+    """
+    Guarda un DataFrame en el caché columnar.
+
+    Args:
+        df (DataFrame): datos limpios (columnas categóricas ya codificadas)
+        ruta_cache (str): directorio del caché
+        nombre (str): nombre lógico de la tabla ('resumen', 'detalle', ...)
+        diccionario (DiccionarioCategorias): se persiste junto a la tabla
+        origen (str): archivo fuente del que provienen los datos
+        extra (dict): metadatos adicionales para el archivo de origen
+        codigo (str): huella del código de limpieza (``huella_codigo``)
+    """
+    if not PARQUET_DISPONIBLE:
+        print("⚠ pyarrow no disponible, no se guarda el caché columnar")
+        return False
+
+    os.makedirs(ruta_cache, exist_ok=True)
+    ruta_tabla = os.path.join(ruta_cache, f'{nombre}.parquet')
+    ruta_temporal = ruta_tabla + '.tmp'
+    df.to_parquet(ruta_temporal, index=False)
+    os.replace(ruta_temporal, ruta_tabla)
+
+    metadatos = {'origen': huella_archivo(origen), 'codigo': codigo, 'filas': int(len(df))}
+    if extra:
+        metadatos.update(extra)
+    with open(os.path.join(ruta_cache, f'{nombre}.origen.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, ensure_ascii=False)
+
+    if diccionario is not None:
+        diccionario.guardar(ruta_diccionario(ruta_cache))
+    return True
+
+
+def leer_metadatos(ruta_cache, nombre):
+    ruta = os.path.join(ruta_cache, f'{nombre}.origen.json')
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def cargar_tabla(ruta_cache, nombre, diccionario=None, columnas_categoricas=None, origen=None, columnas=None,
+                 codigo=None):
+    """
+    Carga una tabla del caché columnar.
+
+    Si se indica ``origen`` y el archivo fuente cambió desde que se generó el caché, o se
+    indica ``codigo`` y la tabla se limpió con otra versión del código, retorna None para
+    que el llamador vuelva a leer el CSV. Las columnas categóricas se re-codifican con el
+    diccionario para garantizar códigos estables.
+    """
+    ruta_tabla = os.path.join(ruta_cache, f'{nombre}.parquet')
+    if not PARQUET_DISPONIBLE or not os.path.exists(ruta_tabla):
+        return None
+
+    if origen is not None or codigo is not None:
+        metadatos = leer_metadatos(ruta_cache, nombre)
+        if metadatos is None:
+            return None
+        if origen is not None and metadatos.get('origen') != huella_archivo(origen):
+            return None
+        if codigo is not None and metadatos.get('codigo') != codigo:
+            return None
+
+    df = pd.read_parquet(ruta_tabla, columns=columnas)
+    if diccionario is not None and columnas_categoricas:
+        diccionario.codificar(df, columnas_categoricas)
+    return df
@@ -0,0 +1,156 @@
+"""
+Codificación categórica (por diccionario) de las columnas de texto del pipeline.
+
+Las columnas de alta cardinalidad (diagnósticos, servicios, alcaldías, etc.) se
+convierten a ``category`` con un diccionario de códigos estable entre ejecuciones.
+El diccionario se persiste junto al caché columnar para que limpieza, agregación,
+anonimización y modelos trabajen siempre sobre los mismos códigos.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Columnas de texto que se codifican en el archivo resumen
+COLUMNAS_CATEGORICAS_RESUMEN = [
+    'diagnostico_hosp', 'diagnostico_urg', 'servicio_origen', 'motivo_alta_hosp',
+    'motivo_alta_urg', 'alcaldia_municipio', 'estado', 'ciudad', 'derechohabiencia',
+    'sexo', 'nse_urg', 'nse_hosp', 'estancia_hosp', 'hospitalizado_urg'
+]
+
+# Columnas de texto que se codifican en el archivo detalle
+COLUMNAS_CATEGORICAS_DETALLE = ['descripcion', 'area_servicio', 'clave', 'sexo']
+
+# Nombre original de la columna de servicio tal como sale del SQL
+COLUMNA_SERVICIO_ORIGINAL = 'FYF7Y9IB2I2II_L5JF77Y5J5F1B'
+
+
+class DiccionarioCategorias:
+    """
+    Diccionario global de categorías con códigos estables.
+
+    Cada columna guarda su lista ordenada de categorías; los valores nuevos se
+    agregan al final, de modo que los códigos ya asignados nunca cambian.
+    """
+
+    VERSION = 1
+
+    def __init__(self, categorias=None):
+        self.categorias = {col: list(valores) for col, valores in (categorias or {}).items()}
+        self.modificado = False
+
+    def dtypes_lectura(self, columnas):
+        """Devuelve el mapeo de dtypes para leer las columnas directamente como ``category``"""
+        dtypes = {col: 'category' for col in columnas}
+        if 'servicio_origen' in columnas:
+            dtypes[COLUMNA_SERVICIO_ORIGINAL] = 'category'
+        return dtypes
+
+    def actualizar(self, columna, serie):
+        """Agrega al diccionario los valores de la serie que aún no tienen código"""
+        conocidas = self.categorias.setdefault(columna, [])
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            valores = serie.cat.categories
+        else:
+            valores = pd.Index(pd.unique(serie.dropna()))
+        valores = valores.astype(str)
+
+        nuevas = valores.difference(pd.Index(conocidas), sort=False)
+        if len(nuevas) > 0:
+            # Orden determinista para que dos ejecuciones con los mismos datos coincidan
+            conocidas.extend(sorted(nuevas))
+            self.modificado = True
+        return conocidas
+
+    def codificar(self, df, columnas):
+        """
+        Convierte las columnas indicadas a ``category`` con los códigos del diccionario.
+
+        Las columnas ausentes o numéricas se ignoran. Modifica ``df`` en sitio y lo retorna.
+        """
+        for columna in columnas:
+            if columna not in df.columns:
+                continue
+            serie = df[columna]
+            es_categorica = isinstance(serie.dtype, pd.CategoricalDtype)
+            if not es_categorica and serie.dtype != object:
+                continue
+
+            if es_categorica and serie.cat.categories.dtype != object:
+                serie = serie.cat.rename_categories(serie.cat.categories.astype(str))
+            elif not es_categorica:
+                serie = serie.where(serie.isna(), serie.astype(str))
+
+            categorias = self.actualizar(columna, serie)
+            if es_categorica:
+                df[columna] = serie.cat.set_categories(categorias)
+            else:
+                df[columna] = pd.Categorical(serie, categories=categorias)
+        return df
+
+    def codigo(self, columna, valor):
+        """Código estable de un valor, o -1 si no existe en el diccionario"""
+        try:
+            return self.categorias.get(columna, []).index(valor)
+        except ValueError:
+            return -1
+
+    def guardar(self, ruta):
+        """
+        Persiste el diccionario en JSON con reemplazo atómico.
+
+        El anonimizador y el procesador escriben el mismo archivo: cada escritura usa su propio
+        temporal, así que un lector (o una escritura interrumpida) nunca deja un JSON a medias.
+        """
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        temporal = f'{ruta}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'columnas': self.categorias}, f, ensure_ascii=False)
+            os.replace(temporal, ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        self.modificado = False
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Carga el diccionario desde JSON; si no existe devuelve uno vacío"""
+        if not os.path.exists(ruta):
+            return cls()
+        with open(ruta, 'r', encoding='utf-8') as f:
+            contenido = json.load(f)
+        return cls(contenido.get('columnas', {}))
+
+
+def mapear_por_valor(serie, funcion, por_fila=None):
+    """
+    Aplica ``funcion`` una sola vez por valor distinto y expande el resultado a todas las filas.
+
+    Sustituye a ``serie.apply(funcion)`` cuando la función es determinista. Las filas
+    marcadas en ``por_fila`` (máscara booleana) se evalúan individualmente, para
+    funciones que no son deterministas en ciertos valores (p. ej. identificadores vacíos).
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        unicos = serie.cat.categories
+    else:
+        codigos, unicos = pd.factorize(serie)
+
+    # El último elemento corresponde a los nulos (código -1)
+    valores = [funcion(valor) for valor in unicos]
+    valores.append(funcion(np.nan))
+    tabla = np.empty(len(valores), dtype=object)
+    tabla[:] = valores
+    resultado = tabla.take(codigos)
+
+    if por_fila is not None:
+        mascara = np.asarray(por_fila, dtype=bool)
+        if mascara.any():
+            resultado[mascara] = [funcion(valor) for valor in serie[mascara]]
+
+    return pd.Series(resultado, index=serie.index, name=serie.name)
@@ -2,8 +2,30 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+import argparse
+import json
+import os
+import sys
+import time
 from pathlib import Path
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from eda_streaming import PerfilAgrupado, PerfilStreaming, guardar_perfiles
+from graficos_eda import figura, panel_barras, panel_caja, panel_histograma, renderizar_figuras
+from monitor_memoria import MonitorMemoria
+
+RUTA_DETALLE = 'proyecto_final/datos/ejemplos/Egreso Detalle Ene 2025 a Abr 2025.csv'
+RUTA_RESUMEN = 'proyecto_final/datos/ejemplos/Resumen Egreso 2025.csv'
+RUTA_GRAFICOS = 'proyecto_final/datos/graficos'
+RUTA_PERFILES = 'proyecto_final/datos/procesados/perfiles_eda.parquet'
+
+# Conjuntos de agrupación de los perfiles por grupo (() = total del archivo)
+CONJUNTOS_DETALLE = [(), ('mes',), ('area_servicio',), ('mes', 'area_servicio')]
+CONJUNTOS_RESUMEN = [
+    (), ('mes',), ('servicio_origen',), ('mes', 'servicio_origen'),
+    ('motivo_alta_hosp',), ('alcaldia_municipio',)
+]
+
 def detectar_columna_costos(df):
     posibles = ['costo_nivel_6', 'gasto_nivel_6', 'monto_nivel_6']
     for col in posibles:
@@ -15,9 +37,161 @@ def detectar_columna_costos(df):
             return col
     return None
 
+def imprimir_perfil(perfil):
+    """Imprime el mismo reporte que el análisis en memoria a partir de un perfil por bloques"""
+    print("\nInformación del DataFrame:")
+    print(f"Dimensiones: ({perfil.filas}, {len(perfil.columnas)})")
+    print("\nColumnas disponibles:")
+    for col in perfil.columnas:
+        print(f"- {col}")
+    
+    print("\nTipos de datos:")
+    print(perfil.tipos())
+    
+    print("\nValores nulos por columna:")
+    print(perfil.nulos())
+    
+    print("\nEstadísticas descriptivas de columnas numéricas:")
+    print(perfil.describir())
+    
+    print("\nAnálisis de costos:")
+    costos_cols = [col for col in perfil.columnas if 'costo' in col.lower() or 'monto' in col.lower() or 'gasto' in col.lower()]
+    for col in costos_cols:
+        print(f"\nEstadísticas de {col}:")
+        print(perfil.describir_columna(col))
+
+def paneles_distribucion(perfil, col_costos):
+    """Histograma y box plot de costos precalculados desde los resúmenes del perfil"""
+    return [
+        panel_histograma(perfil, col_costos, f'Distribución de {col_costos}', 'Costo'),
+        panel_caja(perfil, col_costos, f'Box Plot de {col_costos}', 'Costo')
+    ]
+
+def perfilar_csv(ruta, etapa, tamano_bloque, agrupar_por=(), renombrar=None, conjuntos=None, columna_fecha=None):
+    """
+    Perfila un CSV en una pasada por bloques y reporta la memoria pico usada.
+    
+    Con ``conjuntos`` se calculan en la misma pasada los perfiles por grupo
+    (mes, servicio, ...) con un ``PerfilAgrupado``.
+    
+    Returns:
+        tuple: (perfil, columna de costos detectada o None, perfil agrupado o None)
+    """
+    columnas = pd.read_csv(ruta, nrows=0).rename(columns=renombrar or {})
+    col_costos = detectar_columna_costos(columnas)
+    perfil = PerfilStreaming(tamano_bloque=tamano_bloque, columna_valor=col_costos, agrupar_por=agrupar_por)
+    grupos = PerfilAgrupado(conjuntos, columna_fecha=columna_fecha) if conjuntos else None
+    
+    monitor = MonitorMemoria()
+    with monitor.etapa(etapa) as registro:
+        for bloque in pd.read_csv(ruta, chunksize=tamano_bloque):
+            if renombrar:
+                bloque = bloque.rename(columns=renombrar)
+            perfil.actualizar(bloque)
+            if grupos is not None:
+                grupos.actualizar(bloque)
+    print(f"✓ Perfil en {perfil.bloques} bloques de hasta {tamano_bloque:,} filas "
+          f"(incremento de RSS pico: {registro['incremento_pico_mb']:.1f} MB)")
+    if grupos is not None:
+        print(f"✓ Perfiles por grupo: {len(grupos.grupos):,} grupos en {len(grupos.conjuntos)} conjuntos")
+    
+    with open(f'{RUTA_GRAFICOS}/perfil_{etapa}.json', 'w', encoding='utf-8') as f:
+        json.dump(perfil.a_dict(), f, indent=2, ensure_ascii=False, default=str)
+    return perfil, col_costos, grupos
+
+def guardar_perfiles_grupos(tablas):
+    """Escribe los perfiles por grupo de ambos archivos en un solo artefacto Parquet"""
+    tablas = {archivo: grupos.tabla() for archivo, grupos in tablas.items() if grupos is not None}
+    if not tablas:
+        return
+    tamano = guardar_perfiles(tablas, RUTA_PERFILES)
+    if tamano:
+        filas = sum(len(tabla) for tabla in tablas.values())
+        print(f"✓ Perfiles por grupo guardados: {RUTA_PERFILES} ({filas:,} filas, {tamano / 1024:.1f} KB)")
+
+def analizar_archivo_detalle_streaming(tamano_bloque=200_000, por_grupo=True):
+    """
+    Reporte del archivo detallado por bloques.
+    
+    Returns:
+        tuple: (figuras a dibujar, perfil agrupado o None)
+    """
+    print("\n=== ANÁLISIS DEL ARCHIVO DETALLADO (POR BLOQUES) ===")
+    perfil, col_costos, grupos = perfilar_csv(
+        RUTA_DETALLE, 'detalle', tamano_bloque,
+        conjuntos=CONJUNTOS_DETALLE if por_grupo else None, columna_fecha='fecha'
+    )
+    imprimir_perfil(perfil)
+    
+    if not col_costos:
+        print("No se encontró columna de costos principal para graficar.")
+        return [], grupos
+    
+    print(f"\nColumna de costos principal detectada: {col_costos}")
+    histograma, caja = paneles_distribucion(perfil, col_costos)
+    return [
+        figura('analisis_detalle', [histograma, caja], tamano=(15, 10), filas=2, columnas=2),
+        figura('detalle_histograma', [histograma], tamano=(8, 6)),
+        figura('detalle_caja', [caja], tamano=(8, 6))
+    ], grupos
+
+def analizar_archivo_resumen_streaming(tamano_bloque=200_000, por_grupo=True):
+    """
+    Reporte del archivo resumen por bloques.
+    
+    Las tablas por motivo de alta y por alcaldía quedan en el artefacto de perfiles
+    por grupo (``RUTA_PERFILES``) en lugar de CSV sueltos.
+    
+    Returns:
+        tuple: (figuras a dibujar, perfil agrupado o None)
+    """
+    print("\n=== ANÁLISIS DEL ARCHIVO RESUMEN (POR BLOQUES) ===")
+    perfil, col_costos, grupos = perfilar_csv(
+        RUTA_RESUMEN, 'resumen', tamano_bloque,
+        agrupar_por=['motivo_alta_hosp', 'alcaldia_municipio'],
+        renombrar={'FYF7Y9IB2I2II_L5JF77Y5J5F1B': 'servicio_origen'},
+        conjuntos=CONJUNTOS_RESUMEN if por_grupo else None, columna_fecha='fecha_egreso_general'
+    )
+    imprimir_perfil(perfil)
+    
+    if not col_costos:
+        print("No se encontró columna de costos principal para graficar.")
+        return [], grupos
+    
+    print(f"\nColumna de costos principal detectada: {col_costos}")
+    
+    print("\nAnálisis de costos por motivo de alta hospitalización:")
+    costos_por_motivo = perfil.agregados('motivo_alta_hosp')
+    print(costos_por_motivo)
+    
+    print("\nAnálisis de costos por alcaldía (solo registros completos):")
+    costos_por_alcaldia = perfil.agregados('alcaldia_municipio')
+    print(costos_por_alcaldia)
+    
+    histograma, caja = paneles_distribucion(perfil, col_costos)
+    motivos = panel_barras(costos_por_motivo, 'mean', 'Top 10 Costos Promedio por Motivo de Alta',
+                           'Costo Promedio', 'Motivo de Alta')
+    alcaldias = panel_barras(costos_por_alcaldia, 'mean', 'Top 10 Costos Promedio por Alcaldía',
+                             'Costo Promedio', 'Alcaldía')
+    return [
+        figura('analisis_resumen', [histograma, caja, motivos, alcaldias], tamano=(20, 15), filas=2, columnas=2),
+        figura('resumen_histograma', [histograma], tamano=(8, 6)),
+        figura('resumen_caja', [caja], tamano=(8, 6)),
+        figura('resumen_motivos', [motivos], tamano=(10, 6)),
+        figura('resumen_alcaldias', [alcaldias], tamano=(10, 6))
+    ], grupos
+
+def generar_graficos(figuras, max_procesos=None, forzar=False):
+    """Dibuja en paralelo las figuras cuyo contenido cambió desde la última ejecución"""
+    inicio = time.perf_counter()
+    resultados = renderizar_figuras(figuras, RUTA_GRAFICOS, max_procesos=max_procesos, forzar=forzar)
+    dibujadas = [r for r in resultados if r['estado'] == 'renderizado']
+    print(f"\n✓ Gráficos: {len(dibujadas)} dibujados, {len(resultados) - len(dibujadas)} sin cambios "
+          f"({time.perf_counter() - inicio:.2f}s) en {RUTA_GRAFICOS}/")
+
 def analizar_archivo_detalle():
     print("\n=== ANÁLISIS DEL ARCHIVO DETALLADO ===")
-    df = pd.read_csv('proyecto_final/datos/ejemplos/Egreso Detalle Ene 2025 a Abr 2025.csv')
+    df = pd.read_csv(RUTA_DETALLE)
     
     # Información básica
     print("\nInformación del DataFrame:")
@@ -71,7 +245,7 @@ def analizar_archivo_detalle():
 
 def analizar_archivo_resumen():
     print("\n=== ANÁLISIS DEL ARCHIVO RESUMEN ===")
-    df = pd.read_csv('proyecto_final/datos/ejemplos/Resumen Egreso 2025.csv')
+    df = pd.read_csv(RUTA_RESUMEN)
     
     # Renombrar columna de servicios
     df = df.rename(columns={'FYF7Y9IB2I2II_L5JF77Y5J5F1B': 'servicio_origen'})
@@ -162,12 +336,31 @@ def analizar_archivo_resumen():
         print("No se encontró columna de costos principal para graficar.")
 
 def main():
+    parser = argparse.ArgumentParser(description='Análisis exploratorio de los archivos de egresos')
+    parser.add_argument('--en-memoria', action='store_true',
+                        help='Carga cada archivo completo (solo para archivos pequeños)')
+    parser.add_argument('--tamano-bloque', type=int, default=200_000)
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos para dibujar los gráficos')
+    parser.add_argument('--forzar-graficos', action='store_true',
+                        help='Vuelve a dibujar los gráficos aunque sus datos no hayan cambiado')
+    parser.add_argument('--sin-grupos', action='store_true',
+                        help='No calcula los perfiles por mes y servicio')
+    args = parser.parse_args()
+    
     # Crear directorio para gráficos si no existe
-    Path('proyecto_final/datos/graficos').mkdir(parents=True, exist_ok=True)
+    Path(RUTA_GRAFICOS).mkdir(parents=True, exist_ok=True)
     
     # Analizar ambos archivos
-    analizar_archivo_detalle()
-    analizar_archivo_resumen()
+    if args.en_memoria:
+        analizar_archivo_detalle()
+        analizar_archivo_resumen()
+    else:
+        por_grupo = not args.sin_grupos
+        figuras_detalle, grupos_detalle = analizar_archivo_detalle_streaming(args.tamano_bloque, por_grupo)
+        figuras_resumen, grupos_resumen = analizar_archivo_resumen_streaming(args.tamano_bloque, por_grupo)
+        guardar_perfiles_grupos({'detalle': grupos_detalle, 'resumen': grupos_resumen})
+        figuras = figuras_detalle + figuras_resumen
+        generar_graficos(figuras, args.procesos, args.forzar_graficos)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
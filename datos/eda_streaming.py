@@ -0,0 +1,592 @@
+"""
+Análisis exploratorio fuera de memoria (out-of-core) para los archivos de egresos.
+
+Recorre el CSV una sola vez por bloques y mantiene por columna resúmenes de tamaño fijo:
+tipos, nulos, momentos (media, desviación, asimetría, curtosis), un sketch de cuantiles
+(KLL), un histograma adaptativo y una muestra de reservorio. Con ellos se reproduce el
+reporte de ``df.describe()`` / ``df.isnull().sum()`` y los histogramas y box plots de
+``eda.py`` sin cargar el archivo completo: la memoria depende del tamaño de bloque, no del
+número de registros. Opcionalmente acumula suma y conteo de una columna de valor por
+grupo (p. ej. costo por motivo de alta).
+
+``PerfilAgrupado`` calcula en la misma pasada los perfiles numéricos de cada grupo
+(mes, servicio, mes × servicio, ...) y los guarda en un solo artefacto Parquet en
+formato largo, consultable desde el dashboard.
+"""
+
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+# Distintos valores que se cuentan por columna de texto antes de truncar las frecuencias
+LIMITE_CATEGORIAS = 10_000
+PERCENTILES = (0.25, 0.5, 0.75)
+# Cuantiles guardados por grupo en el artefacto de perfiles
+CUANTILES_PERFIL = {'p05': 0.05, 'p25': 0.25, 'p50': 0.5, 'p75': 0.75, 'p95': 0.95}
+# Etiqueta de grupo para valores nulos o fechas no válidas
+SIN_DATO = 'SIN DATO'
+
+
+class SketchCuantiles:
+    """
+    Sketch KLL de cuantiles: niveles de compactadores donde cada elemento del nivel ``h``
+    representa ``2**h`` valores. El error de rango es del orden de ``1/k``.
+
+    Args:
+        k (int): capacidad del nivel superior (precisión del sketch)
+        rng (np.random.Generator): generador para el desfase aleatorio de las compactaciones
+    """
+
+    def __init__(self, k=200, rng=None):
+        self.k = k
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.niveles = [np.empty(0)]
+        self.n = 0
+
+    def _capacidad(self, nivel):
+        profundidad = len(self.niveles) - nivel - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** profundidad)))
+
+    def actualizar(self, valores):
+        if len(valores) == 0:
+            return
+        self.niveles[0] = np.concatenate([self.niveles[0], valores])
+        self.n += len(valores)
+        compactado = True
+        while compactado:
+            compactado = False
+            for nivel, elementos in enumerate(self.niveles):
+                if len(elementos) > self._capacidad(nivel):
+                    self._compactar(nivel)
+                    compactado = True
+                    break
+
+    def _compactar(self, nivel):
+        """Ordena el nivel y promueve uno de cada dos elementos (con desfase aleatorio)"""
+        if nivel + 1 == len(self.niveles):
+            self.niveles.append(np.empty(0))
+        datos = np.sort(self.niveles[nivel])
+        resto = datos[len(datos) - len(datos) % 2:]
+        datos = datos[:len(datos) - len(datos) % 2]
+        promovidos = datos[self.rng.integers(2)::2]
+        self.niveles[nivel] = resto
+        self.niveles[nivel + 1] = np.concatenate([self.niveles[nivel + 1], promovidos])
+
+    def cuantiles(self, probabilidades):
+        """Valores aproximados para cada probabilidad en [0, 1]"""
+        if self.n == 0:
+            return [np.nan for _ in probabilidades]
+        valores = np.concatenate(self.niveles)
+        pesos = np.concatenate([np.full(len(nivel), 2 ** h, dtype=np.int64) for h, nivel in enumerate(self.niveles)])
+        orden = np.argsort(valores, kind='stable')
+        valores, acumulado = valores[orden], np.cumsum(pesos[orden])
+        posiciones = np.searchsorted(acumulado, np.asarray(probabilidades) * acumulado[-1], side='left')
+        return list(valores[np.clip(posiciones, 0, len(valores) - 1)])
+
+    def tamano(self):
+        return sum(len(nivel) for nivel in self.niveles)
+
+
+class HistogramaAdaptativo:
+    """
+    Histograma de ancho fijo que se amplía sin recorrer de nuevo los datos: cuando llega un
+    valor fuera de rango, duplica el ancho de las barras (sumando pares) y extiende el rango.
+
+    Args:
+        barras (int): número de barras finas (par); el histograma final se re-agrupa
+    """
+
+    def __init__(self, barras=1024):
+        self.barras = barras
+        self.inicio = None
+        self.ancho = None
+        self.conteos = np.zeros(barras, dtype=np.int64)
+
+    def _ampliar(self, minimo, maximo):
+        mitad = self.barras // 2
+        while minimo < self.inicio or maximo >= self.inicio + self.barras * self.ancho:
+            self.conteos = self.conteos.reshape(-1, 2).sum(axis=1)
+            self.ancho *= 2
+            if minimo < self.inicio:
+                self.conteos = np.concatenate([np.zeros(mitad, dtype=np.int64), self.conteos])
+                self.inicio -= mitad * self.ancho
+            else:
+                self.conteos = np.concatenate([self.conteos, np.zeros(mitad, dtype=np.int64)])
+
+    def actualizar(self, valores):
+        if len(valores) == 0:
+            return
+        minimo, maximo = float(valores.min()), float(valores.max())
+        if self.inicio is None:
+            self.inicio = minimo
+            self.ancho = (maximo - minimo) / self.barras if maximo > minimo else 1.0
+        self._ampliar(minimo, maximo)
+        indices = np.clip(((valores - self.inicio) / self.ancho).astype(np.int64), 0, self.barras - 1)
+        self.conteos += np.bincount(indices, minlength=self.barras)
+
+    def reagrupar(self, barras, minimo, maximo):
+        """Conteos y bordes con ``barras`` barras entre ``minimo`` y ``maximo``"""
+        if self.inicio is None:
+            return np.zeros(barras, dtype=np.int64), np.linspace(0, 1, barras + 1)
+        centros = self.inicio + (np.arange(self.barras) + 0.5) * self.ancho
+        if maximo <= minimo:
+            maximo = minimo + self.ancho
+        conteos, bordes = np.histogram(centros, bins=barras, range=(minimo, maximo), weights=self.conteos)
+        return conteos.astype(np.int64), bordes
+
+
+class Reservorio:
+    """
+    Muestra aleatoria uniforme de tamaño fijo: cada valor recibe una prioridad aleatoria y se
+    conservan los ``tamano`` valores de menor prioridad (equivalente al muestreo de reservorio).
+    """
+
+    def __init__(self, tamano=10_000, rng=None):
+        self.tamano = tamano
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.valores = np.empty(0)
+        self.prioridades = np.empty(0)
+
+    def actualizar(self, valores):
+        if len(valores) == 0:
+            return
+        self.valores = np.concatenate([self.valores, valores])
+        self.prioridades = np.concatenate([self.prioridades, self.rng.random(len(valores))])
+        if len(self.valores) > self.tamano:
+            conservar = np.argpartition(self.prioridades, self.tamano)[:self.tamano]
+            self.valores = self.valores[conservar]
+            self.prioridades = self.prioridades[conservar]
+
+
+class EstadisticasColumna:
+    """Resúmenes de una columna acumulados bloque a bloque"""
+
+    def __init__(self, nombre, k_sketch=200, tamano_muestra=10_000, rng=None, barras_histograma=1024):
+        self.nombre = nombre
+        self.filas = 0
+        self.nulos = 0
+        self.tipos = []
+        # Momentos centrales combinados por bloques (Chan et al. / Pébay)
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.minimo = np.inf
+        self.maximo = -np.inf
+        self.sketch = SketchCuantiles(k_sketch, rng)
+        # Sin histograma ni muestra (0) para los perfiles por grupo, que solo guardan estadísticas
+        self.histograma = HistogramaAdaptativo(barras_histograma) if barras_histograma else None
+        self.muestra = Reservorio(tamano_muestra, rng) if tamano_muestra else None
+        self.frecuencias = Counter()
+        self.frecuencias_truncadas = False
+
+    def actualizar(self, serie):
+        self.filas += len(serie)
+        nulos = serie.isna()
+        self.nulos += int(nulos.sum())
+        if serie.dtype not in self.tipos:
+            self.tipos.append(serie.dtype)
+
+        if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+            valores = serie[~nulos].to_numpy(dtype=np.float64)
+            valores = valores[np.isfinite(valores)]
+            self._actualizar_momentos(valores)
+            self.sketch.actualizar(valores)
+            if self.histograma is not None:
+                self.histograma.actualizar(valores)
+            if self.muestra is not None:
+                self.muestra.actualizar(valores)
+        else:
+            conteos = serie[~nulos].astype(str).value_counts()
+            if self.frecuencias_truncadas:
+                conteos = conteos[conteos.index.isin(self.frecuencias.keys())]
+            self.frecuencias.update(conteos.to_dict())
+            if len(self.frecuencias) > LIMITE_CATEGORIAS:
+                self.frecuencias = Counter(dict(self.frecuencias.most_common(LIMITE_CATEGORIAS)))
+                self.frecuencias_truncadas = True
+
+    def _actualizar_momentos(self, valores):
+        nb = len(valores)
+        if nb == 0:
+            return
+        media_b = valores.mean()
+        d = valores - media_b
+        m2b, m3b, m4b = (d ** 2).sum(), (d ** 3).sum(), (d ** 4).sum()
+        self.minimo = min(self.minimo, valores.min())
+        self.maximo = max(self.maximo, valores.max())
+
+        na = self.n
+        n = na + nb
+        delta = media_b - self.media
+        self.m4 += (
+            m4b
+            + delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+            + 6 * delta ** 2 * (na * na * m2b + nb * nb * self.m2) / n ** 2
+            + 4 * delta * (na * m3b - nb * self.m3) / n
+        )
+        self.m3 += (
+            m3b
+            + delta ** 3 * na * nb * (na - nb) / n ** 2
+            + 3 * delta * (na * m2b - nb * self.m2) / n
+        )
+        self.m2 += m2b + delta ** 2 * na * nb / n
+        self.media += delta * nb / n
+        self.n = n
+
+    def tipo(self):
+        """Tipo final de la columna, como lo inferiría ``pd.read_csv`` sobre el archivo completo"""
+        if not self.tipos:
+            return np.dtype(object)
+        if all(pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t) for t in self.tipos):
+            return np.result_type(*self.tipos)
+        if len(set(map(str, self.tipos))) == 1:
+            return self.tipos[0]
+        return np.dtype(object)
+
+    def es_numerica(self):
+        tipo = self.tipo()
+        return pd.api.types.is_numeric_dtype(tipo) and not pd.api.types.is_bool_dtype(tipo)
+
+    def desviacion(self):
+        return np.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else np.nan
+
+    def asimetria(self):
+        """Asimetría con corrección de sesgo (igual que ``Series.skew``)"""
+        n = self.n
+        if n < 3 or self.m2 == 0:
+            return np.nan
+        g1 = np.sqrt(n) * self.m3 / self.m2 ** 1.5
+        return g1 * np.sqrt(n * (n - 1)) / (n - 2)
+
+    def curtosis(self):
+        """Curtosis en exceso con corrección de sesgo (igual que ``Series.kurt``)"""
+        n = self.n
+        if n < 4 or self.m2 == 0:
+            return np.nan
+        g2 = n * self.m4 / self.m2 ** 2 - 3
+        return ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+
+    def describir(self):
+        """Equivalente a ``Series.describe()`` (cuartiles aproximados con el sketch)"""
+        if self.es_numerica():
+            q1, mediana, q3 = self.sketch.cuantiles(PERCENTILES)
+            return pd.Series({
+                'count': float(self.n),
+                'mean': self.media if self.n else np.nan,
+                'std': self.desviacion(),
+                'min': self.minimo if self.n else np.nan,
+                '25%': q1,
+                '50%': mediana,
+                '75%': q3,
+                'max': self.maximo if self.n else np.nan
+            }, name=self.nombre)
+        top, frecuencia = self.frecuencias.most_common(1)[0] if self.frecuencias else (np.nan, np.nan)
+        return pd.Series({
+            'count': self.filas - self.nulos,
+            'unique': len(self.frecuencias) if not self.frecuencias_truncadas else f'>{LIMITE_CATEGORIAS}',
+            'top': top,
+            'freq': frecuencia
+        }, name=self.nombre, dtype=object)
+
+    def estadisticas_caja(self):
+        """
+        Estadísticas para ``Axes.bxp``: cuartiles del sketch, bigotes en el dato más extremo
+        dentro de 1.5·IQR (buscado en la muestra, acotado por el mínimo/máximo exactos) y
+        atípicos tomados de la muestra de reservorio.
+        """
+        q1, mediana, q3 = self.sketch.cuantiles(PERCENTILES)
+        iqr = q3 - q1
+        limite_inferior, limite_superior = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+        muestra = self.muestra.valores
+        dentro = muestra[(muestra >= limite_inferior) & (muestra <= limite_superior)]
+        bigote_inferior = self.minimo if self.minimo >= limite_inferior else (dentro.min() if len(dentro) else q1)
+        bigote_superior = self.maximo if self.maximo <= limite_superior else (dentro.max() if len(dentro) else q3)
+        atipicos = muestra[(muestra < limite_inferior) | (muestra > limite_superior)]
+        # Los extremos exactos se agregan aunque no hayan quedado en la muestra
+        extremos = [v for v in (self.minimo, self.maximo) if v < limite_inferior or v > limite_superior]
+        return {
+            'label': self.nombre,
+            'med': mediana,
+            'q1': q1,
+            'q3': q3,
+            'whislo': min(bigote_inferior, q1),
+            'whishi': max(bigote_superior, q3),
+            'fliers': np.unique(np.concatenate([atipicos, extremos])),
+            'mean': self.media
+        }
+
+    def a_dict(self):
+        datos = {
+            'tipo': str(self.tipo()),
+            'filas': self.filas,
+            'nulos': self.nulos
+        }
+        if self.es_numerica():
+            descripcion = self.describir()
+            datos.update({clave: float(valor) for clave, valor in descripcion.items()})
+            datos.update({
+                'asimetria': float(self.asimetria()),
+                'curtosis': float(self.curtosis()),
+                'elementos_sketch': self.sketch.tamano(),
+                'tamano_muestra': len(self.muestra.valores)
+            })
+        else:
+            datos['mas_frecuentes'] = dict(self.frecuencias.most_common(10))
+            datos['frecuencias_truncadas'] = self.frecuencias_truncadas
+        return datos
+
+
+class PerfilStreaming:
+    """
+    Perfil de un CSV calculado en una pasada por bloques.
+
+    Args:
+        tamano_bloque (int): filas por bloque leído
+        k_sketch (int): precisión del sketch de cuantiles
+        tamano_muestra (int): valores por columna en la muestra de reservorio
+        columna_valor (str): columna numérica a agregar por grupo (p. ej. costo)
+        agrupar_por (list): columnas de grupo para ``agregados``
+        semilla (int): semilla de muestreo y compactación (resultados reproducibles)
+    """
+
+    def __init__(self, tamano_bloque=200_000, k_sketch=200, tamano_muestra=10_000,
+                 columna_valor=None, agrupar_por=(), semilla=2025):
+        self.tamano_bloque = tamano_bloque
+        self.k_sketch = k_sketch
+        self.tamano_muestra = tamano_muestra
+        self.columna_valor = columna_valor
+        self.agrupar_por = list(agrupar_por)
+        self.rng = np.random.default_rng(semilla)
+        self.columnas = {}
+        self.filas = 0
+        self.bloques = 0
+        self._grupos = {}
+
+    def procesar(self, ruta, **kwargs_lectura):
+        """Lee ``ruta`` por bloques y acumula el perfil; retorna ``self``"""
+        for bloque in pd.read_csv(ruta, chunksize=self.tamano_bloque, **kwargs_lectura):
+            self.actualizar(bloque)
+        return self
+
+    def actualizar(self, bloque):
+        """Agrega un bloque (DataFrame) al perfil"""
+        self.filas += len(bloque)
+        self.bloques += 1
+        for columna in bloque.columns:
+            if columna not in self.columnas:
+                self.columnas[columna] = EstadisticasColumna(columna, self.k_sketch, self.tamano_muestra, self.rng)
+            self.columnas[columna].actualizar(bloque[columna])
+
+        if self.columna_valor in bloque.columns:
+            for grupo in self.agrupar_por:
+                if grupo not in bloque.columns:
+                    continue
+                parcial = (bloque.dropna(subset=[grupo, self.columna_valor])
+                           .groupby(grupo)[self.columna_valor].agg(['sum', 'count']))
+                previo = self._grupos.get(grupo)
+                self._grupos[grupo] = parcial if previo is None else previo.add(parcial, fill_value=0)
+
+    def tipos(self):
+        return pd.Series({nombre: c.tipo() for nombre, c in self.columnas.items()}, dtype=object)
+
+    def nulos(self):
+        return pd.Series({nombre: c.nulos for nombre, c in self.columnas.items()})
+
+    def numericas(self):
+        return [nombre for nombre, c in self.columnas.items() if c.es_numerica()]
+
+    def describir(self):
+        """Equivalente a ``df.describe()`` (más asimetría y curtosis)"""
+        tabla = pd.DataFrame({nombre: self.columnas[nombre].describir() for nombre in self.numericas()})
+        if not tabla.empty:
+            tabla.loc['skew'] = [self.columnas[c].asimetria() for c in tabla.columns]
+            tabla.loc['kurt'] = [self.columnas[c].curtosis() for c in tabla.columns]
+        return tabla
+
+    def describir_columna(self, columna):
+        return self.columnas[columna].describir()
+
+    def agregados(self, grupo):
+        """Media, suma y conteo de ``columna_valor`` por ``grupo``, ordenados por suma"""
+        parcial = self._grupos.get(grupo)
+        if parcial is None:
+            return pd.DataFrame(columns=['mean', 'sum', 'count'])
+        tabla = pd.DataFrame({
+            'mean': parcial['sum'] / parcial['count'],
+            'sum': parcial['sum'],
+            'count': parcial['count'].astype(np.int64)
+        })
+        tabla.index.name = grupo
+        return tabla.sort_values('sum', ascending=False)
+
+    def histograma(self, columna, barras=50):
+        estadisticas = self.columnas[columna]
+        return estadisticas.histograma.reagrupar(barras, estadisticas.minimo, estadisticas.maximo)
+
+    def graficar_histograma(self, ax, columna, barras=50):
+        """Histograma de la columna a partir del histograma acumulado"""
+        conteos, bordes = self.histograma(columna, barras)
+        ax.stairs(conteos, bordes, fill=True, alpha=0.75)
+
+    def graficar_caja(self, ax, columna):
+        """Box plot a partir del sketch de cuantiles y la muestra de reservorio"""
+        ax.bxp([self.columnas[columna].estadisticas_caja()], showfliers=True)
+
+    def a_dict(self):
+        return {
+            'filas': self.filas,
+            'bloques': self.bloques,
+            'tamano_bloque': self.tamano_bloque,
+            'columnas': {nombre: c.a_dict() for nombre, c in self.columnas.items()}
+        }
+
+
+class PerfilAgrupado:
+    """
+    Perfiles numéricos por grupo calculados en la misma pasada por bloques.
+
+    Cada conjunto de agrupación es una tupla de dimensiones (``()`` = total, ``('mes',)``,
+    ``('mes', 'servicio_origen')``, ...). La dimensión ``mes`` se deriva de ``columna_fecha``;
+    las demás son columnas del archivo. Por grupo y columna numérica se guardan conteos,
+    momentos y cuantiles del sketch.
+
+    Args:
+        conjuntos (list): conjuntos de agrupación
+        columna_fecha (str): columna de fecha para la dimensión ``mes``
+        columnas (list): columnas numéricas a perfilar (por defecto las numéricas del primer bloque)
+        k_sketch (int): precisión de los sketches por grupo
+        semilla (int): semilla de las compactaciones
+    """
+
+    def __init__(self, conjuntos, columna_fecha=None, columnas=None, k_sketch=100, semilla=2025):
+        self.conjuntos = [tuple(conjunto) for conjunto in conjuntos]
+        self.columna_fecha = columna_fecha
+        self.columnas = columnas
+        self.k_sketch = k_sketch
+        self.rng = np.random.default_rng(semilla)
+        self.grupos = {}
+        self.dimensiones = []
+        for conjunto in self.conjuntos:
+            self.dimensiones.extend(d for d in conjunto if d not in self.dimensiones)
+
+    def _claves(self, bloque):
+        """Serie de etiquetas por dimensión disponible en el bloque"""
+        claves = {}
+        for dimension in self.dimensiones:
+            if dimension == 'mes':
+                if self.columna_fecha not in bloque.columns:
+                    continue
+                fechas = pd.to_datetime(bloque[self.columna_fecha], errors='coerce')
+                claves['mes'] = fechas.dt.strftime('%Y-%m').fillna(SIN_DATO)
+            elif dimension in bloque.columns:
+                claves[dimension] = bloque[dimension].astype(object).where(bloque[dimension].notna(), SIN_DATO).astype(str)
+        return claves
+
+    def actualizar(self, bloque):
+        """Agrega un bloque a los perfiles de todos los grupos"""
+        if self.columnas is None:
+            excluidas = set(self.dimensiones) | {self.columna_fecha}
+            self.columnas = [
+                c for c in bloque.columns
+                if c not in excluidas and pd.api.types.is_numeric_dtype(bloque[c].dtype)
+                and not pd.api.types.is_bool_dtype(bloque[c].dtype)
+            ]
+        columnas = [c for c in self.columnas if c in bloque.columns]
+        valores = {c: bloque[c].to_numpy() for c in columnas}
+        claves = self._claves(bloque)
+
+        for conjunto in self.conjuntos:
+            if not all(d in claves for d in conjunto):
+                continue
+            if conjunto:
+                indices = bloque.groupby([claves[d] for d in conjunto], sort=False).indices
+            else:
+                indices = {(): np.arange(len(bloque))}
+            for clave, posiciones in indices.items():
+                clave = clave if isinstance(clave, tuple) else (clave,)
+                estadisticas = self.grupos.setdefault((conjunto, clave), {})
+                for columna in columnas:
+                    if columna not in estadisticas:
+                        estadisticas[columna] = EstadisticasColumna(
+                            columna, self.k_sketch, tamano_muestra=0, rng=self.rng, barras_histograma=0
+                        )
+                    estadisticas[columna].actualizar(pd.Series(valores[columna][posiciones]))
+
+    def tabla(self):
+        """
+        Perfiles en formato largo: una fila por conjunto, grupo y columna.
+
+        Las dimensiones que no forman parte del conjunto quedan vacías (como ``GROUPING SETS``).
+        """
+        filas = []
+        for (conjunto, clave), estadisticas in self.grupos.items():
+            base = {'conjunto': '×'.join(conjunto) or 'total'}
+            base.update({dimension: None for dimension in self.dimensiones})
+            base.update(dict(zip(conjunto, clave)))
+            for columna, e in estadisticas.items():
+                cuantiles = e.sketch.cuantiles(list(CUANTILES_PERFIL.values()))
+                fila = dict(base)
+                fila.update({
+                    'columna': columna,
+                    'filas': e.filas,
+                    'nulos': e.nulos,
+                    'n': e.n,
+                    'suma': e.media * e.n,
+                    'media': e.media if e.n else np.nan,
+                    'desviacion': e.desviacion(),
+                    'minimo': e.minimo if e.n else np.nan,
+                    'maximo': e.maximo if e.n else np.nan,
+                    'asimetria': e.asimetria(),
+                    'curtosis': e.curtosis()
+                })
+                fila.update(dict(zip(CUANTILES_PERFIL, cuantiles)))
+                filas.append(fila)
+        tabla = pd.DataFrame(filas)
+        for columna in ['conjunto', 'columna'] + self.dimensiones:
+            if columna in tabla.columns:
+                tabla[columna] = tabla[columna].astype('category')
+        return tabla
+
+    def consultar(self, conjunto, columna):
+        """Perfiles de un conjunto (p. ej. ``('mes',)``) para una columna, ordenados por grupo"""
+        conjunto = tuple(conjunto)
+        tabla = self.tabla()
+        seleccion = tabla[(tabla['conjunto'] == ('×'.join(conjunto) or 'total')) & (tabla['columna'] == columna)]
+        return seleccion.sort_values(list(conjunto)) if conjunto else seleccion
+
+
+def guardar_perfiles(tablas, ruta):
+    """
+    Escribe los perfiles por grupo de uno o más archivos en un solo Parquet.
+
+    Args:
+        tablas (dict): nombre de archivo ('detalle', 'resumen') -> ``PerfilAgrupado.tabla()``
+        ruta (str): archivo .parquet de salida
+
+    Returns:
+        int: bytes escritos (0 si pyarrow no está disponible)
+    """
+    if not PARQUET_DISPONIBLE:
+        print("⚠ pyarrow no disponible, no se guarda el artefacto de perfiles")
+        return 0
+    partes = []
+    for archivo, tabla in tablas.items():
+        parte = tabla.copy()
+        parte.insert(0, 'archivo', archivo)
+        partes.append(parte)
+    perfiles = pd.concat(partes, ignore_index=True)
+    for columna in perfiles.columns:
+        if perfiles[columna].dtype == object:
+            perfiles[columna] = perfiles[columna].astype('category')
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    perfiles.to_parquet(ruta, index=False, compression='zstd')
+    return os.path.getsize(ruta)
@@ -0,0 +1,169 @@
+"""
+Generación de gráficas del EDA con datos precalculados, caché por huella y procesos en paralelo.
+
+Cada figura se describe con datos ya agregados (conteos del histograma, estadísticas de la
+caja, top-10 por grupo), de tamaño fijo e independientes del número de registros. La huella
+de una figura es el hash de esa descripción: si coincide con la registrada para el PNG
+existente, la figura no se vuelve a dibujar. Las figuras pendientes se dibujan en procesos
+separados con el backend no interactivo ``Agg``.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+VERSION_GRAFICOS = 1
+ARCHIVO_HUELLAS = 'huellas_graficos.json'
+# Atípicos de la muestra que se dibujan en un box plot
+MAXIMO_ATIPICOS = 2000
+
+
+def panel_histograma(perfil, columna, titulo, xlabel, ylabel='Frecuencia', barras=50):
+    """Panel de histograma a partir del histograma acumulado de un ``PerfilStreaming``"""
+    conteos, bordes = perfil.histograma(columna, barras)
+    return {
+        'tipo': 'histograma',
+        'titulo': titulo, 'xlabel': xlabel, 'ylabel': ylabel,
+        'conteos': [int(c) for c in conteos],
+        'bordes': [float(b) for b in bordes]
+    }
+
+
+def panel_caja(perfil, columna, titulo, ylabel):
+    """Panel de box plot a partir del sketch de cuantiles y la muestra de reservorio"""
+    estadisticas = perfil.columnas[columna].estadisticas_caja()
+    atipicos = np.sort(estadisticas['fliers'])
+    if len(atipicos) > MAXIMO_ATIPICOS:
+        atipicos = atipicos[np.linspace(0, len(atipicos) - 1, MAXIMO_ATIPICOS).astype(int)]
+    estadisticas = {clave: float(valor) for clave, valor in estadisticas.items() if clave not in ('fliers', 'label')}
+    estadisticas['fliers'] = [float(v) for v in atipicos]
+    return {'tipo': 'caja', 'titulo': titulo, 'ylabel': ylabel, 'estadisticas': estadisticas}
+
+
+def panel_barras(tabla, columna_valor, titulo, xlabel, ylabel, top=10):
+    """Panel de barras horizontales con las primeras ``top`` filas de una tabla agregada"""
+    tabla = tabla.head(top)
+    return {
+        'tipo': 'barras',
+        'titulo': titulo, 'xlabel': xlabel, 'ylabel': ylabel,
+        'etiquetas': [str(e) for e in tabla.index],
+        'valores': [float(v) for v in tabla[columna_valor]]
+    }
+
+
+def figura(nombre, paneles, tamano=(15, 10), filas=1, columnas=None):
+    """Descripción de una figura: ``nombre`` del PNG y paneles en una cuadrícula"""
+    return {
+        'nombre': nombre,
+        'tamano': list(tamano),
+        'filas': filas,
+        'columnas': columnas or len(paneles),
+        'paneles': paneles
+    }
+
+
+def huella_figura(descripcion):
+    """Hash de la descripción de la figura (datos precalculados y formato)"""
+    contenido = json.dumps({'version': VERSION_GRAFICOS, 'figura': descripcion}, sort_keys=True)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _dibujar_panel(ax, panel):
+    if panel['tipo'] == 'histograma':
+        ax.stairs(panel['conteos'], panel['bordes'], fill=True, alpha=0.75)
+    elif panel['tipo'] == 'caja':
+        ax.bxp([panel['estadisticas']], showfliers=True)
+    elif panel['tipo'] == 'barras':
+        ax.barh(panel['etiquetas'], panel['valores'])
+        ax.invert_yaxis()
+    ax.set_title(panel['titulo'])
+    ax.set_xlabel(panel.get('xlabel', ''))
+    ax.set_ylabel(panel.get('ylabel', ''))
+
+
+def _renderizar(trabajo):
+    """Dibuja una figura en el proceso de trabajo (backend Agg) y la guarda como PNG"""
+    descripcion, ruta = trabajo
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    inicio = time.perf_counter()
+    fig, ejes = plt.subplots(descripcion['filas'], descripcion['columnas'],
+                             figsize=descripcion['tamano'], squeeze=False)
+    ejes = ejes.ravel()
+    for ax, panel in zip(ejes, descripcion['paneles']):
+        _dibujar_panel(ax, panel)
+    for ax in ejes[len(descripcion['paneles']):]:
+        ax.axis('off')
+    fig.tight_layout()
+    ruta_temporal = ruta + '.tmp.png'
+    fig.savefig(ruta_temporal)
+    plt.close(fig)
+    os.replace(ruta_temporal, ruta)
+    return round(time.perf_counter() - inicio, 4)
+
+
+def _cargar_huellas(directorio):
+    try:
+        with open(os.path.join(directorio, ARCHIVO_HUELLAS), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_huellas(directorio, huellas):
+    with open(os.path.join(directorio, ARCHIVO_HUELLAS), 'w', encoding='utf-8') as f:
+        json.dump(huellas, f, indent=2, sort_keys=True)
+
+
+def renderizar_figuras(figuras, directorio, max_procesos=None, forzar=False):
+    """
+    Dibuja las figuras cuyo PNG no existe o cuya huella cambió.
+
+    Args:
+        figuras (list): descripciones creadas con ``figura``
+        directorio (str): carpeta de salida de los PNG
+        max_procesos (int): procesos de trabajo; con 1 se dibuja en el proceso actual
+        forzar (bool): dibujar aunque la huella coincida
+
+    Returns:
+        list: ``{'nombre', 'ruta', 'estado' ('cache' | 'renderizado'), 'duracion_s'}`` por figura
+    """
+    os.makedirs(directorio, exist_ok=True)
+    huellas = _cargar_huellas(directorio)
+    resultados = []
+    pendientes = []
+    for descripcion in figuras:
+        ruta = os.path.join(directorio, f"{descripcion['nombre']}.png")
+        huella = huella_figura(descripcion)
+        resultado = {'nombre': descripcion['nombre'], 'ruta': ruta, 'huella': huella}
+        if not forzar and huellas.get(descripcion['nombre']) == huella and os.path.exists(ruta):
+            resultado.update(estado='cache', duracion_s=0.0)
+        else:
+            pendientes.append((resultado, (descripcion, ruta)))
+        resultados.append(resultado)
+
+    trabajos = [trabajo for _, trabajo in pendientes]
+    if max_procesos is None:
+        max_procesos = min(len(trabajos), os.cpu_count() or 1)
+    if max_procesos <= 1 or len(trabajos) <= 1:
+        duraciones = [_renderizar(trabajo) for trabajo in trabajos]
+    else:
+        try:
+            with ProcessPoolExecutor(max_workers=max_procesos) as ejecutor:
+                duraciones = list(ejecutor.map(_renderizar, trabajos))
+        except (OSError, RuntimeError) as e:
+            print(f"⚠ Dibujo en paralelo no disponible ({e}); dibujando secuencialmente")
+            duraciones = [_renderizar(trabajo) for trabajo in trabajos]
+
+    for (resultado, _), duracion in zip(pendientes, duraciones):
+        resultado.update(estado='renderizado', duracion_s=duracion)
+        huellas[resultado['nombre']] = resultado['huella']
+    if pendientes:
+        _guardar_huellas(directorio, huellas)
+    return resultados
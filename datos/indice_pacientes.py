@@ -0,0 +1,248 @@
+"""
+Índice de trayectorias por paciente sobre el detalle de cargos.
+
+Obtener los cargos de un paciente con el Parquet del detalle exige leer el archivo completo. Este
+índice guarda, junto al caché columnar:
+
+- ``trayectorias.arrow``: las columnas de la trayectoria (``paciente``, ``fecha``, ``clave``,
+  ``descripcion``, ``area_servicio``, ``cantidad``, ``monto_nivel_6``) ordenadas por paciente y
+  fecha, en formato Arrow IPC sin compresión;
+- ``trayectorias.indice.arrow``: una fila por paciente con la fila inicial y el número de cargos;
+- ``trayectorias.origen.json``: el archivo fuente (tamaño y fecha) y la huella del código de
+  limpieza, como las tablas del caché.
+
+``IndicePacientes`` abre ambos archivos con ``memory_map``: abrir el índice no lee los cargos, y la
+trayectoria de un paciente (o de un lote) es un rango contiguo que se obtiene con una búsqueda
+binaria en la tabla de desplazamientos, en tiempo proporcional a las filas devueltas.
+
+Uso:
+    python datos/indice_pacientes.py 265 752
+    python datos/indice_pacientes.py --construir
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    ARROW_DISPONIBLE = True
+except ImportError:
+    ARROW_DISPONIBLE = False
+
+from cache_columnar import huella_archivo
+
+NOMBRE_INDICE = 'trayectorias'
+COLUMNAS_TRAYECTORIA = ['paciente', 'fecha', 'clave', 'descripcion', 'area_servicio', 'cantidad', 'monto_nivel_6']
+
+
+def _rutas(ruta_cache):
+    return {
+        'cargos': os.path.join(ruta_cache, f'{NOMBRE_INDICE}.arrow'),
+        'indice': os.path.join(ruta_cache, f'{NOMBRE_INDICE}.indice.arrow'),
+        'origen': os.path.join(ruta_cache, f'{NOMBRE_INDICE}.origen.json')
+    }
+
+
+def _clave_paciente(serie):
+    """Identificador de paciente como entero si todos lo son (búsqueda sin copiar), si no como texto"""
+    numeros = pd.to_numeric(serie, errors='coerce')
+    if numeros.notna().sum() == serie.notna().sum() and (numeros.dropna() % 1 == 0).all():
+        return numeros.astype('Int64')
+    return serie.astype('string')
+
+
+def _escribir_arrow(tabla, ruta):
+    temporal = f'{ruta}.tmp'
+    with pa.OSFile(temporal, 'wb') as archivo:
+        with ipc.new_file(archivo, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+    os.replace(temporal, ruta)
+
+
+def guardar_indice(df_detalle, ruta_cache, origen=None, codigo=None):
+    """
+    Ordena el detalle por paciente y fecha y persiste los cargos y la tabla de desplazamientos.
+
+    Args:
+        df_detalle (DataFrame): detalle limpio (columnas categóricas ya codificadas)
+        ruta_cache (str): directorio del caché columnar
+        origen (str): archivo fuente del detalle
+        codigo (str): huella del código de limpieza del detalle
+
+    Returns:
+        dict: pacientes y cargos indexados, o None si no se pudo construir
+    """
+    if not ARROW_DISPONIBLE:
+        print("⚠ pyarrow no disponible, no se guarda el índice de trayectorias")
+        return None
+    if df_detalle is None or 'paciente' not in df_detalle.columns:
+        return None
+
+    columnas = [c for c in COLUMNAS_TRAYECTORIA if c in df_detalle.columns]
+    cargos = df_detalle[columnas].copy()
+    cargos['paciente'] = _clave_paciente(cargos['paciente'])
+    if 'fecha' in cargos.columns:
+        cargos['fecha'] = pd.to_datetime(cargos['fecha'], errors='coerce')
+    # Los cargos sin paciente no se pueden consultar
+    cargos = cargos[cargos['paciente'].notna()]
+    orden = ['paciente', 'fecha'] if 'fecha' in cargos.columns else ['paciente']
+    cargos = cargos.sort_values(orden, kind='stable').reset_index(drop=True)
+
+    # Sin nulos ya: las claves enteras se comparan como int64 y no como objetos de Python
+    claves = cargos['paciente'].to_numpy('int64') if cargos['paciente'].dtype == 'Int64' else cargos['paciente'].to_numpy()
+    pacientes, inicio, filas = np.unique(claves, return_index=True, return_counts=True)
+    indice = pa.table({
+        'paciente': pa.array(pacientes),
+        'inicio': pa.array(inicio.astype(np.int64)),
+        'filas': pa.array(filas.astype(np.int64))
+    })
+
+    os.makedirs(ruta_cache, exist_ok=True)
+    rutas = _rutas(ruta_cache)
+    _escribir_arrow(pa.Table.from_pandas(cargos, preserve_index=False), rutas['cargos'])
+    _escribir_arrow(indice, rutas['indice'])
+    metadatos = {'origen': huella_archivo(origen), 'codigo': codigo, 'pacientes': int(len(pacientes)),
+                 'filas': int(len(cargos))}
+    with open(f"{rutas['origen']}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, ensure_ascii=False)
+    os.replace(f"{rutas['origen']}.tmp", rutas['origen'])
+    return metadatos
+
+
+def abrir_indice(ruta_cache, origen=None, codigo=None):
+    """
+    Abre el índice si existe y corresponde al archivo fuente y al código de limpieza.
+
+    Returns:
+        IndicePacientes: o None si falta, está desactualizado o no hay pyarrow
+    """
+    rutas = _rutas(ruta_cache)
+    if not ARROW_DISPONIBLE or not all(os.path.exists(r) for r in rutas.values()):
+        return None
+    if origen is not None or codigo is not None:
+        with open(rutas['origen'], 'r', encoding='utf-8') as f:
+            metadatos = json.load(f)
+        if origen is not None and metadatos.get('origen') != huella_archivo(origen):
+            return None
+        if codigo is not None and metadatos.get('codigo') != codigo:
+            return None
+    return IndicePacientes(ruta_cache)
+
+
+class IndicePacientes:
+    """
+    Trayectorias de cargos por paciente, con los archivos Arrow mapeados en memoria.
+
+    Args:
+        ruta_cache (str): directorio del caché columnar con ``trayectorias.arrow``
+    """
+
+    def __init__(self, ruta_cache):
+        rutas = _rutas(ruta_cache)
+        # Sin compresión, las columnas son vistas del archivo mapeado (no se copian al abrir)
+        self.cargos = ipc.open_file(pa.memory_map(rutas['cargos'], 'r')).read_all()
+        indice = ipc.open_file(pa.memory_map(rutas['indice'], 'r')).read_all()
+        self.pacientes = indice.column('paciente').to_numpy()
+        self._inicio = indice.column('inicio').to_numpy()
+        self._filas = indice.column('filas').to_numpy()
+        self._numerico = pa.types.is_integer(indice.schema.field('paciente').type)
+
+    def __len__(self):
+        return len(self.pacientes)
+
+    def __contains__(self, paciente):
+        return self._posiciones([paciente])[0] >= 0
+
+    def _posiciones(self, pacientes):
+        """Posición de cada paciente en la tabla de desplazamientos (-1 si no tiene cargos)"""
+        if self._numerico:
+            claves = pd.to_numeric(pd.Series(list(pacientes), dtype=object), errors='coerce').to_numpy(dtype=float)
+            validas = ~np.isnan(claves) & (claves % 1 == 0)
+            claves = np.where(validas, claves, 0).astype(np.int64)
+        else:
+            claves = np.array([str(p) for p in pacientes], dtype=object)
+            validas = np.ones(len(claves), dtype=bool)
+        if len(self.pacientes) == 0:
+            return np.full(len(claves), -1)
+        posiciones = np.minimum(np.searchsorted(self.pacientes, claves), len(self.pacientes) - 1)
+        encontrado = validas & (self.pacientes[posiciones] == claves)
+        return np.where(encontrado, posiciones, -1)
+
+    def filas(self, paciente):
+        """Número de cargos de un paciente"""
+        posicion = self._posiciones([paciente])[0]
+        return int(self._filas[posicion]) if posicion >= 0 else 0
+
+    def trayectoria(self, paciente):
+        """Cargos de un paciente ordenados por fecha (DataFrame vacío si no tiene)"""
+        posicion = self._posiciones([paciente])[0]
+        if posicion < 0:
+            return self.cargos.slice(0, 0).to_pandas()
+        return self.cargos.slice(int(self._inicio[posicion]), int(self._filas[posicion])).to_pandas()
+
+    def trayectorias(self, pacientes):
+        """
+        Cargos de un lote de pacientes, en el orden solicitado y cada uno ordenado por fecha.
+
+        Los rangos de todos los pacientes se convierten en un solo arreglo de filas y se toman con
+        un ``take``; los pacientes sin cargos se omiten.
+        """
+        posiciones = self._posiciones(pacientes)
+        posiciones = posiciones[posiciones >= 0]
+        inicio, filas = self._inicio[posiciones], self._filas[posiciones]
+        total = int(filas.sum())
+        desplazamiento = np.arange(total) - np.repeat(np.cumsum(filas) - filas, filas)
+        return self.cargos.take(pa.array(np.repeat(inicio, filas) + desplazamiento)).to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trayectorias de cargos por paciente (índice mapeado en memoria)')
+    parser.add_argument('pacientes', nargs='*', help='Identificadores de paciente')
+    parser.add_argument('--ruta-base', default='proyecto_final')
+    parser.add_argument('--construir', action='store_true', help='Reconstruir el índice desde cache_columnar/detalle.parquet')
+    args = parser.parse_args()
+
+    if not ARROW_DISPONIBLE:
+        print("❌ pyarrow no está instalado (pip install pyarrow)")
+        return 1
+
+    ruta_cache = f'{args.ruta_base}/datos/cache_columnar'
+    if args.construir:
+        ruta_detalle = os.path.join(ruta_cache, 'detalle.parquet')
+        if not os.path.exists(ruta_detalle):
+            print(f"❌ No existe {ruta_detalle}; ejecutar procesar_datos_avanzado.py")
+            return 1
+        with open(os.path.join(ruta_cache, 'detalle.origen.json'), 'r', encoding='utf-8') as f:
+            metadatos_detalle = json.load(f)
+        origen = (metadatos_detalle.get('origen') or {}).get('ruta')
+        inicio = time.perf_counter()
+        metadatos = guardar_indice(pd.read_parquet(ruta_detalle), ruta_cache, origen, metadatos_detalle.get('codigo'))
+        print(f"✓ Índice de trayectorias: {metadatos['pacientes']:,} pacientes, {metadatos['filas']:,} cargos "
+              f"({time.perf_counter() - inicio:.2f} s)")
+
+    indice = abrir_indice(ruta_cache)
+    if indice is None:
+        print(f"⚠ No hay índice de trayectorias en {ruta_cache}; usar --construir")
+        return 1
+    print(f"📇 {len(indice):,} pacientes, {indice.cargos.num_rows:,} cargos")
+
+    for paciente in args.pacientes:
+        inicio = time.perf_counter()
+        cargos = indice.trayectoria(paciente)
+        milisegundos = (time.perf_counter() - inicio) * 1000
+        total = cargos['monto_nivel_6'].sum() if 'monto_nivel_6' in cargos.columns else 0
+        print(f"\n👤 Paciente {paciente}: {len(cargos):,} cargo(s), monto nivel 6 ${total:,.2f} ({milisegundos:.2f} ms)")
+        if len(cargos):
+            print(cargos.to_string(index=False, max_rows=20))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
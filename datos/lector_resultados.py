@@ -0,0 +1,235 @@
+"""
+Almacén de resultados con índice de secciones para metricas_completas.json.
+
+El JSON de resultados se escribe sección por sección (claves de primer nivel) y junto
+a él un índice ``metricas_completas.json.idx`` con el rango de bytes de cada sección.
+Los lectores abren solo las secciones que usan: ``LectorResultados`` se comporta como
+un diccionario de solo lectura que carga cada sección en su primer acceso y la guarda
+en memoria del proceso. Si el índice no existe o no corresponde al archivo (tamaño o
+fecha de modificación distintos), se reconstruye con un recorrido del archivo que no
+decodifica los valores.
+
+El lector conserva abierto el archivo que indexó: si después se publica una versión nueva
+(``os.replace``), sigue leyendo la versión que abrió, con los desplazamientos de su índice.
+``abrir_resultados`` entrega un lector nuevo cuando el archivo cambia.
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+from collections.abc import Mapping
+
+VERSION_INDICE = 1
+EXTENSION_INDICE = '.idx'
+
+# Cadenas JSON completas (con escapes) y caracteres estructurales
+_TOKENS_JSON = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\],:]', re.DOTALL)
+_ESPACIOS = b' \t\r\n'
+
+
+def ruta_indice(ruta):
+    return ruta + EXTENSION_INDICE
+
+
+def _firma(ruta):
+    """Tamaño y fecha de modificación del archivo (ruta o archivo abierto), para validar el índice"""
+    estado = os.fstat(ruta.fileno()) if hasattr(ruta, 'fileno') else os.stat(ruta)
+    return [estado.st_size, estado.st_mtime_ns]
+
+
+def _guardar_indice(ruta, secciones, firma=None):
+    indice = {'version': VERSION_INDICE, 'firma': firma or _firma(ruta), 'secciones': secciones}
+    try:
+        with open(ruta_indice(ruta), 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False)
+    except OSError:
+        # Directorio de solo lectura: el índice se reconstruye en cada proceso
+        pass
+
+
+def _cargar_indice(ruta, firma=None):
+    """Índice guardado si corresponde al archivo actual (o a ``firma``), o None"""
+    try:
+        with open(ruta_indice(ruta), 'r', encoding='utf-8') as f:
+            indice = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if indice.get('version') != VERSION_INDICE or indice.get('firma') != (firma or _firma(ruta)):
+        return None
+    return indice['secciones']
+
+
+def escribir_resultados(ruta, datos):
+    """
+    Escribe el diccionario de resultados como JSON, una sección a la vez, y su índice.
+
+    El archivo sigue siendo JSON estándar (``json.load`` lo lee completo sin cambios). Se escribe
+    en un temporal que reemplaza al anterior, así que un lector nunca ve un archivo a medias.
+
+    Args:
+        ruta (str): archivo .json de salida
+        datos (dict): resultados con secciones de primer nivel
+    """
+    secciones = {}
+    temporal = f'{ruta}.tmp'
+    with open(temporal, 'wb') as f:
+        f.write(b'{')
+        for i, (clave, valor) in enumerate(datos.items()):
+            f.write((',\n  ' if i else '\n  ').encode('utf-8'))
+            f.write(f'{json.dumps(str(clave), ensure_ascii=False)}: '.encode('utf-8'))
+            inicio = f.tell()
+            f.write(json.dumps(valor, indent=2, ensure_ascii=False, default=str).encode('utf-8'))
+            secciones[str(clave)] = [inicio, f.tell()]
+        f.write(b'\n}\n')
+    os.replace(temporal, ruta)
+    _guardar_indice(ruta, secciones)
+
+
+def publicar_archivo(origen, destino):
+    """Copia ``origen`` a la ruta ``destino`` con un reemplazo atómico (el lector ve la versión anterior o la nueva)"""
+    temporal = f'{destino}.tmp'
+    shutil.copy2(origen, temporal)
+    os.replace(temporal, destino)
+
+
+def copiar_resultados(origen, destino_dir):
+    """Publica el JSON de resultados y su índice en otro directorio (``copy2`` conserva la firma)"""
+    publicar_archivo(origen, os.path.join(destino_dir, os.path.basename(origen)))
+    if os.path.exists(ruta_indice(origen)):
+        publicar_archivo(ruta_indice(origen), os.path.join(destino_dir, os.path.basename(ruta_indice(origen))))
+
+
+def indexar_archivo(ruta):
+    """
+    Rango de bytes de cada sección de primer nivel, recorriendo solo la estructura del JSON.
+
+    Returns:
+        dict: clave -> [inicio, fin]
+    """
+    with open(ruta, 'rb') as f:
+        return _indexar_contenido(f.read())
+
+
+def _indexar_contenido(contenido):
+    secciones = {}
+    profundidad = 0
+    clave = None
+    inicio = None
+
+    def cerrar(posicion):
+        fin = posicion
+        while fin > inicio and contenido[fin - 1] in _ESPACIOS:
+            fin -= 1
+        secciones[clave] = [inicio, fin]
+
+    for token in _TOKENS_JSON.finditer(contenido):
+        simbolo = token.group()
+        if simbolo[:1] == b'"':
+            if profundidad == 1 and inicio is None:
+                clave = json.loads(simbolo)
+        elif simbolo in (b'{', b'['):
+            profundidad += 1
+        elif simbolo in (b'}', b']'):
+            if profundidad == 1 and inicio is not None:
+                cerrar(token.start())
+                inicio = None
+            profundidad -= 1
+        elif profundidad == 1:
+            if simbolo == b':':
+                inicio = token.end()
+                while contenido[inicio] in _ESPACIOS:
+                    inicio += 1
+            else:  # ','
+                cerrar(token.start())
+                inicio = None
+    return secciones
+
+
+class LectorResultados(Mapping):
+    """
+    Lectura perezosa de metricas_completas.json por secciones.
+
+    Se usa como un diccionario de solo lectura: ``lector['metricas_principales']``,
+    ``lector.get('alertas', [])`` o ``lector.obtener('machine_learning.resumen_modelos')``.
+    Solo se leen del disco las secciones consultadas, siempre del archivo abierto al crear el
+    lector (la firma y el índice corresponden a él aunque la ruta se reemplace después).
+
+    Args:
+        ruta (str): archivo de resultados
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = open(ruta, 'rb')
+        self._candado = threading.Lock()
+        self.firma = _firma(self._archivo)
+        secciones = _cargar_indice(ruta, self.firma)
+        if secciones is None:
+            secciones = _indexar_contenido(self._archivo.read())
+            _guardar_indice(ruta, secciones, self.firma)
+        self._indice = secciones
+        self._secciones = {}
+
+    def __getitem__(self, clave):
+        if clave not in self._secciones:
+            inicio, fin = self._indice[clave]
+            with self._candado:
+                self._archivo.seek(inicio)
+                contenido = self._archivo.read(fin - inicio)
+            self._secciones[clave] = json.loads(contenido)
+        return self._secciones[clave]
+
+    def __iter__(self):
+        return iter(self._indice)
+
+    def __len__(self):
+        return len(self._indice)
+
+    def __contains__(self, clave):
+        return clave in self._indice
+
+    def obtener(self, ruta_clave, por_defecto=None):
+        """Valor anidado por ruta con puntos (``'machine_learning.resumen_modelos'``)"""
+        primera, *resto = ruta_clave.split('.')
+        if primera not in self:
+            return por_defecto
+        valor = self[primera]
+        for parte in resto:
+            if not isinstance(valor, dict) or parte not in valor:
+                return por_defecto
+            valor = valor[parte]
+        return valor
+
+    def secciones_cargadas(self):
+        return list(self._secciones)
+
+    def a_dict(self):
+        """Carga todas las secciones (equivalente a ``json.load`` del archivo)"""
+        return {clave: self[clave] for clave in self}
+
+    def cerrar(self):
+        self._archivo.close()
+
+    def __del__(self):
+        archivo = getattr(self, '_archivo', None)
+        if archivo is not None:
+            archivo.close()
+
+
+_LECTORES = {}
+
+
+def abrir_resultados(ruta):
+    """
+    Lector de resultados compartido en el proceso.
+
+    Devuelve el mismo lector (con sus secciones ya cargadas) mientras el archivo no cambie.
+    """
+    clave = os.path.abspath(ruta)
+    lector = _LECTORES.get(clave)
+    if lector is None or lector.firma != _firma(ruta):
+        lector = LectorResultados(ruta)
+        _LECTORES[clave] = lector
+    return lector
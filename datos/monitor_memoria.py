@@ -0,0 +1,221 @@
+"""
+Monitor de memoria por etapa para el procesamiento hospitalario.
+
+Registra el RSS (inicio, fin y pico muestreado) de cada etapa del pipeline y el
+tamaño real (``memory_usage(deep=True)``) de los DataFrames en memoria. Permite
+definir un presupuesto de memoria para que las etapas cambien a modo por bloques,
+reducido (downcast) o muestreado antes de agotar la memoria del equipo.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import psutil
+    PSUTIL_DISPONIBLE = True
+except ImportError:
+    PSUTIL_DISPONIBLE = False
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+
+def rss_actual():
+    """RSS actual del proceso en bytes"""
+    if PSUTIL_DISPONIBLE:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # ru_maxrss es el pico de vida del proceso (KB en Linux); es la mejor aproximación disponible
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return 0
+
+
+def memoria_dataframe(df):
+    """Memoria real de un DataFrame en bytes (incluye el contenido de los strings)"""
+    if df is None:
+        return 0
+    return int(df.memory_usage(deep=True).sum())
+
+
+def reducir_dataframe(df, convertir_texto=True, umbral_categoria=0.5):
+    """
+    Reduce la memoria de un DataFrame en sitio.
+
+    Convierte flotantes a float32, enteros al tipo más pequeño que los contiene y,
+    si ``convertir_texto``, columnas de texto con pocos valores distintos a ``category``.
+    """
+    for columna in df.columns:
+        serie = df[columna]
+        if pd.api.types.is_float_dtype(serie.dtype):
+            df[columna] = pd.to_numeric(serie, downcast='float')
+        elif pd.api.types.is_integer_dtype(serie.dtype):
+            df[columna] = pd.to_numeric(serie, downcast='integer')
+        elif convertir_texto and serie.dtype == object and len(serie) > 0:
+            if serie.nunique(dropna=True) / len(serie) < umbral_categoria:
+                df[columna] = serie.astype('category')
+    return df
+
+
+def estimar_memoria_csv(ruta, filas_muestra=5000, **kwargs_lectura):
+    """
+    Estima la memoria que ocupará un CSV cargado con pandas.
+
+    Lee las primeras ``filas_muestra`` filas, mide su memoria real y la extrapola
+    según el tamaño del archivo. Retorna (bytes_estimados, filas_estimadas).
+    """
+    tamano = os.path.getsize(ruta)
+    muestra = pd.read_csv(ruta, nrows=filas_muestra, **kwargs_lectura)
+    if len(muestra) == 0:
+        return 0, 0
+
+    with open(ruta, 'rb') as f:
+        bytes_muestra = sum(len(f.readline()) for _ in range(len(muestra) + 1))
+
+    filas_estimadas = int(tamano / max(1, bytes_muestra) * len(muestra))
+    bytes_por_fila = memoria_dataframe(muestra) / len(muestra)
+    return int(bytes_por_fila * filas_estimadas), filas_estimadas
+
+
+class _MuestreadorRSS(threading.Thread):
+    """Hilo que muestrea el RSS para capturar el pico dentro de una etapa"""
+
+    def __init__(self, intervalo):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.pico = rss_actual()
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.wait(self.intervalo):
+            self.pico = max(self.pico, rss_actual())
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+        self.pico = max(self.pico, rss_actual())
+        return self.pico
+
+
+class MonitorMemoria:
+    """
+    Instrumentación de memoria por etapa con presupuesto opcional.
+
+    El presupuesto se toma del argumento o de la variable de entorno
+    ``PRESUPUESTO_MEMORIA_MB``. Sin presupuesto solo se registran mediciones.
+    """
+
+    def __init__(self, presupuesto_mb=None, intervalo=0.05):
+        if presupuesto_mb is None and os.getenv('PRESUPUESTO_MEMORIA_MB'):
+            presupuesto_mb = float(os.getenv('PRESUPUESTO_MEMORIA_MB'))
+        self.presupuesto_mb = presupuesto_mb
+        self.intervalo = intervalo
+        self.etapas = []
+        self.modos_degradados = []
+        self.rss_inicial_mb = rss_actual() / MB
+
+    @contextmanager
+    def etapa(self, nombre, dataframes=None):
+        """
+        Mide una etapa del pipeline.
+
+        Args:
+            nombre (str): nombre de la etapa
+            dataframes (callable): retorna un dict nombre -> DataFrame a medir al terminar
+        """
+        registro = {'etapa': nombre, 'rss_inicio_mb': round(rss_actual() / MB, 2)}
+        muestreador = _MuestreadorRSS(self.intervalo)
+        muestreador.start()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            pico = muestreador.detener()
+            registro['rss_fin_mb'] = round(rss_actual() / MB, 2)
+            registro['rss_pico_mb'] = round(pico / MB, 2)
+            registro['incremento_pico_mb'] = round(registro['rss_pico_mb'] - registro['rss_inicio_mb'], 2)
+            registro['duracion_s'] = round(time.perf_counter() - inicio, 4)
+            if dataframes is not None:
+                registro['dataframes_mb'] = {
+                    nombre_df: round(memoria_dataframe(df) / MB, 2)
+                    for nombre_df, df in dataframes().items() if df is not None
+                }
+            if self.presupuesto_mb is not None and pico / MB > self.presupuesto_mb:
+                registro['excedio_presupuesto'] = True
+                print(f"⚠ Etapa '{nombre}' excedió el presupuesto de memoria "
+                      f"({registro['rss_pico_mb']:.0f}MB > {self.presupuesto_mb:.0f}MB)")
+            self.etapas.append(registro)
+
+    def disponible_mb(self):
+        """Memoria restante dentro del presupuesto (None si no hay presupuesto)"""
+        if self.presupuesto_mb is None:
+            return None
+        return self.presupuesto_mb - rss_actual() / MB
+
+    def excede_presupuesto(self, bytes_adicionales=0):
+        """Indica si el RSS actual más ``bytes_adicionales`` rebasaría el presupuesto"""
+        disponible = self.disponible_mb()
+        return disponible is not None and bytes_adicionales / MB > disponible
+
+    def registrar_modo(self, etapa, modo, motivo):
+        """Registra que una etapa cambió de modo para respetar el presupuesto"""
+        print(f"⚠ {etapa}: cambiando a modo '{modo}' ({motivo})")
+        self.modos_degradados.append({'etapa': etapa, 'modo': modo, 'motivo': motivo})
+
+    def resumen(self):
+        """Resumen serializable para la sección ``metadatos`` de las métricas"""
+        picos = [e['rss_pico_mb'] for e in self.etapas]
+        return {
+            'presupuesto_mb': self.presupuesto_mb,
+            'rss_inicial_mb': round(self.rss_inicial_mb, 2),
+            'rss_pico_mb': max(picos) if picos else None,
+            'fuente_rss': 'psutil' if PSUTIL_DISPONIBLE else 'proc/resource',
+            'etapas': list(self.etapas),
+            'modos_degradados': list(self.modos_degradados)
+        }
+
+
+def leer_csv_por_bloques(ruta, monitor, etapa, dtype=None, tamano_bloque=200000, fraccion_presupuesto=0.6):
+    """
+    Lee un CSV por bloques reduciendo cada bloque antes de concatenarlo.
+
+    Si la memoria acumulada alcanza ``fraccion_presupuesto`` de la memoria disponible,
+    deja de leer y retorna los bloques cargados hasta ese punto (modo muestreado).
+    """
+    bloques = []
+    acumulado = 0
+    limite = None
+    if monitor.disponible_mb() is not None:
+        limite = max(0.0, monitor.disponible_mb()) * MB * fraccion_presupuesto
+
+    for bloque in pd.read_csv(ruta, dtype=dtype, chunksize=tamano_bloque):
+        reducir_dataframe(bloque, convertir_texto=False)
+        acumulado += memoria_dataframe(bloque)
+        bloques.append(bloque)
+        if limite is not None and acumulado > limite:
+            filas = sum(len(b) for b in bloques)
+            monitor.registrar_modo(etapa, 'muestreado', f'presupuesto alcanzado tras {filas} registros')
+            break
+
+    if not bloques:
+        return pd.DataFrame()
+    # Unificar categorías entre bloques para que la concatenación conserve el tipo category
+    for columna in bloques[0].columns:
+        if all(isinstance(b[columna].dtype, pd.CategoricalDtype) for b in bloques):
+            categorias = union_categoricals([b[columna] for b in bloques]).categories
+            for b in bloques:
+                b[columna] = b[columna].cat.set_categories(categorias)
+    return pd.concat(bloques, ignore_index=True)
@@ -0,0 +1,261 @@
+"""
+Motor SQL local sobre la exportación particionada para Athena.
+
+Ejecuta en el mismo proceso, con DuckDB, las consultas que el dashboard envía a Athena
+(``app/api/aws/athena/query``) sobre ``anonimizados_v2/athena/<tabla>/periodo=...``,
+la misma estructura Hive que se sube a S3 (``scripts/exportar_athena.py``). Las tablas se
+registran como vistas en ``main`` y en los esquemas de Athena (``hospital_economics_dev``,
+``econ``) en cuanto tienen archivos exportados, así que ``SELECT ... FROM econ.resumen_egresos WHERE periodo = '2025-03'`` funciona
+igual que en Athena y solo lee los archivos de esa partición.
+
+Los resultados se guardan en caché por consulta normalizada (sin comentarios, espacios ni
+mayúsculas fuera de literales). Cada entrada recuerda la huella de las particiones de las tablas
+que consulta; si llega una partición nueva o cambia un archivo, la entrada deja de ser válida.
+
+Solo se aceptan consultas de lectura y DuckDB no puede abrir archivos fuera del directorio de
+la exportación.
+
+Uso:
+    python datos/motor_consultas.py "SELECT periodo, count(*) FROM resumen_egresos GROUP BY 1"
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import duckdb
+    DUCKDB_DISPONIBLE = True
+except ImportError:
+    DUCKDB_DISPONIBLE = False
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from exportar_athena import BASE_DATOS, DIRECTORIO_EXPORTACION, TABLAS
+
+ESQUEMAS = [BASE_DATOS, 'econ']
+INSTRUCCIONES_LECTURA = ('select', 'with', 'show', 'describe', 'summarize', 'explain', 'values', 'from')
+MAXIMO_FILAS = 10000
+_LITERALES = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_COMENTARIOS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+class ErrorConsulta(ValueError):
+    """Consulta inválida o no permitida"""
+
+
+class TablaNoExportada(LookupError):
+    """La consulta usa una tabla que todavía no tiene particiones exportadas (se puede resolver en Athena)"""
+
+
+def normalizar_consulta(sql):
+    """
+    Forma canónica de una consulta para el caché.
+
+    Quita comentarios y el ``;`` final, colapsa espacios y pasa a minúsculas todo lo que no
+    está entre comillas. Los literales e identificadores entre comillas se conservan.
+
+    Raises:
+        ErrorConsulta: si la consulta está vacía o contiene varias sentencias
+    """
+    partes = _LITERALES.split(sql)
+    normalizada = []
+    for i, parte in enumerate(partes):
+        if i % 2:
+            normalizada.append(parte)
+        else:
+            normalizada.append(' '.join(_COMENTARIOS.sub(' ', parte).split()).lower())
+    texto = ' '.join(p for p in normalizada if p).strip()
+    texto = re.sub(r"\s*;\s*$", '', texto)
+    if not texto:
+        raise ErrorConsulta("la consulta está vacía")
+    if any(';' in parte for i, parte in enumerate(_LITERALES.split(texto)) if i % 2 == 0):
+        raise ErrorConsulta("solo se permite una sentencia por consulta")
+    return texto
+
+
+def huella_tabla(directorio):
+    """Huella de los archivos Parquet de una tabla (ruta relativa, tamaño y fecha de modificación)"""
+    archivos = []
+    for raiz, _, nombres in os.walk(directorio):
+        for nombre in nombres:
+            if nombre.endswith('.parquet'):
+                ruta = os.path.join(raiz, nombre)
+                estado = os.stat(ruta)
+                archivos.append(f"{os.path.relpath(ruta, directorio)}:{estado.st_size}:{estado.st_mtime_ns}")
+    return hashlib.sha256('\n'.join(sorted(archivos)).encode('utf-8')).hexdigest()[:16] if archivos else None
+
+
+class MotorConsultas:
+    """
+    Consultas SQL en proceso sobre las tablas particionadas, con caché de resultados.
+
+    Args:
+        ruta_base (str): raíz del proyecto (``proyecto_final``)
+        tamano_cache (int): resultados guardados
+        maximo_filas (int): filas devueltas por consulta
+    """
+
+    def __init__(self, ruta_base='proyecto_final', tamano_cache=128, maximo_filas=MAXIMO_FILAS):
+        if not DUCKDB_DISPONIBLE:
+            raise ImportError("duckdb no está instalado: pip install duckdb")
+        self.directorio = os.path.abspath(f'{ruta_base}/datos/anonimizados_v2/{DIRECTORIO_EXPORTACION}')
+        self.tamano_cache = tamano_cache
+        self.maximo_filas = maximo_filas
+        self._cache = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self._vistas = set()
+        self._conexion = self._conectar()
+
+    def _conectar(self):
+        conexion = duckdb.connect()
+        for esquema in ESQUEMAS:
+            conexion.execute(f'CREATE SCHEMA IF NOT EXISTS "{esquema}"')
+        # Solo lectura del directorio de la exportación: sin otros archivos, extensiones ni cambios de configuración
+        directorio = self.directorio.replace("'", "''")
+        conexion.execute(f"SET allowed_directories = ['{directorio}{os.sep}']")
+        conexion.execute("SET enable_external_access = false")
+        conexion.execute("SET lock_configuration = true")
+        return conexion
+
+    def _registrar_vistas(self, huellas):
+        """
+        Crea las vistas de las tablas consultadas que ya tienen archivos.
+
+        ``read_parquet`` falla con un patrón sin archivos, así que una tabla sin exportar no se
+        registra hasta que llegan sus particiones; las nuevas particiones de una tabla registrada
+        las encuentra el patrón en cada consulta.
+
+        Raises:
+            TablaNoExportada: si alguna tabla consultada no tiene archivos
+        """
+        faltantes = [nombre for nombre, huella in huellas.items() if huella is None]
+        if faltantes:
+            raise TablaNoExportada(f"sin particiones exportadas: {', '.join(faltantes)}")
+        with self._candado:
+            for nombre in huellas:
+                if nombre in self._vistas:
+                    continue
+                patron = os.path.join(self.directorio, nombre, '**', '*.parquet').replace("'", "''")
+                fuente = f"SELECT * FROM read_parquet('{patron}', hive_partitioning = true, union_by_name = true)"
+                for esquema in ['main'] + ESQUEMAS:
+                    self._conexion.execute(f'CREATE OR REPLACE VIEW "{esquema}"."{nombre}" AS {fuente}')
+                self._vistas.add(nombre)
+
+    def tablas_disponibles(self):
+        return [nombre for nombre in TABLAS if huella_tabla(os.path.join(self.directorio, nombre))]
+
+    def _tablas_consultadas(self, consulta):
+        return [nombre for nombre in TABLAS if re.search(rf'\b{nombre}\b', consulta)]
+
+    def _huellas(self, tablas):
+        return {nombre: huella_tabla(os.path.join(self.directorio, nombre)) for nombre in tablas}
+
+    def consultar(self, sql):
+        """
+        Ejecuta una consulta de lectura.
+
+        Returns:
+            dict: columnas, filas (lista de registros), registros, truncado, tiempo_ms y desde_cache
+
+        Raises:
+            ErrorConsulta: consulta vacía, de escritura, con varias sentencias o con error de SQL
+                (incluidas las tablas desconocidas)
+            TablaNoExportada: la consulta usa una tabla de la exportación que aún no tiene archivos
+        """
+        inicio = time.perf_counter()
+        consulta = normalizar_consulta(sql)
+        if not consulta.startswith(INSTRUCCIONES_LECTURA):
+            raise ErrorConsulta("solo se permiten consultas de lectura (SELECT/WITH)")
+
+        tablas = self._tablas_consultadas(consulta)
+        huellas = self._huellas(tablas)
+        with self._candado:
+            entrada = self._cache.get(consulta)
+            if entrada is not None and entrada['huellas'] == huellas:
+                self._cache.move_to_end(consulta)
+                self.aciertos += 1
+                return {**entrada['resultado'], 'tiempo_ms': round((time.perf_counter() - inicio) * 1000, 3),
+                        'desde_cache': True}
+            if entrada is not None:
+                # Llegaron o cambiaron particiones de alguna tabla consultada
+                del self._cache[consulta]
+                self.invalidaciones += 1
+            self.fallos += 1
+
+        self._registrar_vistas(huellas)
+        cursor = self._conexion.cursor()
+        try:
+            resultado = cursor.execute(sql.strip().rstrip(';'))
+            columnas = [d[0] for d in resultado.description] if resultado.description else []
+            filas = resultado.fetchmany(self.maximo_filas + 1)
+        except duckdb.Error as e:
+            raise ErrorConsulta(str(e).splitlines()[0])
+        finally:
+            cursor.close()
+
+        truncado = len(filas) > self.maximo_filas
+        resultado = {
+            'columnas': columnas,
+            'filas': [dict(zip(columnas, fila)) for fila in filas[:self.maximo_filas]],
+            'registros': min(len(filas), self.maximo_filas),
+            'truncado': truncado,
+            'tablas': tablas
+        }
+        with self._candado:
+            self._cache[consulta] = {'resultado': resultado, 'huellas': huellas}
+            self._cache.move_to_end(consulta)
+            while len(self._cache) > self.tamano_cache:
+                self._cache.popitem(last=False)
+        return {**resultado, 'tiempo_ms': round((time.perf_counter() - inicio) * 1000, 3), 'desde_cache': False}
+
+    def resumen(self):
+        total = self.aciertos + self.fallos
+        return {
+            'directorio': self.directorio,
+            'tablas': self.tablas_disponibles(),
+            'entradas': len(self._cache),
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'invalidaciones': self.invalidaciones,
+            'tasa_aciertos': round(self.aciertos / total, 4) if total else None
+        }
+
+    def cerrar(self):
+        self._conexion.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Consultas SQL locales sobre la exportación particionada')
+    parser.add_argument('consulta', help='Consulta SQL (SELECT/WITH)')
+    parser.add_argument('--ruta-base', default='proyecto_final')
+    parser.add_argument('--maximo-filas', type=int, default=50)
+    args = parser.parse_args()
+
+    motor = MotorConsultas(args.ruta_base, maximo_filas=args.maximo_filas)
+    if not motor.tablas_disponibles():
+        print(f"⚠ No hay tablas exportadas en {motor.directorio}; ejecutar scripts/exportar_athena.py")
+        return 1
+    try:
+        resultado = motor.consultar(args.consulta)
+    except (ErrorConsulta, TablaNoExportada) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(' | '.join(resultado['columnas']))
+    for fila in resultado['filas']:
+        print(' | '.join(str(v) for v in fila.values()))
+    print(f"\n✓ {resultado['registros']:,} fila(s){' (truncado)' if resultado['truncado'] else ''} "
+          f"en {resultado['tiempo_ms']:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
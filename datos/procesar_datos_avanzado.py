@@ -2,13 +2,26 @@ import pandas as pd
 import numpy as np
 import json
 import os
+import pickle
 import sys
 from datetime import datetime, timedelta
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 warnings.filterwarnings('ignore')
 
 # Agregar el directorio de modelos al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'modelos'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from codificacion_categorica import COLUMNAS_CATEGORICAS_RESUMEN, COLUMNAS_CATEGORICAS_DETALLE
+import cache_columnar
+import indice_pacientes
+from monitor_memoria import MonitorMemoria, estimar_memoria_csv, leer_csv_por_bloques, reducir_dataframe
+from trazas import trazador_global, tamano_archivo
+from lector_resultados import escribir_resultados, copiar_resultados, publicar_archivo
+from vistas_dashboard import guardar_vistas
+from puntos_control import PuntosControl
 
 try:
     from modelos_predictivos import ModelosPredictivosHospital, entrenar_modelos_completos
@@ -26,41 +39,173 @@ except ImportError as e:
         MODELOS_ML_DISPONIBLES = False
         MODELOS_SIMPLES_DISPONIBLES = False
 
+# Detalle a partir del cual se lee y limpia por bloques con puntos de control
+UMBRAL_BLOQUES_MB = 100
+FILAS_BLOQUE_DETALLE = 200000
+DIRECTORIO_MODULO = os.path.dirname(os.path.abspath(__file__))
+# Código de la limpieza: su huella se guarda con el caché columnar y el índice de trayectorias
+CODIGO_LIMPIEZA = [
+    os.path.join(DIRECTORIO_MODULO, nombre)
+    for nombre in ('procesar_datos_avanzado.py', 'codificacion_categorica.py', 'monitor_memoria.py')
+]
+# Código cuyo cambio invalida los puntos de control de una ejecución interrumpida
+CODIGO_PUNTOS_CONTROL = [
+    os.path.join(DIRECTORIO_MODULO, nombre) for nombre in ('procesar_datos_avanzado.py', 'codificacion_categorica.py')
+] + [
+    os.path.join(DIRECTORIO_MODULO, '..', 'modelos', nombre)
+    for nombre in ('modelos_predictivos.py', 'modelos_predictivos_simple.py')
+]
+
 class ProcesadorDatosHospital:
-    def __init__(self):
+    def __init__(self, ruta_base='proyecto_final', presupuesto_memoria_mb=None, trazador=None, usar_cache=True,
+                 trabajadores=None, reanudar=True):
         self.df_resumen = None
         self.df_detalle = None
+        self.detalle_completo = True
+        self._detalle_limpio = False
         self.metricas_completas = {}
         self.modelos_ml = None
         
+        # Rutas de entrada y salida
+        self.ruta_base = ruta_base
+        self.ruta_resumen = f'{ruta_base}/datos/ejemplos/Resumen Egreso 2025.csv'
+        self.ruta_detalle = f'{ruta_base}/datos/ejemplos/Egreso Detalle Ene 2025 a Abr 2025.csv'
+        self.ruta_cache = f'{ruta_base}/datos/cache_columnar'
+        self.ruta_procesados = f'{ruta_base}/datos/procesados'
+        self.ruta_dashboard = f'{ruta_base}/dashboard/Dashboard de Economía de la Salud/datos/procesados'
+        # Con usar_cache=False se vuelve a limpiar desde el CSV aunque la fuente no haya cambiado
+        self.usar_cache = usar_cache
+        
+        # Diccionario de categorías compartido por limpieza, agregación, anonimización y modelos
+        self.diccionario = cache_columnar.cargar_diccionario(self.ruta_cache)
+        # Un caché limpiado con otra versión del código no se reutiliza aunque la fuente no cambie
+        self.version_limpieza = cache_columnar.huella_codigo(CODIGO_LIMPIEZA)
+        
+        # Instrumentación de memoria por etapa (presupuesto opcional, ver PRESUPUESTO_MEMORIA_MB)
+        self.monitor = MonitorMemoria(presupuesto_memoria_mb)
+        
+        # Trazas de tiempo por etapa
+        self.trazador = trazador if trazador is not None else trazador_global()
+        self._spans_propios = []
+        self._bytes_leidos = 0
+        
+        # Hilos para los análisis de solo lectura (1 = secuencial, ver TRABAJADORES_PROCESAMIENTO)
+        if trabajadores is None:
+            trabajadores = int(os.getenv('TRABAJADORES_PROCESAMIENTO', '1'))
+        self.trabajadores = max(1, trabajadores)
+        
+        # Puntos de control para reanudar una ejecución interrumpida (puntos_control.py)
+        self.puntos_control = PuntosControl(
+            f'{self.ruta_procesados}/puntos_control', [self.ruta_resumen, self.ruta_detalle], CODIGO_PUNTOS_CONTROL
+        ) if reanudar else None
+    
+    @contextmanager
+    def _etapa(self, nombre, padre=None, **metricas):
+        """Contexto de medición (tiempo y memoria) de una etapa; produce el span de la traza"""
+        with self.trazador.span(nombre, padre=padre, **metricas) as span:
+            with self.monitor.etapa(nombre, lambda: {'df_resumen': self.df_resumen, 'df_detalle': self.df_detalle}):
+                yield span
+    
+    def _resumen_trazas(self):
+        """Spans de este procesador (el trazador global puede contener otras ejecuciones)"""
+        return {'version': 1, 'spans': [span.a_dict() for span in self._spans_propios]}
+    
+    def _registros_resumen(self):
+        return len(self.df_resumen) if self.df_resumen is not None else 0
+        
     def cargar_datos(self):
-        """Carga los archivos CSV de datos"""
+        """Carga los archivos CSV de datos (o el caché columnar si la fuente no cambió)"""
         print("Cargando datos...")
         
         # Cargar archivo resumen
         try:
-            self.df_resumen = pd.read_csv('proyecto_final/datos/ejemplos/Resumen Egreso 2025.csv')
-            print(f"✓ Archivo resumen cargado: {self.df_resumen.shape[0]} registros")
+            self.df_resumen = cache_columnar.cargar_tabla(
+                self.ruta_cache, 'resumen', self.diccionario, COLUMNAS_CATEGORICAS_RESUMEN, origen=self.ruta_resumen,
+                codigo=self.version_limpieza
+            ) if self.usar_cache else None
+            if self.df_resumen is not None:
+                self._bytes_leidos += tamano_archivo(f'{self.ruta_cache}/resumen.parquet')
+                print(f"✓ Archivo resumen cargado desde caché columnar: {self.df_resumen.shape[0]} registros")
+            else:
+                self._bytes_leidos += tamano_archivo(self.ruta_resumen)
+                self.df_resumen = pd.read_csv(
+                    self.ruta_resumen, dtype=self.diccionario.dtypes_lectura(COLUMNAS_CATEGORICAS_RESUMEN)
+                )
+                print(f"✓ Archivo resumen cargado: {self.df_resumen.shape[0]} registros")
         except Exception as e:
             print(f"Error cargando archivo resumen: {e}")
             return False
             
         # Cargar archivo detalle (si existe y no es muy grande)
         try:
-            # Verificar tamaño del archivo
-            import os
-            size_mb = os.path.getsize('proyecto_final/datos/ejemplos/Egreso Detalle Ene 2025 a Abr 2025.csv') / (1024*1024)
-            if size_mb < 500:  # Solo cargar si es menor a 500MB
-                self.df_detalle = pd.read_csv('proyecto_final/datos/ejemplos/Egreso Detalle Ene 2025 a Abr 2025.csv')
-                print(f"✓ Archivo detalle cargado: {self.df_detalle.shape[0]} registros")
+            self.df_detalle = cache_columnar.cargar_tabla(
+                self.ruta_cache, 'detalle', self.diccionario, COLUMNAS_CATEGORICAS_DETALLE, origen=self.ruta_detalle,
+                codigo=self.version_limpieza
+            ) if self.usar_cache else None
+            if self.df_detalle is not None:
+                self._bytes_leidos += tamano_archivo(f'{self.ruta_cache}/detalle.parquet')
+                print(f"✓ Archivo detalle cargado desde caché columnar: {self.df_detalle.shape[0]} registros")
             else:
-                print(f"⚠ Archivo detalle muy grande ({size_mb:.1f}MB), usando solo muestra")
-                self.df_detalle = pd.read_csv('proyecto_final/datos/ejemplos/Egreso Detalle Ene 2025 a Abr 2025.csv', nrows=50000)
+                self._bytes_leidos += tamano_archivo(self.ruta_detalle)
+                # Verificar tamaño del archivo
+                dtypes_detalle = self.diccionario.dtypes_lectura(COLUMNAS_CATEGORICAS_DETALLE)
+                size_mb = os.path.getsize(self.ruta_detalle) / (1024*1024)
+                if self.monitor.presupuesto_mb is not None:
+                    # Con presupuesto definido decide la memoria estimada, no el tamaño del archivo
+                    bytes_estimados, filas_estimadas = estimar_memoria_csv(self.ruta_detalle, dtype=dtypes_detalle)
+                    if self.monitor.excede_presupuesto(bytes_estimados):
+                        self.monitor.registrar_modo(
+                            'cargar_datos', 'por_bloques',
+                            f'detalle estimado en {bytes_estimados / (1024*1024):.0f}MB para ~{filas_estimadas} registros'
+                        )
+                        modos_previos = len(self.monitor.modos_degradados)
+                        self.df_detalle = leer_csv_por_bloques(
+                            self.ruta_detalle, self.monitor, 'cargar_datos', dtype=dtypes_detalle
+                        )
+                        # Si la lectura se cortó por presupuesto, el detalle es solo una muestra
+                        self.detalle_completo = len(self.monitor.modos_degradados) == modos_previos
+                    else:
+                        self.df_detalle = pd.read_csv(self.ruta_detalle, dtype=dtypes_detalle)
+                    print(f"✓ Archivo detalle cargado: {self.df_detalle.shape[0]} registros")
+                elif self.puntos_control is not None and UMBRAL_BLOQUES_MB <= size_mb < 500:
+                    self.df_detalle = self._cargar_detalle_por_bloques(dtypes_detalle)
+                    print(f"✓ Archivo detalle cargado por bloques: {self.df_detalle.shape[0]} registros")
+                elif size_mb < 500:  # Solo cargar si es menor a 500MB
+                    self.df_detalle = pd.read_csv(self.ruta_detalle, dtype=dtypes_detalle)
+                    print(f"✓ Archivo detalle cargado: {self.df_detalle.shape[0]} registros")
+                else:
+                    print(f"⚠ Archivo detalle muy grande ({size_mb:.1f}MB), usando solo muestra")
+                    self.df_detalle = pd.read_csv(self.ruta_detalle, dtype=dtypes_detalle, nrows=50000)
+                    self.detalle_completo = False
         except Exception as e:
             print(f"⚠ No se pudo cargar archivo detalle: {e}")
             
         return True
     
+    def _cargar_detalle_por_bloques(self, dtypes):
+        """
+        Lee y limpia el detalle por bloques; cada bloque limpio se guarda como punto de control.
+        
+        Si una ejecución anterior se interrumpió, continúa después de la última fila guardada.
+        """
+        puntos = self.puntos_control
+        filas_hechas = puntos.filas_procesadas('detalle')
+        if filas_hechas:
+            # Las categorías que agregaron los bloques guardados están en su diccionario
+            self.diccionario = puntos.cargar_diccionario() or self.diccionario
+            print(f"↻ Reanudando detalle en la fila {filas_hechas:,} "
+                  f"({len(puntos.bloques('detalle'))} bloque(s) en puntos de control)")
+        
+        lector = pd.read_csv(self.ruta_detalle, dtype=dtypes, chunksize=FILAS_BLOQUE_DETALLE,
+                             skiprows=range(1, filas_hechas + 1))
+        for bloque in lector:
+            filas_fuente = len(bloque)
+            bloque = self._limpiar_detalle(bloque)
+            puntos.guardar_bloque('detalle', bloque, filas_fuente, self.diccionario)
+        
+        self._detalle_limpio = True
+        return puntos.leer_bloques('detalle', self.diccionario, COLUMNAS_CATEGORICAS_DETALLE)
+    
     def limpiar_datos(self):
         """Limpia y prepara los datos para análisis"""
         print("Limpiando datos...")
@@ -95,23 +240,61 @@ class ProcesadorDatosHospital:
                 self.df_resumen.loc[self.df_resumen['edad'] > 120, 'edad'] = np.nan
                 self.df_resumen.loc[self.df_resumen['edad'] < 0, 'edad'] = np.nan
             
+            # Codificar columnas de texto con el diccionario global de categorías
+            self.diccionario.codificar(self.df_resumen, COLUMNAS_CATEGORICAS_RESUMEN)
+            
             print(f"✓ Datos del resumen limpiados: {self.df_resumen.shape[0]} registros válidos")
         
-        # Limpiar datos detalle si están disponibles
-        if self.df_detalle is not None:
+        # Limpiar datos detalle si están disponibles (los bloques ya se limpiaron al leerlos)
+        if self.df_detalle is not None and not self._detalle_limpio:
             print("Limpiando datos detalle...")
-            # Aplicar las mismas limpiezas al archivo detalle
-            columnas_costos = ['gasto_nivel_6', 'gasto_nivel_1']
-            for col in columnas_costos:
-                if col in self.df_detalle.columns:
-                    self.df_detalle[col] = pd.to_numeric(self.df_detalle[col], errors='coerce')
-            
-            if 'edad' in self.df_detalle.columns:
-                self.df_detalle['edad'] = pd.to_numeric(self.df_detalle['edad'], errors='coerce')
-                self.df_detalle.loc[self.df_detalle['edad'] > 120, 'edad'] = np.nan
-                self.df_detalle.loc[self.df_detalle['edad'] < 0, 'edad'] = np.nan
-            
+            self.df_detalle = self._limpiar_detalle(self.df_detalle)
             print(f"✓ Datos detalle limpiados: {self.df_detalle.shape[0]} registros válidos")
+        
+        # Si la memoria ya está cerca del presupuesto, reducir tipos numéricos
+        if self.monitor.presupuesto_mb is not None and self.monitor.disponible_mb() < self.monitor.presupuesto_mb * 0.25:
+            self.monitor.registrar_modo('limpiar_datos', 'reducido', 'menos del 25% del presupuesto disponible')
+            for df in (self.df_resumen, self.df_detalle):
+                if df is not None:
+                    reducir_dataframe(df, convertir_texto=False)
+    
+    def _limpiar_detalle(self, df):
+        """Limpieza del detalle fila por fila (se aplica igual al archivo completo o a un bloque)"""
+        # Aplicar las mismas limpiezas al archivo detalle
+        columnas_costos = ['gasto_nivel_6', 'gasto_nivel_1']
+        for col in columnas_costos:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        
+        if 'edad' in df.columns:
+            df['edad'] = pd.to_numeric(df['edad'], errors='coerce')
+            df.loc[df['edad'] > 120, 'edad'] = np.nan
+            df.loc[df['edad'] < 0, 'edad'] = np.nan
+        
+        self.diccionario.codificar(df, COLUMNAS_CATEGORICAS_DETALLE)
+        return df
+    
+    def guardar_cache_columnar(self):
+        """Persiste los datos limpios y el diccionario de categorías en el caché columnar"""
+        if self.df_resumen is not None:
+            cache_columnar.guardar_tabla(
+                self.df_resumen, self.ruta_cache, 'resumen', self.diccionario, origen=self.ruta_resumen,
+                codigo=self.version_limpieza
+            )
+        # Una muestra parcial del detalle no se guarda para no confundirla con el archivo completo
+        if self.df_detalle is not None and self.detalle_completo:
+            cache_columnar.guardar_tabla(
+                self.df_detalle, self.ruta_cache, 'detalle', self.diccionario, origen=self.ruta_detalle,
+                codigo=self.version_limpieza
+            )
+            # El índice de trayectorias solo se reconstruye si cambió el archivo fuente o la limpieza
+            if indice_pacientes.abrir_indice(self.ruta_cache, origen=self.ruta_detalle,
+                                             codigo=self.version_limpieza) is None:
+                indice_pacientes.guardar_indice(self.df_detalle, self.ruta_cache, origen=self.ruta_detalle,
+                                                codigo=self.version_limpieza)
+            # El caché ya tiene el detalle limpio: los bloques dejan de hacer falta
+            if self.puntos_control is not None:
+                self.puntos_control.descartar_bloques('detalle')
     
     def calcular_metricas_principales(self):
         """Calcula métricas principales del hospital"""
@@ -130,10 +313,10 @@ class ProcesadorDatosHospital:
         
         # Métricas demográficas
         edad_promedio = df['edad'].mean()
-        distribucion_sexo = df['sexo'].value_counts(normalize=True).to_dict() if 'sexo' in df.columns else {}
+        distribucion_sexo = self._distribucion(df['sexo']) if 'sexo' in df.columns else {}
         
         # Métricas de resultados
-        distribucion_motivos = df['motivo_alta_hosp'].value_counts(normalize=True).to_dict() if 'motivo_alta_hosp' in df.columns else {}
+        distribucion_motivos = self._distribucion(df['motivo_alta_hosp']) if 'motivo_alta_hosp' in df.columns else {}
         tasa_mortalidad = (df['motivo_alta_hosp'] == 'DEFUNCIÓN').sum() / len(df) * 100 if 'motivo_alta_hosp' in df.columns else 0
         
         # Métricas temporales
@@ -160,6 +343,12 @@ class ProcesadorDatosHospital:
             }
         }
     
+    @staticmethod
+    def _distribucion(serie):
+        """Proporción de cada valor observado (omite categorías sin registros)"""
+        proporciones = serie.value_counts(normalize=True)
+        return proporciones[proporciones > 0].to_dict()
+    
     def analizar_por_servicio(self):
         """Analiza costos y métricas por servicio/área"""
         print("Analizando por servicio...")
@@ -168,7 +357,7 @@ class ProcesadorDatosHospital:
         
         # Análisis por servicio de origen
         if 'servicio_origen' in df.columns:
-            servicios = df.groupby('servicio_origen').agg({
+            servicios = df.groupby('servicio_origen', observed=True).agg({
                 'gasto_nivel_6': ['sum', 'mean', 'count'],
                 'dias_estancia_calculado': 'mean' if 'dias_estancia_calculado' in df.columns else 'dias_hopit'
             }).round(2)
@@ -187,7 +376,7 @@ class ProcesadorDatosHospital:
         df = self.df_resumen
         
         if 'motivo_alta_hosp' in df.columns:
-            motivos = df.groupby('motivo_alta_hosp').agg({
+            motivos = df.groupby('motivo_alta_hosp', observed=True).agg({
                 'gasto_nivel_6': ['sum', 'mean', 'count'],
                 'dias_estancia_calculado': 'mean' if 'dias_estancia_calculado' in df.columns else 'dias_hopit'
             }).round(2)
@@ -211,7 +400,7 @@ class ProcesadorDatosHospital:
         if 'alcaldia_municipio' in df.columns:
             df_geo = df.dropna(subset=['alcaldia_municipio'])
             
-            alcaldias = df_geo.groupby('alcaldia_municipio').agg({
+            alcaldias = df_geo.groupby('alcaldia_municipio', observed=True).agg({
                 'gasto_nivel_6': ['sum', 'mean', 'count']
             }).round(2)
             
@@ -224,7 +413,7 @@ class ProcesadorDatosHospital:
         if 'estado' in df.columns:
             df_estado = df.dropna(subset=['estado'])
             
-            estados = df_estado.groupby('estado').agg({
+            estados = df_estado.groupby('estado', observed=True).agg({
                 'gasto_nivel_6': ['sum', 'mean', 'count']
             }).round(2)
             
@@ -273,13 +462,15 @@ class ProcesadorDatosHospital:
                 # Entrenar modelos completos
                 resultados_ml = entrenar_modelos_completos(
                     self.df_resumen, 
-                    self.df_detalle if self.df_detalle is not None else self.df_resumen,
-                    df_servicios
+                    self._datos_entrenamiento(),
+                    df_servicios,
+                    trazador=self.trazador
                 )
                 
                 if resultados_ml:
                     self.modelos_ml = resultados_ml['modelos']
                     print("✓ Modelos de Machine Learning avanzados entrenados exitosamente")
+                    self.guardar_modelos()
                     return {
                         'clustering_ml': resultados_ml['clustering'],
                         'alertas_ml': resultados_ml['alertas_ml'],
@@ -306,6 +497,33 @@ class ProcesadorDatosHospital:
                 'nota': 'Modelos ML no disponibles o error en entrenamiento'
             }
     
+    def guardar_modelos(self):
+        """Persiste los modelos entrenados para el servicio analítico (servicio_analitico.py)"""
+        ruta = f'{self.ruta_procesados}/modelos_ml.pkl'
+        try:
+            self.modelos_ml.guardar(ruta)
+            print(f"✓ Modelos guardados: {ruta}")
+        except (OSError, pickle.PicklingError) as e:
+            print(f"⚠ No se pudieron guardar los modelos: {e}")
+    
+    def _datos_entrenamiento(self):
+        """Datos para el modelo de costos; se muestrean si no caben en el presupuesto de memoria"""
+        df = self.df_detalle if self.df_detalle is not None else self.df_resumen
+        if self.monitor.presupuesto_mb is None:
+            return df
+        
+        # El entrenamiento copia el frame y genera la matriz de características (~3x las columnas usadas)
+        columnas = [c for c in ['edad', 'sexo', 'dias_estancia_calculado', 'dias_hopit', 'gasto_nivel_6'] if c in df.columns]
+        bytes_estimados = df[columnas].memory_usage(deep=True).sum() * 3
+        disponible = max(0.0, self.monitor.disponible_mb()) * 1024 * 1024
+        if bytes_estimados > disponible and len(df) > 0:
+            fraccion = max(0.01, disponible / bytes_estimados)
+            self.monitor.registrar_modo(
+                'entrenar_modelos_ml', 'muestreado', f'entrenando con {fraccion:.0%} de {len(df)} registros'
+            )
+            return df.sample(frac=fraccion, random_state=42)
+        return df
+    
     def _entrenar_modelos_fallback(self):
         """Entrena modelos simples como fallback"""
         global MODELOS_SIMPLES_DISPONIBLES
@@ -324,7 +542,7 @@ class ProcesadorDatosHospital:
             # Entrenar modelos simples
             resultados_simples = entrenar_modelos_simples(
                 self.df_resumen, 
-                self.df_detalle if self.df_detalle is not None else self.df_resumen,
+                self._datos_entrenamiento(),
                 df_servicios
             )
             
@@ -411,35 +629,147 @@ class ProcesadorDatosHospital:
         """Ejecuta todo el procesamiento de datos incluyendo ML"""
         print("=== INICIANDO PROCESAMIENTO AVANZADO DE DATOS CON ML ===")
         
-        if not self.cargar_datos():
-            return False
+        with self.trazador.span('procesar_todo') as span:
+            self._spans_propios.append(span)
+            if not self._ejecutar_etapas():
+                return False
+            span.registrar(filas_entrada=self._registros_resumen(), filas_salida=len(self.metricas_completas))
         
-        self.limpiar_datos()
+        self.metricas_completas['metadatos']['trazas'] = self._resumen_trazas()
+        return True
+    
+    def _ejecutar_etapas(self):
+        if not self.preparar_datos():
+            return False
         
-        # Calcular métricas tradicionales
-        metricas_principales = self.calcular_metricas_principales()
-        analisis_servicios = self.analizar_por_servicio()
-        analisis_motivos_alta = self.analizar_por_motivo_alta()
-        analisis_geografico = self.analizar_geografico()
-        tendencias_temporales = self.analizar_tendencias_temporales()
-        alertas_tradicionales = self.generar_alertas()
+        # Métricas tradicionales y modelos de Machine Learning (en paralelo si hay más de un trabajador);
+        # el entrenamiento es la etapa más larga: en paralelo se inicia primero, en secuencia va al final
+        entrenamiento = ('machine_learning', self.entrenar_modelos_ml, None)
+        tareas = ([entrenamiento] + self._analisis_agregados() if self.trabajadores > 1
+                  else self._analisis_agregados() + [entrenamiento])
+        resultados = {}
+        puntos = self.puntos_control
+        if puntos is not None:
+            # Etapas que ya terminaron en una ejecución interrumpida sobre los mismos datos
+            puntos.validar_etapas({
+                'registros_resumen': self._registros_resumen(),
+                'registros_detalle': len(self.df_detalle) if self.df_detalle is not None else None,
+                'detalle_completo': self.detalle_completo,
+                'presupuesto_mb': self.monitor.presupuesto_mb
+            })
+            resultados = {clave: puntos.cargar_etapa(clave) for clave, _, _ in tareas if puntos.tiene_etapa(clave)}
+            if resultados:
+                print(f"↻ Reanudando con {len(resultados)} etapa(s) de puntos de control: {', '.join(resultados)}")
         
-        # Entrenar modelos de Machine Learning
-        resultados_ml = self.entrenar_modelos_ml()
+        al_terminar = self._guardar_punto_control if puntos is not None else None
+        resultados.update(self._ejecutar_analisis([t for t in tareas if t[0] not in resultados], al_terminar=al_terminar))
+        resultados = {clave: resultados[clave] for clave, _, _ in tareas}
+        resultados_ml = resultados.pop('machine_learning')
         
         # Combinar resultados tradicionales con ML
-        self.metricas_completas = {
-            'timestamp': datetime.now().isoformat(),
-            'metricas_principales': metricas_principales,
-            'analisis_servicios': analisis_servicios,
-            'analisis_motivos_alta': analisis_motivos_alta,
-            'analisis_geografico': analisis_geografico,
-            'tendencias_temporales': tendencias_temporales,
-            'alertas': alertas_tradicionales,
-            'machine_learning': resultados_ml if resultados_ml else {
-                'disponible': False,
-                'nota': 'Modelos ML no disponibles o error en entrenamiento'
-            },
+        self.combinar_resultados(self._agregados(resultados), resultados_ml)
+        
+        # Todas las etapas terminaron: la siguiente ejecución debe volver a calcularlas. Si el
+        # entrenamiento falló se conservan las demás para reintentarlo sin repetirlas
+        if puntos is not None and (resultados_ml or {}).get('disponible'):
+            puntos.descartar()
+        return True
+    
+    def _guardar_punto_control(self, clave, resultado):
+        """Guarda una etapa terminada; un entrenamiento fallido no se guarda y se reintenta en la siguiente ejecución"""
+        if clave != 'machine_learning' or (resultado or {}).get('disponible'):
+            self.puntos_control.guardar_etapa(clave, resultado)
+    
+    def preparar_datos(self):
+        """Carga y limpia los datos y actualiza el caché columnar"""
+        with self._etapa('cargar_datos') as span:
+            if not self.cargar_datos():
+                return False
+            span.registrar(
+                filas_salida=self._registros_resumen() + (len(self.df_detalle) if self.df_detalle is not None else 0),
+                bytes_leidos=self._bytes_leidos
+            )
+        
+        with self._etapa('limpiar_datos', filas_entrada=self._registros_resumen()) as span:
+            self.limpiar_datos()
+            self.guardar_cache_columnar()
+            span.registrar(
+                filas_salida=self._registros_resumen(),
+                bytes_escritos=tamano_archivo(f'{self.ruta_cache}/resumen.parquet') + tamano_archivo(f'{self.ruta_cache}/detalle.parquet')
+            )
+        return True
+    
+    def cargar_datos_limpios(self):
+        """Carga los datos ya limpios del caché columnar, sin volver a escribirlo (etapas del orquestador)"""
+        with self._etapa('cargar_datos') as span:
+            self.df_resumen = cache_columnar.cargar_tabla(
+                self.ruta_cache, 'resumen', self.diccionario, COLUMNAS_CATEGORICAS_RESUMEN
+            )
+            if self.df_resumen is None:
+                print(f"❌ No hay datos limpios en {self.ruta_cache}; ejecutar la etapa de limpieza")
+                return False
+            self.df_detalle = cache_columnar.cargar_tabla(
+                self.ruta_cache, 'detalle', self.diccionario, COLUMNAS_CATEGORICAS_DETALLE
+            )
+            span.registrar(
+                filas_salida=self._registros_resumen() + (len(self.df_detalle) if self.df_detalle is not None else 0),
+                bytes_leidos=tamano_archivo(f'{self.ruta_cache}/resumen.parquet') + tamano_archivo(f'{self.ruta_cache}/detalle.parquet')
+            )
+        return True
+    
+    def _analisis_agregados(self):
+        """Análisis de solo lectura sobre df_resumen: (clave en metricas_completas, método, filas de salida)"""
+        return [
+            ('metricas_principales', self.calcular_metricas_principales, lambda r: 1),
+            ('analisis_servicios', self.analizar_por_servicio, len),
+            ('analisis_motivos_alta', self.analizar_por_motivo_alta, len),
+            ('analisis_geografico', self.analizar_geografico, lambda r: sum(len(v) for v in r.values())),
+            ('tendencias_temporales', self.analizar_tendencias_temporales, len),
+            ('alertas', self.generar_alertas, len)
+        ]
+    
+    def _ejecutar_analisis(self, tareas, al_terminar=None):
+        """
+        Ejecuta análisis que solo leen df_resumen/df_detalle.
+        
+        Con más de un trabajador corren en hilos que comparten los mismos DataFrames (sin copiarlos);
+        groupby, reducciones de numpy y el entrenamiento de sklearn liberan el GIL. Los resultados se
+        devuelven en el orden de ``tareas`` sin importar cuál termine primero.
+        
+        Args:
+            tareas (list): (clave, método, filas de salida)
+            al_terminar (callable): recibe (clave, resultado) al terminar cada análisis
+        
+        Returns:
+            dict: clave -> resultado
+        """
+        filas = self._registros_resumen()
+        # Los hilos de trabajo no heredan la pila de spans: cuelgan del span activo aquí
+        padre = self.trazador.span_actual()
+        
+        def ejecutar(clave, metodo, filas_salida):
+            with self._etapa(metodo.__name__, padre=padre, filas_entrada=filas) as span:
+                resultado = metodo()
+                if filas_salida is not None:
+                    span.registrar(filas_salida=filas_salida(resultado))
+            if al_terminar is not None:
+                al_terminar(clave, resultado)
+            return resultado
+        
+        if self.trabajadores == 1 or len(tareas) <= 1:
+            return {clave: ejecutar(clave, metodo, filas_salida) for clave, metodo, filas_salida in tareas}
+        
+        with ThreadPoolExecutor(max_workers=min(self.trabajadores, len(tareas)), thread_name_prefix='analisis') as pool:
+            futuros = [(clave, pool.submit(ejecutar, clave, metodo, filas_salida)) for clave, metodo, filas_salida in tareas]
+            return {clave: futuro.result() for clave, futuro in futuros}
+    
+    def calcular_agregados(self):
+        """Métricas, análisis, alertas y metadatos de los datos limpios (todo excepto los modelos ML)"""
+        return self._agregados(self._ejecutar_analisis(self._analisis_agregados()))
+    
+    def _agregados(self, analisis):
+        return {
+            **analisis,
             'metadatos': {
                 'total_registros_procesados': len(self.df_resumen),
                 'registros_detalle': len(self.df_detalle) if self.df_detalle is not None else 0,
@@ -451,35 +781,77 @@ class ProcesadorDatosHospital:
                     'completitud_costos': (self.df_resumen['gasto_nivel_6'].notna().sum() / len(self.df_resumen) * 100),
                     'completitud_demograficos': (self.df_resumen['edad'].notna().sum() / len(self.df_resumen) * 100) if 'edad' in self.df_resumen.columns else 0,
                     'completitud_geograficos': (self.df_resumen['alcaldia_municipio'].notna().sum() / len(self.df_resumen) * 100) if 'alcaldia_municipio' in self.df_resumen.columns else 0
-                },
+                }
+            }
+        }
+    
+    def combinar_resultados(self, agregados, resultados_ml):
+        """Arma metricas_completas con los agregados y los resultados de los modelos ML"""
+        self.metricas_completas = {
+            'timestamp': datetime.now().isoformat(),
+            **{clave: valor for clave, valor in agregados.items() if clave != 'metadatos'},
+            'machine_learning': resultados_ml if resultados_ml else {
+                'disponible': False,
+                'nota': 'Modelos ML no disponibles o error en entrenamiento'
+            },
+            'metadatos': {
+                **agregados['metadatos'],
                 'modelos_ml': {
                     'disponibles': MODELOS_ML_DISPONIBLES,
                     'entrenados': resultados_ml is not None,
                     'version': 'v2.0-ML' if resultados_ml else 'v1.0-estadistico'
-                }
+                },
+                'memoria': self.monitor.resumen()
             }
         }
-        
-        return True
+    
+    def resultados(self):
+        """
+        Resultados del procesamiento en memoria, para entregarlos a otros consumidores
+        (reportes Excel, demos, reporte de despliegue) sin releer metricas_completas.json.
+        """
+        return self.metricas_completas
     
     def guardar_resultados(self):
         """Guarda los resultados del procesamiento"""
+        with self._etapa('guardar_resultados') as span:
+            self._spans_propios.append(span)
+            self._guardar_archivos_resultados()
+            span.registrar(bytes_escritos=sum(
+                tamano_archivo(ruta) for ruta in (
+                    f'{self.ruta_procesados}/metricas_completas.json', f'{self.ruta_base}/datos/metricas.json'
+                )
+            ))
+        
+        # Agregar la medición de la etapa de guardado a los metadatos ya escritos
+        self.metricas_completas['metadatos']['memoria'] = self.monitor.resumen()
+        self.metricas_completas['metadatos']['trazas'] = self._resumen_trazas()
+        self._escribir_metricas_completas()
+        
+        # Exportar la traza de esta ejecución para chrome://tracing / Perfetto y para flamegraph
+        self.trazador.exportar_json(f'{self.ruta_procesados}/traza_procesamiento.json', self._spans_propios)
+        self.trazador.exportar_flamegraph(f'{self.ruta_procesados}/traza_procesamiento.folded', self._spans_propios)
+        
+        # La ejecución terminó: ya no hay nada que reanudar
+        if self.puntos_control is not None:
+            self.puntos_control.descartar()
+    
+    def _escribir_metricas_completas(self):
+        """Escribe metricas_completas.json (con su índice de secciones) y lo copia al dashboard"""
+        escribir_resultados(f'{self.ruta_procesados}/metricas_completas.json', self.metricas_completas)
+        
+        # Copiar al dashboard
+        copiar_resultados(f'{self.ruta_procesados}/metricas_completas.json', f'{self.ruta_dashboard}/')
+    
+    def _guardar_archivos_resultados(self):
         print("Guardando resultados...")
         
         # Crear directorios necesarios
-        os.makedirs('proyecto_final/datos/procesados', exist_ok=True)
-        os.makedirs('proyecto_final/dashboard/Dashboard de Economía de la Salud/datos/procesados', exist_ok=True)
+        os.makedirs(self.ruta_procesados, exist_ok=True)
+        os.makedirs(self.ruta_dashboard, exist_ok=True)
         
         # Guardar métricas completas
-        with open('proyecto_final/datos/procesados/metricas_completas.json', 'w', encoding='utf-8') as f:
-            json.dump(self.metricas_completas, f, indent=2, ensure_ascii=False, default=str)
-        
-        # Copiar al dashboard
-        import shutil
-        shutil.copy2(
-            'proyecto_final/datos/procesados/metricas_completas.json',
-            'proyecto_final/dashboard/Dashboard de Economía de la Salud/datos/procesados/'
-        )
+        self._escribir_metricas_completas()
         
         # Guardar versión legacy para compatibilidad
         metricas_legacy = {
@@ -511,22 +883,46 @@ class ProcesadorDatosHospital:
             }
         }
         
-        with open('proyecto_final/datos/metricas.json', 'w', encoding='utf-8') as f:
+        with open(f'{self.ruta_base}/datos/metricas.json.tmp', 'w', encoding='utf-8') as f:
             json.dump(metricas_legacy, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(f'{self.ruta_base}/datos/metricas.json.tmp', f'{self.ruta_base}/datos/metricas.json')
         
         # Copiar legacy al dashboard
-        shutil.copy2(
-            'proyecto_final/datos/metricas.json',
-            'proyecto_final/dashboard/Dashboard de Economía de la Salud/datos/procesados/'
-        )
+        publicar_archivo(f'{self.ruta_base}/datos/metricas.json', f'{self.ruta_dashboard}/metricas.json')
+        
+        self.guardar_vistas_dashboard()
         
         print("✓ Resultados guardados exitosamente")
-        print(f"✓ Métricas completas: proyecto_final/datos/procesados/metricas_completas.json")
-        print(f"✓ Métricas legacy: proyecto_final/datos/metricas.json")
+        print(f"✓ Métricas completas: {self.ruta_procesados}/metricas_completas.json")
+        print(f"✓ Métricas legacy: {self.ruta_base}/datos/metricas.json")
         
         # Generar reportes Excel automáticamente
         self.generar_reportes_excel()
     
+    def guardar_vistas_dashboard(self):
+        """Vistas por página del dashboard (vistas_dashboard.py); solo se copian las que cambiaron"""
+        ruta_vistas = f'{self.ruta_procesados}/vistas'
+        ruta_vistas_dashboard = f'{self.ruta_dashboard}/vistas'
+        ruta_geojson = os.path.join(os.path.dirname(self.ruta_dashboard), 'alcaldias.json')
+        indice = guardar_vistas(self.metricas_completas, ruta_vistas, ruta_geojson,
+                                generado=self.metricas_completas.get('timestamp'))
+        
+        os.makedirs(ruta_vistas_dashboard, exist_ok=True)
+        # El índice se publica al final: nunca apunta a un etag cuya vista aún no está en el dashboard
+        for pagina, entrada in indice.items():
+            destino = f'{ruta_vistas_dashboard}/{pagina}.json'
+            if entrada['actualizada'] or not os.path.exists(destino):
+                publicar_archivo(f'{ruta_vistas}/{pagina}.json', destino)
+        publicar_archivo(f'{ruta_vistas}/indice.json', f'{ruta_vistas_dashboard}/indice.json')
+        # Vistas de páginas que ya no se generan
+        for nombre in os.listdir(ruta_vistas_dashboard):
+            if nombre.endswith('.json') and nombre != 'indice.json' and nombre[:-len('.json')] not in indice:
+                os.remove(os.path.join(ruta_vistas_dashboard, nombre))
+        
+        actualizadas = [pagina for pagina, entrada in indice.items() if entrada['actualizada']]
+        print(f"✓ Vistas del dashboard: {len(actualizadas)} actualizada(s), "
+              f"{len(indice) - len(actualizadas)} sin cambios ({ruta_vistas})")
+    
     def generar_reportes_excel(self):
         """Genera reportes Excel automáticamente"""
         print("\n=== GENERANDO REPORTES EXCEL AUTOMÁTICAMENTE ===")
@@ -536,15 +932,17 @@ class ProcesadorDatosHospital:
             sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
             from generar_reportes_excel import GeneradorReportesExcel
             
-            # Crear y ejecutar el generador
-            generador = GeneradorReportesExcel()
+            # Entregar los resultados en memoria: el JSON es solo un formato de exportación
+            generador = GeneradorReportesExcel(
+                ruta_base=self.ruta_base, trazador=self.trazador, datos_completos=self.resultados()
+            )
             if generador.guardar_reportes_excel():
                 print("✓ Reportes Excel generados automáticamente")
                 
                 # Listar archivos generados
                 import glob
-                archivos = glob.glob('proyecto_final/reportes/*.xlsx')
-                print(f"✓ {len(archivos)} archivos Excel creados en proyecto_final/reportes/")
+                archivos = glob.glob(f'{generador.ruta_reportes}/*.xlsx')
+                print(f"✓ {len(archivos)} archivos Excel creados en {generador.ruta_reportes}/")
             else:
                 print("⚠ Error generando reportes Excel automáticamente")
                 
@@ -552,6 +950,65 @@ class ProcesadorDatosHospital:
             print(f"⚠ Error en generación automática de reportes: {e}")
             print("  Los datos JSON están disponibles para generación manual")
 
+def _ruta_etapa(procesador, nombre):
+    return f'{procesador.ruta_procesados}/etapas/{nombre}.pkl'
+
+def _guardar_etapa(ruta, datos):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(f'{ruta}.tmp', 'wb') as f:
+        pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f'{ruta}.tmp', ruta)
+
+def etapa_limpiar(ruta_base='proyecto_final'):
+    """Etapa del orquestador: CSV fuente -> caché columnar limpio"""
+    # El orquestador ya decidió que la etapa está desactualizada (fuente o código de limpieza)
+    return ProcesadorDatosHospital(ruta_base=ruta_base, usar_cache=False).preparar_datos()
+
+def etapa_agregar(ruta_base='proyecto_final'):
+    """Etapa del orquestador: caché columnar -> procesados/etapas/agregados.pkl"""
+    procesador = ProcesadorDatosHospital(ruta_base=ruta_base)
+    if not procesador.cargar_datos_limpios():
+        return False
+    _guardar_etapa(_ruta_etapa(procesador, 'agregados'), procesador.calcular_agregados())
+    return True
+
+def etapa_entrenar(ruta_base='proyecto_final'):
+    """Etapa del orquestador: caché columnar -> modelos_ml.pkl y procesados/etapas/resultados_ml.pkl"""
+    procesador = ProcesadorDatosHospital(ruta_base=ruta_base)
+    if not procesador.cargar_datos_limpios():
+        return False
+    with procesador._etapa('entrenar_modelos_ml', filas_entrada=procesador._registros_resumen()):
+        resultados_ml = procesador.entrenar_modelos_ml()
+    _guardar_etapa(_ruta_etapa(procesador, 'resultados_ml'), resultados_ml)
+    return True
+
+def etapa_reportar(ruta_base='proyecto_final'):
+    """Etapa del orquestador: agregados + resultados ML -> metricas_completas.json, vistas y reportes Excel"""
+    procesador = ProcesadorDatosHospital(ruta_base=ruta_base)
+    with open(_ruta_etapa(procesador, 'agregados'), 'rb') as f:
+        agregados = pickle.load(f)
+    with open(_ruta_etapa(procesador, 'resultados_ml'), 'rb') as f:
+        resultados_ml = pickle.load(f)
+    procesador.combinar_resultados(agregados, resultados_ml)
+    procesador.guardar_resultados()
+    return True
+
+def procesar_y_entregar(ruta_base='proyecto_final', **opciones):
+    """
+    Ejecuta el procesamiento completo en este proceso y devuelve los resultados en memoria.
+    
+    Permite a otros scripts (demos, preparación de despliegue) consumir las métricas sin
+    lanzar un subproceso ni releer metricas_completas.json.
+    
+    Returns:
+        dict: métricas completas, o None si el procesamiento falla
+    """
+    procesador = ProcesadorDatosHospital(ruta_base=ruta_base, **opciones)
+    if not procesador.procesar_todo():
+        return None
+    procesador.guardar_resultados()
+    return procesador.resultados()
+
 def main():
     procesador = ProcesadorDatosHospital()
     
@@ -0,0 +1,184 @@
+"""
+Puntos de control para reanudar un procesamiento interrumpido.
+
+Mientras corre ``procesar_todo`` se guardan en ``procesados/puntos_control/``:
+
+- el resultado de cada etapa terminada (métricas, análisis, alertas, modelos ML), en pickle;
+- los bloques ya limpios del CSV de detalle, como ``bloques/<tabla>/parte-00000.parquet``,
+  con las filas de la fuente que cubre cada uno y el diccionario de categorías vigente.
+
+Si la ejecución muere (un bloque con datos inválidos, falta de memoria al entrenar), la
+siguiente ejecución carga lo ya hecho y continúa desde el siguiente bloque o la siguiente etapa.
+``estado.json`` es el registro de lo completado: un bloque o etapa solo cuenta cuando aparece ahí,
+así que un archivo a medio escribir nunca se reutiliza.
+
+Los puntos de control llevan una clave con la huella de los archivos fuente y del código; si
+cualquiera cambió, se descartan. Al terminar bien, el procesador los elimina.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+
+import pandas as pd
+
+from cache_columnar import huella_archivo
+from codificacion_categorica import DiccionarioCategorias
+
+VERSION_PUNTOS_CONTROL = 1
+ARCHIVO_ESTADO = 'estado.json'
+ARCHIVO_DICCIONARIO = 'diccionario_categorias.json'
+
+
+def clave_ejecucion(fuentes, codigo=()):
+    """Huella de los archivos fuente (tamaño y fecha) y del contenido del código"""
+    digest = hashlib.sha256(str(VERSION_PUNTOS_CONTROL).encode('utf-8'))
+    for ruta in fuentes:
+        digest.update(json.dumps(huella_archivo(ruta), sort_keys=True).encode('utf-8'))
+    for ruta in codigo:
+        if os.path.exists(ruta):
+            with open(ruta, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()[:24]
+
+
+class PuntosControl:
+    """
+    Registro de etapas y bloques completados de una ejecución.
+
+    Args:
+        directorio (str): carpeta de los puntos de control
+        fuentes (list): archivos de entrada de la ejecución
+        codigo (list): archivos de código cuyo cambio invalida los puntos de control
+    """
+
+    def __init__(self, directorio, fuentes, codigo=()):
+        self.directorio = directorio
+        self.clave = clave_ejecucion(fuentes, codigo)
+        self._candado = threading.Lock()
+        self.estado = self._cargar_estado()
+
+    def _ruta(self, *partes):
+        return os.path.join(self.directorio, *partes)
+
+    def _cargar_estado(self):
+        try:
+            with open(self._ruta(ARCHIVO_ESTADO), 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            estado = None
+        if estado is None or estado.get('clave') != self.clave:
+            if estado is not None:
+                print("⚠ Puntos de control de otra versión de los datos o del código: se descartan")
+            shutil.rmtree(self.directorio, ignore_errors=True)
+            estado = {'clave': self.clave, 'etapas': {}, 'bloques': {}}
+        return estado
+
+    def _guardar_estado(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        temporal = self._ruta(f'{ARCHIVO_ESTADO}.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, indent=1, ensure_ascii=False)
+        os.replace(temporal, self._ruta(ARCHIVO_ESTADO))
+
+    @property
+    def vacio(self):
+        return not self.estado['etapas'] and not self.estado['bloques']
+
+    # ----- Etapas -----
+
+    def validar_etapas(self, contexto):
+        """
+        Descarta las etapas guardadas si se calcularon sobre otros datos cargados.
+
+        Args:
+            contexto (dict): descripción de los datos en memoria (registros, detalle completo, ...)
+        """
+        contexto = json.loads(json.dumps(contexto, default=str))
+        if self.estado.get('contexto') == contexto:
+            return
+        if self.estado['etapas']:
+            print("⚠ Las etapas guardadas se calcularon con otros datos cargados: se descartan")
+            shutil.rmtree(self._ruta('etapas'), ignore_errors=True)
+            self.estado['etapas'] = {}
+        self.estado['contexto'] = contexto
+        self._guardar_estado()
+
+    def tiene_etapa(self, nombre):
+        return nombre in self.estado['etapas'] and os.path.exists(self._ruta('etapas', f'{nombre}.pkl'))
+
+    def cargar_etapa(self, nombre):
+        with open(self._ruta('etapas', f'{nombre}.pkl'), 'rb') as f:
+            return pickle.load(f)
+
+    def guardar_etapa(self, nombre, datos):
+        """Persiste el resultado de una etapa (se puede llamar desde varios hilos)"""
+        ruta = self._ruta('etapas', f'{nombre}.pkl')
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(f'{ruta}.tmp', 'wb') as f:
+            pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f'{ruta}.tmp', ruta)
+        with self._candado:
+            self.estado['etapas'][nombre] = {'bytes': os.path.getsize(ruta)}
+            self._guardar_estado()
+
+    # ----- Bloques -----
+
+    def bloques(self, tabla):
+        return self.estado['bloques'].get(tabla, [])
+
+    def filas_procesadas(self, tabla):
+        """Filas de la fuente (sin encabezado) cubiertas por los bloques guardados"""
+        return sum(bloque['filas_fuente'] for bloque in self.bloques(tabla))
+
+    def cargar_diccionario(self):
+        """Diccionario guardado con el último bloque (incluye las categorías que agregaron los bloques)"""
+        ruta = self._ruta(ARCHIVO_DICCIONARIO)
+        return DiccionarioCategorias.cargar(ruta) if os.path.exists(ruta) else None
+
+    def guardar_bloque(self, tabla, df, filas_fuente, diccionario=None):
+        """
+        Persiste un bloque limpio y avanza el desplazamiento de la tabla.
+
+        Args:
+            tabla (str): nombre lógico ('detalle')
+            df (DataFrame): bloque ya limpio y codificado
+            filas_fuente (int): filas del CSV que consumió el bloque
+            diccionario (DiccionarioCategorias): diccionario después de codificar el bloque
+        """
+        indice = len(self.bloques(tabla))
+        relativa = os.path.join('bloques', tabla, f'parte-{indice:05d}.parquet')
+        ruta = self._ruta(relativa)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        df.to_parquet(f'{ruta}.tmp', index=False)
+        os.replace(f'{ruta}.tmp', ruta)
+        if diccionario is not None:
+            diccionario.guardar(self._ruta(ARCHIVO_DICCIONARIO))
+        self.estado['bloques'].setdefault(tabla, []).append(
+            {'ruta': relativa, 'filas': int(len(df)), 'filas_fuente': int(filas_fuente)}
+        )
+        self._guardar_estado()
+
+    def leer_bloques(self, tabla, diccionario=None, columnas_categoricas=None):
+        """Une los bloques guardados; las categorías se codifican con el diccionario final"""
+        partes = []
+        for bloque in self.bloques(tabla):
+            df = pd.read_parquet(self._ruta(bloque['ruta']))
+            if diccionario is not None and columnas_categoricas:
+                diccionario.codificar(df, columnas_categoricas)
+            partes.append(df)
+        return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+    def descartar_bloques(self, tabla):
+        """Elimina los bloques de una tabla cuando ya están en el caché columnar"""
+        shutil.rmtree(self._ruta('bloques', tabla), ignore_errors=True)
+        if self.estado['bloques'].pop(tabla, None) is not None:
+            self._guardar_estado()
+
+    def descartar(self):
+        """Elimina todos los puntos de control (la ejecución terminó bien)"""
+        shutil.rmtree(self.directorio, ignore_errors=True)
+        self.estado = {'clave': self.clave, 'etapas': {}, 'bloques': {}}
@@ -0,0 +1,572 @@
+"""
+Servicio analítico residente para el dashboard.
+
+Carga una sola vez los datos limpios del caché columnar (``cache_columnar/*.parquet``) y los
+modelos guardados por el procesador (``procesados/modelos_ml.pkl``), y responde por HTTP
+(o por un socket Unix) consultas de agregados, pronóstico de demanda y costo por paciente.
+Las respuestas se guardan en un caché LRU por ruta y parámetros, que se vacía al recargar
+los datos. Las predicciones de solicitudes concurrentes se agrupan en lotes y se evalúan con
+una sola llamada al modelo (``agrupador_inferencia.py``). Funciona sin conexión: solo usa
+archivos locales.
+
+Rutas:
+    GET  /salud                      estado, datos y modelos cargados
+    GET  /metricas                   solicitudes, latencias, caché, lotes de inferencia y memoria
+    GET  /agregados?tabla=resumen&por=servicio_origen,mes&valor=gasto_nivel_6&desde=2025-01&hasta=2025-03
+    GET  /pronostico?dias=30         demanda de los próximos días
+    GET  /costo?edad=45&sexo=FEMENINO&dias_estancia=3
+    POST /costo                      {"pacientes": [{"edad": 45, "sexo": "FEMENINO", "dias_estancia": 3}, ...]}
+    GET  /resultados/<seccion>       sección de metricas_completas.json
+    POST /consulta                   {"query": "SELECT ..."} SQL local sobre la exportación de Athena
+    POST /recargar                   vuelve a cargar datos y modelos si cambiaron
+
+Uso:
+    python datos/servicio_analitico.py --puerto 8765
+    python datos/servicio_analitico.py --socket /tmp/servicio_analitico.sock
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'modelos'))
+
+import cache_columnar
+from agrupador_inferencia import AgrupadorInferencia
+from codificacion_categorica import COLUMNAS_CATEGORICAS_DETALLE, COLUMNAS_CATEGORICAS_RESUMEN
+from lector_resultados import abrir_resultados
+from monitor_memoria import rss_actual
+
+try:
+    from modelos_predictivos import ModelosPredictivosHospital
+    MODELOS_ML_DISPONIBLES = True
+except ImportError:
+    MODELOS_ML_DISPONIBLES = False
+
+try:
+    from motor_consultas import ErrorConsulta, MotorConsultas, TablaNoExportada
+    MOTOR_SQL_DISPONIBLE = True
+except ImportError:
+    MOTOR_SQL_DISPONIBLE = False
+
+# Tablas del caché columnar: columna de fecha, dimensiones y valores que se pueden consultar.
+# Solo se exponen agregados; las columnas con datos personales no se pueden agrupar.
+TABLAS = {
+    'resumen': {
+        'fecha': 'fecha_egreso_general',
+        'categoricas': COLUMNAS_CATEGORICAS_RESUMEN,
+        'dimensiones': ['mes', 'servicio_origen', 'motivo_alta_hosp', 'alcaldia_municipio', 'sexo', 'derechohabiencia'],
+        'valores': ['gasto_nivel_6', 'gasto_nivel_1', 'dias_estancia_calculado', 'dias_hopit', 'edad']
+    },
+    'detalle': {
+        'fecha': 'fecha',
+        'categoricas': COLUMNAS_CATEGORICAS_DETALLE,
+        'dimensiones': ['mes', 'area_servicio', 'nivel', 'sexo'],
+        'valores': ['costo_nivel_6', 'monto_nivel_1', 'monto_nivel_6', 'gasto_nivel_6', 'cantidad', 'edad']
+    }
+}
+MAXIMO_DIAS_PRONOSTICO = 365
+MUESTRAS_LATENCIA = 2000
+SEXOS = ('MASCULINO', 'FEMENINO')
+
+
+class ErrorSolicitud(ValueError):
+    """Parámetros inválidos en una solicitud (HTTP 400)"""
+
+
+class ErrorNoDisponible(RuntimeError):
+    """El servicio no puede resolver la solicitud con los datos locales (HTTP 503)"""
+
+
+class ErrorNoEncontrado(LookupError):
+    """Ruta o sección de resultados inexistente (HTTP 404)"""
+
+
+class CacheLRU:
+    """Caché de respuestas con política LRU, seguro entre hilos"""
+
+    def __init__(self, capacidad=256):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._candado:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        with self._candado:
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def vaciar(self):
+        with self._candado:
+            self._entradas.clear()
+
+    def resumen(self):
+        total = self.aciertos + self.fallos
+        return {
+            'entradas': len(self._entradas),
+            'capacidad': self.capacidad,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / total, 4) if total else None
+        }
+
+
+def _a_json(valor):
+    """Convierte tipos de numpy/pandas para json.dumps"""
+    if valor is None or isinstance(valor, (bool, int, str)):
+        return valor
+    if isinstance(valor, float):
+        return None if np.isnan(valor) else valor
+    if isinstance(valor, (np.integer,)):
+        return int(valor)
+    if isinstance(valor, (np.floating,)):
+        return None if np.isnan(valor) else float(valor)
+    if isinstance(valor, (pd.Timestamp, date)):
+        return valor.isoformat()
+    return str(valor)
+
+
+class ServicioAnalitico:
+    """
+    Datos y modelos residentes en memoria con caché de respuestas.
+
+    Args:
+        ruta_base (str): raíz del proyecto (``proyecto_final``)
+        tamano_cache (int): respuestas guardadas en el caché LRU
+        lote_maximo (int): pacientes o pronósticos evaluados por lote
+        espera_lote_ms (float): espera máxima para completar un lote
+    """
+
+    def __init__(self, ruta_base='proyecto_final', tamano_cache=256, lote_maximo=64, espera_lote_ms=2.0):
+        self.ruta_base = ruta_base
+        self.ruta_cache = f'{ruta_base}/datos/cache_columnar'
+        self.ruta_procesados = f'{ruta_base}/datos/procesados'
+        self.ruta_modelos = f'{self.ruta_procesados}/modelos_ml.pkl'
+        self.cache = CacheLRU(tamano_cache)
+        self.tablas = {}
+        self.modelos = None
+        self.firmas = {}
+        self.cargado_en = None
+        self.generacion = 0
+        self.inicio = time.time()
+        self._candado_carga = threading.Lock()
+        self._candado_metricas = threading.Lock()
+        self._solicitudes = defaultdict(int)
+        self._errores = defaultdict(int)
+        self._latencias = defaultdict(lambda: deque(maxlen=MUESTRAS_LATENCIA))
+        self.motor_sql = None
+        self._candado_motor = threading.Lock()
+        self.agrupadores = {
+            'costos': AgrupadorInferencia('costos', self._costos_lote, tamano=len,
+                                          tamano_maximo=lote_maximo, espera_maxima_ms=espera_lote_ms),
+            'demanda': AgrupadorInferencia('demanda', self._demanda_lote,
+                                           tamano_maximo=lote_maximo, espera_maxima_ms=espera_lote_ms)
+        }
+
+    # Carga
+
+    def _firmas_actuales(self):
+        rutas = [os.path.join(self.ruta_cache, f'{nombre}.parquet') for nombre in TABLAS] + [self.ruta_modelos]
+        return {ruta: cache_columnar.huella_archivo(ruta) for ruta in rutas}
+
+    def cargar(self, forzar=False):
+        """
+        Carga datos y modelos si cambiaron desde la última carga.
+
+        Returns:
+            bool: True si se volvió a cargar
+        """
+        with self._candado_carga:
+            firmas = self._firmas_actuales()
+            if not forzar and firmas == self.firmas:
+                return False
+
+            inicio = time.perf_counter()
+            diccionario = cache_columnar.cargar_diccionario(self.ruta_cache)
+            tablas = {}
+            for nombre, definicion in TABLAS.items():
+                df = cache_columnar.cargar_tabla(self.ruta_cache, nombre, diccionario, definicion['categoricas'])
+                if df is None:
+                    continue
+                if definicion['fecha'] in df.columns:
+                    fechas = pd.to_datetime(df[definicion['fecha']], errors='coerce')
+                    df['mes'] = fechas.dt.strftime('%Y-%m').astype('category')
+                tablas[nombre] = df
+
+            modelos = None
+            if MODELOS_ML_DISPONIBLES:
+                try:
+                    modelos = ModelosPredictivosHospital.cargar(self.ruta_modelos)
+                except Exception as e:
+                    print(f"⚠ No se pudieron cargar los modelos: {e}")
+
+            self.tablas = tablas
+            self.modelos = modelos
+            self.firmas = firmas
+            self.cargado_en = time.strftime('%Y-%m-%dT%H:%M:%S')
+            self.generacion += 1
+            self.cache.vaciar()
+
+            filas = ', '.join(f"{nombre}: {len(df):,}" for nombre, df in tablas.items()) or 'sin datos'
+            print(f"✓ Datos cargados ({filas}); modelos: {'sí' if modelos else 'no'} "
+                  f"({time.perf_counter() - inicio:.2f}s)")
+            return True
+
+    def precalentar(self):
+        """Calcula por adelantado las respuestas que el dashboard pide al abrir"""
+        solicitudes = [('/pronostico', {'dias': '30'})]
+        for nombre, definicion in TABLAS.items():
+            if nombre in self.tablas:
+                dimension = definicion['dimensiones'][1]
+                solicitudes.append(('/agregados', {'tabla': nombre, 'por': dimension, 'valor': definicion['valores'][0]}))
+        for ruta, parametros in solicitudes:
+            try:
+                self.despachar('GET', ruta, parametros)
+            except (ErrorSolicitud, ErrorNoEncontrado):
+                pass
+
+    # Consultas
+
+    def salud(self, parametros=None):
+        return {
+            'estado': 'ok' if self.tablas else 'sin_datos',
+            'cargado_en': self.cargado_en,
+            'generacion': self.generacion,
+            'tablas': {nombre: len(df) for nombre, df in self.tablas.items()},
+            'modelos': {
+                'demanda': bool(self.modelos and self.modelos.modelo_demanda is not None),
+                'costos': bool(self.modelos and self.modelos.modelo_costos is not None)
+            }
+        }
+
+    def metricas(self, parametros=None):
+        with self._candado_metricas:
+            rutas = {}
+            for ruta, muestras in self._latencias.items():
+                valores = np.array(muestras) if muestras else np.array([0.0])
+                rutas[ruta] = {
+                    'solicitudes': self._solicitudes[ruta],
+                    'errores': self._errores[ruta],
+                    'latencia_ms': {
+                        'p50': round(float(np.percentile(valores, 50)), 3),
+                        'p95': round(float(np.percentile(valores, 95)), 3),
+                        'p99': round(float(np.percentile(valores, 99)), 3),
+                        'max': round(float(valores.max()), 3)
+                    }
+                }
+        return {
+            'tiempo_activo_s': round(time.time() - self.inicio, 1),
+            'rss_mb': round(rss_actual() / (1024 * 1024), 1),
+            'cache': self.cache.resumen(),
+            'inferencia': {nombre: agrupador.resumen() for nombre, agrupador in self.agrupadores.items()},
+            'consultas_sql': self.motor_sql.resumen() if self.motor_sql else None,
+            'rutas': rutas
+        }
+
+    def agregados(self, parametros):
+        nombre = parametros.get('tabla', 'resumen')
+        if nombre not in TABLAS:
+            raise ErrorSolicitud(f"tabla desconocida: {nombre}")
+        if nombre not in self.tablas:
+            raise ErrorSolicitud(f"la tabla {nombre} no está cargada")
+        definicion = TABLAS[nombre]
+        df = self.tablas[nombre]
+
+        por = [c for c in parametros.get('por', '').split(',') if c]
+        invalidas = [c for c in por if c not in definicion['dimensiones'] or c not in df.columns]
+        if invalidas:
+            raise ErrorSolicitud(f"dimensiones no permitidas: {', '.join(invalidas)}")
+        valor = parametros.get('valor', definicion['valores'][0])
+        if valor not in definicion['valores'] or valor not in df.columns:
+            raise ErrorSolicitud(f"valor no permitido: {valor}")
+
+        if ('desde' in parametros or 'hasta' in parametros) and 'mes' in df.columns:
+            meses = df['mes'].astype(str)
+            mascara = np.ones(len(df), dtype=bool)
+            if 'desde' in parametros:
+                mascara &= (meses >= parametros['desde']).to_numpy()
+            if 'hasta' in parametros:
+                mascara &= (meses <= parametros['hasta']).to_numpy()
+            df = df.loc[mascara]
+
+        serie = pd.to_numeric(df[valor], errors='coerce')
+        if por:
+            tabla = serie.groupby([df[c] for c in por], observed=True).agg(['count', 'sum', 'mean'])
+            tabla = tabla.sort_values('sum', ascending=False).reset_index()
+        else:
+            tabla = pd.DataFrame([{'count': serie.count(), 'sum': serie.sum(), 'mean': serie.mean()}])
+        tabla = tabla.rename(columns={'count': 'registros', 'sum': 'suma', 'mean': 'promedio'})
+        return {
+            'tabla': nombre,
+            'por': por,
+            'valor': valor,
+            'filas': [{k: _a_json(v) for k, v in fila.items()} for fila in tabla.to_dict('records')]
+        }
+
+    def _modelo(self, atributo):
+        if self.modelos is None or getattr(self.modelos, atributo, None) is None:
+            raise ErrorSolicitud("modelo no disponible; ejecutar procesar_datos_avanzado.py para entrenarlo")
+        return self.modelos
+
+    def _costos_lote(self, solicitudes):
+        """Una sola predicción para los pacientes de todas las solicitudes del lote"""
+        pacientes = [paciente for solicitud in solicitudes for paciente in solicitud]
+        edades, sexos, dias = zip(*pacientes)
+        costos = self.modelos.predecir_costos_pacientes(edades, sexos, dias)
+        resultados, inicio = [], 0
+        for solicitud in solicitudes:
+            resultados.append(costos[inicio:inicio + len(solicitud)])
+            inicio += len(solicitud)
+        return resultados
+
+    def _demanda_lote(self, solicitudes):
+        """El pronóstico más largo del lote contiene a los demás"""
+        predicciones = self.modelos.predecir_demanda(max(solicitudes))
+        return [predicciones[:dias] for dias in solicitudes]
+
+    def pronostico(self, parametros):
+        dias = _entero(parametros, 'dias', 30)
+        if not 1 <= dias <= MAXIMO_DIAS_PRONOSTICO:
+            raise ErrorSolicitud(f"dias debe estar entre 1 y {MAXIMO_DIAS_PRONOSTICO}")
+        self._modelo('modelo_demanda')
+        predicciones = self.agrupadores['demanda'].evaluar(dias)
+        return {'dias': dias, 'predicciones': predicciones}
+
+    def costo(self, parametros, cuerpo=None):
+        self._modelo('modelo_costos')
+        pacientes = (cuerpo or {}).get('pacientes') if cuerpo else [parametros]
+        if not pacientes:
+            raise ErrorSolicitud("se requiere al menos un paciente")
+        if not isinstance(pacientes, list) or not all(isinstance(p, dict) for p in pacientes):
+            raise ErrorSolicitud("pacientes debe ser una lista de objetos")
+        try:
+            pacientes = [(float(p['edad']), str(p.get('sexo', '')), float(p.get('dias_estancia', 1))) for p in pacientes]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ErrorSolicitud(f"paciente inválido: {e}")
+        # El modelo codifica cualquier otro valor como FEMENINO: se rechaza en lugar de adivinar
+        pacientes = [(edad, sexo.strip().upper(), dias) for edad, sexo, dias in pacientes]
+        invalidos = sorted({sexo for _, sexo, _ in pacientes if sexo not in SEXOS})
+        if invalidos:
+            raise ErrorSolicitud(f"sexo debe ser {' o '.join(SEXOS)}; recibido: {', '.join(invalidos) or 'vacío'}")
+        costos = self.agrupadores['costos'].evaluar(pacientes)
+        return {'costos': [round(float(c), 2) for c in costos]}
+
+    def consulta(self, cuerpo):
+        """
+        SQL de Athena ejecutado localmente; el motor tiene su propio caché por consulta normalizada.
+
+        Los errores de SQL son 400; sin duckdb o sin la exportación de una tabla consultada se
+        responde 503 para que el dashboard pase la consulta a Athena.
+        """
+        if not MOTOR_SQL_DISPONIBLE:
+            raise ErrorNoDisponible("duckdb no disponible para consultas SQL locales")
+        sql = (cuerpo or {}).get('query')
+        if not sql:
+            raise ErrorSolicitud("se requiere query")
+        with self._candado_motor:
+            if self.motor_sql is None:
+                self.motor_sql = MotorConsultas(self.ruta_base)
+        try:
+            return self.motor_sql.consultar(sql)
+        except ErrorConsulta as e:
+            raise ErrorSolicitud(str(e))
+        except TablaNoExportada as e:
+            raise ErrorNoDisponible(str(e))
+
+    def resultados(self, seccion):
+        ruta = f'{self.ruta_procesados}/metricas_completas.json'
+        if not os.path.exists(ruta):
+            raise ErrorNoEncontrado(f"sin resultados procesados: {seccion}")
+        lector = abrir_resultados(ruta)
+        if seccion not in lector:
+            raise ErrorNoEncontrado(f"sección no encontrada: {seccion}")
+        return {seccion: lector[seccion]}
+
+    # Despacho
+
+    def despachar(self, metodo, ruta, parametros, cuerpo=None):
+        """
+        Resuelve una solicitud; las consultas GET se responden desde el caché si ya se calcularon.
+
+        Returns:
+            tuple: (respuesta, desde_cache)
+        """
+        if cuerpo is not None and not isinstance(cuerpo, dict):
+            raise ErrorSolicitud("el cuerpo de la solicitud debe ser un objeto JSON")
+        if ruta == '/salud':
+            return self.salud(), False
+        if ruta == '/metricas':
+            return self.metricas(), False
+        if ruta == '/consulta' and metodo == 'POST':
+            return self.consulta(cuerpo), False
+        if ruta == '/recargar' and metodo == 'POST':
+            return {'recargado': self.cargar(), **self.salud()}, False
+
+        clave = None
+        if metodo == 'GET':
+            # El pronóstico parte de la fecha actual: la clave incluye el día
+            dia = date.today().isoformat() if ruta == '/pronostico' else None
+            clave = (self.generacion, ruta, dia, tuple(sorted(parametros.items())))
+            respuesta = self.cache.obtener(clave)
+            if respuesta is not None:
+                return respuesta, True
+
+        if ruta == '/agregados':
+            respuesta = self.agregados(parametros)
+        elif ruta == '/pronostico':
+            respuesta = self.pronostico(parametros)
+        elif ruta == '/costo':
+            respuesta = self.costo(parametros, cuerpo if metodo == 'POST' else None)
+        elif ruta.startswith('/resultados/'):
+            respuesta = self.resultados(ruta[len('/resultados/'):])
+        else:
+            raise ErrorNoEncontrado(f"ruta no encontrada: {ruta}")
+
+        if clave is not None:
+            self.cache.guardar(clave, respuesta)
+        return respuesta, False
+
+    def registrar_solicitud(self, ruta, duracion_ms, error=False):
+        ruta = '/resultados' if ruta.startswith('/resultados/') else ruta
+        with self._candado_metricas:
+            self._solicitudes[ruta] += 1
+            self._latencias[ruta].append(duracion_ms)
+            if error:
+                self._errores[ruta] += 1
+
+
+def _entero(parametros, nombre, por_defecto):
+    try:
+        return int(parametros.get(nombre, por_defecto))
+    except (TypeError, ValueError):
+        raise ErrorSolicitud(f"{nombre} debe ser un entero")
+
+
+class ManejadorAnalitico(BaseHTTPRequestHandler):
+    """Traduce solicitudes HTTP a ``ServicioAnalitico.despachar``"""
+
+    servicio = None
+    detallado = False
+
+    def _responder(self, estado, contenido, desde_cache=False):
+        cuerpo = json.dumps(contenido, ensure_ascii=False, default=_a_json).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.send_header('X-Cache', 'HIT' if desde_cache else 'MISS')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _atender(self, metodo):
+        inicio = time.perf_counter()
+        partes = urlsplit(self.path)
+        ruta = partes.path.rstrip('/') or '/'
+        parametros = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+        error = True
+        try:
+            cuerpo = None
+            if metodo == 'POST':
+                longitud = int(self.headers.get('Content-Length') or 0)
+                cuerpo = json.loads(self.rfile.read(longitud) or b'{}') if longitud else {}
+            respuesta, desde_cache = self.servicio.despachar(metodo, ruta, parametros, cuerpo)
+            self._responder(200, respuesta, desde_cache)
+            error = False
+        except (ErrorSolicitud, json.JSONDecodeError) as e:
+            self._responder(400, {'error': str(e)})
+        except ErrorNoDisponible as e:
+            self._responder(503, {'error': str(e)})
+        except ErrorNoEncontrado as e:
+            self._responder(404, {'error': str(e)})
+        except Exception as e:
+            self._responder(500, {'error': f'{type(e).__name__}: {e}'})
+        finally:
+            self.servicio.registrar_solicitud(ruta, (time.perf_counter() - inicio) * 1000, error)
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def address_string(self):
+        # En un socket Unix la dirección del cliente es una cadena vacía
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, formato, *args):
+        if self.detallado:
+            super().log_message(formato, *args)
+
+
+class ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def crear_servidor(servicio, host='127.0.0.1', puerto=8765, socket_unix=None, detallado=False):
+    """Servidor HTTP con hilos por solicitud sobre TCP o un socket Unix"""
+    manejador = type('Manejador', (ManejadorAnalitico,), {'servicio': servicio, 'detallado': detallado})
+    if socket_unix:
+        if os.path.exists(socket_unix):
+            os.remove(socket_unix)
+        return ServidorUnix(socket_unix, manejador)
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servicio analítico residente para el dashboard')
+    parser.add_argument('--ruta-base', default='proyecto_final')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--socket', default=None, help='Ruta de un socket Unix en lugar de TCP')
+    parser.add_argument('--tamano-cache', type=int, default=256)
+    parser.add_argument('--lote-maximo', type=int, default=64, help='Elementos por lote de inferencia')
+    parser.add_argument('--espera-lote-ms', type=float, default=2.0, help='Espera máxima para completar un lote')
+    parser.add_argument('--detallado', action='store_true', help='Registra cada solicitud')
+    args = parser.parse_args()
+
+    servicio = ServicioAnalitico(args.ruta_base, args.tamano_cache, args.lote_maximo, args.espera_lote_ms)
+    servicio.cargar(forzar=True)
+    if not servicio.tablas:
+        print("⚠ No hay datos en el caché columnar; ejecutar procesar_datos_avanzado.py primero")
+    servicio.precalentar()
+
+    servidor = crear_servidor(servicio, args.host, args.puerto, args.socket, args.detallado)
+    direccion = f"unix:{args.socket}" if args.socket else f"http://{args.host}:{args.puerto}"
+    print(f"✓ Servicio analítico escuchando en {direccion}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Servicio detenido")
+    finally:
+        servidor.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""
+Trazas ligeras por etapa para el pipeline hospitalario.
+
+Cada etapa se registra como un *span* anidado con tiempo de reloj, tiempo de CPU,
+registros de entrada/salida y bytes leídos/escritos. Las trazas se exportan en
+formato JSON (Chrome Trace Event, visible en chrome://tracing o Perfetto) y en
+formato de pilas plegadas compatible con flamegraph.pl / speedscope.
+
+El tiempo de CPU de un span es el de su hilo más el de sus hijos que corrieron en otros hilos
+(un pool de trabajo), así que un span padre nunca reporta menos CPU que sus etapas.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+
+class Span:
+    """Una etapa medida dentro de la traza"""
+
+    def __init__(self, nombre, padre=None, **metricas):
+        self.nombre = nombre
+        self.padre = padre
+        self.hijos = []
+        self.hilo = threading.current_thread().name
+        self._id_hilo = threading.get_ident()
+        self.inicio = time.time()
+        self._inicio_reloj = time.perf_counter()
+        self._inicio_cpu = time.thread_time()
+        self.duracion_s = None
+        self.cpu_s = None
+        # CPU de los hijos cerrados en otros hilos (thread_time solo mide el hilo actual)
+        self.cpu_otros_hilos_s = 0.0
+        self.filas_entrada = None
+        self.filas_salida = None
+        self.bytes_leidos = None
+        self.bytes_escritos = None
+        self.atributos = {}
+        self.registrar(**metricas)
+
+    def registrar(self, filas_entrada=None, filas_salida=None, bytes_leidos=None, bytes_escritos=None, **atributos):
+        """Agrega métricas de volumen al span (los bytes se acumulan)"""
+        if filas_entrada is not None:
+            self.filas_entrada = int(filas_entrada)
+        if filas_salida is not None:
+            self.filas_salida = int(filas_salida)
+        if bytes_leidos is not None:
+            self.bytes_leidos = (self.bytes_leidos or 0) + int(bytes_leidos)
+        if bytes_escritos is not None:
+            self.bytes_escritos = (self.bytes_escritos or 0) + int(bytes_escritos)
+        self.atributos.update(atributos)
+        return self
+
+    def cerrar(self):
+        self.duracion_s = time.perf_counter() - self._inicio_reloj
+        self.cpu_s = time.thread_time() - self._inicio_cpu + self.cpu_otros_hilos_s
+
+    def ruta(self):
+        """Nombres desde la raíz hasta este span"""
+        nombres = []
+        span = self
+        while span is not None:
+            nombres.append(span.nombre)
+            span = span.padre
+        return list(reversed(nombres))
+
+    def a_dict(self):
+        datos = {
+            'nombre': self.nombre,
+            'inicio': self.inicio,
+            'duracion_s': round(self.duracion_s, 6) if self.duracion_s is not None else None,
+            'cpu_s': round(self.cpu_s, 6) if self.cpu_s is not None else None,
+            'hilo': self.hilo
+        }
+        for campo in ('filas_entrada', 'filas_salida', 'bytes_leidos', 'bytes_escritos'):
+            valor = getattr(self, campo)
+            if valor is not None:
+                datos[campo] = valor
+        if self.atributos:
+            datos['atributos'] = self.atributos
+        if self.hijos:
+            datos['hijos'] = [hijo.a_dict() for hijo in self.hijos]
+        return datos
+
+
+class Trazador:
+    """Colector de spans anidados (seguro para usarse desde varios hilos)"""
+
+    def __init__(self):
+        self.raices = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _pila(self):
+        if not hasattr(self._local, 'pila'):
+            self._local.pila = []
+        return self._local.pila
+
+    def span_actual(self):
+        pila = self._pila()
+        return pila[-1] if pila else None
+
+    @contextmanager
+    def span(self, nombre, padre=None, **metricas):
+        """
+        Abre un span hijo del span activo en el hilo actual.
+
+        Args:
+            nombre (str): nombre de la etapa
+            padre (Span): padre explícito, para spans abiertos desde hilos de trabajo
+            **metricas: filas_entrada, filas_salida, bytes_leidos, bytes_escritos u otros atributos
+        """
+        padre = padre if padre is not None else self.span_actual()
+        span = Span(nombre, padre, **metricas)
+        with self._lock:
+            if padre is None:
+                self.raices.append(span)
+            else:
+                padre.hijos.append(span)
+
+        pila = self._pila()
+        pila.append(span)
+        try:
+            yield span
+        finally:
+            span.cerrar()
+            pila.pop()
+            if padre is not None and padre._id_hilo != span._id_hilo:
+                with self._lock:
+                    padre.cpu_otros_hilos_s += span.cpu_s
+
+    def trazar(self, nombre=None):
+        """Decorador que abre un span por cada llamada a la función"""
+        def decorador(funcion):
+            @wraps(funcion)
+            def envoltura(*args, **kwargs):
+                with self.span(nombre or funcion.__name__):
+                    return funcion(*args, **kwargs)
+            return envoltura
+        return decorador
+
+    def _recorrer(self, raices=None):
+        pendientes = list(self.raices if raices is None else raices)
+        while pendientes:
+            span = pendientes.pop()
+            yield span
+            pendientes.extend(span.hijos)
+
+    def resumen(self):
+        """Árbol de spans serializable (para ``metricas_completas['metadatos']``)"""
+        with self._lock:
+            return {
+                'version': 1,
+                'spans': [raiz.a_dict() for raiz in self.raices]
+            }
+
+    def duraciones_por_ruta(self):
+        """Duración total (segundos) por ruta ``raiz;etapa;subetapa``, para comparar ejecuciones"""
+        duraciones = defaultdict(float)
+        for span in self._recorrer():
+            if span.duracion_s is not None:
+                duraciones[';'.join(span.ruta())] += span.duracion_s
+        return dict(duraciones)
+
+    def eventos_chrome(self, raices=None):
+        """Eventos en formato Chrome Trace Event ("ph": "X" = evento completo) de ``raices`` (por defecto, todas)"""
+        identificadores_hilo = {}
+        eventos = []
+        for span in self._recorrer(raices):
+            if span.duracion_s is None:
+                continue
+            tid = identificadores_hilo.setdefault(span.hilo, len(identificadores_hilo) + 1)
+            argumentos = {k: v for k, v in span.a_dict().items()
+                          if k in ('filas_entrada', 'filas_salida', 'bytes_leidos', 'bytes_escritos', 'cpu_s')}
+            argumentos.update(span.atributos)
+            eventos.append({
+                'name': span.nombre,
+                'cat': 'pipeline',
+                'ph': 'X',
+                'ts': int(span.inicio * 1e6),
+                'dur': int(span.duracion_s * 1e6),
+                'pid': os.getpid(),
+                'tid': tid,
+                'args': argumentos
+            })
+        eventos.sort(key=lambda e: e['ts'])
+        return eventos
+
+    def pilas_plegadas(self, raices=None):
+        """
+        Líneas ``raiz;etapa;subetapa microsegundos`` con el tiempo propio de cada span,
+        el formato que consumen flamegraph.pl y speedscope.
+        """
+        acumulado = defaultdict(int)
+        for span in self._recorrer(raices):
+            if span.duracion_s is None:
+                continue
+            tiempo_hijos = sum(h.duracion_s or 0 for h in span.hijos if h.hilo == span.hilo)
+            propio = max(0.0, span.duracion_s - tiempo_hijos)
+            acumulado[';'.join(span.ruta())] += int(propio * 1e6)
+        return [f'{ruta} {valor}' for ruta, valor in sorted(acumulado.items())]
+
+    def exportar_json(self, ruta, raices=None):
+        """Escribe la traza (o solo los spans bajo ``raices``) en formato Chrome Trace Event"""
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.eventos_chrome(raices), 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+    def exportar_flamegraph(self, ruta, raices=None):
+        """Escribe la traza (o solo los spans bajo ``raices``) en formato de pilas plegadas"""
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.pilas_plegadas(raices)) + '\n')
+
+    def reiniciar(self):
+        with self._lock:
+            self.raices = []
+
+
+_TRAZADOR_GLOBAL = Trazador()
+
+
+def trazador_global():
+    """Trazador compartido por los módulos que no reciben uno explícito"""
+    return _TRAZADOR_GLOBAL
+
+
+def tamano_archivo(ruta):
+    """Tamaño en bytes de un archivo (0 si no existe), para bytes leídos/escritos"""
+    try:
+        return os.path.getsize(ruta)
+    except OSError:
+        return 0
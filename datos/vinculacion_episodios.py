@@ -0,0 +1,543 @@
+"""
+Vinculación de episodios urgencias ↔ hospitalización.
+
+Reproduce en Python el CTE ``todo_junto`` de ``Egresos_Detalle_Completo.sql`` sobre las tablas
+ya extraídas, sin el join con ``OR`` y ``DATEDIFF`` que es costoso en la base de origen:
+
+- ``urgencias_egreso`` (egresos de urgencias que no pasaron a hospitalización, o defunciones sin
+  cama) ``LEFT JOIN hospitalizacion`` por expediente (``n_expediente_hosp`` o
+  ``ian_expediente_hosp``), sin ventana de fechas, igual que en el query;
+- ``urgencias RIGHT JOIN hospitalizacion`` por expediente y con la fecha de egreso de urgencias a
+  ±1 día de la recepción en hospitalización;
+- ``UNION`` de ambos, sin duplicados.
+
+Cada join se resuelve ordenando una vez la tabla de urgencias por (expediente, día) y buscando con
+``searchsorted`` el rango de la ventana de cada admisión, de forma vectorizada; el costo es
+O((n + m) log n) en lugar de comparar todos los pares de un expediente.
+
+El resultado es una tabla compacta de episodios (uno por par urgencias/admisión, o por registro
+sin pareja) con un ``id_episodio`` estable: el hash de los dos identificadores de registro, que
+no depende del orden de las filas ni de la ejecución.
+
+Uso:
+    python datos/vinculacion_episodios.py --periodo 2025-01 --verificar
+    python datos/vinculacion_episodios.py --sinteticos 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+    DUCKDB_DISPONIBLE = True
+except ImportError:
+    DUCKDB_DISPONIBLE = False
+
+COLUMNAS_URGENCIAS = [
+    'id_registro_urg', 'fecha_recepcion_urg', 'fecha_egreso_urg', 'motivo_alta_urg',
+    'expediente_urg', 'nse_urg', 'no_de_cam_urg', 'hospitalizado_urg'
+]
+COLUMNAS_HOSPITALIZACION = [
+    'id_registro_admision', 'fecha_recepcion_hosp', 'fecha_egreso_hosp', 'motivo_alta_hosp',
+    'n_expediente_hosp', 'ian_expediente_hosp', 'nse_hosp', 'no_de_cama_hosp', 'estancia_hosp',
+    'FYF7Y9IB2I2II_L5JF77Y5J5F1B'
+]
+CLAVES_HOSPITALIZACION = ['n_expediente_hosp', 'ian_expediente_hosp']
+VENTANA_DIAS = 1
+SIN_REGISTRO = -1
+
+TIPO_URGENCIAS = 'urgencias'
+TIPO_HOSPITALIZACION = 'hospitalizacion'
+TIPO_COMPLETO = 'urgencias_hospitalizacion'
+
+# El CTE todo_junto del query, con DATEDIFF/DATE_FORMAT de MySQL en su forma de DuckDB.
+# DATEDIFF(a, b) de MySQL es a - b en días; date_diff('day', b, a) de DuckDB también.
+SQL_TODO_JUNTO = """
+with urgencias_egreso as (
+    select * from urgencias
+    where {filtro_periodo}
+        and (
+            (no_de_cam_urg is not null and motivo_alta_urg <> 'HOSPITALIZACIÓN')
+            or (no_de_cam_urg is null and motivo_alta_urg = 'DEFUNCIÓN')
+        )
+),
+todo_junto as (
+    select ue.id_registro_urg, h.id_registro_admision from urgencias_egreso ue
+    left join hospitalizacion h
+        on (ue.expediente_urg = h.n_expediente_hosp
+            or ue.expediente_urg = h.ian_expediente_hosp)
+    union
+    select u.id_registro_urg, h.id_registro_admision from urgencias u
+    right join hospitalizacion h
+        on (u.expediente_urg = h.n_expediente_hosp
+            or u.expediente_urg = h.ian_expediente_hosp)
+        and (
+            strftime(u.fecha_egreso_urg, '%Y%m%d') = strftime(h.fecha_recepcion_hosp, '%Y%m%d')
+            or (
+                date_diff('day', cast(h.fecha_recepcion_hosp as date), cast(u.fecha_egreso_urg as date)) >= -1
+                and date_diff('day', cast(h.fecha_recepcion_hosp as date), cast(u.fecha_egreso_urg as date)) <= 1
+            )
+        )
+)
+select * from todo_junto
+"""
+
+
+def normalizar_clave(serie):
+    """
+    Expedientes e identificadores como claves comparables.
+
+    En los CSV la misma clave llega como ``621`` o ``621.0`` (columna con nulos); los vacíos
+    quedan como nulos, que nunca coinciden en el join. Las columnas numéricas enteras se quedan
+    como ``Int64`` (sin pasar por texto, que domina el tiempo con millones de filas).
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        numeros = serie.astype('float64')
+        if (numeros.dropna() % 1 == 0).all():
+            return numeros.astype('Int64')
+    texto = serie.astype('string').str.strip().str.replace(r'\.0+$', '', regex=True)
+    return texto.mask(texto == '')
+
+
+def claves_comparables(series):
+    """Normaliza varias columnas de clave a un mismo tipo (entero si todas lo son, texto si no)"""
+    claves = [normalizar_clave(serie) for serie in series]
+    if all(clave.dtype == 'Int64' for clave in claves):
+        return claves
+    return [clave.astype('string') for clave in claves]
+
+
+def _dias(serie):
+    """Fecha como número de día (la parte de hora no cuenta, igual que en DATEDIFF)"""
+    fechas = pd.to_datetime(serie, errors='coerce')
+    dias = fechas.values.astype('datetime64[D]').astype(np.int64)
+    return dias, fechas.notna().values
+
+
+def separar_registros(df):
+    """
+    Separa un extracto ya unido (``Resumen Egreso``) en las tablas de urgencias y hospitalización.
+
+    Sirve para reconstruir las tablas fuente a partir de un extracto local y volver a vincularlas.
+
+    Returns:
+        tuple: (urgencias, hospitalizacion), un registro por identificador
+    """
+    columnas_urg = [c for c in COLUMNAS_URGENCIAS if c in df.columns]
+    columnas_hosp = [c for c in COLUMNAS_HOSPITALIZACION if c in df.columns]
+    urgencias = df.loc[df['id_registro_urg'].notna(), columnas_urg]
+    hospitalizacion = df.loc[df['id_registro_admision'].notna(), columnas_hosp]
+    return (
+        urgencias.drop_duplicates('id_registro_urg').reset_index(drop=True),
+        hospitalizacion.drop_duplicates('id_registro_admision').reset_index(drop=True)
+    )
+
+
+def es_egreso_urgencias(urgencias, periodo=None):
+    """
+    Filtro del CTE ``urgencias_egreso``.
+
+    Egresos de urgencias con cama y motivo distinto de hospitalización, o defunciones sin cama.
+
+    Args:
+        urgencias (DataFrame): tabla de urgencias
+        periodo (str): mes de egreso 'AAAA-MM'; None no filtra por mes
+    """
+    motivo = urgencias['motivo_alta_urg']
+    con_cama = urgencias['no_de_cam_urg'].notna()
+    mascara = (con_cama & motivo.notna() & (motivo != 'HOSPITALIZACIÓN')) | (~con_cama & (motivo == 'DEFUNCIÓN'))
+    if periodo is not None:
+        egreso = pd.to_datetime(urgencias['fecha_egreso_urg'], errors='coerce')
+        anio, mes = (int(parte) for parte in periodo.split('-'))
+        mascara &= (egreso.dt.year == anio) & (egreso.dt.month == mes)
+    return mascara.fillna(False).values
+
+
+def _pares(codigos_busqueda, dias_busqueda, codigos_indice, dias_indice, ventana=None):
+    """
+    Join ordenado por expediente (y ventana de días).
+
+    Ordena el lado ``indice`` por (código, día) y, para cada fila de ``busqueda``, ubica con
+    ``searchsorted`` el rango [día - ventana, día + ventana] de su mismo código. Sin ventana el
+    rango es todo el código (join de igualdad).
+
+    Returns:
+        tuple: (posiciones en busqueda, posiciones en indice) de cada par que coincide
+    """
+    validos_b = np.flatnonzero(codigos_busqueda >= 0)
+    validos_i = np.flatnonzero(codigos_indice >= 0)
+    if len(validos_b) == 0 or len(validos_i) == 0:
+        vacio = np.empty(0, dtype=np.int64)
+        return vacio, vacio
+
+    if ventana is None:
+        llave_i = codigos_indice[validos_i]
+        desde = hasta = codigos_busqueda[validos_b]
+    else:
+        minimo = min(dias_busqueda[validos_b].min(), dias_indice[validos_i].min()) - ventana
+        ancho = max(dias_busqueda[validos_b].max(), dias_indice[validos_i].max()) + ventana - minimo + 1
+        llave_i = codigos_indice[validos_i] * ancho + (dias_indice[validos_i] - minimo)
+        base = codigos_busqueda[validos_b] * ancho + (dias_busqueda[validos_b] - minimo)
+        desde, hasta = base - ventana, base + ventana
+
+    orden = np.argsort(llave_i, kind='stable')
+    llave_ordenada = llave_i[orden]
+    inicio = np.searchsorted(llave_ordenada, desde, side='left')
+    fin = np.searchsorted(llave_ordenada, hasta, side='right')
+
+    conteos = fin - inicio
+    total = int(conteos.sum())
+    posiciones_b = np.repeat(validos_b, conteos)
+    desplazamiento = np.arange(total) - np.repeat(np.cumsum(conteos) - conteos, conteos)
+    posiciones_i = validos_i[orden[np.repeat(inicio, conteos) + desplazamiento]]
+    return posiciones_b, posiciones_i
+
+
+def _sin_duplicados(urg, hosp, total_hosp):
+    """UNION: un solo par por (urgencias, admisión); las posiciones ausentes valen -1"""
+    llave = (urg.astype(np.int64) + 1) * (total_hosp + 1) + (hosp.astype(np.int64) + 1)
+    _, primeros = np.unique(llave, return_index=True)
+    primeros.sort()
+    return urg[primeros], hosp[primeros]
+
+
+def vincular_pares(urgencias, hospitalizacion, periodo=None, mascara_egreso=None, ventana=VENTANA_DIAS):
+    """
+    Pares (urgencias, admisión) de ``todo_junto``.
+
+    Args:
+        urgencias (DataFrame): tabla de urgencias (todas las visitas)
+        hospitalizacion (DataFrame): admisiones del periodo (CTE ``hospitalizacion``)
+        periodo (str): mes 'AAAA-MM' del filtro de ``urgencias_egreso``
+        mascara_egreso (array): filas de ``urgencias`` que forman ``urgencias_egreso``; si se
+            indica, reemplaza al filtro por periodo
+        ventana (int): días de tolerancia entre egreso de urgencias y recepción hospitalaria
+
+    Returns:
+        tuple: (posiciones en urgencias, posiciones en hospitalizacion); -1 si no hay pareja
+    """
+    if mascara_egreso is None:
+        mascara_egreso = es_egreso_urgencias(urgencias, periodo)
+    mascara_egreso = np.asarray(mascara_egreso, dtype=bool)
+
+    # Un solo espacio de códigos para los expedientes de ambas tablas
+    claves = claves_comparables([urgencias['expediente_urg']] + [hospitalizacion[c] for c in CLAVES_HOSPITALIZACION])
+    codigos, _ = pd.factorize(pd.concat(claves, ignore_index=True))
+    codigos = codigos.astype(np.int64)
+    n_urg, n_hosp = len(urgencias), len(hospitalizacion)
+    codigos_urg = codigos[:n_urg]
+    codigos_hosp = [codigos[n_urg + i * n_hosp:n_urg + (i + 1) * n_hosp] for i in range(len(CLAVES_HOSPITALIZACION))]
+
+    dias_egreso_urg, fecha_valida_urg = _dias(urgencias['fecha_egreso_urg'])
+    dias_recepcion_hosp, fecha_valida_hosp = _dias(hospitalizacion['fecha_recepcion_hosp'])
+
+    # urgencias_egreso LEFT JOIN hospitalizacion (solo expediente)
+    egresos = np.flatnonzero(mascara_egreso)
+    urg_a, hosp_a = [], []
+    for codigos_clave in codigos_hosp:
+        b, i = _pares(codigos_urg[egresos], None, codigos_clave, None)
+        urg_a.append(egresos[b])
+        hosp_a.append(i)
+    urg_a, hosp_a = np.concatenate(urg_a), np.concatenate(hosp_a)
+    sin_pareja = np.setdiff1d(egresos, urg_a)
+    urg_a = np.concatenate([urg_a, sin_pareja])
+    hosp_a = np.concatenate([hosp_a, np.full(len(sin_pareja), SIN_REGISTRO)])
+
+    # urgencias RIGHT JOIN hospitalizacion (expediente y ±ventana días)
+    codigos_urg_fecha = np.where(fecha_valida_urg, codigos_urg, SIN_REGISTRO)
+    urg_b, hosp_b = [], []
+    for codigos_clave in codigos_hosp:
+        codigos_clave = np.where(fecha_valida_hosp, codigos_clave, SIN_REGISTRO)
+        b, i = _pares(codigos_clave, dias_recepcion_hosp, codigos_urg_fecha, dias_egreso_urg, ventana)
+        hosp_b.append(b)
+        urg_b.append(i)
+    urg_b, hosp_b = np.concatenate(urg_b), np.concatenate(hosp_b)
+    sin_pareja = np.setdiff1d(np.arange(n_hosp), hosp_b)
+    urg_b = np.concatenate([urg_b, np.full(len(sin_pareja), SIN_REGISTRO)])
+    hosp_b = np.concatenate([hosp_b, sin_pareja])
+
+    return _sin_duplicados(
+        np.concatenate([urg_a, urg_b]).astype(np.int64),
+        np.concatenate([hosp_a, hosp_b]).astype(np.int64),
+        n_hosp
+    )
+
+
+def _tomar(serie, posiciones):
+    """Valores en ``posiciones``; nulo donde la posición es -1"""
+    valores = serie.iloc[np.maximum(posiciones, 0)].reset_index(drop=True)
+    return valores.mask(pd.Series(posiciones < 0))
+
+
+def id_episodio(id_urgencias, id_admision):
+    """
+    Identificador estable del episodio: hash de sus identificadores de registro (uint64).
+
+    Los identificadores numéricos se llevan a entero antes del hash, así que no cambia si el CSV
+    se lee con ellos como enteros, decimales o texto.
+    """
+    def canonica(serie):
+        clave = normalizar_clave(serie)
+        if clave.dtype != 'Int64':
+            numeros = pd.to_numeric(clave, errors='coerce')
+            if numeros.notna().sum() == clave.notna().sum() and (numeros.dropna() % 1 == 0).all():
+                return numeros.astype('Int64')
+        return clave
+
+    claves = pd.DataFrame({'urg': canonica(id_urgencias), 'adm': canonica(id_admision)})
+    return pd.util.hash_pandas_object(claves, index=False).values
+
+
+def construir_episodios(urgencias, hospitalizacion, pares):
+    """
+    Tabla compacta de episodios a partir de los pares vinculados.
+
+    Columnas: ``id_episodio``, ``id_registro_urg``, ``id_registro_admision``, ``expediente``,
+    ``tipo`` (urgencias, hospitalizacion o urgencias_hospitalizacion), ``fecha_inicio``,
+    ``fecha_fin`` y ``dias_urg_a_hosp`` (días entre el egreso de urgencias y la recepción).
+    """
+    pos_urg, pos_hosp = pares
+    con_urg, con_hosp = pos_urg >= 0, pos_hosp >= 0
+
+    id_urg = _tomar(normalizar_clave(urgencias['id_registro_urg']), pos_urg)
+    id_adm = _tomar(normalizar_clave(hospitalizacion['id_registro_admision']), pos_hosp)
+    claves = claves_comparables([urgencias['expediente_urg']] + [hospitalizacion[c] for c in CLAVES_HOSPITALIZACION])
+    expediente = _tomar(claves[0], pos_urg)
+    for clave in claves[1:]:
+        expediente = expediente.fillna(_tomar(clave, pos_hosp))
+
+    fecha = lambda tabla, columna, posiciones: _tomar(pd.to_datetime(tabla[columna], errors='coerce'), posiciones)
+    egreso_urg = fecha(urgencias, 'fecha_egreso_urg', pos_urg)
+    recepcion_hosp = fecha(hospitalizacion, 'fecha_recepcion_hosp', pos_hosp)
+
+    tipo = np.where(con_urg & con_hosp, TIPO_COMPLETO, np.where(con_urg, TIPO_URGENCIAS, TIPO_HOSPITALIZACION))
+    episodios = pd.DataFrame({
+        'id_episodio': id_episodio(id_urg, id_adm),
+        'id_registro_urg': id_urg,
+        'id_registro_admision': id_adm,
+        'expediente': expediente,
+        'tipo': pd.Categorical(tipo, categories=[TIPO_URGENCIAS, TIPO_HOSPITALIZACION, TIPO_COMPLETO]),
+        'fecha_inicio': fecha(urgencias, 'fecha_recepcion_urg', pos_urg).fillna(recepcion_hosp),
+        'fecha_fin': fecha(hospitalizacion, 'fecha_egreso_hosp', pos_hosp).fillna(egreso_urg),
+        'dias_urg_a_hosp': (recepcion_hosp.dt.normalize() - egreso_urg.dt.normalize()).dt.days.astype('Int16')
+    })
+    return episodios.sort_values(['expediente', 'fecha_inicio', 'id_episodio'], kind='stable').reset_index(drop=True)
+
+
+def vincular_episodios(urgencias, hospitalizacion, periodo=None, mascara_egreso=None, ventana=VENTANA_DIAS):
+    """
+    Vincula urgencias y hospitalización como ``todo_junto`` y devuelve la tabla de episodios.
+
+    Args:
+        urgencias (DataFrame): tabla de urgencias (columnas de ``COLUMNAS_URGENCIAS``)
+        hospitalizacion (DataFrame): admisiones (columnas de ``COLUMNAS_HOSPITALIZACION``)
+        periodo (str): mes 'AAAA-MM' de ``urgencias_egreso``
+        mascara_egreso (array): filas de urgencias que forman ``urgencias_egreso``
+        ventana (int): tolerancia en días
+
+    Returns:
+        DataFrame: episodios (ver ``construir_episodios``)
+    """
+    pares = vincular_pares(urgencias, hospitalizacion, periodo, mascara_egreso, ventana)
+    return construir_episodios(urgencias, hospitalizacion, pares)
+
+
+def unir_registros(urgencias, hospitalizacion, pares):
+    """Filas de ``todo_junto`` completas (``ue.*, h.*``), con nulos del lado sin pareja"""
+    pos_urg, pos_hosp = pares
+    izquierda = pd.DataFrame({c: _tomar(urgencias[c], pos_urg) for c in urgencias.columns})
+    derecha = pd.DataFrame({c: _tomar(hospitalizacion[c], pos_hosp) for c in hospitalizacion.columns})
+    return pd.concat([izquierda, derecha], axis=1)
+
+
+def verificar_contra_sql(urgencias, hospitalizacion, periodo=None):
+    """
+    Compara los pares vinculados con el resultado de ``todo_junto`` ejecutado en DuckDB.
+
+    Returns:
+        dict: filas de cada lado, pares faltantes/sobrantes (muestra) e ``igual``
+    """
+    if not DUCKDB_DISPONIBLE:
+        raise RuntimeError("DuckDB no está instalado (pip install duckdb)")
+
+    def preparar(tabla, columnas_clave, columnas_fecha):
+        tabla = tabla.copy()
+        for columna in columnas_clave:
+            tabla[columna] = normalizar_clave(tabla[columna]).astype('string').astype(object)
+        for columna in columnas_fecha:
+            tabla[columna] = pd.to_datetime(tabla[columna], errors='coerce')
+        return tabla
+
+    urg_sql = preparar(urgencias, ['id_registro_urg', 'expediente_urg'], ['fecha_egreso_urg'])
+    urg_sql['no_de_cam_urg'] = urg_sql['no_de_cam_urg'].astype(object).where(urg_sql['no_de_cam_urg'].notna(), None)
+    hosp_sql = preparar(hospitalizacion, ['id_registro_admision'] + CLAVES_HOSPITALIZACION, ['fecha_recepcion_hosp'])
+
+    filtro = "1 = 1"
+    if periodo is not None:
+        anio, mes = (int(p) for p in periodo.split('-'))
+        filtro = f"year(fecha_egreso_urg) = {anio} and month(fecha_egreso_urg) = {mes}"
+
+    conexion = duckdb.connect()
+    try:
+        conexion.register('urgencias', urg_sql)
+        conexion.register('hospitalizacion', hosp_sql)
+        inicio = time.perf_counter()
+        resultado_sql = conexion.execute(SQL_TODO_JUNTO.format(filtro_periodo=filtro)).df()
+        segundos_sql = time.perf_counter() - inicio
+    finally:
+        conexion.close()
+
+    inicio = time.perf_counter()
+    pos_urg, pos_hosp = vincular_pares(urgencias, hospitalizacion, periodo)
+    segundos_python = time.perf_counter() - inicio
+
+    def conjunto(id_urg, id_adm):
+        return set(zip(
+            normalizar_clave(id_urg).astype('string').fillna('').tolist(),
+            normalizar_clave(id_adm).astype('string').fillna('').tolist()
+        ))
+
+    esperado = conjunto(resultado_sql['id_registro_urg'], resultado_sql['id_registro_admision'])
+    obtenido = conjunto(
+        _tomar(urgencias['id_registro_urg'], pos_urg),
+        _tomar(hospitalizacion['id_registro_admision'], pos_hosp)
+    )
+    return {
+        'filas_sql': len(resultado_sql),
+        'filas_python': len(pos_urg),
+        'faltantes': sorted(esperado - obtenido)[:10],
+        'sobrantes': sorted(obtenido - esperado)[:10],
+        'igual': esperado == obtenido and len(resultado_sql) == len(pos_urg),
+        'segundos_sql': round(segundos_sql, 3),
+        'segundos_python': round(segundos_python, 3)
+    }
+
+
+def datos_sinteticos(pacientes, semilla=42, periodo='2025-01'):
+    """
+    Tablas de urgencias y hospitalización sintéticas con los casos del join.
+
+    Incluye visitas repetidas por expediente, admisiones encontradas por ``ian_expediente_hosp``,
+    separaciones de 0 a 3 días, expedientes y fechas nulos, y egresos fuera del periodo.
+    """
+    rng = np.random.default_rng(semilla)
+    inicio = pd.Timestamp(f'{periodo}-01')
+
+    n_urg = int(pacientes * 1.5)
+    expediente_urg = rng.integers(0, pacientes, n_urg)
+    recepcion_urg = inicio + pd.to_timedelta(rng.integers(-5 * 1440, 35 * 1440, n_urg), unit='min')
+    egreso_urg = recepcion_urg + pd.to_timedelta(rng.integers(30, 2 * 1440, n_urg), unit='min')
+    motivos = np.array(['MEJORÍA', 'HOSPITALIZACIÓN', 'DEFUNCIÓN', 'TRASLADO', 'ALTA VOLUNTARIA'])
+    urgencias = pd.DataFrame({
+        'id_registro_urg': np.arange(100000, 100000 + n_urg),
+        'fecha_recepcion_urg': recepcion_urg,
+        'fecha_egreso_urg': egreso_urg,
+        'motivo_alta_urg': motivos[rng.choice(len(motivos), n_urg, p=[0.45, 0.35, 0.05, 0.1, 0.05])],
+        'expediente_urg': expediente_urg.astype(float),
+        'nse_urg': rng.integers(1, 7, n_urg),
+        'no_de_cam_urg': np.where(rng.random(n_urg) < 0.2, np.nan, rng.integers(1, 60, n_urg)),
+        'hospitalizado_urg': np.where(rng.random(n_urg) < 0.4, 'SI', 'NO')
+    })
+    urgencias.loc[rng.random(n_urg) < 0.01, 'expediente_urg'] = np.nan
+    urgencias.loc[rng.random(n_urg) < 0.005, 'fecha_egreso_urg'] = pd.NaT
+
+    # Admisiones: la mayoría a 0-3 días de un egreso de urgencias del mismo expediente
+    n_hosp = int(pacientes * 0.6)
+    origen = rng.integers(0, n_urg, n_hosp)
+    recepcion_hosp = urgencias['fecha_egreso_urg'].values[origen] + pd.to_timedelta(
+        rng.integers(-1440, 3 * 1440, n_hosp), unit='min'
+    ).values
+    sin_urgencias = rng.random(n_hosp) < 0.15
+    recepcion_hosp[sin_urgencias] = (inicio + pd.to_timedelta(rng.integers(0, 31 * 1440, sin_urgencias.sum()), unit='min')).values
+    expediente_hosp = np.where(sin_urgencias, rng.integers(pacientes, 2 * pacientes, n_hosp), urgencias['expediente_urg'].values[origen])
+    por_ian = rng.random(n_hosp) < 0.1
+    hospitalizacion = pd.DataFrame({
+        'id_registro_admision': np.arange(500000, 500000 + n_hosp),
+        'fecha_recepcion_hosp': recepcion_hosp,
+        'fecha_egreso_hosp': pd.Series(recepcion_hosp) + pd.to_timedelta(rng.integers(1, 15, n_hosp), unit='D'),
+        'motivo_alta_hosp': motivos[rng.choice([0, 2, 3], n_hosp)],
+        'n_expediente_hosp': np.where(por_ian, np.nan, expediente_hosp),
+        'ian_expediente_hosp': np.where(por_ian | (rng.random(n_hosp) < 0.5), expediente_hosp, np.nan),
+        'nse_hosp': rng.integers(1, 7, n_hosp),
+        'no_de_cama_hosp': rng.integers(1, 400, n_hosp),
+        'estancia_hosp': 'Hospitalizado',
+        'FYF7Y9IB2I2II_L5JF77Y5J5F1B': 'URGENCIAS'
+    })
+    return urgencias, hospitalizacion
+
+
+def guardar_episodios(episodios, ruta):
+    """Escribe la tabla de episodios en Parquet con reemplazo atómico"""
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    episodios.to_parquet(f'{ruta}.tmp', index=False)
+    os.replace(f'{ruta}.tmp', ruta)
+
+
+def etapa_vincular(ruta_base='proyecto_final'):
+    """Etapa del orquestador: vincula los registros del extracto de resumen en ``procesados/episodios.parquet``"""
+    urgencias, hospitalizacion = separar_registros(
+        pd.read_csv(f'{ruta_base}/datos/ejemplos/Resumen Egreso 2025.csv', low_memory=False)
+    )
+    episodios = vincular_episodios(urgencias, hospitalizacion)
+    guardar_episodios(episodios, f'{ruta_base}/datos/procesados/episodios.parquet')
+    print(f"✓ {len(episodios):,} episodios ({_resumen(episodios)})")
+
+
+def _resumen(episodios):
+    conteos = episodios['tipo'].value_counts()
+    return ', '.join(f"{tipo}: {conteos.get(tipo, 0):,}" for tipo in [TIPO_COMPLETO, TIPO_URGENCIAS, TIPO_HOSPITALIZACION])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vincula episodios de urgencias y hospitalización (todo_junto)')
+    parser.add_argument('--ruta-base', default='proyecto_final')
+    parser.add_argument('--extracto', help='CSV ya unido del que se reconstruyen las tablas (por defecto Resumen Egreso 2025.csv)')
+    parser.add_argument('--periodo', help="Mes de egreso de urgencias 'AAAA-MM' (filtro de urgencias_egreso)")
+    parser.add_argument('--verificar', action='store_true', help='Comparar con el SQL de todo_junto en DuckDB')
+    parser.add_argument('--sinteticos', type=int, help='Usar N pacientes sintéticos en lugar del extracto')
+    args = parser.parse_args()
+
+    if args.sinteticos:
+        periodo = args.periodo or '2025-01'
+        urgencias, hospitalizacion = datos_sinteticos(args.sinteticos, periodo=periodo)
+        print(f"🧪 Datos sintéticos: {len(urgencias):,} visitas de urgencias, {len(hospitalizacion):,} admisiones")
+    else:
+        periodo = args.periodo
+        extracto = args.extracto or f'{args.ruta_base}/datos/ejemplos/Resumen Egreso 2025.csv'
+        if not os.path.exists(extracto):
+            print(f"❌ No se encontró el extracto: {extracto}")
+            return 1
+        urgencias, hospitalizacion = separar_registros(pd.read_csv(extracto, low_memory=False))
+        print(f"📂 {os.path.basename(extracto)}: {len(urgencias):,} visitas de urgencias, {len(hospitalizacion):,} admisiones")
+
+    inicio = time.perf_counter()
+    episodios = vincular_episodios(urgencias, hospitalizacion, periodo)
+    print(f"✓ {len(episodios):,} episodios en {time.perf_counter() - inicio:.2f} s ({_resumen(episodios)})")
+
+    if not args.sinteticos:
+        ruta = f'{args.ruta_base}/datos/procesados/episodios.parquet'
+        guardar_episodios(episodios, ruta)
+        print(f"💾 Episodios guardados en {ruta}")
+
+    if args.verificar:
+        try:
+            verificacion = verificar_contra_sql(urgencias, hospitalizacion, periodo)
+        except RuntimeError as e:
+            print(f"⚠ {e}")
+            return 1
+        print(f"🔍 SQL: {verificacion['filas_sql']:,} filas en {verificacion['segundos_sql']} s; "
+              f"Python: {verificacion['filas_python']:,} filas en {verificacion['segundos_python']} s")
+        if not verificacion['igual']:
+            print(f"❌ Diferencias con todo_junto: faltantes {verificacion['faltantes']}, sobrantes {verificacion['sobrantes']}")
+            return 1
+        print("✓ Mismo resultado que todo_junto")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
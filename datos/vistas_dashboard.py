@@ -0,0 +1,189 @@
+"""
+Vistas materializadas por página del dashboard.
+
+A partir de ``metricas_completas`` se genera un JSON por página que lee su vista (``trends``,
+``geographic``, ``motivos``) con los datos ya en la forma de sus gráficas: la serie mensual con
+su variación, los motivos ordenados y los valores por alcaldía unidos al GeoJSON de
+``datos/alcaldias.json``. Las demás páginas siguen usando sus rutas de la API, así que no se
+generan vistas para ellas.
+
+Cada vista lleva un ``etag`` (hash del contenido) y ``vistas/indice.json`` los reúne, para que
+la ruta ``/api/vistas/<pagina>`` responda ``304 Not Modified`` sin leer la vista cuando el
+navegador ya la tiene. Las vistas sin cambios no se reescriben.
+"""
+
+import hashlib
+import json
+import os
+import unicodedata
+
+VERSION_VISTAS = 1
+TOP_N = 10
+ARCHIVO_INDICE = 'indice.json'
+# Nombres oficiales -> nombre de la alcaldía en ``alcaldias.json`` (ya sin acentos)
+ALIAS_GEOGRAFICOS = {
+    'LA MAGDALENA CONTRERAS': 'MAGDALENA CONTRERAS',
+    'CUAJIMALPA DE MORELOS': 'CUAJIMALPA',
+    'CUAUHTEMOC': 'CUAUTHEMOC',
+    'GUSTAVO A MADERO': 'GUSTAVO A. MADERO',
+}
+NOMBRES_MESES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+
+def clave_geografica(nombre):
+    """
+    Nombre sin acentos y en mayúsculas, como en ``alcaldias.json`` (COYOACÁN -> COYOACAN).
+
+    Los nombres que el GeoJSON escribe distinto se traducen con ``ALIAS_GEOGRAFICOS``
+    (CUAJIMALPA DE MORELOS -> CUAJIMALPA).
+    """
+    texto = unicodedata.normalize('NFKD', str(nombre)).encode('ascii', 'ignore').decode('ascii')
+    clave = ' '.join(texto.upper().split())
+    return ALIAS_GEOGRAFICOS.get(clave, clave)
+
+
+def calcular_etag(datos):
+    """Hash estable del contenido de una vista (no depende del orden de las claves)"""
+    contenido = json.dumps(datos, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:20]
+
+
+def _cambio(actual, anterior):
+    return round((actual - anterior) / anterior * 100, 2) if anterior else 0
+
+
+def _top(registros, clave_orden, campos_suma, n=TOP_N):
+    """Primeros ``n`` registros por ``clave_orden`` y el resto acumulado en ``otros``"""
+    ordenados = sorted(registros, key=lambda r: r.get(clave_orden) or 0, reverse=True)
+    resto = ordenados[n:]
+    otros = {campo: round(sum(r.get(campo) or 0 for r in resto), 2) for campo in campos_suma}
+    otros['elementos'] = len(resto)
+    return ordenados[:n], otros
+
+
+def _registros(seccion, nombre_clave, renombrar=None):
+    renombrar = renombrar or {}
+    return [
+        {nombre_clave: clave, **{renombrar.get(k, k): v for k, v in datos.items()}}
+        for clave, datos in (seccion or {}).items()
+    ]
+
+
+def vista_trends(metricas):
+    """Serie mensual con la variación contra el mes anterior"""
+    serie = []
+    anterior = None
+    for periodo in sorted(metricas.get('tendencias_temporales') or {}):
+        datos = metricas['tendencias_temporales'][periodo]
+        mes = int(periodo.split('-')[1])
+        punto = {'periodo': periodo, 'name': NOMBRES_MESES[mes - 1], **datos}
+        for campo in ('total_facturado', 'total_pacientes', 'costo_promedio'):
+            punto[f'cambio_{campo}'] = _cambio(datos.get(campo, 0), anterior.get(campo, 0)) if anterior else 0
+        serie.append(punto)
+        anterior = datos
+    metadatos = metricas.get('metadatos', {})
+    return {
+        'serie_mensual': serie,
+        'periodo': metadatos.get('periodo_datos'),
+        'total_registros': metadatos.get('total_registros_procesados')
+    }
+
+
+def vista_geographic(metricas, geojson=None):
+    """Alcaldías y estados ordenados; GeoJSON con los valores unidos por nombre de alcaldía"""
+    geografico = metricas.get('analisis_geografico') or {}
+    renombrar = {'total_pacientes': 'total_casos'}
+    alcaldias = _registros(geografico.get('alcaldias'), 'nombre', renombrar)
+    for registro in alcaldias:
+        registro['alcaldia'] = clave_geografica(registro['nombre'])
+    alcaldias, otras = _top(alcaldias, 'total_facturado', ['total_facturado', 'total_casos'], n=len(alcaldias))
+    estados, otros_estados = _top(_registros(geografico.get('estados'), 'estado', renombrar),
+                                  'total_facturado', ['total_facturado', 'total_casos'])
+
+    vista = {'alcaldias': alcaldias, 'estados': estados, 'otros_estados': otros_estados}
+    if geojson:
+        por_clave = {registro['alcaldia']: registro for registro in alcaldias}
+        caracteristicas = []
+        for caracteristica in geojson.get('features', []):
+            clave = clave_geografica(caracteristica.get('properties', {}).get('name', ''))
+            datos = por_clave.get(clave, {})
+            propiedades = {**caracteristica.get('properties', {}), 'clave': clave}
+            propiedades.update({campo: datos.get(campo) for campo in
+                                ('costo_promedio', 'total_casos', 'total_facturado', 'porcentaje_pacientes')})
+            caracteristicas.append({**caracteristica, 'properties': propiedades})
+        vista['geojson'] = {'type': 'FeatureCollection', 'features': caracteristicas}
+        vista['sin_geometria'] = sorted(set(por_clave) - {c['properties']['clave'] for c in caracteristicas})
+    return vista
+
+
+def vista_motivos(metricas):
+    """Motivos de alta ordenados por número de casos"""
+    motivos = _registros(metricas.get('analisis_motivos_alta'), 'motivo', {'total_pacientes': 'total_casos'})
+    return {'motivos': sorted(motivos, key=lambda r: r.get('total_casos') or 0, reverse=True)}
+
+
+def construir_vistas(metricas, geojson=None):
+    """
+    Datos de cada página del dashboard.
+
+    Args:
+        metricas (dict): ``metricas_completas``
+        geojson (dict): FeatureCollection de ``alcaldias.json`` (opcional)
+
+    Returns:
+        dict: página -> datos de la vista
+    """
+    return {
+        'trends': vista_trends(metricas),
+        'geographic': vista_geographic(metricas, geojson),
+        'motivos': vista_motivos(metricas)
+    }
+
+
+def guardar_vistas(metricas, directorio, ruta_geojson=None, generado=None):
+    """
+    Escribe ``<directorio>/<pagina>.json`` y el índice de etags.
+
+    Las vistas cuyo etag no cambió se conservan sin reescribir, y las de páginas que ya no
+    tienen vista se eliminan.
+
+    Returns:
+        dict: índice (página -> etag, bytes y si se actualizó)
+    """
+    geojson = None
+    if ruta_geojson and os.path.exists(ruta_geojson):
+        with open(ruta_geojson, 'r', encoding='utf-8') as f:
+            geojson = json.load(f)
+
+    os.makedirs(directorio, exist_ok=True)
+    ruta_indice = os.path.join(directorio, ARCHIVO_INDICE)
+    anterior = {}
+    if os.path.exists(ruta_indice):
+        try:
+            with open(ruta_indice, 'r', encoding='utf-8') as f:
+                anterior = json.load(f).get('vistas', {})
+        except (OSError, ValueError):
+            anterior = {}
+
+    indice = {}
+    for pagina, datos in construir_vistas(metricas, geojson).items():
+        etag = calcular_etag(datos)
+        ruta = os.path.join(directorio, f'{pagina}.json')
+        actualizada = anterior.get(pagina, {}).get('etag') != etag or not os.path.exists(ruta)
+        if actualizada:
+            vista = {'pagina': pagina, 'version': VERSION_VISTAS, 'etag': etag, 'generado': generado, 'datos': datos}
+            temporal = f'{ruta}.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(vista, f, ensure_ascii=False, separators=(',', ':'), default=str)
+            os.replace(temporal, ruta)
+        indice[pagina] = {'etag': etag, 'bytes': os.path.getsize(ruta), 'actualizada': actualizada}
+
+    for pagina in set(anterior) - set(indice):
+        ruta = os.path.join(directorio, f'{pagina}.json')
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    with open(f'{ruta_indice}.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'version': VERSION_VISTAS, 'generado': generado, 'vistas': indice}, f, indent=2, ensure_ascii=False)
+    os.replace(f'{ruta_indice}.tmp', ruta_indice)
+    return indice
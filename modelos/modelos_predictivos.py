@@ -5,9 +5,17 @@ from sklearn.linear_model import LinearRegression
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_absolute_error, r2_score
+import os
+import pickle
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datos'))
+from trazas import trazador_global
+
+VERSION_PERSISTENCIA = 1
+
 class ModelosPredictivosHospital:
     """
     Clase para implementar modelos predictivos más robustos para el hospital
@@ -24,13 +32,19 @@ class ModelosPredictivosHospital:
         """
         Prepara datos para predicción de demanda
         """
-        # Crear características temporales
-        df_temporal['mes'] = pd.to_datetime(df_temporal['fecha_egreso_general']).dt.month
-        df_temporal['dia_semana'] = pd.to_datetime(df_temporal['fecha_egreso_general']).dt.dayofweek
-        df_temporal['es_fin_semana'] = df_temporal['dia_semana'].isin([5, 6]).astype(int)
+        # Crear características temporales en un frame aparte: df_temporal puede estar
+        # compartido con otros análisis que corren en paralelo y no se modifica
+        fechas = pd.to_datetime(df_temporal['fecha_egreso_general'])
+        caracteristicas = pd.DataFrame({
+            'id_paciente': df_temporal['id_paciente'],
+            'gasto_nivel_6': df_temporal['gasto_nivel_6'],
+            'mes': fechas.dt.month,
+            'dia_semana': fechas.dt.dayofweek
+        })
+        caracteristicas['es_fin_semana'] = caracteristicas['dia_semana'].isin([5, 6]).astype(int)
         
         # Agregar por día
-        demanda_diaria = df_temporal.groupby(df_temporal['fecha_egreso_general'].dt.date).agg({
+        demanda_diaria = caracteristicas.groupby(fechas.dt.date).agg({
             'id_paciente': 'count',  # Total pacientes
             'gasto_nivel_6': 'sum',  # Total costos
             'mes': 'first',
@@ -83,23 +97,18 @@ class ModelosPredictivosHospital:
         if self.modelo_demanda is None:
             raise ValueError("Modelo de demanda no entrenado")
         
-        predicciones = []
-        fecha_base = pd.Timestamp.now()
+        fechas = pd.Timestamp.now() + pd.to_timedelta(np.arange(dias_futuros), unit='D')
+        dia_semana = fechas.dayofweek.to_numpy()
+        X_pred = np.column_stack([fechas.month.to_numpy(), dia_semana, np.isin(dia_semana, [5, 6]).astype(int)])
+        pacientes_pred = self.modelo_demanda.predict(X_pred) if dias_futuros > 0 else []
         
-        for i in range(dias_futuros):
-            fecha = fecha_base + pd.Timedelta(days=i)
-            mes = fecha.month
-            dia_semana = fecha.dayofweek
-            es_fin_semana = 1 if dia_semana in [5, 6] else 0
-            
-            X_pred = np.array([[mes, dia_semana, es_fin_semana]])
-            pacientes_pred = self.modelo_demanda.predict(X_pred)[0]
-            
+        predicciones = []
+        for fecha, pacientes in zip(fechas, pacientes_pred):
             predicciones.append({
                 'fecha': fecha.strftime('%Y-%m-%d'),
-                'pacientes_predichos': max(0, int(pacientes_pred)),
-                'urgencias_estimadas': int(pacientes_pred * 0.72),
-                'hospitalizacion_estimada': int(pacientes_pred * 0.28)
+                'pacientes_predichos': max(0, int(pacientes)),
+                'urgencias_estimadas': int(pacientes * 0.72),
+                'hospitalizacion_estimada': int(pacientes * 0.28)
             })
         
         return predicciones
@@ -117,7 +126,8 @@ class ModelosPredictivosHospital:
         df_modelo['edad_grupo'] = pd.cut(df_modelo['edad'], 
                                        bins=[0, 18, 35, 50, 65, 100], 
                                        labels=[0, 1, 2, 3, 4])
-        df_modelo['sexo_cod'] = df_modelo['sexo'].map({'MASCULINO': 1, 'FEMENINO': 0})
+        # Funciona igual con texto o con la columna codificada como categoría
+        df_modelo['sexo_cod'] = df_modelo['sexo'].map({'MASCULINO': 1, 'FEMENINO': 0}).astype(float)
         df_modelo['dias_estancia'] = df_modelo.get('dias_estancia_calculado', df_modelo.get('dias_hopit', 1))
         
         # Seleccionar características
@@ -167,6 +177,18 @@ class ModelosPredictivosHospital:
         costo_predicho = self.modelo_costos.predict(X_pred_scaled)[0]
         return max(0, costo_predicho)
     
+    def predecir_costos_pacientes(self, edades, sexos, dias_estancia):
+        """
+        Predice el costo de varios pacientes con una sola llamada al modelo
+        """
+        if self.modelo_costos is None:
+            raise ValueError("Modelo de costos no entrenado")
+        
+        sexo_cod = [1 if str(sexo).upper() == 'MASCULINO' else 0 for sexo in sexos]
+        X_pred = np.column_stack([np.asarray(edades, dtype=float), sexo_cod, np.asarray(dias_estancia, dtype=float)])
+        costos = self.modelo_costos.predict(self.scaler.transform(X_pred))
+        return np.maximum(costos, 0)
+    
     def segmentar_pacientes(self, df_servicios, n_clusters=5):
         """
         Segmenta pacientes usando K-Means clustering
@@ -285,28 +307,66 @@ class ModelosPredictivosHospital:
             },
             'nota': 'Modelos de Machine Learning entrenados con datos reales del hospital'
         }
+    
+    def guardar(self, ruta):
+        """
+        Guarda los modelos entrenados para reutilizarlos sin reentrenar (servicio analítico)
+        """
+        import sklearn
+        
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        contenido = {'version': VERSION_PERSISTENCIA, 'sklearn': sklearn.__version__, 'modelos': self}
+        with open(f'{ruta}.tmp', 'wb') as f:
+            pickle.dump(contenido, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f'{ruta}.tmp', ruta)
+    
+    @classmethod
+    def cargar(cls, ruta):
+        """
+        Carga modelos guardados con ``guardar``; retorna None si no existen o son de otra versión
+        """
+        import sklearn
+        
+        if not os.path.exists(ruta):
+            return None
+        with open(ruta, 'rb') as f:
+            contenido = pickle.load(f)
+        if contenido.get('version') != VERSION_PERSISTENCIA or contenido.get('sklearn') != sklearn.__version__:
+            print(f"⚠ Modelos guardados con otra versión ({contenido.get('sklearn')}); es necesario reentrenar")
+            return None
+        return contenido['modelos']
 
 # Función para integrar con el procesador existente
-def entrenar_modelos_completos(df_resumen, df_detalle, df_servicios):
+def entrenar_modelos_completos(df_resumen, df_detalle, df_servicios, trazador=None):
     """
     Función principal para entrenar todos los modelos
+    
+    Args:
+        trazador (Trazador): colector de spans; por defecto el trazador global
     """
+    trazador = trazador if trazador is not None else trazador_global()
     modelos = ModelosPredictivosHospital()
     
     try:
         # Entrenar modelo de demanda
         if 'fecha_egreso_general' in df_resumen.columns:
-            modelos.entrenar_modelo_demanda(df_resumen)
+            with trazador.span('modelo_demanda', filas_entrada=len(df_resumen)):
+                modelos.entrenar_modelo_demanda(df_resumen)
         
         # Entrenar modelo de costos
         if 'gasto_nivel_6' in df_detalle.columns:
-            modelos.entrenar_modelo_costos(df_detalle)
+            with trazador.span('modelo_costos', filas_entrada=len(df_detalle)):
+                modelos.entrenar_modelo_costos(df_detalle)
         
         # Realizar segmentación
-        resultados_clustering = modelos.segmentar_pacientes(df_servicios)
+        with trazador.span('segmentacion', filas_entrada=len(df_servicios)) as span:
+            resultados_clustering = modelos.segmentar_pacientes(df_servicios)
+            span.registrar(filas_salida=len(resultados_clustering or []))
         
         # Generar alertas predictivas
-        alertas_ml = modelos.generar_alertas_predictivas(df_servicios)
+        with trazador.span('alertas_predictivas', filas_entrada=len(df_servicios)) as span:
+            alertas_ml = modelos.generar_alertas_predictivas(df_servicios)
+            span.registrar(filas_salida=len(alertas_ml or []))
         
         return {
             'modelos': modelos,
@@ -317,4 +377,4 @@ def entrenar_modelos_completos(df_resumen, df_detalle, df_servicios):
         
     except Exception as e:
         print(f"Error entrenando modelos: {e}")
-        return None 
\ No newline at end of file
+        return None
@@ -48,8 +48,8 @@ class ModelosPredictivosSimple:
         
         try:
             # Agrupar por día
-            df_temporal['fecha'] = pd.to_datetime(df_temporal['fecha_egreso_general']).dt.date
-            demanda_diaria = df_temporal.groupby('fecha').size().reset_index(name='pacientes')
+            fechas = pd.to_datetime(df_temporal['fecha_egreso_general']).dt.date.rename('fecha')
+            demanda_diaria = df_temporal.groupby(fechas).size().reset_index(name='pacientes')
             
             # Calcular tendencia
             valores_historicos = demanda_diaria['pacientes'].values
@@ -119,9 +119,8 @@ class ModelosPredictivosSimple:
                 print("⚠ No se encontró columna de fecha válida")
                 return []
             
-            # Agrupar por mes
-            df_detalle['mes'] = pd.to_datetime(df_detalle[columna_fecha], errors='coerce').dt.to_period('M')
-            df_detalle = df_detalle.dropna(subset=['mes'])
+            # Agrupar por mes (sin agregar columnas a df_detalle, que puede ser el resumen compartido)
+            meses = pd.to_datetime(df_detalle[columna_fecha], errors='coerce').dt.to_period('M').rename('mes')
             
             # Verificar qué columna de costos usar
             columna_costo = None
@@ -134,7 +133,7 @@ class ModelosPredictivosSimple:
                 print("⚠ No se encontró columna de costos válida")
                 return []
             
-            costos_mensuales = df_detalle.groupby('mes')[columna_costo].sum().reset_index()
+            costos_mensuales = df_detalle[columna_costo].groupby(meses).sum().reset_index()
             costos_mensuales['mes_str'] = costos_mensuales['mes'].astype(str)
             
             # Calcular tendencia
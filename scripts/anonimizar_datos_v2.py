@@ -15,21 +15,33 @@ import numpy as np
 import hashlib
 import json
 import os
+import sys
 from datetime import datetime, timedelta
 import random
 import string
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'datos'))
+
+from codificacion_categorica import (
+    DiccionarioCategorias, COLUMNAS_CATEGORICAS_RESUMEN, COLUMNAS_CATEGORICAS_DETALLE, mapear_por_valor
+)
+from trazas import trazador_global, tamano_archivo
+
 class AnonimizadorDatosV2:
     """Clase mejorada para anonimizar datos médicos"""
     
-    def __init__(self, salt_key="hospital_economics_2025_v2"):
+    def __init__(self, salt_key="hospital_economics_2025_v2", diccionario=None, trazador=None):
         """
         Inicializa el anonimizador
         
         Args:
             salt_key (str): Clave salt para hashing
+            diccionario (DiccionarioCategorias): diccionario de categorías compartido con el procesador
+            trazador (Trazador): colector de spans; por defecto el trazador global
         """
         self.salt_key = salt_key
+        self.diccionario = diccionario if diccionario is not None else DiccionarioCategorias()
+        self.trazador = trazador if trazador is not None else trazador_global()
         self.mapeo_anonimizacion = {}
         self.estadisticas_anonimizacion = {
             'registros_procesados': 0,
@@ -38,6 +50,8 @@ class AnonimizadorDatosV2:
             'campos_eliminados': 0,
             'fecha_procesamiento': datetime.now().isoformat()
         }
+        # Metadatos de los CSV guardados (filas, columnas y hash) para el paquete de despliegue
+        self.archivos_generados = {}
     
     def hash_identificador(self, valor):
         """Genera hash irreversible de un identificador"""
@@ -163,15 +177,36 @@ class AnonimizadorDatosV2:
         else:
             return "ZONA_GENERAL"
     
+    @staticmethod
+    def _identificadores_vacios(serie):
+        """Filas cuyo identificador está vacío (reciben un valor aleatorio por fila)"""
+        return serie.isna().to_numpy() | serie.astype(str).str.strip().eq('').to_numpy()
+    
+    def _hashear_columna(self, serie):
+        """Hashea cada identificador distinto una sola vez"""
+        return mapear_por_valor(serie, self.hash_identificador, por_fila=self._identificadores_vacios(serie))
+    
+    def _generalizar_cp(self, cp):
+        return str(cp)[:2] + "XXX" if pd.notna(cp) and str(cp).strip() != '' else "NO_ESPECIFICADO"
+    
     def anonimizar_resumen(self, df_resumen):
         """
         Anonimiza el dataset de resumen de egresos con las columnas reales
         """
+        with self.trazador.span('anonimizar_resumen', filas_entrada=len(df_resumen)) as span:
+            df_anonimo = self._anonimizar_resumen(df_resumen)
+            span.registrar(filas_salida=len(df_anonimo))
+        return df_anonimo
+    
+    def _anonimizar_resumen(self, df_resumen):
         print("🔒 Anonimizando dataset de resumen...")
         print(f"   📊 Columnas originales: {list(df_resumen.columns)}")
         
         df_anonimo = df_resumen.copy()
         
+        # Codificar columnas de texto para que cada transformación se calcule una vez por valor distinto
+        self.diccionario.codificar(df_anonimo, COLUMNAS_CATEGORICAS_RESUMEN)
+        
         # 1. ELIMINAR COMPLETAMENTE identificadores directos y nombres
         columnas_a_eliminar = [
             'nombre_paciente', 'nombre_paciente_hosp', 'direcccion', 'calle'
@@ -192,14 +227,16 @@ class AnonimizadorDatosV2:
         for columna in columnas_a_hashear:
             if columna in df_anonimo.columns:
                 print(f"   🔐 Hasheando identificador: {columna}")
-                df_anonimo[f'{columna}_hash'] = df_anonimo[columna].apply(self.hash_identificador)
+                with self.trazador.span('hashear_identificador', filas_entrada=len(df_anonimo), columna=columna):
+                    df_anonimo[f'{columna}_hash'] = self._hashear_columna(df_anonimo[columna])
                 df_anonimo.drop(columna, axis=1, inplace=True)
                 self.estadisticas_anonimizacion['identificadores_hasheados'] += 1
         
         # 3. GENERALIZAR edad
         if 'edad' in df_anonimo.columns:
             print("   📊 Generalizando edades...")
-            df_anonimo['rango_edad'] = df_anonimo['edad'].apply(self.generalizar_edad)
+            with self.trazador.span('generalizar_edad', filas_entrada=len(df_anonimo)):
+                df_anonimo['rango_edad'] = mapear_por_valor(df_anonimo['edad'], self.generalizar_edad)
             df_anonimo.drop('edad', axis=1, inplace=True)
             self.estadisticas_anonimizacion['campos_anonimizados'] += 1
         
@@ -208,7 +245,8 @@ class AnonimizadorDatosV2:
         for columna in columnas_ubicacion:
             if columna in df_anonimo.columns:
                 print(f"   🗺️  Generalizando ubicación: {columna}")
-                df_anonimo[f'{columna}_zona'] = df_anonimo[columna].apply(self.generalizar_ubicacion)
+                with self.trazador.span('generalizar_ubicacion', filas_entrada=len(df_anonimo), columna=columna):
+                    df_anonimo[f'{columna}_zona'] = mapear_por_valor(df_anonimo[columna], self.generalizar_ubicacion)
                 df_anonimo.drop(columna, axis=1, inplace=True)
                 self.estadisticas_anonimizacion['campos_anonimizados'] += 1
         
@@ -220,18 +258,18 @@ class AnonimizadorDatosV2:
         for columna in columnas_fecha:
             if columna in df_anonimo.columns:
                 print(f"   📅 Anonimizando fechas: {columna}")
-                df_anonimo[f'{columna}_periodo'] = df_anonimo[columna].apply(
-                    lambda x: self.anonimizar_fechas(x, 'mes')
-                )
+                with self.trazador.span('anonimizar_fechas', filas_entrada=len(df_anonimo), columna=columna):
+                    df_anonimo[f'{columna}_periodo'] = mapear_por_valor(
+                        df_anonimo[columna], lambda x: self.anonimizar_fechas(x, 'mes')
+                    )
                 df_anonimo.drop(columna, axis=1, inplace=True)
                 self.estadisticas_anonimizacion['campos_anonimizados'] += 1
         
         # 6. GENERALIZAR código postal (mantener solo primeros 2 dígitos)
         if 'cp' in df_anonimo.columns:
             print("   📮 Generalizando códigos postales...")
-            df_anonimo['cp_zona'] = df_anonimo['cp'].apply(
-                lambda x: str(x)[:2] + "XXX" if pd.notna(x) and str(x).strip() != '' else "NO_ESPECIFICADO"
-            )
+            with self.trazador.span('generalizar_cp', filas_entrada=len(df_anonimo)):
+                df_anonimo['cp_zona'] = mapear_por_valor(df_anonimo['cp'], self._generalizar_cp)
             df_anonimo.drop('cp', axis=1, inplace=True)
             self.estadisticas_anonimizacion['campos_anonimizados'] += 1
         
@@ -258,10 +296,17 @@ class AnonimizadorDatosV2:
     
     def anonimizar_detalle(self, df_detalle):
         """Anonimiza el dataset de detalle de egresos"""
+        with self.trazador.span('anonimizar_detalle', filas_entrada=len(df_detalle)) as span:
+            df_anonimo = self._anonimizar_detalle(df_detalle)
+            span.registrar(filas_salida=len(df_anonimo))
+        return df_anonimo
+    
+    def _anonimizar_detalle(self, df_detalle):
         print("🔒 Anonimizando dataset de detalle...")
         print(f"   📊 Columnas originales: {list(df_detalle.columns)}")
         
         df_anonimo = df_detalle.copy()
+        self.diccionario.codificar(df_anonimo, COLUMNAS_CATEGORICAS_DETALLE)
         
         # Hashear identificadores de paciente
         columnas_id = [col for col in df_anonimo.columns if any(palabra in col.lower() 
@@ -270,7 +315,8 @@ class AnonimizadorDatosV2:
         for columna in columnas_id:
             if columna in df_anonimo.columns:
                 print(f"   🔐 Hasheando identificador: {columna}")
-                df_anonimo[f'{columna}_hash'] = df_anonimo[columna].apply(self.hash_identificador)
+                with self.trazador.span('hashear_identificador', filas_entrada=len(df_anonimo), columna=columna):
+                    df_anonimo[f'{columna}_hash'] = self._hashear_columna(df_anonimo[columna])
                 df_anonimo.drop(columna, axis=1, inplace=True)
                 self.estadisticas_anonimizacion['identificadores_hasheados'] += 1
         
@@ -278,9 +324,10 @@ class AnonimizadorDatosV2:
         columnas_fecha = [col for col in df_anonimo.columns if 'fecha' in col.lower()]
         for columna in columnas_fecha:
             print(f"   📅 Anonimizando fechas: {columna}")
-            df_anonimo[f'{columna}_periodo'] = df_anonimo[columna].apply(
-                lambda x: self.anonimizar_fechas(x, 'mes')
-            )
+            with self.trazador.span('anonimizar_fechas', filas_entrada=len(df_anonimo), columna=columna):
+                df_anonimo[f'{columna}_periodo'] = mapear_por_valor(
+                    df_anonimo[columna], lambda x: self.anonimizar_fechas(x, 'mes')
+                )
             df_anonimo.drop(columna, axis=1, inplace=True)
             self.estadisticas_anonimizacion['campos_anonimizados'] += 1
         
@@ -346,6 +393,8 @@ class AnonimizadorDatosV2:
                 ]
             },
             'estadisticas': self.estadisticas_anonimizacion,
+            'trazas': self.trazador.resumen(),
+            'archivos_generados': self.archivos_generados,
             'cumplimiento_regulatorio': {
                 'eliminacion_identificadores_directos': True,
                 'hash_identificadores_unicos': True,
@@ -382,8 +431,39 @@ class AnonimizadorDatosV2:
         
         print(f"📋 Reporte de anonimización guardado en: {ruta_salida}")
 
-def main():
-    """Función principal del pipeline de anonimización v2"""
+def _describir_archivo(ruta, filas, columnas):
+    """
+    Metadatos del archivo para el paquete de despliegue (tamaño, fecha, hash y dimensiones).
+
+    Sin ``paquete_despliegue`` solo se guardan las dimensiones y el empaquetador calcula el resto.
+    """
+    try:
+        from paquete_despliegue import describir_archivo
+    except ImportError:
+        return {'filas': filas, 'columnas': columnas}
+    return describir_archivo(ruta, filas=filas, columnas=columnas)
+
+
+def exportar_para_athena(ruta_anonimizados, tablas, trazador=None):
+    """Exporta las tablas anonimizadas en memoria como Parquet particionado con el DDL de Athena"""
+    from exportar_athena import exportar_anonimizados
+
+    print(f"\n📦 Exportando tablas particionadas para Athena...")
+    return exportar_anonimizados(ruta_anonimizados, dataframes=tablas, trazador=trazador)
+
+
+def main(ruta_base="proyecto_final/datos", exportar=True):
+    """
+    Función principal del pipeline de anonimización v2
+
+    Args:
+        ruta_base (str): directorio ``datos`` del proyecto (el orquestador lo indica)
+        exportar (bool): exportar también para Athena; si la exportación falla, la anonimización
+            se conserva y solo se avisa (el orquestador la ejecuta aparte con ``exportar=False``)
+
+    Returns:
+        dict: DataFrames anonimizados por tabla de Athena ('resumen_egresos', 'detalle_egresos')
+    """
     print("=" * 80)
     print("🔒 PIPELINE DE ANONIMIZACIÓN DE DATOS MÉDICOS v2.0")
     print("=" * 80)
@@ -392,7 +472,6 @@ def main():
     print("=" * 80)
     
     # Rutas de archivos
-    ruta_base = "proyecto_final/datos"
     ruta_resumen = f"{ruta_base}/ejemplos/Resumen Egreso 2025.csv"
     ruta_detalle = f"{ruta_base}/ejemplos/Egreso Detalle Ene 2025 a Abr 2025.csv"
     
@@ -400,47 +479,87 @@ def main():
     ruta_anonimizados = f"{ruta_base}/anonimizados_v2"
     os.makedirs(ruta_anonimizados, exist_ok=True)
     
-    # Inicializar anonimizador
-    anonimizador = AnonimizadorDatosV2()
+    # Inicializar anonimizador con el diccionario de categorías del caché columnar
+    ruta_diccionario = f"{ruta_base}/cache_columnar/diccionario_categorias.json"
+    anonimizador = AnonimizadorDatosV2(diccionario=DiccionarioCategorias.cargar(ruta_diccionario))
+    trazador = anonimizador.trazador
+    # DataFrames anonimizados en memoria para la exportación particionada
+    tablas_exportacion = {}
     
     try:
-        # Procesar dataset de resumen
-        if os.path.exists(ruta_resumen):
-            print(f"\n📂 Cargando dataset de resumen: {ruta_resumen}")
-            df_resumen = pd.read_csv(ruta_resumen, encoding='utf-8')
-            print(f"   📊 Registros cargados: {len(df_resumen)}")
+        with trazador.span('anonimizacion'):
+            # Procesar dataset de resumen
+            if os.path.exists(ruta_resumen):
+                print(f"\n📂 Cargando dataset de resumen: {ruta_resumen}")
+                with trazador.span('cargar_resumen', bytes_leidos=tamano_archivo(ruta_resumen)) as span:
+                    df_resumen = pd.read_csv(
+                        ruta_resumen, encoding='utf-8',
+                        dtype=anonimizador.diccionario.dtypes_lectura(COLUMNAS_CATEGORICAS_RESUMEN)
+                    )
+                    span.registrar(filas_salida=len(df_resumen))
+                print(f"   📊 Registros cargados: {len(df_resumen)}")
             
-            # Anonimizar
-            df_resumen_anonimo = anonimizador.anonimizar_resumen(df_resumen)
+                # Anonimizar
+                df_resumen_anonimo = anonimizador.anonimizar_resumen(df_resumen)
             
-            # Validar
-            anonimizador.validar_anonimizacion(df_resumen, df_resumen_anonimo, "Resumen")
+                # Validar
+                anonimizador.validar_anonimizacion(df_resumen, df_resumen_anonimo, "Resumen")
             
-            # Guardar
-            ruta_resumen_anonimo = f"{ruta_anonimizados}/resumen_anonimizado_v2.csv"
-            df_resumen_anonimo.to_csv(ruta_resumen_anonimo, index=False, encoding='utf-8')
-            print(f"💾 Resumen anonimizado guardado: {ruta_resumen_anonimo}")
-        
-        # Procesar dataset de detalle (muestra)
-        if os.path.exists(ruta_detalle):
-            print(f"\n📂 Cargando muestra del dataset de detalle: {ruta_detalle}")
-            df_detalle = pd.read_csv(ruta_detalle, encoding='utf-8', nrows=10000)
-            print(f"   📊 Registros cargados (muestra): {len(df_detalle)}")
+                # Guardar
+                ruta_resumen_anonimo = f"{ruta_anonimizados}/resumen_anonimizado_v2.csv"
+                with trazador.span('guardar_resumen', filas_entrada=len(df_resumen_anonimo)) as span:
+                    df_resumen_anonimo.to_csv(ruta_resumen_anonimo, index=False, encoding='utf-8')
+                    span.registrar(bytes_escritos=tamano_archivo(ruta_resumen_anonimo))
+                    anonimizador.archivos_generados['resumen_anonimizado_v2.csv'] = _describir_archivo(
+                        ruta_resumen_anonimo, filas=len(df_resumen_anonimo), columnas=len(df_resumen_anonimo.columns)
+                    )
+                print(f"💾 Resumen anonimizado guardado: {ruta_resumen_anonimo}")
+                tablas_exportacion['resumen_egresos'] = df_resumen_anonimo
+        
+            # Procesar dataset de detalle (muestra)
+            if os.path.exists(ruta_detalle):
+                print(f"\n📂 Cargando muestra del dataset de detalle: {ruta_detalle}")
+                with trazador.span('cargar_detalle') as span:
+                    df_detalle = pd.read_csv(
+                        ruta_detalle, encoding='utf-8', nrows=10000,
+                        dtype=anonimizador.diccionario.dtypes_lectura(COLUMNAS_CATEGORICAS_DETALLE)
+                    )
+                    span.registrar(filas_salida=len(df_detalle))
+                print(f"   📊 Registros cargados (muestra): {len(df_detalle)}")
             
-            # Anonimizar
-            df_detalle_anonimo = anonimizador.anonimizar_detalle(df_detalle)
+                # Anonimizar
+                df_detalle_anonimo = anonimizador.anonimizar_detalle(df_detalle)
             
-            # Validar
-            anonimizador.validar_anonimizacion(df_detalle, df_detalle_anonimo, "Detalle")
+                # Validar
+                anonimizador.validar_anonimizacion(df_detalle, df_detalle_anonimo, "Detalle")
             
-            # Guardar
-            ruta_detalle_anonimo = f"{ruta_anonimizados}/detalle_anonimizado_v2.csv"
-            df_detalle_anonimo.to_csv(ruta_detalle_anonimo, index=False, encoding='utf-8')
-            print(f"💾 Detalle anonimizado guardado: {ruta_detalle_anonimo}")
-        
-        # Generar reporte de anonimización
+                # Guardar
+                ruta_detalle_anonimo = f"{ruta_anonimizados}/detalle_anonimizado_v2.csv"
+                with trazador.span('guardar_detalle', filas_entrada=len(df_detalle_anonimo)) as span:
+                    df_detalle_anonimo.to_csv(ruta_detalle_anonimo, index=False, encoding='utf-8')
+                    span.registrar(bytes_escritos=tamano_archivo(ruta_detalle_anonimo))
+                    anonimizador.archivos_generados['detalle_anonimizado_v2.csv'] = _describir_archivo(
+                        ruta_detalle_anonimo, filas=len(df_detalle_anonimo), columnas=len(df_detalle_anonimo.columns)
+                    )
+                print(f"💾 Detalle anonimizado guardado: {ruta_detalle_anonimo}")
+                tablas_exportacion['detalle_egresos'] = df_detalle_anonimo
+        
+            # Persistir categorías nuevas para mantener los códigos estables
+            if anonimizador.diccionario.modificado:
+                anonimizador.diccionario.guardar(ruta_diccionario)
+            
+            # Exportar Parquet particionado por periodo y servicio con el DDL de Athena
+            if exportar:
+                try:
+                    exportar_para_athena(ruta_anonimizados, tablas_exportacion, trazador)
+                except Exception as e:
+                    print(f"⚠ No se pudo exportar para Athena ({e}); los CSV anonimizados sí se guardaron")
+        
+        # Generar reporte de anonimización (incluye la traza de las etapas)
         ruta_reporte = f"{ruta_anonimizados}/reporte_anonimizacion_v2.json"
         anonimizador.generar_reporte_anonimizacion(ruta_reporte)
+        trazador.exportar_json(f"{ruta_anonimizados}/traza_anonimizacion.json")
+        trazador.exportar_flamegraph(f"{ruta_anonimizados}/traza_anonimizacion.folded")
         
         print(f"\n✅ ANONIMIZACIÓN v2.0 COMPLETADA EXITOSAMENTE")
         print(f"📁 Archivos anonimizados disponibles en: {ruta_anonimizados}")
@@ -457,6 +576,8 @@ def main():
     except Exception as e:
         print(f"\n❌ Error en el proceso de anonimización: {e}")
         raise
+    
+    return tablas_exportacion
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -17,6 +17,9 @@ import sys
 import time
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datos'))
+from lector_resultados import abrir_resultados
+
 def mostrar_banner():
     """Muestra el banner del sistema"""
     print("=" * 80)
@@ -64,25 +67,30 @@ def verificar_ambiente():
     return True
 
 def ejecutar_procesamiento():
-    """Ejecuta el procesamiento completo de datos"""
+    """
+    Ejecuta el procesamiento completo de datos en este proceso
+    
+    Returns:
+        dict: métricas completas en memoria, o None si hubo error
+    """
     print("🚀 INICIANDO PROCESAMIENTO COMPLETO...")
     print("-" * 50)
     
     # Cambiar al directorio correcto
     os.chdir('/Users/davidescudero/Documents/Github/ArqProd/clase')
     
-    # Ejecutar el procesador
-    resultado = os.system('python proyecto_final/datos/procesar_datos_avanzado.py')
+    # Ejecutar el procesador sin subproceso: los resultados se reciben en memoria
+    from procesar_datos_avanzado import procesar_y_entregar
+    datos = procesar_y_entregar()
     
-    if resultado == 0:
+    if datos is not None:
         print("\n✅ PROCESAMIENTO COMPLETADO EXITOSAMENTE")
-        return True
     else:
         print("\n❌ ERROR EN EL PROCESAMIENTO")
-        return False
+    return datos
 
-def mostrar_resumen_resultados():
-    """Muestra un resumen de los resultados generados"""
+def mostrar_resumen_resultados(datos=None):
+    """Muestra un resumen de los resultados generados (métricas del JSON si no se entregan)"""
     print("\n📋 RESUMEN DE RESULTADOS GENERADOS")
     print("=" * 50)
     
@@ -119,9 +127,9 @@ def mostrar_resumen_resultados():
     
     # Mostrar métricas principales si están disponibles
     try:
-        import json
-        with open('proyecto_final/datos/procesados/metricas_completas.json', 'r') as f:
-            datos = json.load(f)
+        if datos is None:
+            # Solo se leen del disco las secciones que se muestran
+            datos = abrir_resultados('proyecto_final/datos/procesados/metricas_completas.json')
         
         print(f"\n💰 MÉTRICAS PRINCIPALES:")
         metricas = datos['metricas_principales']
@@ -190,12 +198,13 @@ def main():
     tiempo_inicio = time.time()
     
     # Ejecutar procesamiento
-    if ejecutar_procesamiento():
+    datos = ejecutar_procesamiento()
+    if datos is not None:
         tiempo_total = time.time() - tiempo_inicio
         print(f"\n⏱️  Tiempo total de procesamiento: {tiempo_total:.1f} segundos")
         
-        # Mostrar resumen
-        mostrar_resumen_resultados()
+        # Mostrar resumen con los resultados en memoria
+        mostrar_resumen_resultados(datos)
         
         # Mostrar instrucciones
         mostrar_instrucciones_siguientes()
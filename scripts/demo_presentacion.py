@@ -13,10 +13,12 @@ Fecha: Mayo 2025
 import os
 import sys
 import time
-import json
 import subprocess
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datos'))
+from lector_resultados import abrir_resultados
+
 def mostrar_banner():
     """Muestra el banner de la demostración"""
     print("=" * 80)
@@ -59,11 +61,17 @@ def ejecutar_comando(comando, descripcion=""):
     except Exception as e:
         print(f"❌ Excepción: {e}")
 
-def mostrar_metricas_principales():
-    """Muestra las métricas principales del sistema"""
+def procesar_en_memoria():
+    """Ejecuta el procesador en este proceso y devuelve sus resultados en memoria (None si falla)"""
+    from procesar_datos_avanzado import procesar_y_entregar
+    return procesar_y_entregar()
+
+def mostrar_metricas_principales(datos=None):
+    """Muestra las métricas principales del sistema (del JSON exportado si no se entregan)"""
     try:
-        with open('proyecto_final/datos/procesados/metricas_completas.json', 'r') as f:
-            datos = json.load(f)
+        if datos is None:
+            # Solo se leen del disco las secciones que se muestran
+            datos = abrir_resultados('proyecto_final/datos/procesados/metricas_completas.json')
         
         metricas = datos['metricas_principales']
         
@@ -194,11 +202,11 @@ def demo_procesamiento():
     
     if respuesta in ['y', 'yes', 's', 'si', 'sí']:
         os.chdir("/Users/davidescudero/Documents/Github/ArqProd/clase")
-        ejecutar_comando(
-            "python proyecto_final/datos/procesar_datos_avanzado.py",
-            "Ejecutando procesamiento completo de datos"
-        )
-        mostrar_metricas_principales()
+        print("⏳ Ejecutando procesamiento completo de datos...")
+        datos = procesar_en_memoria()
+        if datos is None:
+            print("❌ Error en el procesamiento")
+        mostrar_metricas_principales(datos)
     else:
         print("⏭️  Saltando procesamiento, mostrando métricas existentes...")
         mostrar_metricas_principales()
@@ -0,0 +1,417 @@
+"""
+Exportación particionada de los datos anonimizados para Athena.
+
+Después de ``AnonimizadorDatosV2`` los datasets se escriben como Parquet comprimido en
+particiones estilo Hive (``periodo=2025-03/parte-0000.parquet``), junto con el DDL de las
+tablas externas. Athena descarta las particiones que no cumplen el filtro
+(``WHERE periodo = '2025-03'``) y, por ser columnar, solo lee las columnas de la consulta.
+
+Las columnas de partición (``periodo``, ``servicio``) se derivan de las columnas originales,
+que se conservan en los datos: las consultas existentes siguen funcionando. Los valores de
+servicio se normalizan a ``[A-Za-z0-9_]`` para que las rutas sean válidas en S3. El detalle
+solo se particiona por periodo: por servicio quedarían decenas de archivos de unas cientos de
+filas por mes, más grandes en conjunto que el CSV y más lentos de listar que de leer.
+
+Los DataFrames en memoria del anonimizador (con columnas categóricas) y los que se releen del
+CSV se llevan a los mismos tipos antes de calcular huellas y escribir, así que exportar los mismos
+datos por cualquiera de los dos caminos no reescribe particiones.
+
+DuckDB sirve como motor local para verificar la exportación (``--verificar``).
+
+Uso:
+    python scripts/exportar_athena.py --ruta-base proyecto_final --verificar
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import unicodedata
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+try:
+    import duckdb
+    DUCKDB_DISPONIBLE = True
+except ImportError:
+    DUCKDB_DISPONIBLE = False
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'datos'))
+from trazas import trazador_global
+
+COMPRESION = 'zstd'
+BASE_DATOS = 'hospital_economics_dev'
+DIRECTORIO_EXPORTACION = 'athena'
+ARCHIVO_DDL = 'tablas_athena.sql'
+ARCHIVO_MANIFIESTO = 'exportacion.json'
+SIN_VALOR = 'NO_ESPECIFICADO'
+# Marcador aleatorio de los identificadores vacíos (AnonimizadorDatosV2.hash_identificador)
+PREFIJO_ANONIMO = 'ANONIMO_'
+
+# Tabla de Athena -> CSV anonimizado y columnas de partición (clave Hive, columnas candidatas)
+TABLAS = {
+    'resumen_egresos': {
+        'archivo': 'resumen_anonimizado_v2.csv',
+        'particiones': [
+            ('periodo', ['fecha_egreso_general_periodo']),
+            ('servicio', ['servicio_origen', 'servicio'])
+        ]
+    },
+    'detalle_egresos': {
+        'archivo': 'detalle_anonimizado_v2.csv',
+        'particiones': [
+            ('periodo', ['fecha_periodo'])
+        ]
+    }
+}
+
+# Tipos de Arrow -> tipos de Athena (Hive)
+TIPOS_ATHENA = [
+    (pa.types.is_boolean, 'boolean'),
+    (pa.types.is_int8, 'tinyint'),
+    (pa.types.is_int16, 'smallint'),
+    (pa.types.is_int32, 'int'),
+    (pa.types.is_integer, 'bigint'),
+    (pa.types.is_float32, 'float'),
+    (pa.types.is_floating, 'double'),
+    (pa.types.is_timestamp, 'timestamp'),
+    (pa.types.is_date, 'date'),
+] if PARQUET_DISPONIBLE else []
+
+
+def valor_particion(valor):
+    """Valor seguro para una ruta de partición (sin acentos, espacios ni '/')"""
+    if pd.isna(valor) or str(valor).strip() == '':
+        return SIN_VALOR
+    ascii_texto = unicodedata.normalize('NFKD', str(valor)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', ascii_texto).strip('_') or SIN_VALOR
+
+
+def tipo_athena(tipo):
+    if pa.types.is_dictionary(tipo):
+        return tipo_athena(tipo.value_type)
+    for es_tipo, nombre in TIPOS_ATHENA:
+        if es_tipo(tipo):
+            return nombre
+    return 'string'
+
+
+def _columnas_particion(df, particiones):
+    """Claves Hive presentes en el DataFrame con su columna de origen"""
+    presentes = []
+    for clave, candidatas in particiones:
+        origen = next((c for c in candidatas if c in df.columns), None)
+        if origen is not None:
+            presentes.append((clave, origen))
+    return presentes
+
+
+def _normalizar_tipos(df):
+    """
+    Columnas categóricas con el tipo de sus valores, como quedan al releer el CSV.
+
+    Como ``read_csv``, una columna cuyos valores son todos números (aunque sean texto, ``'2'``)
+    queda numérica (``float64`` si hay vacíos) y las demás, objetos; así el esquema y las huellas
+    no dependen de si la tabla llegó en memoria o del CSV.
+    """
+    categoricas = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+    if not categoricas:
+        return df
+    normalizado = df.copy(deep=False)
+    for columna in categoricas:
+        valores = normalizado[columna].astype(object)
+        try:
+            valores = pd.to_numeric(valores)
+        except (TypeError, ValueError):
+            pass
+        normalizado[columna] = valores
+    return normalizado
+
+
+def _sin_diccionarios(tabla):
+    """Columnas de diccionario de Arrow como su tipo de valores (un solo esquema por tabla)"""
+    esquema = pa.schema([campo.with_type(campo.type.value_type) if pa.types.is_dictionary(campo.type) else campo
+                         for campo in tabla.schema])
+    return tabla.cast(esquema) if esquema != tabla.schema else tabla
+
+
+def _filas_para_huella(df):
+    """
+    Copia de las columnas ``*_hash`` con los marcadores de identificadores vacíos unificados.
+
+    El anonimizador genera un marcador aleatorio distinto en cada ejecución para los
+    identificadores vacíos; no aporta información, así que no debe contar como cambio.
+    """
+    columnas = [c for c in df.columns if c.endswith('_hash') and df[c].dtype == object]
+    if not columnas:
+        return df
+    normalizado = df.copy(deep=False)
+    for columna in columnas:
+        valores = normalizado[columna]
+        normalizado[columna] = valores.mask(valores.astype(str).str.startswith(PREFIJO_ANONIMO), PREFIJO_ANONIMO)
+    return normalizado
+
+
+def _huella_particion(filas, posiciones, esquema, compresion):
+    """Hash de las filas de una partición, del esquema y del códec"""
+    digest = hashlib.sha256(f'{esquema}|{compresion}'.encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(filas.iloc[posiciones], index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:20]
+
+
+def _conservar_archivo(origen, destino):
+    """Reutiliza un Parquet sin cambios (enlace duro: conserva fecha de modificación y no copia datos)"""
+    try:
+        os.link(origen, destino)
+    except OSError:
+        shutil.copy2(origen, destino)
+
+
+def exportar_tabla(df, directorio, particiones, compresion=COMPRESION, anterior=None):
+    """
+    Escribe un DataFrame como Parquet particionado estilo Hive.
+
+    Todas las particiones comparten el esquema de la tabla completa (una columna vacía en
+    un mes no cambia de tipo). La tabla se escribe en un directorio temporal que reemplaza
+    al anterior al terminar. Las particiones cuyo contenido no cambió respecto a ``anterior``
+    reutilizan el archivo existente, así que solo se reescriben (y se suben) los meses afectados.
+
+    Args:
+        df (DataFrame): datos anonimizados
+        directorio (str): directorio de la tabla
+        particiones (list): ``(clave, [columnas candidatas])`` en orden de anidamiento
+        compresion (str): códec de Parquet
+        anterior (dict): exportación previa de la tabla (del manifiesto)
+
+    Returns:
+        dict: claves de partición, esquema, filas, archivos y particiones actualizadas
+    """
+    df = _normalizar_tipos(df)
+    presentes = _columnas_particion(df, particiones)
+    claves = [clave for clave, _ in presentes]
+    tabla = _sin_diccionarios(pa.Table.from_pandas(df, preserve_index=False))
+    valores = pd.DataFrame({clave: df[origen].map(valor_particion).to_numpy() for clave, origen in presentes})
+
+    esquema = tabla.schema.to_string(show_schema_metadata=False)
+    filas_huella = _filas_para_huella(df)
+    previos = {a['ruta']: a.get('huella') for a in (anterior or {}).get('archivos', [])}
+
+    temporal = f"{directorio}.tmp"
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    archivos = []
+    grupos = valores.groupby(claves, sort=True).indices if claves else {(): range(len(df))}
+    for clave, posiciones in grupos.items():
+        clave = clave if isinstance(clave, tuple) else (clave,)
+        subdirectorio = os.path.join(*[f"{k}={v}" for k, v in zip(claves, clave)]) if claves else ''
+        ruta = os.path.join(temporal, subdirectorio, 'parte-0000.parquet')
+        relativa = os.path.relpath(ruta, temporal)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        huella = _huella_particion(filas_huella, posiciones, esquema, compresion)
+        existente = os.path.join(directorio, relativa)
+        actualizado = previos.get(relativa) != huella or not os.path.exists(existente)
+        if actualizado:
+            pq.write_table(tabla.take(pa.array(posiciones)), ruta, compression=compresion)
+        else:
+            _conservar_archivo(existente, ruta)
+        archivos.append({
+            'ruta': relativa,
+            'particion': dict(zip(claves, clave)),
+            'filas': len(posiciones),
+            'bytes': os.path.getsize(ruta),
+            'huella': huella,
+            'actualizado': actualizado
+        })
+
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.replace(temporal, directorio)
+    return {
+        'particiones': [{'clave': clave, 'origen': origen} for clave, origen in presentes],
+        'columnas': [(campo.name, tipo_athena(campo.type)) for campo in tabla.schema],
+        'filas': len(df),
+        'archivos': archivos,
+        'actualizados': [a['ruta'] for a in archivos if a['actualizado']],
+        'compresion': compresion
+    }
+
+
+def ddl_tabla(nombre, exportacion, ubicacion_s3, base_datos=BASE_DATOS):
+    """CREATE EXTERNAL TABLE y MSCK REPAIR para una tabla exportada"""
+    columnas = ',\n'.join(f"  `{columna}` {tipo}" for columna, tipo in exportacion['columnas'])
+    particiones = ', '.join(f"`{p['clave']}` string" for p in exportacion['particiones'])
+    sentencias = [
+        f"CREATE EXTERNAL TABLE IF NOT EXISTS {base_datos}.{nombre} (\n{columnas}\n)",
+    ]
+    if particiones:
+        sentencias.append(f"PARTITIONED BY ({particiones})")
+    sentencias += [
+        "STORED AS PARQUET",
+        f"LOCATION '{ubicacion_s3.rstrip('/')}/{nombre}/'",
+        f"TBLPROPERTIES ('parquet.compression' = '{exportacion['compresion'].upper()}');"
+    ]
+    ddl = '\n'.join(sentencias)
+    if particiones:
+        ddl += f"\n\nMSCK REPAIR TABLE {base_datos}.{nombre};"
+    return ddl
+
+
+def ubicacion_s3_por_defecto():
+    cuenta = os.getenv('AWS_ACCOUNT_ID', '<ACCOUNT_ID>')
+    return os.getenv('ATHENA_S3_LOCATION', f"s3://hospital-economics-dev-processed-{cuenta}/{DIRECTORIO_EXPORTACION}")
+
+
+def exportar_anonimizados(ruta_anonimizados, dataframes=None, ubicacion_s3=None, base_datos=BASE_DATOS,
+                          compresion=COMPRESION, trazador=None):
+    """
+    Exporta los datasets anonimizados a ``<ruta_anonimizados>/athena`` con su DDL.
+
+    Args:
+        ruta_anonimizados (str): directorio con los CSV anonimizados
+        dataframes (dict): tabla -> DataFrame ya en memoria (evita releer el CSV)
+        ubicacion_s3 (str): prefijo S3 donde se suben las tablas
+        base_datos (str): base de datos de Athena
+        compresion (str): códec de Parquet
+
+    Returns:
+        dict: manifiesto de la exportación (None si pyarrow no está disponible)
+    """
+    if not PARQUET_DISPONIBLE:
+        print("⚠ pyarrow no disponible, no se exportan las tablas para Athena")
+        return None
+
+    trazador = trazador if trazador is not None else trazador_global()
+    ubicacion_s3 = ubicacion_s3 or ubicacion_s3_por_defecto()
+    directorio = os.path.join(ruta_anonimizados, DIRECTORIO_EXPORTACION)
+    os.makedirs(directorio, exist_ok=True)
+    dataframes = dataframes or {}
+
+    ruta_manifiesto = os.path.join(directorio, ARCHIVO_MANIFIESTO)
+    anterior = {}
+    if os.path.exists(ruta_manifiesto):
+        try:
+            with open(ruta_manifiesto, 'r', encoding='utf-8') as f:
+                anterior = json.load(f).get('tablas', {})
+        except (OSError, ValueError):
+            anterior = {}
+
+    manifiesto = {'base_datos': base_datos, 'ubicacion_s3': ubicacion_s3, 'tablas': {}}
+    ddls = []
+    with trazador.span('exportar_athena'):
+        for nombre, definicion in TABLAS.items():
+            df = dataframes.get(nombre)
+            ruta_csv = os.path.join(ruta_anonimizados, definicion['archivo'])
+            if df is None:
+                if not os.path.exists(ruta_csv):
+                    continue
+                df = pd.read_csv(ruta_csv, encoding='utf-8')
+            with trazador.span('exportar_tabla', filas_entrada=len(df), tabla=nombre) as span:
+                exportacion = exportar_tabla(df, os.path.join(directorio, nombre), definicion['particiones'], compresion,
+                                             anterior=anterior.get(nombre))
+                bytes_tabla = sum(a['bytes'] for a in exportacion['archivos'])
+                span.registrar(bytes_escritos=sum(a['bytes'] for a in exportacion['archivos'] if a['actualizado']))
+            manifiesto['tablas'][nombre] = exportacion
+            ddls.append(ddl_tabla(nombre, exportacion, ubicacion_s3, base_datos))
+
+            tamano_csv = os.path.getsize(ruta_csv) if os.path.exists(ruta_csv) else 0
+            claves = '/'.join(p['clave'] for p in exportacion['particiones']) or 'sin particiones'
+            print(f"   ✅ {nombre}: {exportacion['filas']:,} filas en {len(exportacion['archivos'])} partición(es) "
+                  f"[{claves}], {len(exportacion['actualizados'])} actualizada(s), {bytes_tabla / 1024:.1f} KB"
+                  + (f" (CSV: {tamano_csv / 1024:.1f} KB)" if tamano_csv else ""))
+
+    with open(os.path.join(directorio, ARCHIVO_DDL), 'w', encoding='utf-8') as f:
+        f.write(f"-- Tablas externas de Athena generadas por exportar_athena.py\n"
+                f"CREATE DATABASE IF NOT EXISTS {base_datos};\n\n")
+        f.write('\n\n'.join(ddls) + '\n')
+    with open(f'{ruta_manifiesto}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    os.replace(f'{ruta_manifiesto}.tmp', ruta_manifiesto)
+    print(f"📋 DDL de Athena guardado en: {os.path.join(directorio, ARCHIVO_DDL)}")
+    return manifiesto
+
+
+def verificar_con_duckdb(ruta_anonimizados):
+    """
+    Verifica la exportación con DuckDB como motor local compatible con Hive.
+
+    Compara filas totales y por partición contra el manifiesto, y que un filtro por
+    partición lea solo los archivos de esa partición.
+
+    Returns:
+        bool: True si todas las tablas coinciden
+    """
+    if not DUCKDB_DISPONIBLE:
+        print("⚠ duckdb no disponible, se omite la verificación local")
+        return True
+
+    directorio = os.path.join(ruta_anonimizados, DIRECTORIO_EXPORTACION)
+    with open(os.path.join(directorio, ARCHIVO_MANIFIESTO), 'r', encoding='utf-8') as f:
+        manifiesto = json.load(f)
+
+    conexion = duckdb.connect()
+    correcto = True
+    for nombre, exportacion in manifiesto['tablas'].items():
+        patron = os.path.join(directorio, nombre, '**', '*.parquet').replace("'", "''")
+        fuente = f"read_parquet('{patron}', hive_partitioning = true)"
+        filas = conexion.execute(f"SELECT count(*) FROM {fuente}").fetchone()[0]
+        ok = filas == exportacion['filas']
+
+        claves = [p['clave'] for p in exportacion['particiones']]
+        if claves:
+            conteos = conexion.execute(
+                f"SELECT {', '.join(claves)}, count(*) FROM {fuente} GROUP BY ALL"
+            ).fetchall()
+            esperados = {tuple(a['particion'][c] for c in claves): a['filas'] for a in exportacion['archivos']}
+            ok = ok and {tuple(str(v) for v in fila[:-1]): fila[-1] for fila in conteos} == esperados
+
+            # Poda de particiones: un filtro por la primera clave solo lee sus archivos
+            archivo = exportacion['archivos'][0]
+            valor = archivo['particion'][claves[0]]
+            plan = conexion.execute(
+                f"EXPLAIN ANALYZE SELECT count(*) FROM {fuente} WHERE {claves[0]} = '{valor}'"
+            ).fetchall()
+            texto_plan = '\n'.join(str(fila[-1]) for fila in plan)
+            archivos_particion = sum(1 for a in exportacion['archivos'] if a['particion'][claves[0]] == valor)
+            leidos = re.search(r'Total Files Read:\s*(\d+)', texto_plan)
+            if leidos:
+                ok = ok and int(leidos.group(1)) == archivos_particion
+
+        estado = '✅' if ok else '❌'
+        print(f"   {estado} {nombre}: {filas:,} filas leídas con DuckDB (esperadas {exportacion['filas']:,})")
+        correcto = correcto and ok
+    conexion.close()
+    return correcto
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporta los datos anonimizados como Parquet particionado para Athena')
+    parser.add_argument('--ruta-base', default='proyecto_final')
+    parser.add_argument('--ubicacion-s3', default=None, help='Prefijo S3 de las tablas (por defecto ATHENA_S3_LOCATION)')
+    parser.add_argument('--base-datos', default=BASE_DATOS)
+    parser.add_argument('--verificar', action='store_true', help='Verifica la exportación con DuckDB')
+    args = parser.parse_args()
+
+    ruta_anonimizados = f"{args.ruta_base}/datos/anonimizados_v2"
+    print("📦 EXPORTANDO DATOS ANONIMIZADOS PARA ATHENA...")
+    manifiesto = exportar_anonimizados(ruta_anonimizados, ubicacion_s3=args.ubicacion_s3, base_datos=args.base_datos)
+    if manifiesto is None:
+        return 1
+    if args.verificar:
+        print("\n🦆 Verificando con DuckDB...")
+        if not verificar_con_duckdb(ruta_anonimizados):
+            print("❌ La exportación no coincide con los datos anonimizados")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
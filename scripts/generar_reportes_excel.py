@@ -1,77 +1,169 @@
 import pandas as pd
-import json
+import argparse
 import os
+import re
+import shutil
+import sys
+import unicodedata
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datos'))
+from trazas import trazador_global
+from lector_resultados import abrir_resultados
+from motor_excel import (
+    FuenteParquet, FILAS_DATOS_POR_HOJA, PARQUET_DISPONIBLE, escribir_libros, particionar_por_columna
+)
+
+# Formato de número Excel por columna (ver motor_excel.FORMATOS_NUMERO); las columnas quedan numéricas
+FORMATOS_COLUMNAS = {
+    'Total Facturado': 'moneda',
+    'Costo Promedio': 'moneda',
+    'Total Pacientes': 'entero',
+    'Estancia Promedio': 'decimal',
+    '% de Ingresos': 'porcentaje',
+    '% de Pacientes': 'porcentaje',
+    '% de Casos': 'porcentaje',
+    'Variación Facturación (%)': 'porcentaje',
+    'Variación Pacientes (%)': 'porcentaje'
+}
+
+# Campos de las secciones agregadas de metricas_completas.json -> encabezado de columna
+COLUMNAS_METRICAS = {
+    'total_facturado': 'Total Facturado',
+    'costo_promedio': 'Costo Promedio',
+    'total_pacientes': 'Total Pacientes',
+    'estancia_promedio': 'Estancia Promedio'
+}
+
+# Columnas del resumen incluidas en la hoja de pacientes del reporte de detalle (sin nombres ni direcciones)
+COLUMNAS_DETALLE_PACIENTES = [
+    'id_paciente', 'fecha_recepcion_hosp', 'fecha_egreso_general', 'servicio_origen', 'diagnostico_hosp',
+    'motivo_alta_hosp', 'dias_estancia_calculado', 'edad', 'sexo', 'alcaldia_municipio', 'estado',
+    'derechohabiencia', 'gasto_nivel_6', 'gasto_nivel_1'
+]
+
+
+def _nombre_archivo(texto):
+    """Convierte un nombre de servicio en un fragmento seguro para nombre de archivo"""
+    ascii_texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^A-Za-z0-9]+', '_', ascii_texto).strip('_') or 'SIN_NOMBRE'
+
+
+def _nombres_archivo_unicos(valores):
+    """
+    Fragmento de nombre de archivo por valor, con sufijo numérico si dos valores coinciden al
+    normalizarse ("RAYOS X" y "RAYOS-X" -> RAYOS_X y RAYOS_X_2), para no escribir el mismo libro.
+    """
+    nombres, usados = {}, set()
+    for valor in valores:
+        base = nombre = _nombre_archivo(valor)
+        sufijo = 2
+        while nombre in usados:
+            nombre = f'{base}_{sufijo}'
+            sufijo += 1
+        usados.add(nombre)
+        nombres[valor] = nombre
+    return nombres
+
+
+def tabla_seccion(seccion, nombre_indice, columnas):
+    """
+    Convierte una sección ``{clave: {campo: valor}}`` del JSON en un DataFrame de una vez.
+    
+    Args:
+        seccion (dict): sección de metricas_completas.json
+        nombre_indice (str): encabezado de la columna con las claves
+        columnas (dict): campo -> encabezado, en el orden de salida
+    """
+    df = pd.DataFrame.from_dict(seccion, orient='index').reindex(columns=list(columnas))
+    df = df.rename(columns=columnas)
+    df.index.name = nombre_indice
+    return df.reset_index()
+
+
+def tabla_registros(registros, columnas, valor_faltante=None):
+    """Convierte una lista de dicts en un DataFrame con las columnas ``campo -> encabezado``"""
+    df = pd.DataFrame.from_records(registros, columns=list(columnas))
+    if valor_faltante is not None:
+        df = df.fillna(valor_faltante)
+    return df.rename(columns=columnas)
+
 class GeneradorReportesExcel:
     """
     Clase para generar reportes Excel automáticamente a partir de los datos procesados
+    
+    Los datos pueden entregarse en memoria (``datos_completos``, p. ej. los resultados de
+    ``ProcesadorDatosHospital``) o leerse de ``metricas_completas.json`` si no se entregan.
     """
     
-    def __init__(self):
-        self.datos_completos = None
+    def __init__(self, ruta_base='proyecto_final', trazador=None, max_procesos=None, datos_completos=None):
+        self.ruta_base = ruta_base
+        self.ruta_reportes = f'{ruta_base}/reportes'
+        self.max_procesos = max_procesos
+        self.datos_completos = datos_completos
+        self.hojas = None
         self.fecha_reporte = datetime.now().strftime('%Y%m%d_%H%M')
+        self.trazador = trazador if trazador is not None else trazador_global()
         
     def cargar_datos_procesados(self):
-        """Carga los datos procesados desde el JSON"""
+        """Abre el JSON de datos procesados (las secciones se leen al usarse)"""
+        ruta_metricas = f'{self.ruta_base}/datos/procesados/metricas_completas.json'
         try:
-            with open('proyecto_final/datos/procesados/metricas_completas.json', 'r', encoding='utf-8') as f:
-                self.datos_completos = json.load(f)
+            with self.trazador.span('cargar_datos_procesados'):
+                self.datos_completos = abrir_resultados(ruta_metricas)
+            self.hojas = None
             print("✓ Datos procesados cargados correctamente")
             return True
         except Exception as e:
             print(f"❌ Error cargando datos procesados: {e}")
             return False
     
+    def usar_resultados(self, datos_completos):
+        """Usa resultados ya calculados en memoria (mismo contenido que metricas_completas.json)"""
+        self.datos_completos = datos_completos
+        self.hojas = None
+    
+    def _asegurar_datos(self):
+        """Lee el JSON solo si no se entregaron los resultados en memoria"""
+        if self.datos_completos is not None:
+            print("✓ Usando resultados del procesamiento en memoria")
+            return True
+        return self.cargar_datos_procesados()
+    
     def generar_reporte_resumen_ejecutivo(self):
         """Genera reporte resumen ejecutivo"""
         print("Generando reporte resumen ejecutivo...")
         
         try:
-            # Crear DataFrame con métricas principales
+            # Métricas principales como valores numéricos; la unidad va en su propia columna
             metricas = self.datos_completos['metricas_principales']
-            
-            resumen_data = {
-                'Métrica': [
-                    'Total Facturado',
-                    'Total Costo Directo', 
-                    'Costo Promedio por Paciente',
-                    'Margen Bruto (%)',
-                    'Total Pacientes',
-                    'Pacientes Último Mes',
-                    'Estancia Promedio (días)',
-                    'Tasa de Mortalidad (%)',
-                    'Edad Promedio'
-                ],
-                'Valor': [
-                    f"${metricas['financieras']['total_facturado']:,.2f}",
-                    f"${metricas['financieras']['total_costo_directo']:,.2f}",
-                    f"${metricas['financieras']['costo_promedio']:,.2f}",
-                    f"{metricas['financieras']['margen_bruto']:.2f}%",
-                    f"{metricas['operacionales']['total_pacientes']:,}",
-                    f"{metricas['operacionales']['pacientes_ultimo_mes']:,}",
-                    f"{metricas['operacionales']['estancia_promedio']:.1f}",
-                    f"{metricas['operacionales']['tasa_mortalidad']:.2f}%",
-                    f"{metricas['demograficas']['edad_promedio']:.1f} años"
-                ]
-            }
-            
-            df_resumen = pd.DataFrame(resumen_data)
+            financieras = metricas['financieras']
+            operacionales = metricas['operacionales']
+            
+            df_resumen = pd.DataFrame([
+                ('Total Facturado', financieras['total_facturado'], 'MXN'),
+                ('Total Costo Directo', financieras['total_costo_directo'], 'MXN'),
+                ('Costo Promedio por Paciente', financieras['costo_promedio'], 'MXN'),
+                ('Margen Bruto (%)', financieras['margen_bruto'], '%'),
+                ('Total Pacientes', operacionales['total_pacientes'], 'pacientes'),
+                ('Pacientes Último Mes', operacionales['pacientes_ultimo_mes'], 'pacientes'),
+                ('Estancia Promedio (días)', operacionales['estancia_promedio'], 'días'),
+                ('Tasa de Mortalidad (%)', operacionales['tasa_mortalidad'], '%'),
+                ('Edad Promedio', metricas['demograficas']['edad_promedio'], 'años')
+            ], columns=['Métrica', 'Valor', 'Unidad'])
             
             # Crear DataFrame con alertas
-            alertas_data = []
-            for alerta in self.datos_completos.get('alertas', []):
-                alertas_data.append({
-                    'Título': alerta['titulo'],
-                    'Descripción': alerta['descripcion'],
-                    'Severidad': alerta['severidad'].upper(),
-                    'Tipo': alerta['tipo'].title(),
-                    'Valor': alerta['valor']
-                })
-            
-            df_alertas = pd.DataFrame(alertas_data)
+            df_alertas = tabla_registros(self.datos_completos.get('alertas', []), {
+                'titulo': 'Título',
+                'descripcion': 'Descripción',
+                'severidad': 'Severidad',
+                'tipo': 'Tipo',
+                'valor': 'Valor'
+            })
+            df_alertas['Severidad'] = df_alertas['Severidad'].str.upper()
+            df_alertas['Tipo'] = df_alertas['Tipo'].str.title()
             
             return df_resumen, df_alertas
             
@@ -84,25 +176,10 @@ class GeneradorReportesExcel:
         print("Generando reporte por servicios...")
         
         try:
-            servicios_data = []
-            for servicio, datos in self.datos_completos['analisis_servicios'].items():
-                servicios_data.append({
-                    'Servicio': servicio,
-                    'Total Facturado': datos['total_facturado'],
-                    'Costo Promedio': datos['costo_promedio'],
-                    'Total Pacientes': datos['total_pacientes'],
-                    'Estancia Promedio': datos['estancia_promedio'],
-                    '% de Ingresos': datos['porcentaje_ingresos']
-                })
-            
-            df_servicios = pd.DataFrame(servicios_data)
-            df_servicios = df_servicios.sort_values('Total Facturado', ascending=False)
-            
-            # Formatear columnas monetarias
-            df_servicios['Total Facturado Formateado'] = df_servicios['Total Facturado'].apply(lambda x: f"${x:,.2f}")
-            df_servicios['Costo Promedio Formateado'] = df_servicios['Costo Promedio'].apply(lambda x: f"${x:,.2f}")
-            
-            return df_servicios
+            df_servicios = tabla_seccion(self.datos_completos['analisis_servicios'], 'Servicio',
+                                         {**COLUMNAS_METRICAS, 'porcentaje_ingresos': '% de Ingresos'})
+            # Los montos se formatean en Excel (FORMATOS_COLUMNAS), no como texto
+            return df_servicios.sort_values('Total Facturado', ascending=False)
             
         except Exception as e:
             print(f"❌ Error generando reporte servicios: {e}")
@@ -113,32 +190,18 @@ class GeneradorReportesExcel:
         print("Generando reporte geográfico...")
         
         try:
-            # Reporte por alcaldías
-            alcaldias_data = []
-            for alcaldia, datos in self.datos_completos['analisis_geografico']['alcaldias'].items():
-                alcaldias_data.append({
-                    'Alcaldía': alcaldia,
-                    'Total Facturado': datos['total_facturado'],
-                    'Costo Promedio': datos['costo_promedio'],
-                    'Total Pacientes': datos['total_pacientes'],
-                    '% de Pacientes': datos['porcentaje_pacientes']
-                })
+            geografico = self.datos_completos['analisis_geografico']
+            columnas = {
+                'total_facturado': 'Total Facturado',
+                'costo_promedio': 'Costo Promedio',
+                'total_pacientes': 'Total Pacientes',
+                'porcentaje_pacientes': '% de Pacientes'
+            }
             
-            df_alcaldias = pd.DataFrame(alcaldias_data)
+            df_alcaldias = tabla_seccion(geografico['alcaldias'], 'Alcaldía', columnas)
             df_alcaldias = df_alcaldias.sort_values('Total Pacientes', ascending=False)
             
-            # Reporte por estados
-            estados_data = []
-            for estado, datos in self.datos_completos['analisis_geografico']['estados'].items():
-                estados_data.append({
-                    'Estado': estado,
-                    'Total Facturado': datos['total_facturado'],
-                    'Costo Promedio': datos['costo_promedio'],
-                    'Total Pacientes': datos['total_pacientes'],
-                    '% de Pacientes': datos['porcentaje_pacientes']
-                })
-            
-            df_estados = pd.DataFrame(estados_data)
+            df_estados = tabla_seccion(geografico['estados'], 'Estado', columnas)
             df_estados = df_estados.sort_values('Total Pacientes', ascending=False)
             
             return df_alcaldias, df_estados
@@ -152,17 +215,7 @@ class GeneradorReportesExcel:
         print("Generando reporte de tendencias...")
         
         try:
-            tendencias_data = []
-            for periodo, datos in self.datos_completos['tendencias_temporales'].items():
-                tendencias_data.append({
-                    'Período': periodo,
-                    'Total Facturado': datos['total_facturado'],
-                    'Costo Promedio': datos['costo_promedio'],
-                    'Total Pacientes': datos['total_pacientes'],
-                    'Estancia Promedio': datos['estancia_promedio']
-                })
-            
-            df_tendencias = pd.DataFrame(tendencias_data)
+            df_tendencias = tabla_seccion(self.datos_completos['tendencias_temporales'], 'Período', COLUMNAS_METRICAS)
             df_tendencias = df_tendencias.sort_values('Período')
             
             # Calcular variaciones mes a mes
@@ -180,21 +233,9 @@ class GeneradorReportesExcel:
         print("Generando reporte por motivos de alta...")
         
         try:
-            motivos_data = []
-            for motivo, datos in self.datos_completos['analisis_motivos_alta'].items():
-                motivos_data.append({
-                    'Motivo de Alta': motivo,
-                    'Total Facturado': datos['total_facturado'],
-                    'Costo Promedio': datos['costo_promedio'],
-                    'Total Pacientes': datos['total_pacientes'],
-                    'Estancia Promedio': datos['estancia_promedio'],
-                    '% de Casos': datos['porcentaje_casos']
-                })
-            
-            df_motivos = pd.DataFrame(motivos_data)
-            df_motivos = df_motivos.sort_values('Total Facturado', ascending=False)
-            
-            return df_motivos
+            df_motivos = tabla_seccion(self.datos_completos['analisis_motivos_alta'], 'Motivo de Alta',
+                                       {**COLUMNAS_METRICAS, 'porcentaje_casos': '% de Casos'})
+            return df_motivos.sort_values('Total Facturado', ascending=False)
             
         except Exception as e:
             print(f"❌ Error generando reporte motivos: {e}")
@@ -208,7 +249,7 @@ class GeneradorReportesExcel:
             ml_data = self.datos_completos.get('machine_learning', {})
             
             if not ml_data.get('disponible', False):
-                return pd.DataFrame({'Información': ['Modelos ML no disponibles']})
+                return pd.DataFrame({'Información': ['Modelos ML no disponibles']}), None
             
             # Información de modelos
             resumen_modelos = ml_data.get('resumen_modelos', {})
@@ -244,17 +285,13 @@ class GeneradorReportesExcel:
             df_modelos = pd.DataFrame(modelos_info)
             
             # Alertas predictivas
-            alertas_ml = []
-            for alerta in ml_data.get('alertas_ml', []):
-                alertas_ml.append({
-                    'Servicio': alerta.get('service', 'N/A'),
-                    'Predicción': alerta.get('prediction', 'N/A'),
-                    'Confianza': alerta.get('confidence', 'N/A'),
-                    'Impacto': alerta.get('impact', 'N/A'),
-                    'Modelo': alerta.get('modelo_usado', 'N/A')
-                })
-            
-            df_alertas_ml = pd.DataFrame(alertas_ml)
+            df_alertas_ml = tabla_registros(ml_data.get('alertas_ml', []), {
+                'service': 'Servicio',
+                'prediction': 'Predicción',
+                'confidence': 'Confianza',
+                'impact': 'Impacto',
+                'modelo_usado': 'Modelo'
+            }, valor_faltante='N/A')
             
             return df_modelos, df_alertas_ml
             
@@ -262,80 +299,111 @@ class GeneradorReportesExcel:
             print(f"❌ Error generando reporte ML: {e}")
             return None, None
     
+    def construir_hojas(self):
+        """
+        Construye una sola vez los DataFrames de todas las hojas.
+        
+        El libro completo y los reportes por área comparten estos DataFrames.
+        """
+        if self.hojas is not None:
+            return self.hojas
+        
+        with self.trazador.span('construir_hojas') as span:
+            df_resumen, df_alertas = self.generar_reporte_resumen_ejecutivo()
+            df_alcaldias, df_estados = self.generar_reporte_geografico()
+            df_modelos, df_alertas_ml = self.generar_reporte_modelos_ml()
+            self.hojas = {
+                'resumen': df_resumen,
+                'alertas': df_alertas if df_alertas is not None and not df_alertas.empty else None,
+                'servicios': self.generar_reporte_servicios(),
+                'alcaldias': df_alcaldias,
+                'estados': df_estados,
+                'tendencias': self.generar_reporte_tendencias(),
+                'motivos': self.generar_reporte_motivos_alta(),
+                'modelos': df_modelos,
+                'alertas_ml': df_alertas_ml if df_alertas_ml is not None and not df_alertas_ml.empty else None,
+                'metadatos': self.generar_hoja_metadatos()
+            }
+            span.registrar(filas_salida=sum(len(df) for df in self.hojas.values() if df is not None))
+        return self.hojas
+    
+    def generar_hoja_metadatos(self):
+        """Genera la hoja de metadatos del reporte completo"""
+        metadatos = self.datos_completos.get('metadatos', {})
+        return pd.DataFrame([
+            ['Fecha de Generación', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+            ['Total Registros Procesados', metadatos.get('total_registros_procesados', 'N/A')],
+            ['Registros Detalle', metadatos.get('registros_detalle', 'N/A')],
+            ['Período de Datos', f"{metadatos.get('periodo_datos', {}).get('inicio', 'N/A')} a {metadatos.get('periodo_datos', {}).get('fin', 'N/A')}"],
+            ['Completitud Costos (%)', round(metadatos.get('calidad_datos', {}).get('completitud_costos', 0), 1)],
+            ['Completitud Demográficos (%)', round(metadatos.get('calidad_datos', {}).get('completitud_demograficos', 0), 1)],
+            ['Versión Modelos', metadatos.get('modelos_ml', {}).get('version', 'N/A')]
+        ], columns=['Atributo', 'Valor'])
+    
+    def _libro_completo(self):
+        hojas = self.construir_hojas()
+        return (f'{self.ruta_reportes}/Reporte_Hospital_Completo_{self.fecha_reporte}.xlsx', [
+            ('Resumen Ejecutivo', hojas['resumen']),
+            ('Alertas', hojas['alertas']),
+            ('Análisis por Servicios', hojas['servicios']),
+            ('Análisis por Alcaldías', hojas['alcaldias']),
+            ('Análisis por Estados', hojas['estados']),
+            ('Tendencias Temporales', hojas['tendencias']),
+            ('Motivos de Alta', hojas['motivos']),
+            ('Modelos Predictivos', hojas['modelos']),
+            ('Alertas Predictivas', hojas['alertas_ml']),
+            ('Metadatos', hojas['metadatos'])
+        ])
+    
+    def _libros_individuales(self):
+        hojas = self.construir_hojas()
+        libros = []
+        if hojas['servicios'] is not None:
+            libros.append((f'{self.ruta_reportes}/Reporte_Servicios_{self.fecha_reporte}.xlsx',
+                           [('Análisis por Servicios', hojas['servicios'])]))
+        if hojas['alcaldias'] is not None and hojas['estados'] is not None:
+            libros.append((f'{self.ruta_reportes}/Reporte_Geografico_{self.fecha_reporte}.xlsx',
+                           [('Por Alcaldías', hojas['alcaldias']), ('Por Estados', hojas['estados'])]))
+        if hojas['tendencias'] is not None:
+            libros.append((f'{self.ruta_reportes}/Reporte_Tendencias_{self.fecha_reporte}.xlsx',
+                           [('Tendencias Temporales', hojas['tendencias'])]))
+        return libros
+    
+    def _escribir_libros(self, libros, limite_filas=FILAS_DATOS_POR_HOJA):
+        """Escribe los libros en paralelo y registra un span por libro"""
+        with self.trazador.span('escribir_libros', total_libros=len(libros)) as span:
+            resultados = escribir_libros(libros, self.max_procesos, limite_filas, FORMATOS_COLUMNAS)
+            for resultado in resultados:
+                span.registrar(bytes_escritos=resultado['bytes_escritos'])
+                # Cada libro se escribe en otro proceso: se registra su duración como atributo
+                span.atributos.setdefault('libros', {})[os.path.basename(resultado['ruta'])] = {
+                    'duracion_s': resultado['duracion_s'],
+                    'filas': sum(resultado['filas_por_hoja'].values()),
+                    'motor': resultado['motor']
+                }
+        return resultados
+    
     def guardar_reportes_excel(self):
         """Guarda todos los reportes en archivos Excel"""
+        with self.trazador.span('reportes_excel'):
+            return self._guardar_reportes_excel()
+    
+    def _guardar_reportes_excel(self):
         print("=== GENERANDO REPORTES EXCEL ===")
         
-        if not self.cargar_datos_procesados():
+        if not self._asegurar_datos():
             return False
         
         try:
             # Crear directorio de reportes
-            os.makedirs('proyecto_final/reportes', exist_ok=True)
-            
-            # Generar todos los reportes
-            df_resumen, df_alertas = self.generar_reporte_resumen_ejecutivo()
-            df_servicios = self.generar_reporte_servicios()
-            df_alcaldias, df_estados = self.generar_reporte_geografico()
-            df_tendencias = self.generar_reporte_tendencias()
-            df_motivos = self.generar_reporte_motivos_alta()
-            df_modelos, df_alertas_ml = self.generar_reporte_modelos_ml()
+            os.makedirs(self.ruta_reportes, exist_ok=True)
             
-            # Guardar reporte completo
-            nombre_archivo = f'proyecto_final/reportes/Reporte_Hospital_Completo_{self.fecha_reporte}.xlsx'
+            # Libro completo y reportes por área se escriben en paralelo a partir de las mismas hojas
+            resultados = self._escribir_libros([self._libro_completo()] + self._libros_individuales())
             
-            with pd.ExcelWriter(nombre_archivo, engine='openpyxl') as writer:
-                # Hoja de resumen ejecutivo
-                if df_resumen is not None:
-                    df_resumen.to_excel(writer, sheet_name='Resumen Ejecutivo', index=False)
-                
-                if df_alertas is not None and not df_alertas.empty:
-                    df_alertas.to_excel(writer, sheet_name='Alertas', index=False)
-                
-                # Hoja de servicios
-                if df_servicios is not None:
-                    df_servicios.to_excel(writer, sheet_name='Análisis por Servicios', index=False)
-                
-                # Hojas geográficas
-                if df_alcaldias is not None:
-                    df_alcaldias.to_excel(writer, sheet_name='Análisis por Alcaldías', index=False)
-                
-                if df_estados is not None:
-                    df_estados.to_excel(writer, sheet_name='Análisis por Estados', index=False)
-                
-                # Hoja de tendencias
-                if df_tendencias is not None:
-                    df_tendencias.to_excel(writer, sheet_name='Tendencias Temporales', index=False)
-                
-                # Hoja de motivos de alta
-                if df_motivos is not None:
-                    df_motivos.to_excel(writer, sheet_name='Motivos de Alta', index=False)
-                
-                # Hojas de modelos ML
-                if df_modelos is not None:
-                    df_modelos.to_excel(writer, sheet_name='Modelos Predictivos', index=False)
-                
-                if df_alertas_ml is not None and not df_alertas_ml.empty:
-                    df_alertas_ml.to_excel(writer, sheet_name='Alertas Predictivas', index=False)
-                
-                # Hoja de metadatos
-                metadatos = self.datos_completos.get('metadatos', {})
-                df_metadatos = pd.DataFrame([
-                    ['Fecha de Generación', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-                    ['Total Registros Procesados', metadatos.get('total_registros_procesados', 'N/A')],
-                    ['Registros Detalle', metadatos.get('registros_detalle', 'N/A')],
-                    ['Período de Datos', f"{metadatos.get('periodo_datos', {}).get('inicio', 'N/A')} a {metadatos.get('periodo_datos', {}).get('fin', 'N/A')}"],
-                    ['Completitud Costos (%)', f"{metadatos.get('calidad_datos', {}).get('completitud_costos', 0):.1f}%"],
-                    ['Completitud Demográficos (%)', f"{metadatos.get('calidad_datos', {}).get('completitud_demograficos', 0):.1f}%"],
-                    ['Versión Modelos', metadatos.get('modelos_ml', {}).get('version', 'N/A')]
-                ], columns=['Atributo', 'Valor'])
-                
-                df_metadatos.to_excel(writer, sheet_name='Metadatos', index=False)
-            
-            print(f"✓ Reporte completo guardado: {nombre_archivo}")
-            
-            # Generar reportes individuales por área
-            self.generar_reportes_individuales()
+            print(f"✓ Reporte completo guardado: {resultados[0]['ruta']}")
+            for resultado in resultados[1:]:
+                print(f"✓ Reporte individual: {resultado['ruta']}")
             
             return True
             
@@ -348,44 +416,99 @@ class GeneradorReportesExcel:
         print("Generando reportes individuales...")
         
         try:
-            # Reporte solo de servicios
-            df_servicios = self.generar_reporte_servicios()
-            if df_servicios is not None:
-                archivo_servicios = f'proyecto_final/reportes/Reporte_Servicios_{self.fecha_reporte}.xlsx'
-                df_servicios.to_excel(archivo_servicios, index=False)
-                print(f"✓ Reporte de servicios: {archivo_servicios}")
+            os.makedirs(self.ruta_reportes, exist_ok=True)
+            with self.trazador.span('reportes_individuales'):
+                for resultado in self._escribir_libros(self._libros_individuales()):
+                    print(f"✓ Reporte individual: {resultado['ruta']}")
             
-            # Reporte solo geográfico
-            df_alcaldias, df_estados = self.generar_reporte_geografico()
-            if df_alcaldias is not None and df_estados is not None:
-                archivo_geo = f'proyecto_final/reportes/Reporte_Geografico_{self.fecha_reporte}.xlsx'
-                with pd.ExcelWriter(archivo_geo, engine='openpyxl') as writer:
-                    df_alcaldias.to_excel(writer, sheet_name='Por Alcaldías', index=False)
-                    df_estados.to_excel(writer, sheet_name='Por Estados', index=False)
-                print(f"✓ Reporte geográfico: {archivo_geo}")
+        except Exception as e:
+            print(f"❌ Error generando reportes individuales: {e}")
+
+    def generar_reportes_detalle(self, por_servicio=True, tamano_lote=100_000, limite_filas=FILAS_DATOS_POR_HOJA):
+        """
+        Genera reportes de detalle (drill-down) a nivel paciente y cargo.
+        
+        Lee directamente del caché columnar (``datos/cache_columnar``) por lotes, sin
+        cargar el detalle completo en memoria. Las hojas que rebasan el límite de filas
+        de Excel continúan en hojas ``Cargos (2)``, ``Cargos (3)``, ... Con ``por_servicio``
+        se genera además un libro por área de servicio; todos los libros se escriben en paralelo.
+        
+        Args:
+            por_servicio (bool): generar un libro por área de servicio
+            tamano_lote (int): filas leídas por lote del Parquet
+            limite_filas (int): filas de datos por hoja
+        """
+        print("=== GENERANDO REPORTES DE DETALLE ===")
+        ruta_cache = f'{self.ruta_base}/datos/cache_columnar'
+        ruta_detalle = f'{ruta_cache}/detalle.parquet'
+        ruta_resumen = f'{ruta_cache}/resumen.parquet'
+        
+        if not PARQUET_DISPONIBLE or not os.path.exists(ruta_detalle):
+            print(f"⚠ No hay detalle en el caché columnar ({ruta_detalle}); ejecutar procesar_datos_avanzado.py primero")
+            return False
+        
+        try:
+            directorio = f'{self.ruta_reportes}/detalle'
+            directorio_particiones = f'{directorio}/.particiones_servicio'
+            os.makedirs(directorio, exist_ok=True)
+            
+            with self.trazador.span('reportes_detalle') as span:
+                hojas_generales = []
+                if os.path.exists(ruta_resumen):
+                    presentes = set(FuenteParquet(ruta_resumen).nombres_columnas())
+                    columnas = [c for c in COLUMNAS_DETALLE_PACIENTES if c in presentes]
+                    hojas_generales.append(('Pacientes', FuenteParquet(ruta_resumen, columnas, tamano_lote=tamano_lote)))
+                hojas_generales.append(('Cargos', FuenteParquet(ruta_detalle, tamano_lote=tamano_lote)))
+                libros = [(f'{directorio}/Reporte_Detalle_{self.fecha_reporte}.xlsx', hojas_generales)]
+                
+                if por_servicio:
+                    # Una sola pasada separa el detalle por servicio; cada libro lee solo su partición
+                    particiones = particionar_por_columna(ruta_detalle, 'area_servicio', directorio_particiones, tamano_lote)
+                    nombres = _nombres_archivo_unicos(particiones)
+                    for servicio, ruta_particion in particiones.items():
+                        libros.append((
+                            f'{directorio}/Reporte_Detalle_{nombres[servicio]}_{self.fecha_reporte}.xlsx',
+                            [('Cargos', FuenteParquet(ruta_particion, tamano_lote=tamano_lote))]
+                        ))
+                
+                resultados = self._escribir_libros(libros, limite_filas)
+                span.registrar(filas_salida=sum(sum(r['filas_por_hoja'].values()) for r in resultados))
             
-            # Reporte de tendencias
-            df_tendencias = self.generar_reporte_tendencias()
-            if df_tendencias is not None:
-                archivo_tendencias = f'proyecto_final/reportes/Reporte_Tendencias_{self.fecha_reporte}.xlsx'
-                df_tendencias.to_excel(archivo_tendencias, index=False)
-                print(f"✓ Reporte de tendencias: {archivo_tendencias}")
+            print(f"✓ {len(resultados)} reportes de detalle en {directorio}/")
+            for nombre_hoja, filas in resultados[0]['filas_por_hoja'].items():
+                print(f"  - {nombre_hoja}: {filas:,} filas")
+            return True
             
         except Exception as e:
-            print(f"❌ Error generando reportes individuales: {e}")
+            print(f"❌ Error generando reportes de detalle: {e}")
+            return False
+        finally:
+            if por_servicio:
+                shutil.rmtree(f'{self.ruta_reportes}/detalle/.particiones_servicio', ignore_errors=True)
 
 def main():
     """Función principal para generar todos los reportes"""
-    generador = GeneradorReportesExcel()
+    parser = argparse.ArgumentParser(description='Genera los reportes Excel del hospital')
+    parser.add_argument('--ruta-base', default='proyecto_final')
+    parser.add_argument('--detalle', action='store_true',
+                        help='Genera también los reportes de detalle a nivel paciente y cargo')
+    parser.add_argument('--sin-servicios', action='store_true',
+                        help='En modo detalle, no generar un libro por área de servicio')
+    args = parser.parse_args()
+    
+    generador = GeneradorReportesExcel(ruta_base=args.ruta_base)
+    
+    if args.detalle:
+        generador.generar_reportes_detalle(por_servicio=not args.sin_servicios)
     
     if generador.guardar_reportes_excel():
         print("\n=== REPORTES EXCEL GENERADOS EXITOSAMENTE ===")
-        print(f"📁 Ubicación: proyecto_final/reportes/")
+        print(f"📁 Ubicación: {generador.ruta_reportes}/")
         print(f"📅 Fecha: {generador.fecha_reporte}")
         
         # Listar archivos generados
         import glob
-        archivos = glob.glob('proyecto_final/reportes/*.xlsx')
+        archivos = glob.glob(f'{generador.ruta_reportes}/*.xlsx')
         print(f"\n📊 Archivos generados ({len(archivos)}):")
         for archivo in sorted(archivos):
             size_kb = os.path.getsize(archivo) / 1024
@@ -0,0 +1,355 @@
+"""
+Motor de escritura de libros Excel en modo streaming (solo escritura).
+
+Las hojas se escriben fila por fila sin mantener las celdas en memoria:
+con ``xlsxwriter`` en modo ``constant_memory`` o, si no está instalado, con
+``openpyxl`` en modo ``write_only``. La memoria usada no crece con el número de
+filas, lo que permite hojas a nivel paciente.
+
+Cada libro se describe con una lista de hojas ``(nombre, fuente)``, donde la fuente es
+un DataFrame o una ``FuenteParquet`` que se lee por lotes. Las hojas que rebasan el
+límite de filas de Excel se dividen automáticamente en ``Hoja``, ``Hoja (2)``, ...
+Los montos y porcentajes se escriben como números con formato nativo de Excel
+(``formatos``: columna -> formato), de modo que siguen siendo ordenables y sumables.
+Varios libros se escriben en paralelo en procesos separados (la escritura de xlsx es
+CPU intensiva y no se beneficia de hilos por el GIL).
+"""
+
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+try:
+    import xlsxwriter
+    XLSXWRITER_DISPONIBLE = True
+except ImportError:
+    XLSXWRITER_DISPONIBLE = False
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    OPENPYXL_DISPONIBLE = True
+except ImportError:
+    OPENPYXL_DISPONIBLE = False
+
+# Límites de Excel: nombre de hoja y filas por hoja (incluye el encabezado)
+LONGITUD_MAXIMA_HOJA = 31
+LIMITE_FILAS_EXCEL = 1_048_576
+FILAS_DATOS_POR_HOJA = LIMITE_FILAS_EXCEL - 1
+
+FORMATO_FECHA = 'yyyy-mm-dd hh:mm'
+
+# Formatos de número por nombre; los porcentajes ya vienen expresados de 0 a 100
+FORMATOS_NUMERO = {
+    'moneda': '"$"#,##0.00',
+    'porcentaje': '0.00"%"',
+    'entero': '#,##0',
+    'decimal': '#,##0.0',
+    'fecha': FORMATO_FECHA
+}
+
+
+class FuenteParquet:
+    """
+    Hoja que se lee por lotes desde un archivo Parquet (no se materializa completa).
+
+    Args:
+        ruta (str): archivo .parquet
+        columnas (list): columnas a incluir (por defecto todas)
+        filtro (tuple): ``(columna, valor)`` para incluir solo las filas con ese valor; se evalúa en
+            Arrow al leer (con las estadísticas de cada grupo de filas se omiten los que no lo contienen),
+            así que solo las filas que pasan se convierten a pandas
+        tamano_lote (int): filas por lote leído
+    """
+
+    def __init__(self, ruta, columnas=None, filtro=None, tamano_lote=100_000):
+        self.ruta = ruta
+        self.columnas = columnas
+        self.filtro = filtro
+        self.tamano_lote = tamano_lote
+
+    def nombres_columnas(self):
+        if self.columnas is not None:
+            return list(self.columnas)
+        return list(pq.ParquetFile(self.ruta).schema_arrow.names)
+
+    def lotes(self):
+        """Itera DataFrames de a lo más ``tamano_lote`` filas"""
+        if self.filtro is None:
+            lotes = pq.ParquetFile(self.ruta).iter_batches(batch_size=self.tamano_lote, columns=self.columnas)
+        else:
+            columna, valor = self.filtro
+            lotes = ds.dataset(self.ruta, format='parquet').to_batches(
+                columns=self.columnas, filter=pc.field(columna) == valor, batch_size=self.tamano_lote
+            )
+        for lote in lotes:
+            if lote.num_rows > 0:
+                yield lote.to_pandas()
+
+
+def valores_distintos(ruta, columna, tamano_lote=500_000):
+    """Valores distintos de una columna Parquet, leyendo solo esa columna por lotes"""
+    valores = set()
+    for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tamano_lote, columns=[columna]):
+        valores.update(lote.to_pandas()[columna].dropna().unique())
+    return sorted(valores, key=str)
+
+
+def particionar_por_columna(ruta, columna, directorio, tamano_lote=500_000):
+    """
+    Separa un Parquet en un archivo por valor de ``columna``, en una sola pasada por lotes.
+
+    Leer el archivo completo una vez por valor cuesta valores × filas; con las particiones cada
+    libro lee solo sus filas. Cada lote se ordena por ``columna`` y se corta en tramos contiguos
+    (un ordenamiento por lote, no un filtro por valor). Las filas con ``columna`` nula se omiten.
+
+    Returns:
+        dict: valor -> ruta del Parquet de la partición, ordenado como ``valores_distintos``
+    """
+    os.makedirs(directorio, exist_ok=True)
+    escritores, rutas = {}, {}
+    try:
+        for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tamano_lote):
+            tabla = pa.Table.from_batches([lote])
+            # Las categorías se escriben como texto: cada lote trae su propio diccionario
+            tabla = tabla.cast(pa.schema([
+                pa.field(c.name, c.type.value_type) if pa.types.is_dictionary(c.type) else c for c in tabla.schema
+            ]))
+            tabla = tabla.filter(pc.is_valid(tabla.column(columna)))
+            tabla = tabla.take(pc.sort_indices(tabla, sort_keys=[(columna, 'ascending')])).combine_chunks()
+            inicio = 0
+            # En una columna ordenada, value_counts (orden de aparición) da los tramos en orden
+            for conteo in pc.value_counts(tabla.column(columna)).to_pylist():
+                valor, filas = conteo['values'], conteo['counts']
+                parte = tabla.slice(inicio, filas)
+                inicio += filas
+                if valor not in escritores:
+                    rutas[valor] = os.path.join(directorio, f'parte-{len(rutas):05d}.parquet')
+                    escritores[valor] = pq.ParquetWriter(rutas[valor], parte.schema)
+                escritores[valor].write_table(parte)
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+    return {valor: rutas[valor] for valor in sorted(rutas, key=str)}
+
+
+def motor_disponible():
+    """Nombre del motor que se usará ('xlsxwriter', 'openpyxl') o None"""
+    if XLSXWRITER_DISPONIBLE:
+        return 'xlsxwriter'
+    if OPENPYXL_DISPONIBLE:
+        return 'openpyxl'
+    return None
+
+
+def filas_dataframe(df):
+    """
+    Itera las filas de un DataFrame como tuplas de valores Python (NaN/NaT -> vacío).
+
+    La conversión se hace por columna (vectorizada) y las filas se producen una a una;
+    las fechas quedan como ``Timestamp`` (subclase de ``datetime``, que ambos motores aceptan).
+    """
+    columnas = []
+    for columna in df.columns:
+        serie = df[columna]
+        valores = serie.astype(object).to_numpy(copy=True)
+        valores[serie.isna().to_numpy()] = None
+        columnas.append(valores)
+    return zip(*columnas)
+
+
+def _lotes(fuente):
+    if isinstance(fuente, FuenteParquet):
+        return fuente.lotes()
+    return [fuente]
+
+
+def _columnas(fuente):
+    if isinstance(fuente, FuenteParquet):
+        return fuente.nombres_columnas()
+    return [str(c) for c in fuente.columns]
+
+
+def _nombre_parte(nombre, parte):
+    if parte == 1:
+        return nombre[:LONGITUD_MAXIMA_HOJA]
+    sufijo = f' ({parte})'
+    return nombre[:LONGITUD_MAXIMA_HOJA - len(sufijo)] + sufijo
+
+
+def _formatos_columna(columnas, formatos):
+    """Índice de columna -> cadena de formato Excel, para las columnas con formato declarado"""
+    formatos = formatos or {}
+    return {
+        i: FORMATOS_NUMERO.get(formatos[columna], formatos[columna])
+        for i, columna in enumerate(columnas) if columna in formatos
+    }
+
+
+def _hojas_divididas(nombre, fuente, limite_filas, formatos=None):
+    """
+    Divide una fuente en hojas de a lo más ``limite_filas`` filas de datos.
+
+    Produce ``(nombre_hoja, columnas, filas, formatos_columna)``; cada iterador de filas debe
+    consumirse antes de pedir la siguiente hoja (las hojas comparten el mismo recorrido).
+    Las columnas de fecha sin formato declarado reciben ``FORMATO_FECHA`` al leer el primer lote.
+    """
+    formatos_columna = _formatos_columna(_columnas(fuente), formatos)
+
+    def filas():
+        for lote in _lotes(fuente):
+            for i, columna in enumerate(lote.columns):
+                if pd.api.types.is_datetime64_any_dtype(lote[columna].dtype):
+                    formatos_columna.setdefault(i, FORMATO_FECHA)
+            yield from filas_dataframe(lote)
+
+    recorrido = filas()
+    fin = object()
+    parte = 1
+    while True:
+        bloque = itertools.islice(recorrido, limite_filas)
+        primera = next(bloque, fin)
+        if primera is fin:
+            if parte == 1:
+                yield _nombre_parte(nombre, parte), _columnas(fuente), iter(()), formatos_columna
+            return
+        yield _nombre_parte(nombre, parte), _columnas(fuente), itertools.chain([primera], bloque), formatos_columna
+        parte += 1
+
+
+def _escribir_xlsxwriter(ruta, hojas, limite_filas, formatos):
+    libro = xlsxwriter.Workbook(ruta, {'constant_memory': True, 'nan_inf_to_errors': True})
+    formato_encabezado = libro.add_format({'bold': True, 'border': 1})
+    formatos_libro = {}
+    filas_por_hoja = {}
+    for nombre, fuente in hojas:
+        for nombre_hoja, columnas, filas, formatos_columna in _hojas_divididas(nombre, fuente, limite_filas, formatos):
+            hoja = libro.add_worksheet(nombre_hoja)
+            # En modo constant_memory las filas deben escribirse en orden
+            hoja.write_row(0, 0, columnas, formato_encabezado)
+            numero = 0
+            for numero, fila in enumerate(filas, start=1):
+                if numero == 1:
+                    # Las columnas de fecha se conocen al leer el primer lote
+                    for i, cadena in formatos_columna.items():
+                        if cadena not in formatos_libro:
+                            formatos_libro[cadena] = libro.add_format({'num_format': cadena})
+                        hoja.set_column(i, i, 18 if cadena == FORMATO_FECHA else 16, formatos_libro[cadena])
+                hoja.write_row(numero, 0, fila)
+            filas_por_hoja[nombre_hoja] = numero
+    libro.close()
+    return filas_por_hoja
+
+
+def _escribir_openpyxl(ruta, hojas, limite_filas, formatos):
+    libro = Workbook(write_only=True)
+    fuente_encabezado = Font(bold=True)
+    filas_por_hoja = {}
+    for nombre, fuente in hojas:
+        for nombre_hoja, columnas, filas, formatos_columna in _hojas_divididas(nombre, fuente, limite_filas, formatos):
+            hoja = libro.create_sheet(nombre_hoja)
+            encabezado = []
+            for columna in columnas:
+                celda = WriteOnlyCell(hoja, value=columna)
+                celda.font = fuente_encabezado
+                encabezado.append(celda)
+            hoja.append(encabezado)
+            numero = 0
+            for numero, fila in enumerate(filas, start=1):
+                if formatos_columna:
+                    # En modo write_only el formato se asigna por celda
+                    fila = list(fila)
+                    for i, cadena in formatos_columna.items():
+                        celda = WriteOnlyCell(hoja, value=fila[i])
+                        celda.number_format = cadena
+                        fila[i] = celda
+                hoja.append(fila)
+            filas_por_hoja[nombre_hoja] = numero
+    libro.save(ruta)
+    return filas_por_hoja
+
+
+def escribir_libro(ruta, hojas, limite_filas=FILAS_DATOS_POR_HOJA, formatos=None):
+    """
+    Escribe un libro Excel en modo streaming.
+
+    Args:
+        ruta (str): archivo .xlsx de salida (se escribe en un temporal y se renombra)
+        hojas (list): lista de ``(nombre_hoja, fuente)`` con fuente DataFrame o ``FuenteParquet``;
+            se omiten las fuentes None
+        limite_filas (int): filas de datos por hoja antes de continuar en una hoja nueva
+        formatos (dict): nombre de columna -> formato (clave de ``FORMATOS_NUMERO`` o cadena
+            de formato Excel), aplicado en todas las hojas que tengan esa columna
+
+    Returns:
+        dict: ruta, motor, filas por hoja, bytes escritos y duración
+    """
+    motor = motor_disponible()
+    if motor is None:
+        raise ImportError("Se requiere xlsxwriter u openpyxl para generar reportes Excel")
+
+    hojas = [(nombre, fuente) for nombre, fuente in hojas if fuente is not None]
+    inicio = time.perf_counter()
+    ruta_temporal = ruta + '.tmp'
+    if motor == 'xlsxwriter':
+        filas = _escribir_xlsxwriter(ruta_temporal, hojas, limite_filas, formatos)
+    else:
+        filas = _escribir_openpyxl(ruta_temporal, hojas, limite_filas, formatos)
+    os.replace(ruta_temporal, ruta)
+    return {
+        'ruta': ruta,
+        'motor': motor,
+        'filas_por_hoja': filas,
+        'bytes_escritos': os.path.getsize(ruta),
+        'duracion_s': round(time.perf_counter() - inicio, 4)
+    }
+
+
+def _escribir_libro_trabajo(trabajo):
+    ruta, hojas, limite_filas, formatos = trabajo
+    return escribir_libro(ruta, hojas, limite_filas, formatos)
+
+
+def escribir_libros(trabajos, max_procesos=None, limite_filas=FILAS_DATOS_POR_HOJA, formatos=None):
+    """
+    Escribe varios libros en paralelo.
+
+    Args:
+        trabajos (list): lista de ``(ruta, hojas)``
+        max_procesos (int): procesos de trabajo; con 1 (o un solo libro) se escribe en el proceso actual
+        limite_filas (int): filas de datos por hoja (ver ``escribir_libro``)
+        formatos (dict): formatos de número por columna (ver ``escribir_libro``)
+
+    Returns:
+        list: resultado de ``escribir_libro`` por trabajo, en el mismo orden
+    """
+    trabajos = [(ruta, hojas, limite_filas, formatos) for ruta, hojas in trabajos]
+    if max_procesos is None:
+        max_procesos = min(len(trabajos), os.cpu_count() or 1)
+    if max_procesos <= 1 or len(trabajos) <= 1:
+        return [_escribir_libro_trabajo(trabajo) for trabajo in trabajos]
+
+    try:
+        # spawn: se llama desde procesos con hilos vivos (monitor de memoria, análisis en paralelo) y
+        # un fork podría heredar candados tomados por esos hilos
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_procesos, mp_context=contexto) as ejecutor:
+            return list(ejecutor.map(_escribir_libro_trabajo, trabajos))
+    except (OSError, RuntimeError) as e:
+        # Entornos sin soporte de multiprocessing (p. ej. algunos contenedores o Lambda)
+        print(f"⚠ Escritura paralela no disponible ({e}); escribiendo secuencialmente")
+        return [_escribir_libro_trabajo(trabajo) for trabajo in trabajos]
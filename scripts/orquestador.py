@@ -0,0 +1,446 @@
+"""
+Orquestador del pipeline por etapas (DAG).
+
+Declara las etapas del procesamiento con sus entradas, salidas y dependencias:
+
+    extraer -> anonimizar -> limpiar -> agregar ---> reportar -> empaquetar
+       |            |                \\-> entrenar -/              ^
+       |            \\-------------------------------------------/
+       \\-> vincular
+
+Antes de ejecutar una etapa se calcula su clave: el hash del contenido de sus entradas y del
+código que la implementa. Si la clave y las salidas coinciden con la última ejecución exitosa,
+la etapa se omite. Las etapas cuyas dependencias ya terminaron se ejecutan en paralelo en un
+pool de procesos (``agregar`` y ``entrenar``), cada una con su salida en
+``cache_pipeline/logs/<etapa>.log``.
+
+El hash de cada archivo se guarda junto con su tamaño y fecha de modificación en
+``cache_pipeline/estado.json``; un archivo solo se vuelve a leer si cambió su ``stat``, así que
+una ejecución sin cambios termina en segundos.
+
+Uso:
+    python scripts/orquestador.py                      # ejecuta lo que esté desactualizado
+    python scripts/orquestador.py --hasta reportar     # una etapa y sus dependencias
+    python scripts/orquestador.py --forzar limpiar     # vuelve a ejecutar una etapa (y lo que depende de ella)
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+RAIZ_REPO = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+DIRECTORIOS_CODIGO = ['datos', 'modelos', 'scripts']
+for _directorio in DIRECTORIOS_CODIGO:
+    sys.path.append(os.path.join(RAIZ_REPO, _directorio))
+
+VERSION_ESTADO = 1
+DIRECTORIO_CACHE = 'cache_pipeline'
+TAMANO_BLOQUE_HASH = 1024 * 1024
+
+
+class Etapa:
+    """
+    Etapa del pipeline.
+
+    Args:
+        nombre (str): identificador de la etapa
+        funcion (str): ``modulo:funcion`` que se importa en el proceso de trabajo
+        argumentos (tuple): argumentos de la función
+        entradas (list): archivos o patrones glob que lee
+        opcionales (list): archivos o patrones glob que lee si existen (entran en la clave, pero no
+            faltan si no hay ninguno)
+        salidas (list): archivos o patrones glob que produce
+        depende_de (list): etapas que deben terminar antes
+        codigo (list): archivos de código (relativos al repositorio) que forman parte de la clave
+    """
+
+    def __init__(self, nombre, funcion, argumentos=(), entradas=(), salidas=(), depende_de=(), codigo=(),
+                 opcionales=()):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.argumentos = tuple(argumentos)
+        self.entradas = list(entradas)
+        self.opcionales = list(opcionales)
+        self.salidas = list(salidas)
+        self.depende_de = list(depende_de)
+        self.codigo = [os.path.join(RAIZ_REPO, ruta) for ruta in codigo]
+
+
+def _expandir(patrones):
+    """Archivos que corresponden a una lista de rutas o patrones glob, ordenados"""
+    archivos = set()
+    for patron in patrones:
+        if glob.has_magic(patron):
+            archivos.update(ruta for ruta in glob.glob(patron, recursive=True) if os.path.isfile(ruta))
+        elif os.path.isfile(patron):
+            archivos.add(patron)
+    return sorted(archivos)
+
+
+def _faltantes(patrones):
+    """Rutas fijas inexistentes o patrones sin ningún archivo"""
+    return [patron for patron in patrones if not _expandir([patron])]
+
+
+class HuellasArchivos:
+    """Hash de contenido de archivos con caché por (tamaño, fecha de modificación)"""
+
+    def __init__(self, conocidas=None):
+        self.conocidas = conocidas or {}
+        self.calculadas = 0
+
+    def huella(self, ruta):
+        estado = os.stat(ruta)
+        conocida = self.conocidas.get(ruta)
+        if conocida and conocida[0] == estado.st_size and conocida[1] == estado.st_mtime_ns:
+            return conocida[2]
+        digest = hashlib.sha256()
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(TAMANO_BLOQUE_HASH), b''):
+                digest.update(bloque)
+        huella = digest.hexdigest()
+        self.conocidas[ruta] = [estado.st_size, estado.st_mtime_ns, huella]
+        self.calculadas += 1
+        return huella
+
+    def huellas(self, patrones):
+        return {ruta: self.huella(ruta) for ruta in _expandir(patrones)}
+
+
+def _ejecutar_etapa(funcion, argumentos, ruta_log):
+    """
+    Ejecuta ``modulo:funcion`` en el proceso de trabajo con su salida en ``ruta_log``.
+
+    Returns:
+        tuple: (exitosa, duracion_s, error)
+    """
+    inicio = time.perf_counter()
+    os.makedirs(os.path.dirname(ruta_log), exist_ok=True)
+    with open(ruta_log, 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            modulo, nombre = funcion.split(':')
+            resultado = getattr(importlib.import_module(modulo), nombre)(*argumentos)
+            exitosa = resultado is None or bool(resultado)
+            error = None if exitosa else f'{funcion} devolvió {resultado!r}'
+        except BaseException as e:
+            traceback.print_exc()
+            exitosa, error = False, f'{type(e).__name__}: {e}'
+    return exitosa, time.perf_counter() - inicio, error
+
+
+class Orquestador:
+    """
+    Ejecuta un conjunto de etapas en orden de dependencias, omitiendo las que están al día.
+
+    Args:
+        etapas (list): etapas del pipeline
+        ruta_base (str): raíz del proyecto; el estado se guarda en ``<ruta_base>/cache_pipeline``
+        trabajadores (int): procesos para etapas independientes
+    """
+
+    def __init__(self, etapas, ruta_base='proyecto_final', trabajadores=None):
+        self.etapas = {etapa.nombre: etapa for etapa in etapas}
+        for etapa in etapas:
+            desconocidas = [d for d in etapa.depende_de if d not in self.etapas]
+            if desconocidas:
+                raise ValueError(f"La etapa {etapa.nombre} depende de etapas inexistentes: {desconocidas}")
+        self.orden = self._orden_topologico()
+        self.directorio = os.path.join(ruta_base, DIRECTORIO_CACHE)
+        self.ruta_estado = os.path.join(self.directorio, 'estado.json')
+        self.trabajadores = trabajadores or min(4, os.cpu_count() or 1)
+        self.estado = self._cargar_estado()
+        self.huellas = HuellasArchivos(self.estado.get('archivos'))
+
+    def _orden_topologico(self):
+        orden, visitadas, en_curso = [], set(), set()
+
+        def visitar(nombre):
+            if nombre in visitadas:
+                return
+            if nombre in en_curso:
+                raise ValueError(f"Ciclo de dependencias en la etapa {nombre}")
+            en_curso.add(nombre)
+            for dependencia in self.etapas[nombre].depende_de:
+                visitar(dependencia)
+            en_curso.discard(nombre)
+            visitadas.add(nombre)
+            orden.append(nombre)
+
+        for nombre in self.etapas:
+            visitar(nombre)
+        return orden
+
+    def _cargar_estado(self):
+        try:
+            with open(self.ruta_estado, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+            if estado.get('version') == VERSION_ESTADO:
+                return estado
+        except (OSError, ValueError):
+            pass
+        return {'version': VERSION_ESTADO, 'etapas': {}, 'archivos': {}}
+
+    def _guardar_estado(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        self.estado['archivos'] = self.huellas.conocidas
+        temporal = f'{self.ruta_estado}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, indent=1, ensure_ascii=False)
+        os.replace(temporal, self.ruta_estado)
+
+    def _dependientes(self, nombres):
+        """Etapas que dependen (directa o indirectamente) de ``nombres``, incluidas"""
+        resultado = set(nombres)
+        for nombre in self.orden:
+            if any(d in resultado for d in self.etapas[nombre].depende_de):
+                resultado.add(nombre)
+        return resultado
+
+    def _ancestros(self, nombres):
+        resultado, pendientes = set(), list(nombres)
+        while pendientes:
+            nombre = pendientes.pop()
+            if nombre not in resultado:
+                resultado.add(nombre)
+                pendientes.extend(self.etapas[nombre].depende_de)
+        return resultado
+
+    def clave(self, etapa):
+        """Hash de las entradas y el código de la etapa"""
+        contenido = {
+            'funcion': etapa.funcion,
+            'argumentos': [str(a) for a in etapa.argumentos],
+            'entradas': self.huellas.huellas(etapa.entradas + etapa.opcionales),
+            'codigo': {os.path.relpath(r, RAIZ_REPO): h for r, h in self.huellas.huellas(etapa.codigo).items()}
+        }
+        return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _al_dia(self, etapa, clave):
+        previo = self.estado['etapas'].get(etapa.nombre)
+        if not previo or previo.get('resultado') != 'ok' or previo.get('clave') != clave:
+            return False
+        if _faltantes(etapa.salidas):
+            return False
+        # Una salida modificada fuera del pipeline también obliga a ejecutar la etapa
+        return self.huellas.huellas(etapa.salidas) == previo.get('salidas')
+
+    def ejecutar(self, hasta=None, forzar=()):
+        """
+        Ejecuta las etapas desactualizadas.
+
+        Args:
+            hasta (list): etapas objetivo (con sus dependencias); por defecto todas
+            forzar (list): etapas que se ejecutan aunque estén al día (y sus dependientes)
+
+        Returns:
+            dict: etapa -> 'ejecutada', 'sin_cambios', 'error' u 'omitida'
+        """
+        seleccion = self._ancestros(hasta) if hasta else set(self.orden)
+        forzadas = self._dependientes(forzar) if forzar else set()
+        resultados = {}
+        tiempos = {}
+        en_curso = {}
+        inicio = time.perf_counter()
+
+        print(f"🔀 PIPELINE: {len(seleccion)} etapa(s), {self.trabajadores} trabajador(es)")
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.trabajadores, mp_context=contexto) as pool:
+            while len(resultados) < len(seleccion):
+                for nombre in self.orden:
+                    if nombre not in seleccion or nombre in resultados or nombre in en_curso.values():
+                        continue
+                    etapa = self.etapas[nombre]
+                    dependencias = [resultados.get(d) for d in etapa.depende_de if d in seleccion]
+                    if any(r in ('error', 'omitida') for r in dependencias):
+                        resultados[nombre] = 'omitida'
+                        print(f"   ⏭️  {nombre}: omitida (falló una dependencia)")
+                        continue
+                    if any(r is None for r in dependencias):
+                        continue
+
+                    faltantes = _faltantes(etapa.entradas)
+                    if faltantes:
+                        resultados[nombre] = 'error'
+                        print(f"   ❌ {nombre}: faltan entradas {faltantes}")
+                        continue
+                    clave = self.clave(etapa)
+                    if nombre not in forzadas and self._al_dia(etapa, clave):
+                        resultados[nombre] = 'sin_cambios'
+                        print(f"   ✓ {nombre}: sin cambios")
+                        continue
+
+                    ruta_log = os.path.join(self.directorio, 'logs', f'{nombre}.log')
+                    futuro = pool.submit(_ejecutar_etapa, etapa.funcion, etapa.argumentos, ruta_log)
+                    en_curso[futuro] = nombre
+                    self.estado['etapas'][nombre] = {'clave': clave, 'resultado': 'en_curso'}
+                    print(f"   ▶️  {nombre}: ejecutando...")
+
+                if not en_curso:
+                    if len(resultados) < len(seleccion):
+                        # Solo quedan etapas cuyas dependencias no se pueden cumplir
+                        for nombre in seleccion - set(resultados):
+                            resultados[nombre] = 'omitida'
+                    break
+
+                terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    nombre = en_curso.pop(futuro)
+                    etapa = self.etapas[nombre]
+                    try:
+                        exitosa, duracion, error = futuro.result()
+                    except Exception as e:
+                        exitosa, duracion, error = False, 0.0, f'{type(e).__name__}: {e}'
+                    faltantes = _faltantes(etapa.salidas) if exitosa else []
+                    if faltantes:
+                        exitosa, error = False, f'no generó {faltantes}'
+                    tiempos[nombre] = duracion
+
+                    registro = self.estado['etapas'][nombre]
+                    registro.update({'fecha': datetime.now().isoformat(timespec='seconds'), 'duracion_s': round(duracion, 2)})
+                    if exitosa:
+                        registro.update({'resultado': 'ok', 'salidas': self.huellas.huellas(etapa.salidas)})
+                        resultados[nombre] = 'ejecutada'
+                        print(f"   ✅ {nombre}: {duracion:.1f}s")
+                    else:
+                        registro.update({'resultado': 'error', 'error': error})
+                        resultados[nombre] = 'error'
+                        print(f"   ❌ {nombre}: {error} (ver {os.path.join(self.directorio, 'logs', nombre + '.log')})")
+                    self._guardar_estado()
+
+        self._guardar_estado()
+        ejecutadas = [n for n, r in resultados.items() if r == 'ejecutada']
+        errores = [n for n, r in resultados.items() if r in ('error', 'omitida')]
+        print(f"\n⏱️  Pipeline: {time.perf_counter() - inicio:.1f}s — {len(ejecutadas)} ejecutada(s), "
+              f"{sum(1 for r in resultados.values() if r == 'sin_cambios')} sin cambios, "
+              f"{len(errores)} con error u omitida(s); {self.huellas.calculadas} archivo(s) leídos para huellas")
+        return resultados
+
+
+def etapa_extraer(ruta_base='proyecto_final'):
+    """Verifica los extractos CSV del expediente (el query se ejecuta fuera del pipeline)"""
+    for ruta in fuentes(ruta_base):
+        print(f"✓ {ruta} ({os.path.getsize(ruta) / (1024 * 1024):.1f} MB)")
+    return True
+
+
+def etapa_anonimizar(ruta_base='proyecto_final'):
+    """Anonimiza los extractos y exporta las tablas en memoria para Athena (un fallo de la exportación falla la etapa)"""
+    from anonimizar_datos_v2 import exportar_para_athena, main as anonimizar
+
+    datos = f'{ruta_base}/datos'
+    tablas = anonimizar(datos, exportar=False)
+    exportar_para_athena(f'{datos}/anonimizados_v2', tablas)
+
+
+def etapa_empaquetar(ruta_base='proyecto_final'):
+    """Paquete de despliegue AWS (incremental) con los datos anonimizados y las métricas"""
+    from lector_resultados import abrir_resultados
+    from preparar_aws_deployment_simple import PreparadorAWSSimple
+
+    metricas = abrir_resultados(f'{ruta_base}/datos/procesados/metricas_completas.json')
+    preparador = PreparadorAWSSimple(metricas_completas=metricas, ruta_base=ruta_base)
+    if not preparador.preparar_archivos_deployment():
+        return False
+    preparador.generar_reporte_preparacion()
+    return True
+
+
+def fuentes(ruta_base):
+    return [
+        f'{ruta_base}/datos/ejemplos/Resumen Egreso 2025.csv',
+        f'{ruta_base}/datos/ejemplos/Egreso Detalle Ene 2025 a Abr 2025.csv'
+    ]
+
+
+def etapas_pipeline(ruta_base='proyecto_final'):
+    """Etapas del pipeline del dashboard con sus entradas y salidas"""
+    datos = f'{ruta_base}/datos'
+    anonimizados = f'{datos}/anonimizados_v2'
+    # detalle.parquet falta si solo se cargó una muestra del detalle
+    cache = [f'{datos}/cache_columnar/*.parquet', f'{datos}/cache_columnar/diccionario_categorias.json']
+    etapas_intermedias = f'{datos}/procesados/etapas'
+    metricas = f'{datos}/procesados/metricas_completas.json'
+    return [
+        Etapa('extraer', 'orquestador:etapa_extraer', (ruta_base,),
+              entradas=fuentes(ruta_base), salidas=fuentes(ruta_base)),
+        Etapa('anonimizar', 'orquestador:etapa_anonimizar', (ruta_base,),
+              entradas=fuentes(ruta_base),
+              salidas=[f'{anonimizados}/resumen_anonimizado_v2.csv', f'{anonimizados}/detalle_anonimizado_v2.csv',
+                       f'{anonimizados}/reporte_anonimizacion_v2.json', f'{anonimizados}/athena/exportacion.json'],
+              depende_de=['extraer'],
+              codigo=['scripts/anonimizar_datos_v2.py', 'scripts/exportar_athena.py', 'datos/codificacion_categorica.py']),
+        Etapa('vincular', 'vinculacion_episodios:etapa_vincular', (ruta_base,),
+              entradas=fuentes(ruta_base)[:1], salidas=[f'{datos}/procesados/episodios.parquet'],
+              depende_de=['extraer'],
+              codigo=['datos/vinculacion_episodios.py']),
+        # Después de anonimizar: ambas etapas agregan categorías al mismo diccionario
+        Etapa('limpiar', 'procesar_datos_avanzado:etapa_limpiar', (ruta_base,),
+              entradas=fuentes(ruta_base), salidas=[f'{datos}/cache_columnar/resumen.parquet'],
+              depende_de=['anonimizar'],
+              codigo=['datos/procesar_datos_avanzado.py', 'datos/codificacion_categorica.py', 'datos/cache_columnar.py',
+                      'datos/indice_pacientes.py']),
+        Etapa('agregar', 'procesar_datos_avanzado:etapa_agregar', (ruta_base,),
+              entradas=cache, salidas=[f'{etapas_intermedias}/agregados.pkl'],
+              depende_de=['limpiar'],
+              codigo=['datos/procesar_datos_avanzado.py']),
+        Etapa('entrenar', 'procesar_datos_avanzado:etapa_entrenar', (ruta_base,),
+              entradas=cache, salidas=[f'{etapas_intermedias}/resultados_ml.pkl'],
+              depende_de=['limpiar'],
+              codigo=['datos/procesar_datos_avanzado.py', 'modelos/modelos_predictivos.py',
+                      'modelos/modelos_predictivos_simple.py']),
+        Etapa('reportar', 'procesar_datos_avanzado:etapa_reportar', (ruta_base,),
+              entradas=[f'{etapas_intermedias}/agregados.pkl', f'{etapas_intermedias}/resultados_ml.pkl'],
+              salidas=[metricas, f'{datos}/metricas.json', f'{datos}/procesados/vistas/indice.json'],
+              depende_de=['agregar', 'entrenar'],
+              codigo=['datos/procesar_datos_avanzado.py', 'datos/vistas_dashboard.py', 'datos/lector_resultados.py',
+                      'scripts/generar_reportes_excel.py', 'scripts/motor_excel.py']),
+        Etapa('empaquetar', 'orquestador:etapa_empaquetar', (ruta_base,),
+              entradas=[f'{anonimizados}/*.csv', f'{anonimizados}/*.json', f'{anonimizados}/athena/**/*', metricas],
+              # Plantillas y scripts de AWS: el paquete los incluye solo si existen
+              opcionales=[f'{ruta_base}/arquitectura/cloudformation/*', f'{ruta_base}/arquitectura/scripts/*.sh'],
+              salidas=[f'{ruta_base}/aws_deployment/manifiesto.json'],
+              depende_de=['anonimizar', 'reportar'],
+              codigo=['scripts/preparar_aws_deployment_simple.py', 'scripts/paquete_despliegue.py'])
+    ]
+
+
+def ejecutar_pipeline(ruta_base='proyecto_final', hasta=None, forzar=(), trabajadores=None):
+    """
+    Ejecuta el pipeline completo (o hasta las etapas indicadas).
+
+    Returns:
+        bool: True si ninguna etapa falló
+    """
+    orquestador = Orquestador(etapas_pipeline(ruta_base), ruta_base, trabajadores)
+    resultados = orquestador.ejecutar(hasta=hasta, forzar=forzar)
+    return all(r in ('ejecutada', 'sin_cambios') for r in resultados.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Orquestador del pipeline del dashboard (DAG con caché por etapa)')
+    parser.add_argument('--ruta-base', default='proyecto_final')
+    parser.add_argument('--hasta', nargs='+', default=None, help='Etapas objetivo (con sus dependencias)')
+    parser.add_argument('--forzar', nargs='+', default=[], help='Etapas que se ejecutan aunque estén al día')
+    parser.add_argument('--trabajadores', type=int, default=None)
+    args = parser.parse_args()
+
+    nombres = {etapa.nombre for etapa in etapas_pipeline(args.ruta_base)}
+    desconocidas = [n for n in (args.hasta or []) + args.forzar if n not in nombres]
+    if desconocidas:
+        parser.error(f"etapas desconocidas: {', '.join(desconocidas)} (disponibles: {', '.join(sorted(nombres))})")
+    return 0 if ejecutar_pipeline(args.ruta_base, args.hasta, args.forzar, args.trabajadores) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Construcción incremental del paquete de despliegue AWS.
+
+Cada archivo del paquete se identifica por el SHA-256 de su contenido. Los archivos se
+guardan una sola vez en un almacén de objetos (``cache_despliegue/objetos/<hash>``) y el
+paquete los enlaza con *hardlinks* (o los copia si el sistema de archivos no lo permite).
+El manifiesto ``manifiesto.json`` del paquete registra por archivo su origen, tamaño,
+fecha de modificación, hash y, para los CSV, filas y columnas.
+
+Al volver a preparar el paquete, un origen con el mismo tamaño y fecha de modificación
+que en el manifiesto reutiliza su hash sin leerlo, y un destino con el mismo hash no se
+vuelve a escribir. Las filas y columnas de los CSV anonimizados se toman del reporte de
+anonimización (``describir_archivo`` al guardar cada CSV), por lo que preparar el paquete
+no vuelve a leer los datos.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+VERSION_MANIFIESTO = 1
+ARCHIVO_MANIFIESTO = 'manifiesto.json'
+TAMANO_LECTURA = 1024 * 1024
+# Archivos actualizados que se listan en el resumen
+MAXIMO_LISTADO = 10
+
+
+def huella_contenido(ruta):
+    """SHA-256 del contenido de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_LECTURA), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def describir_archivo(ruta, filas=None, columnas=None):
+    """
+    Tamaño, fecha de modificación, hash y dimensiones de un archivo generado.
+
+    Se llama al guardar cada CSV anonimizado, cuando las filas y columnas ya se conocen.
+    """
+    estado = os.stat(ruta)
+    return {
+        'tamano': estado.st_size,
+        'mtime_ns': estado.st_mtime_ns,
+        'sha256': huella_contenido(ruta),
+        'filas': filas,
+        'columnas': columnas
+    }
+
+
+def contar_filas_csv(ruta, tamano_bloque=200_000):
+    """Filas y columnas de un CSV leyendo por bloques (solo si no vienen del anonimizador)"""
+    import pandas as pd
+
+    filas = 0
+    columnas = len(pd.read_csv(ruta, nrows=0).columns)
+    for bloque in pd.read_csv(ruta, usecols=[0], chunksize=tamano_bloque):
+        filas += len(bloque)
+    return filas, columnas
+
+
+class PaqueteDespliegue:
+    """
+    Paquete de despliegue direccionado por contenido.
+
+    Uso::
+
+        paquete = PaqueteDespliegue('proyecto_final/aws_deployment')
+        paquete.agregar('datos/resumen.csv', 'proyecto_final/datos/anonimizados_v2/resumen.csv')
+        paquete.agregar_texto('README.md', contenido)
+        resumen = paquete.construir()
+
+    Args:
+        ruta_paquete (str): directorio del paquete
+        ruta_objetos (str): almacén de objetos (por defecto ``cache_despliegue/objetos`` junto al paquete)
+        metadatos_conocidos (dict): ruta de origen -> ``describir_archivo`` (p. ej. del reporte de anonimización)
+    """
+
+    def __init__(self, ruta_paquete, ruta_objetos=None, metadatos_conocidos=None):
+        self.ruta_paquete = ruta_paquete
+        self.ruta_objetos = ruta_objetos or os.path.join(
+            os.path.dirname(os.path.abspath(ruta_paquete)), 'cache_despliegue', 'objetos'
+        )
+        self.metadatos_conocidos = {os.path.abspath(r): m for r, m in (metadatos_conocidos or {}).items()}
+        self.manifiesto_anterior = self._cargar_manifiesto()
+        self.entradas = {}
+
+    def _cargar_manifiesto(self):
+        try:
+            with open(os.path.join(self.ruta_paquete, ARCHIVO_MANIFIESTO), 'r', encoding='utf-8') as f:
+                manifiesto = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifiesto.get('version') != VERSION_MANIFIESTO:
+            return {}
+        return manifiesto.get('archivos', {})
+
+    def agregar(self, destino, origen, modo=None, contar_filas=False):
+        """
+        Registra un archivo de origen en la ruta relativa ``destino`` del paquete.
+
+        Args:
+            destino (str): ruta relativa dentro del paquete
+            origen (str): archivo de origen
+            modo (int): permisos del archivo en el paquete (p. ej. 0o755 para scripts)
+            contar_filas (bool): registrar filas y columnas (CSV) en el manifiesto
+        """
+        self.entradas[destino] = {'origen': origen, 'modo': modo, 'contar_filas': contar_filas}
+
+    def agregar_directorio(self, destino, directorio, extensiones, modo=None, recursivo=False):
+        """
+        Registra los archivos de ``directorio`` con alguna de las ``extensiones``.
+
+        Con ``recursivo`` se incluyen los subdirectorios (p. ej. particiones ``periodo=2025-03/``).
+        """
+        if not os.path.isdir(directorio):
+            return []
+        agregados = []
+        for actual, subdirectorios, archivos in os.walk(directorio):
+            subdirectorios.sort()
+            if not recursivo:
+                subdirectorios.clear()
+            for archivo in sorted(archivos):
+                if archivo.endswith(tuple(extensiones)):
+                    relativa = os.path.relpath(os.path.join(actual, archivo), directorio).replace(os.sep, '/')
+                    self.agregar(f"{destino}/{relativa}", os.path.join(actual, archivo), modo=modo)
+                    agregados.append(relativa)
+        return agregados
+
+    def agregar_texto(self, destino, contenido, modo=None):
+        """Registra un archivo generado (configuración, README, scripts)"""
+        self.entradas[destino] = {'contenido': contenido.encode('utf-8'), 'modo': modo}
+
+    def _metadatos_origen(self, destino, origen):
+        """Metadatos del origen, reutilizando el hash si tamaño y fecha no cambiaron"""
+        estado = os.stat(origen)
+        firma = (estado.st_size, estado.st_mtime_ns)
+        candidatos = [self.metadatos_conocidos.get(os.path.abspath(origen)), self.manifiesto_anterior.get(destino)]
+        for candidato in candidatos:
+            if candidato and (candidato.get('tamano'), candidato.get('mtime_ns')) == firma:
+                return dict(candidato), False
+        return {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns, 'sha256': huella_contenido(origen)}, True
+
+    def _ruta_objeto(self, huella):
+        return os.path.join(self.ruta_objetos, huella[:2], huella)
+
+    def _guardar_objeto(self, huella, origen=None, contenido=None):
+        """Copia el contenido al almacén si el objeto no existe; retorna bytes copiados"""
+        ruta = self._ruta_objeto(huella)
+        if os.path.exists(ruta):
+            return 0
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        if contenido is not None:
+            with open(temporal, 'wb') as f:
+                f.write(contenido)
+        else:
+            shutil.copyfile(origen, temporal)
+        os.replace(temporal, ruta)
+        return os.path.getsize(ruta)
+
+    def _enlazar(self, huella, destino, modo):
+        """Coloca el objeto en el paquete con un hardlink (o una copia) de forma atómica"""
+        ruta_destino = os.path.join(self.ruta_paquete, destino)
+        os.makedirs(os.path.dirname(ruta_destino), exist_ok=True)
+        temporal = f"{ruta_destino}.{os.getpid()}.tmp"
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        try:
+            os.link(self._ruta_objeto(huella), temporal)
+        except OSError:
+            shutil.copyfile(self._ruta_objeto(huella), temporal)
+        if modo is not None:
+            os.chmod(temporal, modo)
+        os.replace(temporal, ruta_destino)
+
+    def _vigente(self, destino, huella, modo):
+        """El archivo del paquete ya tiene este contenido y permisos"""
+        anterior = self.manifiesto_anterior.get(destino)
+        ruta_destino = os.path.join(self.ruta_paquete, destino)
+        if not anterior or anterior.get('sha256') != huella or not os.path.exists(ruta_destino):
+            return False
+        if os.path.getsize(ruta_destino) != anterior.get('tamano'):
+            return False
+        return modo is None or (os.stat(ruta_destino).st_mode & 0o777) == modo
+
+    def construir(self):
+        """
+        Actualiza el paquete con los archivos registrados y escribe el manifiesto.
+
+        Returns:
+            dict: conteos de archivos nuevos/actualizados, sin cambios, eliminados y bytes copiados
+        """
+        os.makedirs(self.ruta_paquete, exist_ok=True)
+        archivos = {}
+        resumen = {'actualizados': [], 'sin_cambios': [], 'eliminados': [], 'bytes_copiados': 0, 'hashes_calculados': 0}
+
+        for destino, entrada in self.entradas.items():
+            if 'contenido' in entrada:
+                contenido = entrada['contenido']
+                huella = hashlib.sha256(contenido).hexdigest()
+                registro = {'origen': None, 'tamano': len(contenido), 'sha256': huella}
+                copiar = {'contenido': contenido}
+            else:
+                registro, calculado = self._metadatos_origen(destino, entrada['origen'])
+                resumen['hashes_calculados'] += int(calculado)
+                registro['origen'] = entrada['origen']
+                huella = registro['sha256']
+                copiar = {'origen': entrada['origen']}
+                if entrada['contar_filas'] and registro.get('filas') is None:
+                    anterior = self.manifiesto_anterior.get(destino, {})
+                    if anterior.get('sha256') == huella and anterior.get('filas') is not None:
+                        registro['filas'], registro['columnas'] = anterior['filas'], anterior.get('columnas')
+                    else:
+                        registro['filas'], registro['columnas'] = contar_filas_csv(entrada['origen'])
+            registro['modo'] = entrada['modo']
+
+            if self._vigente(destino, huella, entrada['modo']):
+                resumen['sin_cambios'].append(destino)
+            else:
+                resumen['bytes_copiados'] += self._guardar_objeto(huella, **copiar)
+                self._enlazar(huella, destino, entrada['modo'])
+                resumen['actualizados'].append(destino)
+            archivos[destino] = registro
+
+        # Quitar del paquete lo que ya no forma parte de él
+        for destino in set(self.manifiesto_anterior) - set(archivos):
+            ruta_destino = os.path.join(self.ruta_paquete, destino)
+            if os.path.exists(ruta_destino):
+                os.remove(ruta_destino)
+                try:
+                    os.removedirs(os.path.dirname(ruta_destino))
+                except OSError:
+                    pass
+            resumen['eliminados'].append(destino)
+
+        self.guardar_manifiesto(archivos)
+        self.manifiesto_anterior = archivos
+        return resumen
+
+    def guardar_manifiesto(self, archivos):
+        manifiesto = {
+            'version': VERSION_MANIFIESTO,
+            'generado': datetime.now().isoformat(timespec='seconds'),
+            'huella_paquete': hashlib.sha256(
+                json.dumps({d: a['sha256'] for d, a in sorted(archivos.items())}).encode('utf-8')
+            ).hexdigest(),
+            'archivos': archivos
+        }
+        ruta = os.path.join(self.ruta_paquete, ARCHIVO_MANIFIESTO)
+        with open(f"{ruta}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+        os.replace(f"{ruta}.tmp", ruta)
+        return manifiesto
+
+    def manifiesto(self):
+        """Archivos del último paquete construido"""
+        return self.manifiesto_anterior
+
+
+def metadatos_anonimizacion(ruta_datos_anonimizados, nombre_reporte='reporte_anonimizacion_v2.json'):
+    """
+    Metadatos de los CSV registrados por el anonimizador (ruta -> ``describir_archivo``).
+
+    Returns:
+        dict: vacío si el reporte no existe o es de una versión sin ``archivos_generados``
+    """
+    try:
+        with open(os.path.join(ruta_datos_anonimizados, nombre_reporte), 'r', encoding='utf-8') as f:
+            reporte = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {
+        os.path.join(ruta_datos_anonimizados, nombre): metadatos
+        for nombre, metadatos in reporte.get('archivos_generados', {}).items()
+    }
+
+
+def imprimir_resumen_paquete(resumen):
+    print(f"   ✅ {len(resumen['actualizados'])} archivo(s) actualizados, "
+          f"{len(resumen['sin_cambios'])} sin cambios, {len(resumen['eliminados'])} eliminados "
+          f"({resumen['bytes_copiados'] / (1024 * 1024):.1f} MB copiados, "
+          f"{resumen['hashes_calculados']} hash(es) calculados)")
+    for destino in resumen['actualizados'][:MAXIMO_LISTADO]:
+        print(f"   • {destino}")
+    if len(resumen['actualizados']) > MAXIMO_LISTADO:
+        print(f"   • ... y {len(resumen['actualizados']) - MAXIMO_LISTADO} más")
@@ -12,16 +12,36 @@ Fecha: Mayo 2025
 import os
 import json
 import subprocess
-import shutil
 from datetime import datetime
-import pandas as pd
+
+from paquete_despliegue import PaqueteDespliegue, imprimir_resumen_paquete, metadatos_anonimizacion
+
+def resumen_metricas_procesamiento(metricas_completas):
+    """Resumen de las métricas del procesamiento para el reporte de preparación"""
+    principales = metricas_completas.get('metricas_principales', {})
+    return {
+        'total_pacientes': principales.get('operacionales', {}).get('total_pacientes'),
+        'total_facturado': principales.get('financieras', {}).get('total_facturado'),
+        'alertas': len(metricas_completas.get('alertas', [])),
+        'modelos_ml': metricas_completas.get('machine_learning', {}).get('disponible', False),
+        'periodo_datos': metricas_completas.get('metadatos', {}).get('periodo_datos')
+    }
 
 class PreparadorAWSSimple:
     """Clase simplificada para preparar el despliegue en AWS"""
     
-    def __init__(self):
-        """Inicializa el preparador AWS"""
-        self.ruta_base = "proyecto_final"
+    def __init__(self, metricas_completas=None, ruta_base="proyecto_final"):
+        """
+        Inicializa el preparador AWS
+        
+        Args:
+            metricas_completas (dict): resultados del procesador entregados en memoria (opcional)
+            ruta_base (str): raíz del proyecto
+        """
+        self.metricas_completas = metricas_completas
+        self.paquete = None
+        self.resumen_paquete = None
+        self.ruta_base = ruta_base
         self.ruta_datos_anonimizados = f"{self.ruta_base}/datos/anonimizados_v2"
         self.ruta_aws = f"{self.ruta_base}/arquitectura"
         self.ruta_deployment = f"{self.ruta_base}/aws_deployment"
@@ -126,13 +146,13 @@ class PreparadorAWSSimple:
         print(f"\n📁 PREPARANDO ARCHIVOS PARA DEPLOYMENT...")
         print("=" * 60)
         
-        # Crear directorio de deployment
-        os.makedirs(self.ruta_deployment, exist_ok=True)
+        # Paquete direccionado por contenido: solo se escriben los archivos que cambiaron
+        metadatos = metadatos_anonimizacion(self.ruta_datos_anonimizados)
+        self.paquete = PaqueteDespliegue(self.ruta_deployment, metadatos_conocidos=metadatos)
+        paquete = self.paquete
         
-        # 1. Copiar datos anonimizados
-        print("1. 📊 Copiando datos anonimizados...")
-        datos_dest = f"{self.ruta_deployment}/datos"
-        os.makedirs(datos_dest, exist_ok=True)
+        # 1. Datos anonimizados
+        print("1. 📊 Registrando datos anonimizados...")
         
         archivos_datos = [
             'resumen_anonimizado_v2.csv',
@@ -142,40 +162,36 @@ class PreparadorAWSSimple:
         
         for archivo in archivos_datos:
             src = f"{self.ruta_datos_anonimizados}/{archivo}"
-            dst = f"{datos_dest}/{archivo}"
             if os.path.exists(src):
-                shutil.copy2(src, dst)
-                size_mb = os.path.getsize(dst) / (1024 * 1024)
-                print(f"   ✅ {archivo} copiado ({size_mb:.1f} MB)")
-        
-        # 2. Copiar templates CloudFormation
-        print("\n2. 🏗️  Copiando templates CloudFormation...")
-        cf_dest = f"{self.ruta_deployment}/cloudformation"
-        os.makedirs(cf_dest, exist_ok=True)
-        
-        cf_src = f"{self.ruta_aws}/cloudformation"
-        if os.path.exists(cf_src):
-            for archivo in os.listdir(cf_src):
-                if archivo.endswith('.yaml') or archivo.endswith('.yml'):
-                    shutil.copy2(f"{cf_src}/{archivo}", f"{cf_dest}/{archivo}")
-                    print(f"   ✅ {archivo} copiado")
-        
-        # 3. Copiar scripts
-        print("\n3. 📜 Copiando scripts de despliegue...")
-        scripts_dest = f"{self.ruta_deployment}/scripts"
-        os.makedirs(scripts_dest, exist_ok=True)
-        
-        scripts_src = f"{self.ruta_aws}/scripts"
-        if os.path.exists(scripts_src):
-            for archivo in os.listdir(scripts_src):
-                if archivo.endswith('.sh'):
-                    shutil.copy2(f"{scripts_src}/{archivo}", f"{scripts_dest}/{archivo}")
-                    # Asegurar permisos de ejecución
-                    os.chmod(f"{scripts_dest}/{archivo}", 0o755)
-                    print(f"   ✅ {archivo} copiado con permisos de ejecución")
+                paquete.agregar(f"datos/{archivo}", src, contar_filas=archivo.endswith('.csv'))
+                size_mb = os.path.getsize(src) / (1024 * 1024)
+                print(f"   ✅ {archivo} ({size_mb:.1f} MB)")
+        
+        # Tablas Parquet particionadas y DDL para Athena (exportar_athena.py)
+        tablas_athena = paquete.agregar_directorio(
+            'datos/athena', f"{self.ruta_datos_anonimizados}/athena", ('.parquet', '.sql', '.json'), recursivo=True
+        )
+        if tablas_athena:
+            print(f"   ✅ athena/: {len(tablas_athena)} archivo(s) particionados y DDL")
+        
+        # 2. Templates CloudFormation
+        print("\n2. 🏗️  Registrando templates CloudFormation...")
+        for archivo in paquete.agregar_directorio('cloudformation', f"{self.ruta_aws}/cloudformation", ('.yaml', '.yml')):
+            print(f"   ✅ {archivo}")
+        
+        # 3. Scripts (con permisos de ejecución)
+        print("\n3. 📜 Registrando scripts de despliegue...")
+        for archivo in paquete.agregar_directorio('scripts', f"{self.ruta_aws}/scripts", ('.sh',), modo=0o755):
+            print(f"   ✅ {archivo} con permisos de ejecución")
         
         # 4. Crear archivo de configuración
         print("\n4. ⚙️  Creando archivo de configuración...")
+        # Fecha y registros del resumen anonimizado (el contenido no cambia si los datos no cambian)
+        resumen_anonimizado = metadatos.get(f"{self.ruta_datos_anonimizados}/resumen_anonimizado_v2.csv", {})
+        fecha_anonimizacion = (
+            datetime.fromtimestamp(resumen_anonimizado['mtime_ns'] / 1e9).isoformat()
+            if 'mtime_ns' in resumen_anonimizado else datetime.now().isoformat()
+        )
         config = {
             'proyecto': {
                 'nombre': 'hospital-economics',
@@ -186,8 +202,8 @@ class PreparadorAWSSimple:
                 'anonimizados': True,
                 'cumple_hipaa': True,
                 'cumple_gdpr': True,
-                'fecha_anonimizacion': datetime.now().isoformat(),
-                'registros_procesados': 1678,
+                'fecha_anonimizacion': fecha_anonimizacion,
+                'registros_procesados': resumen_anonimizado.get('filas') or 1678,
                 'campos_eliminados': 5,
                 'identificadores_hasheados': 10
             },
@@ -205,9 +221,8 @@ class PreparadorAWSSimple:
             }
         }
         
-        with open(f"{self.ruta_deployment}/config.json", 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        print("   ✅ config.json creado")
+        paquete.agregar_texto('config.json', json.dumps(config, indent=2, ensure_ascii=False))
+        print("   ✅ config.json")
         
         # 5. Crear README para deployment
         print("\n5. 📖 Creando README de deployment...")
@@ -292,9 +307,8 @@ Para problemas durante el despliegue:
 3. Reporte de anonimización en `datos/`
 """
         
-        with open(f"{self.ruta_deployment}/README.md", 'w', encoding='utf-8') as f:
-            f.write(readme_content)
-        print("   ✅ README.md creado")
+        paquete.agregar_texto('README.md', readme_content)
+        print("   ✅ README.md")
         
         # 6. Crear script de verificación post-despliegue
         print("\n6. 🔍 Creando script de verificación...")
@@ -325,10 +339,13 @@ aws rds describe-db-instances --query 'DBInstances[?contains(DBInstanceIdentifie
 echo "✅ Verificación completada"
 """
         
-        with open(f"{self.ruta_deployment}/scripts/verificar_despliegue.sh", 'w') as f:
-            f.write(verificacion_script)
-        os.chmod(f"{self.ruta_deployment}/scripts/verificar_despliegue.sh", 0o755)
-        print("   ✅ verificar_despliegue.sh creado")
+        paquete.agregar_texto('scripts/verificar_despliegue.sh', verificacion_script, modo=0o755)
+        print("   ✅ verificar_despliegue.sh")
+        
+        # 7. Escribir solo lo que cambió y el manifiesto
+        print("\n7. 📦 Actualizando paquete de deployment...")
+        self.resumen_paquete = paquete.construir()
+        imprimir_resumen_paquete(self.resumen_paquete)
         
         self.checklist_deployment['archivos_preparados'] = True
         print(f"\n✅ ARCHIVOS DE DEPLOYMENT PREPARADOS")
@@ -339,17 +356,12 @@ echo "✅ Verificación completada"
         print(f"\n📋 GENERANDO REPORTE DE PREPARACIÓN...")
         print("=" * 60)
         
-        # Estadísticas de datos
-        resumen_path = f"{self.ruta_deployment}/datos/resumen_anonimizado_v2.csv"
-        if os.path.exists(resumen_path):
-            df = pd.read_csv(resumen_path)
-            registros = len(df)
-            columnas = len(df.columns)
-            size_mb = os.path.getsize(resumen_path) / (1024 * 1024)
-        else:
-            registros = 0
-            columnas = 0
-            size_mb = 0
+        # Estadísticas de datos desde el manifiesto (filas contadas al anonimizar)
+        manifiesto = self.manifiesto_paquete()
+        resumen_datos = manifiesto.get('datos/resumen_anonimizado_v2.csv', {})
+        registros = resumen_datos.get('filas') or 0
+        columnas = resumen_datos.get('columnas') or 0
+        size_mb = resumen_datos.get('tamano', 0) / (1024 * 1024)
         
         reporte = {
             'metadata': {
@@ -364,12 +376,16 @@ echo "✅ Verificación completada"
                 'tamaño_mb': round(size_mb, 2),
                 'cumplimiento_regulatorio': True
             },
+            'metricas_procesamiento': (
+                resumen_metricas_procesamiento(self.metricas_completas) if self.metricas_completas else None
+            ),
             'archivos_preparados': {
                 'datos': [
                     'resumen_anonimizado_v2.csv',
                     'detalle_anonimizado_v2.csv',
                     'reporte_anonimizacion_v2.json'
                 ],
+                'athena': ['datos/athena/tablas_athena.sql'],
                 'infraestructura': [
                     'cloudformation/infrastructure.yaml'
                 ],
@@ -379,9 +395,15 @@ echo "✅ Verificación completada"
                 ],
                 'configuracion': [
                     'config.json',
-                    'README.md'
+                    'README.md',
+                    'manifiesto.json'
                 ]
             },
+            'paquete': {
+                'archivos': len(manifiesto),
+                'actualizados': len(self.resumen_paquete['actualizados']) if self.resumen_paquete else None,
+                'sin_cambios': len(self.resumen_paquete['sin_cambios']) if self.resumen_paquete else None
+            },
             'siguiente_paso': {
                 'comando': 'cd aws_deployment/scripts && ./deploy.sh',
                 'descripcion': 'Ejecutar script de despliegue automatizado',
@@ -396,11 +418,16 @@ echo "✅ Verificación completada"
         }
         
         with open(f"{self.ruta_deployment}/reporte_preparacion.json", 'w', encoding='utf-8') as f:
-            json.dump(reporte, f, indent=2, ensure_ascii=False)
+            json.dump(reporte, f, indent=2, ensure_ascii=False, default=str)
         
         print("✅ Reporte de preparación generado")
         return reporte
     
+    def manifiesto_paquete(self):
+        """Archivos del paquete con hash, filas y columnas (manifiesto.json)"""
+        paquete = self.paquete or PaqueteDespliegue(self.ruta_deployment)
+        return paquete.manifiesto()
+    
     def mostrar_resumen_final(self, reporte):
         """Muestra resumen final de la preparación"""
         print(f"\n🎯 RESUMEN FINAL DE PREPARACIÓN")
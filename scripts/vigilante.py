@@ -0,0 +1,321 @@
+"""
+Vigilante de la carpeta de extractos: reprocesa automáticamente cuando llega un CSV nuevo.
+
+Observa ``datos/ejemplos/`` (inotify/FSEvents con ``watchdog``; sin él, sondeo por ``stat``) y
+espera a que la carpeta quede quieta ``--espera`` segundos antes de procesar, para no leer un
+archivo que todavía se está copiando. Un archivo solo cuenta como cambio si cambió su contenido
+(hash), no su fecha.
+
+El extracto más reciente de cada tipo (``Resumen Egreso*.csv``, ``Egreso Detalle*.csv``) se
+publica con el nombre que usa el pipeline y se calcula una huella por mes de sus filas, para
+reportar qué meses son nuevos o cambiaron. Después se ejecuta el orquestador
+(``orquestador.py``), que omite las etapas sin cambios; la exportación para Athena solo reescribe
+las particiones de los meses afectados y el dashboard solo recibe las vistas que cambiaron, todo
+con reemplazos atómicos.
+
+Se ejecuta un pipeline a la vez. Los archivos que llegan mientras corre quedan pendientes y se
+procesan juntos en la siguiente ejecución.
+
+Uso:
+    python scripts/vigilante.py --ruta-base proyecto_final
+    python scripts/vigilante.py --una-vez       # procesa lo pendiente y termina (cron)
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from orquestador import HuellasArchivos, Orquestador, etapas_pipeline, fuentes
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_DISPONIBLE = True
+except ImportError:
+    WATCHDOG_DISPONIBLE = False
+
+ESPERA_S = 5.0
+INTERVALO_SONDEO_S = 2.0
+FILAS_BLOQUE = 200_000
+# Etapas cuyo fallo solo se avisa: el paquete de despliegue no cambia los datos del dashboard
+ETAPAS_AVISO = ('empaquetar',)
+
+# Tipo de extracto -> patrón del archivo que llega a la carpeta (en el orden de orquestador.fuentes)
+EXTRACTOS = [('resumen', 'Resumen Egreso*.csv'), ('detalle', 'Egreso Detalle*.csv')]
+COLUMNAS_FECHA = ['fecha_egreso_general', 'fecha', 'fecha_egreso_hosp', 'fecha_egreso_urg']
+IGNORADOS = ('.*', '~*', '*.tmp', '*.part', '*.crdownload')
+
+
+def _firma(ruta):
+    estado = os.stat(ruta)
+    return (estado.st_size, estado.st_mtime_ns)
+
+
+def es_extracto(nombre):
+    return nombre.lower().endswith('.csv') and not any(fnmatch.fnmatch(nombre, patron) for patron in IGNORADOS)
+
+
+def huellas_por_mes(ruta):
+    """
+    Filas y huella por mes de un CSV, leído por bloques.
+
+    La huella es la suma (módulo 2^64) del hash de cada fila, así que no depende del orden de
+    las filas y cambia si se agrega, quita o modifica alguna fila del mes.
+
+    Returns:
+        dict: 'YYYY-MM' -> 'filas:huella'
+    """
+    conteos, sumas = {}, {}
+    for bloque in pd.read_csv(ruta, dtype=str, keep_default_na=False, chunksize=FILAS_BLOQUE):
+        columna = next((c for c in COLUMNAS_FECHA if c in bloque.columns), None)
+        meses = bloque[columna].str[:7] if columna else pd.Series('sin_fecha', index=bloque.index)
+        meses = meses.where(meses.str.match(r'^\d{4}-\d{2}$'), 'sin_fecha')
+        hashes = pd.util.hash_pandas_object(bloque, index=False)
+        for mes, grupo in hashes.groupby(meses.to_numpy()):
+            conteos[mes] = conteos.get(mes, 0) + len(grupo)
+            sumas[mes] = (sumas.get(mes, 0) + int(grupo.to_numpy().sum(dtype='uint64'))) % (1 << 64)
+    return {mes: f'{conteos[mes]}:{sumas[mes]:016x}' for mes in sorted(conteos)}
+
+
+def comparar_meses(anteriores, actuales):
+    """Meses nuevos, modificados y eliminados entre dos huellas por mes"""
+    return {
+        'nuevos': sorted(set(actuales) - set(anteriores)),
+        'modificados': sorted(m for m in set(actuales) & set(anteriores) if actuales[m] != anteriores[m]),
+        'eliminados': sorted(set(anteriores) - set(actuales))
+    }
+
+
+def publicar_extracto(origen, destino):
+    """Deja ``origen`` con el nombre que lee el pipeline (enlace duro y reemplazo atómico, sin copiar datos)"""
+    temporal = f'{destino}.tmp'
+    if os.path.exists(temporal):
+        os.remove(temporal)
+    try:
+        os.link(origen, temporal)
+    except OSError:
+        shutil.copy2(origen, temporal)
+    os.replace(temporal, destino)
+
+
+class Vigilante:
+    """
+    Procesa la carpeta de extractos cuando cambia.
+
+    Args:
+        ruta_base (str): raíz del proyecto
+        espera_s (float): segundos sin eventos antes de procesar
+        trabajadores (int): procesos del orquestador para etapas independientes
+        sondeo (bool): usar sondeo por ``stat`` aunque watchdog esté disponible
+    """
+
+    def __init__(self, ruta_base='proyecto_final', espera_s=ESPERA_S, trabajadores=None, sondeo=False):
+        self.ruta_base = ruta_base
+        self.carpeta = f'{ruta_base}/datos/ejemplos'
+        self.espera_s = espera_s
+        self.trabajadores = trabajadores
+        self.sondeo = sondeo or not WATCHDOG_DISPONIBLE
+        self.ruta_estado = f'{ruta_base}/cache_pipeline/vigilante.json'
+        self.estado = self._cargar_estado()
+        self.huellas = HuellasArchivos(self.estado.get('archivos'))
+
+        # Cola de pendientes: rutas que cambiaron desde la última ejecución (se agrupan)
+        self._pendientes = set()
+        # Extractos publicados por el propio vigilante: su evento no es un cambio nuevo
+        self._publicados = {}
+        self._ultimo_evento = 0.0
+        self._condicion = threading.Condition()
+        self._detenido = threading.Event()
+        self.ejecuciones = 0
+
+    def _cargar_estado(self):
+        try:
+            with open(self.ruta_estado, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'extractos': {}, 'archivos': {}}
+
+    def _guardar_estado(self):
+        os.makedirs(os.path.dirname(self.ruta_estado), exist_ok=True)
+        self.estado['archivos'] = self.huellas.conocidas
+        with open(f'{self.ruta_estado}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, indent=1, ensure_ascii=False)
+        os.replace(f'{self.ruta_estado}.tmp', self.ruta_estado)
+
+    def registrar(self, ruta):
+        """Anota un archivo que cambió (lo llaman los eventos del sistema de archivos)"""
+        if not es_extracto(os.path.basename(ruta)):
+            return
+        publicado = self._publicados.get(os.path.abspath(ruta))
+        if publicado is not None and os.path.exists(ruta) and publicado == _firma(ruta):
+            return
+        with self._condicion:
+            self._pendientes.add(ruta)
+            self._ultimo_evento = time.monotonic()
+            self._condicion.notify()
+
+    def _tomar_lote(self):
+        """Espera a que haya pendientes y la carpeta lleve ``espera_s`` sin eventos; devuelve el lote"""
+        with self._condicion:
+            while not self._detenido.is_set():
+                if self._pendientes:
+                    restante = self._ultimo_evento + self.espera_s - time.monotonic()
+                    if restante <= 0:
+                        lote, self._pendientes = self._pendientes, set()
+                        return lote
+                    self._condicion.wait(restante)
+                else:
+                    self._condicion.wait(1.0)
+        return None
+
+    def _extracto_actual(self, patron):
+        candidatos = [
+            os.path.join(self.carpeta, nombre) for nombre in os.listdir(self.carpeta)
+            if es_extracto(nombre) and fnmatch.fnmatch(nombre, patron)
+        ]
+        return max(candidatos, key=os.path.getmtime) if candidatos else None
+
+    def procesar(self, lote=None):
+        """
+        Publica los extractos cuyo contenido cambió, reporta los meses afectados y ejecuta el pipeline.
+
+        Returns:
+            bool: True si no hubo cambios o el pipeline terminó sin errores (salvo en ``ETAPAS_AVISO``)
+        """
+        if lote:
+            print(f"\n📥 {datetime.now():%H:%M:%S} {len(lote)} archivo(s) con eventos: "
+                  f"{', '.join(sorted(os.path.basename(r) for r in lote))}")
+        cambios = {}
+        for (tipo, patron), destino in zip(EXTRACTOS, fuentes(self.ruta_base)):
+            origen = self._extracto_actual(patron)
+            if origen is None:
+                continue
+            huella = self.huellas.huella(origen)
+            previo = self.estado['extractos'].get(tipo, {})
+            if previo.get('huella') == huella and os.path.exists(destino):
+                continue
+
+            meses = huellas_por_mes(origen)
+            diferencias = comparar_meses(previo.get('meses', {}), meses)
+            if os.path.abspath(origen) != os.path.abspath(destino):
+                publicar_extracto(origen, destino)
+                self._publicados[os.path.abspath(destino)] = _firma(destino)
+            cambios[tipo] = {'archivo': os.path.basename(origen), 'huella': huella, 'meses': meses, **diferencias}
+            afectados = diferencias['nuevos'] + diferencias['modificados'] + diferencias['eliminados']
+            print(f"   📄 {tipo}: {os.path.basename(origen)} — meses afectados: {', '.join(afectados) or 'ninguno'}"
+                  + (f" (nuevos: {', '.join(diferencias['nuevos'])})" if diferencias['nuevos'] else ''))
+
+        if not cambios:
+            print("   ✓ Sin cambios de contenido en los extractos")
+            self._guardar_estado()
+            return True
+
+        inicio = time.perf_counter()
+        orquestador = Orquestador(etapas_pipeline(self.ruta_base), self.ruta_base, self.trabajadores)
+        resultados = orquestador.ejecutar()
+        fallidas = [nombre for nombre, r in resultados.items() if r not in ('ejecutada', 'sin_cambios')]
+        exitoso = all(nombre in ETAPAS_AVISO for nombre in fallidas)
+        self.ejecuciones += 1
+
+        if exitoso:
+            # Solo se recuerdan los extractos procesados: si el pipeline falla se reintentan en el siguiente lote
+            for tipo, cambio in cambios.items():
+                self.estado['extractos'][tipo] = {
+                    'archivo': cambio['archivo'], 'huella': cambio['huella'], 'meses': cambio['meses'],
+                    'procesado': datetime.now().isoformat(timespec='seconds')
+                }
+            print(f"✅ Extractos procesados en {time.perf_counter() - inicio:.1f}s")
+            if fallidas:
+                print(f"⚠ Falló {', '.join(fallidas)}; los datos del dashboard sí se actualizaron")
+        else:
+            print("❌ El pipeline falló; los extractos se reintentarán con el siguiente cambio")
+        self._guardar_estado()
+        return exitoso
+
+    def _observar(self):
+        """Inicia la observación de la carpeta; devuelve una función para detenerla"""
+        if not self.sondeo:
+            vigilante = self
+
+            class Manejador(FileSystemEventHandler):
+                def on_any_event(self, evento):
+                    if not evento.is_directory:
+                        vigilante.registrar(getattr(evento, 'dest_path', '') or evento.src_path)
+
+            observador = Observer()
+            observador.schedule(Manejador(), self.carpeta, recursive=False)
+            observador.start()
+            print(f"👀 Observando {self.carpeta} (eventos del sistema de archivos)")
+            return lambda: (observador.stop(), observador.join())
+
+        def firmas_carpeta():
+            return {
+                entrada.path: _firma(entrada.path)
+                for entrada in os.scandir(self.carpeta) if entrada.is_file() and es_extracto(entrada.name)
+            }
+
+        def sondear():
+            firmas = firmas_carpeta()
+            while not self._detenido.wait(INTERVALO_SONDEO_S):
+                actuales = firmas_carpeta()
+                for ruta, firma in actuales.items():
+                    if firmas.get(ruta) != firma:
+                        self.registrar(ruta)
+                firmas = actuales
+
+        hilo = threading.Thread(target=sondear, name='sondeo', daemon=True)
+        hilo.start()
+        print(f"👀 Observando {self.carpeta} (sondeo cada {INTERVALO_SONDEO_S:.0f}s)")
+        return lambda: hilo.join()
+
+    def ejecutar(self):
+        """Procesa lo pendiente al iniciar y luego cada lote de cambios hasta Ctrl+C"""
+        os.makedirs(self.carpeta, exist_ok=True)
+        detener = self._observar()
+        try:
+            self.procesar()
+            while not self._detenido.is_set():
+                lote = self._tomar_lote()
+                if lote:
+                    self.procesar(lote)
+        except KeyboardInterrupt:
+            print("\n🛑 Deteniendo vigilante...")
+        finally:
+            self.detener()
+            detener()
+
+    def detener(self):
+        self._detenido.set()
+        with self._condicion:
+            self._condicion.notify_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reprocesa el pipeline cuando llega un extracto nuevo a datos/ejemplos')
+    parser.add_argument('--ruta-base', default='proyecto_final')
+    parser.add_argument('--espera', type=float, default=ESPERA_S, help='Segundos sin eventos antes de procesar')
+    parser.add_argument('--trabajadores', type=int, default=None)
+    parser.add_argument('--sondeo', action='store_true', help='Sondeo por stat en lugar de eventos del sistema')
+    parser.add_argument('--una-vez', action='store_true', help='Procesar lo pendiente y terminar')
+    args = parser.parse_args()
+
+    vigilante = Vigilante(args.ruta_base, args.espera, args.trabajadores, args.sondeo)
+    if args.una_vez:
+        return 0 if vigilante.procesar() else 1
+    if not WATCHDOG_DISPONIBLE and not args.sondeo:
+        print("⚠ watchdog no está instalado (pip install watchdog); se usa sondeo")
+    vigilante.ejecutar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())